@@ -17,6 +17,8 @@ import json
 import shutil
 import logging
 import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
@@ -32,6 +34,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# การหาไฟล์ซ้ำ
+MIN_DUPLICATE_SIZE = 1024          # ไม่ตรวจไฟล์เล็กกว่า 1KB
+PARTIAL_HASH_SIZE = 64 * 1024      # hash ส่วนหัว + ส่วนท้ายไฟล์
+HASH_READ_SIZE = 1024 * 1024       # อ่านทีละ 1MB ตอน hash ทั้งไฟล์
+
 class AutoCleanupSystem:
     """ระบบทำความสะอาดไฟล์ขยะอัตโนมัติ"""
     
@@ -39,6 +46,9 @@ class AutoCleanupSystem:
         self.project_root = Path(project_root)
         self.backup_dir = self.project_root / "backups" / "auto_cleanup"
         self.analysis_file = self.project_root / "cleanup_analysis.json"
+        self.cache_dir = self.project_root / "data" / "cache"
+        self.hash_cache_file = self.cache_dir / "cleanup_hash_cache.json"
+        self.hash_workers = min(8, os.cpu_count() or 2)
         self.important_patterns = [
             "credentials", "config", "settings", "api_key", "token",
             "password", "secret", "private", "sensitive"
@@ -67,7 +77,7 @@ class AutoCleanupSystem:
         
         # วิเคราะห์ไฟล์ทั้งหมด
         for file_path in self.project_root.rglob("*"):
-            if file_path.is_file():
+            if file_path.is_file() and not self._is_internal_file(file_path):
                 analysis["total_files"] += 1
                 
                 # ตรวจสอบไฟล์สำคัญ
@@ -93,7 +103,10 @@ class AutoCleanupSystem:
             "important_count": len(analysis["important_files"]),
             "junk_count": len(analysis["junk_files"]),
             "large_count": len(analysis["large_files"]),
-            "duplicate_count": len(analysis["duplicate_files"]),
+            # จำนวนไฟล์ที่เกินมา (ไม่นับต้นฉบับของแต่ละกลุ่ม)
+            "duplicate_count": sum(len(group["files"]) - 1 for group in analysis["duplicate_files"]),
+            "duplicate_groups": len(analysis["duplicate_files"]),
+            "duplicate_wasted_mb": sum(group["wasted_bytes"] for group in analysis["duplicate_files"]) / (1024 * 1024),
             "estimated_cleanup_size_mb": self._calculate_cleanup_size(analysis)
         }
         
@@ -108,6 +121,10 @@ class AutoCleanupSystem:
         
         return analysis
     
+    def _is_internal_file(self, file_path: Path) -> bool:
+        """ไฟล์สถานะของระบบทำความสะอาดเอง (ไม่นับในการวิเคราะห์)"""
+        return file_path in (self.hash_cache_file, self.analysis_file)
+    
     def _is_important_file(self, file_path: Path) -> bool:
         """ตรวจสอบว่าเป็นไฟล์สำคัญหรือไม่"""
         file_name = file_path.name.lower()
@@ -153,28 +170,129 @@ class AutoCleanupSystem:
         return False
     
     def _find_duplicates(self) -> List[Dict]:
-        """หาฟิล์ซ้ำ"""
-        duplicates = []
-        file_hashes = {}
+        """
+        หาไฟล์ซ้ำแบบเป็นขั้น (คืนค่าเป็นกลุ่ม N ไฟล์)
         
+        1. จัดกลุ่มตามขนาด - ขนาดไม่ซ้ำกับใครไม่ต้องอ่านเลย
+        2. hash 64KB แรก + 64KB สุดท้าย ของไฟล์ที่ขนาดชนกัน
+        3. hash ทั้งไฟล์ (อ่านทีละ block) เฉพาะไฟล์ที่ยังชนกันอยู่
+        
+        ผล hash ถูก cache ข้ามการรันด้วย (path, size, mtime)
+        """
+        cache = self._load_hash_cache()
+        new_cache = {}
+        
+        # ขั้นที่ 1: จัดกลุ่มตามขนาด
+        by_size = defaultdict(list)
         for file_path in self.project_root.rglob("*"):
-            if file_path.is_file() and file_path.stat().st_size > 1024:  # > 1KB
-                try:
-                    with open(file_path, 'rb') as f:
-                        file_hash = hashlib.md5(f.read()).hexdigest()
-                    
-                    if file_hash in file_hashes:
-                        duplicates.append({
-                            "hash": file_hash,
-                            "files": [str(file_hashes[file_hash]), str(file_path)]
-                        })
-                    else:
-                        file_hashes[file_hash] = file_path
-                except:
-                    pass
+            try:
+                if not file_path.is_file() or self._is_internal_file(file_path):
+                    continue
+                stat = file_path.stat()
+            except OSError:
+                continue
+            if stat.st_size > MIN_DUPLICATE_SIZE:
+                by_size[stat.st_size].append((str(file_path), stat.st_mtime_ns))
+        
+        candidates = [files for files in by_size.values() if len(files) > 1]
+        
+        # ขั้นที่ 2: hash ส่วนหัว/ท้าย
+        groups = self._group_by_hash([f for files in candidates for f in files], "partial", cache, new_cache)
+        
+        # ขั้นที่ 3: hash ทั้งไฟล์ (ไฟล์ที่ไม่เกิน 128KB ถูกอ่านครบแล้วในขั้นที่ 2)
+        full_candidates = []
+        duplicate_sets = []
+        for (size, _), files in groups.items():
+            if size <= 2 * PARTIAL_HASH_SIZE:
+                duplicate_sets.append(files)
+            else:
+                full_candidates.extend(files)
+        
+        for (size, _), files in self._group_by_hash(full_candidates, "full", cache, new_cache).items():
+            duplicate_sets.append(files)
         
+        self._save_hash_cache(new_cache)
+        
+        duplicates = []
+        for files in duplicate_sets:
+            path = files[0][0]
+            entry = new_cache[path]
+            size = entry["size"]
+            duplicates.append({
+                "hash": entry.get("full") or entry["partial"],
+                "size": size,
+                "files": sorted(f[0] for f in files),
+                "wasted_bytes": size * (len(files) - 1)
+            })
+        
+        duplicates.sort(key=lambda group: group["wasted_bytes"], reverse=True)
         return duplicates
     
+    def _group_by_hash(self, files: List[Tuple[str, int]], kind: str, cache: Dict, new_cache: Dict) -> Dict:
+        """hash ไฟล์ (ใช้ cache ถ้า size/mtime ตรงกัน) แล้วคืนเฉพาะกลุ่ม (size, hash) ที่มีมากกว่า 1 ไฟล์"""
+        hash_func = self._partial_hash if kind == "partial" else self._full_hash
+        
+        def compute(item):
+            path, mtime_ns = item
+            try:
+                size = os.path.getsize(path)
+                entry = new_cache.get(path) or cache.get(path)
+                if not entry or entry.get("size") != size or entry.get("mtime_ns") != mtime_ns:
+                    entry = {"size": size, "mtime_ns": mtime_ns}
+                if kind not in entry:
+                    entry = dict(entry)
+                    entry[kind] = hash_func(path, size)
+                return item, entry
+            except OSError:
+                return item, None
+        
+        groups = defaultdict(list)
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+            for item, entry in executor.map(compute, files):
+                if entry is None:
+                    continue
+                new_cache[item[0]] = entry
+                groups[(entry["size"], entry[kind])].append(item)
+        
+        return {key: group for key, group in groups.items() if len(group) > 1}
+    
+    def _partial_hash(self, path: str, size: int) -> str:
+        """hash ของ 64KB แรกและ 64KB สุดท้าย"""
+        hasher = hashlib.md5()
+        with open(path, 'rb') as f:
+            hasher.update(f.read(PARTIAL_HASH_SIZE))
+            if size > PARTIAL_HASH_SIZE:
+                f.seek(max(PARTIAL_HASH_SIZE, size - PARTIAL_HASH_SIZE))
+                hasher.update(f.read(PARTIAL_HASH_SIZE))
+        return hasher.hexdigest()
+    
+    def _full_hash(self, path: str, size: int) -> str:
+        """hash ทั้งไฟล์แบบอ่านทีละ block (ไม่โหลดทั้งไฟล์เข้า memory)"""
+        hasher = hashlib.md5()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+                hasher.update(block)
+        return hasher.hexdigest()
+    
+    def _load_hash_cache(self) -> Dict:
+        """โหลด cache ของ hash จากการรันครั้งก่อน"""
+        try:
+            if self.hash_cache_file.exists():
+                with open(self.hash_cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ ไม่สามารถโหลด hash cache: {e}")
+        return {}
+    
+    def _save_hash_cache(self, cache: Dict):
+        """บันทึก cache (เฉพาะไฟล์ที่ยังเป็นผู้สมัครไฟล์ซ้ำในรอบนี้)"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.hash_cache_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"⚠️ ไม่สามารถบันทึก hash cache: {e}")
+    
     def _calculate_cleanup_size(self, analysis: Dict) -> float:
         """คำนวณขนาดที่ประหยัดได้"""
         total_size = 0
@@ -342,7 +460,7 @@ class AutoCleanupSystem:
 - ไฟล์สำคัญ: {analysis['analysis_summary']['important_count']} ไฟล์
 - ไฟล์ขยะ: {analysis['analysis_summary']['junk_count']} ไฟล์
 - ไฟล์ขนาดใหญ่: {analysis['analysis_summary']['large_count']} ไฟล์
-- ไฟล์ซ้ำ: {analysis['analysis_summary']['duplicate_count']} ไฟล์
+- ไฟล์ซ้ำ: {analysis['analysis_summary']['duplicate_count']} ไฟล์ ({analysis['analysis_summary'].get('duplicate_groups', 0)} กลุ่ม)
 
 ## 💾 ประโยชน์ที่ได้
 - ขนาดที่ประหยัดได้: {analysis['analysis_summary']['estimated_cleanup_size_mb']:.2f} MB
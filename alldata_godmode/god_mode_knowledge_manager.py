@@ -12,6 +12,11 @@ from datetime import datetime
 from typing import Dict, List, Any, Optional
 import hashlib
 import shutil
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from core import sqlite_pool
 
 class GodModeKnowledgeManager:
     """จัดการความรู้สำหรับ God Mode แบบถาวร"""
@@ -48,7 +53,7 @@ class GodModeKnowledgeManager:
     
     def _init_database(self):
         """สร้างฐานข้อมูล SQLite"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # ตาราง sessions
@@ -132,7 +137,7 @@ class GodModeKnowledgeManager:
         if session_id is None:
             session_id = f"godmode_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -149,7 +154,7 @@ class GodModeKnowledgeManager:
     
     def end_session(self, session_id: str):
         """จบ session"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -168,7 +173,7 @@ class GodModeKnowledgeManager:
         """บันทึกคำสั่งที่ใช้"""
         command_hash = hashlib.md5(command.encode()).hexdigest()
         
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -206,7 +211,7 @@ class GodModeKnowledgeManager:
     def save_result(self, session_id: str, command_hash: str, result_type: str, 
                    result_data: Any, file_path: str = None, metadata: Dict = None):
         """บันทึกผลลัพธ์"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # บันทึกผลลัพธ์ลงฐานข้อมูล
@@ -247,7 +252,7 @@ class GodModeKnowledgeManager:
     def save_pattern(self, pattern_name: str, pattern_type: str, pattern_data: Dict, 
                     success_rate: float = 0.0, usage_count: int = 1):
         """บันทึก pattern ที่ใช้บ่อย"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -279,7 +284,7 @@ class GodModeKnowledgeManager:
     def save_learning(self, learning_type: str, learning_data: Dict, context: str = "", 
                      importance_score: float = 1.0, tags: List[str] = None):
         """บันทึกการเรียนรู้ใหม่"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -310,7 +315,7 @@ class GodModeKnowledgeManager:
     
     def get_session_history(self, session_id: str = None, limit: int = 10) -> List[Dict]:
         """ดึงประวัติ session"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         if session_id:
@@ -343,7 +348,7 @@ class GodModeKnowledgeManager:
     
     def get_command_history(self, session_id: str = None, limit: int = 50) -> List[Dict]:
         """ดึงประวัติคำสั่ง"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         if session_id:
@@ -378,7 +383,7 @@ class GodModeKnowledgeManager:
     
     def get_patterns(self, pattern_type: str = None) -> List[Dict]:
         """ดึง patterns ที่ใช้บ่อย"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         if pattern_type:
@@ -410,7 +415,7 @@ class GodModeKnowledgeManager:
     
     def get_learnings(self, learning_type: str = None, min_importance: float = 0.5) -> List[Dict]:
         """ดึงการเรียนรู้ที่สำคัญ"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         if learning_type:
@@ -483,7 +488,7 @@ class GodModeKnowledgeManager:
     
     def get_statistics(self) -> Dict:
         """ดึงสถิติของ knowledge base"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # จำนวน sessions
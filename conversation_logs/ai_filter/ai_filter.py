@@ -14,6 +14,101 @@ from datetime import datetime
 import sqlite3
 from pathlib import Path
 import hashlib
+import sys
+import threading
+from collections import deque
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from core import sqlite_pool
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton สำหรับค้นหาคำสำคัญหลายคำในรอบเดียว (case-insensitive)
+    เพิ่มคำใหม่ได้แบบ incremental: แทรกลง trie แล้วคำนวณ failure links ใหม่ก่อนค้นหาครั้งถัดไป
+    
+    find() ใช้ตาราง (goto, fail, outputs) ชุดที่ build แล้วซึ่งไม่ถูกแก้ไขอีก
+    add() แก้เฉพาะ trie ต้นฉบับ ส่วน _build() สร้างตารางชุดใหม่แล้วสลับ reference เดียว
+    """
+    
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._terminal: List[List[int]] = [[]]
+        self._pattern_ids: Dict[str, int] = {}
+        self._tables: Tuple[List[Dict[str, int]], List[int], List[Tuple[int, ...]]] = ([{}], [0], [()])
+        self._dirty = False
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._pattern_ids)
+    
+    def add(self, keyword: str) -> int:
+        """เพิ่มคำสำคัญ คืนค่า pattern id (คำซ้ำได้ id เดิม)"""
+        pattern = keyword.lower()
+        with self._lock:
+            if pattern in self._pattern_ids:
+                return self._pattern_ids[pattern]
+            
+            pattern_id = len(self._pattern_ids)
+            self._pattern_ids[pattern] = pattern_id
+            
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._terminal.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._terminal[state].append(pattern_id)
+            self._dirty = True
+            return pattern_id
+    
+    def find(self, text: str) -> set:
+        """คืนค่า pattern ids ทั้งหมดที่พบในข้อความ (รวมคำที่ซ้อนกัน)"""
+        if self._dirty:
+            self._build()
+        
+        goto, fail, outputs = self._tables
+        found = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+    
+    def _build(self):
+        """คำนวณ failure links และ output ของทุก state (BFS)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            
+            goto = [dict(edges) for edges in self._goto]
+            fail = [0] * len(goto)
+            outputs: List[Tuple[int, ...]] = [()] * len(goto)
+            queue = deque()
+            for state in goto[0].values():
+                outputs[state] = tuple(self._terminal[state])
+                queue.append(state)
+            
+            while queue:
+                state = queue.popleft()
+                for char, next_state in goto[state].items():
+                    fallback = fail[state]
+                    while fallback and char not in goto[fallback]:
+                        fallback = fail[fallback]
+                    link = goto[fallback].get(char, 0)
+                    fail[next_state] = link if link != next_state else 0
+                    outputs[next_state] = tuple(self._terminal[next_state]) + outputs[fail[next_state]]
+                    queue.append(next_state)
+            
+            # สลับ reference เดียว: find() ที่กำลังทำงานยังใช้ตารางชุดเดิมได้ครบ
+            self._tables = (goto, fail, outputs)
+            self._dirty = False
 
 class AIFilter:
     """ระบบกรองและจัดหมวดหมู่ข้อมูล"""
@@ -25,6 +120,7 @@ class AIFilter:
         self.init_database()
         self.categories = self._load_categories()
         self.keywords = self._load_keywords()
+        self._build_matcher()
         
     def _load_config(self, config_path: str = None) -> Dict[str, Any]:
         """โหลดการตั้งค่า"""
@@ -67,7 +163,7 @@ class AIFilter:
     def init_database(self):
         """สร้างฐานข้อมูลสำหรับ AI Filter"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ตารางหมวดหมู่
@@ -119,7 +215,7 @@ class AIFilter:
         """โหลดหมวดหมู่จากฐานข้อมูล"""
         categories = {}
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('SELECT * FROM categories')
@@ -145,7 +241,7 @@ class AIFilter:
         """โหลดคำสำคัญจากฐานข้อมูล"""
         keywords = {}
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('SELECT * FROM keywords')
@@ -171,11 +267,28 @@ class AIFilter:
             
         return keywords
     
+    def _build_matcher(self):
+        """สร้าง keyword matcher จาก cache ของคำสำคัญทั้งหมด"""
+        self.matcher = KeywordMatcher()
+        # pattern id -> [(category_id, ลำดับใน category, keyword_info)]
+        self._pattern_entries: Dict[int, List[Tuple[int, int, Dict[str, Any]]]] = {}
+        self._category_weights: Dict[int, float] = {}
+        
+        for category_id, keyword_list in self.keywords.items():
+            for index, keyword_info in enumerate(keyword_list):
+                self._index_keyword(category_id, index, keyword_info)
+    
+    def _index_keyword(self, category_id: int, index: int, keyword_info: Dict[str, Any]):
+        """เพิ่มคำสำคัญหนึ่งคำเข้า matcher (incremental)"""
+        pattern_id = self.matcher.add(keyword_info['keyword'])
+        self._pattern_entries.setdefault(pattern_id, []).append((category_id, index, keyword_info))
+        self._category_weights[category_id] = self._category_weights.get(category_id, 0.0) + keyword_info['weight']
+    
     def add_category(self, name: str, description: str = None, 
                     priority: str = 'medium') -> bool:
         """เพิ่มหมวดหมู่ใหม่"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -213,7 +326,7 @@ class AIFilter:
             
             category_id = self.categories[category_name]['id']
             
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -228,13 +341,15 @@ class AIFilter:
             if category_id not in self.keywords:
                 self.keywords[category_id] = []
                 
-            self.keywords[category_id].append({
+            keyword_info = {
                 'id': cursor.lastrowid,
                 'category_id': category_id,
                 'keyword': keyword,
                 'weight': weight,
                 'created_at': datetime.now().isoformat()
-            })
+            }
+            self.keywords[category_id].append(keyword_info)
+            self._index_keyword(category_id, len(self.keywords[category_id]) - 1, keyword_info)
             
             self.logger.info(f"เพิ่มคำสำคัญสำเร็จ: {keyword} -> {category_name}")
             return True
@@ -247,41 +362,11 @@ class AIFilter:
                           conversation_id: int = None) -> Dict[str, Any]:
         """กรองการสนทนา"""
         try:
-            results = {
-                'categories': [],
-                'confidence_scores': {},
-                'keywords_found': {},
-                'sentiment_score': 0.0,
-                'priority': 'low',
-                'overall_confidence': 0.0
-            }
-            
-            # วิเคราะห์หมวดหมู่
-            for category_name, category_info in self.categories.items():
-                category_id = category_info['id']
-                confidence, keywords = self._analyze_category(
-                    conversation_text, category_id
-                )
-                
-                if confidence > 0:
-                    results['categories'].append(category_name)
-                    results['confidence_scores'][category_name] = confidence
-                    results['keywords_found'][category_name] = keywords
-            
-            # คำนวณความมั่นใจรวม
-            if results['confidence_scores']:
-                results['overall_confidence'] = max(results['confidence_scores'].values())
-            
-            # วิเคราะห์ sentiment
-            if self.config['sentiment_analysis']:
-                results['sentiment_score'] = self._analyze_sentiment(conversation_text)
-            
-            # กำหนดความสำคัญ
-            results['priority'] = self._determine_priority(results)
+            results = self._filter_text(conversation_text)
             
             # บันทึกผลลัพธ์
             if conversation_id:
-                self._save_filter_result(conversation_id, results)
+                self._save_filter_results([(conversation_id, results)])
             
             self.logger.info(f"กรองการสนทนาสำเร็จ: {len(results['categories'])} หมวดหมู่")
             return results
@@ -290,28 +375,92 @@ class AIFilter:
             self.logger.error(f"ไม่สามารถกรองการสนทนา: {e}")
             return {}
     
+    def filter_conversations(self, conversations: List[Any]) -> List[Dict[str, Any]]:
+        """
+        กรองการสนทนาหลายรายการในครั้งเดียว
+        conversations: รายการข้อความ หรือ tuple (ข้อความ, conversation_id)
+        ผลการกรองที่มี conversation_id จะถูกบันทึกใน transaction เดียว
+        """
+        all_results = []
+        to_save = []
+        try:
+            for conversation in conversations:
+                if isinstance(conversation, (tuple, list)):
+                    conversation_text, conversation_id = conversation
+                else:
+                    conversation_text, conversation_id = conversation, None
+                
+                results = self._filter_text(conversation_text)
+                all_results.append(results)
+                if conversation_id:
+                    to_save.append((conversation_id, results))
+            
+            if to_save:
+                self._save_filter_results(to_save)
+            
+            self.logger.info(f"กรองการสนทนาแบบกลุ่มสำเร็จ: {len(all_results)} รายการ")
+            return all_results
+            
+        except Exception as e:
+            self.logger.error(f"ไม่สามารถกรองการสนทนาแบบกลุ่ม: {e}")
+            return all_results
+    
+    def _filter_text(self, conversation_text: str) -> Dict[str, Any]:
+        """วิเคราะห์ข้อความหนึ่งรายการ (ไม่บันทึกผล)"""
+        results = {
+            'categories': [],
+            'confidence_scores': {},
+            'keywords_found': {},
+            'sentiment_score': 0.0,
+            'priority': 'low',
+            'overall_confidence': 0.0
+        }
+        
+        # วิเคราะห์หมวดหมู่ (ค้นหาคำสำคัญทุกหมวดในรอบเดียว)
+        matches = self._match_categories(conversation_text)
+        for category_name, category_info in self.categories.items():
+            confidence, keywords = matches.get(category_info['id'], (0.0, []))
+            
+            if confidence > 0:
+                results['categories'].append(category_name)
+                results['confidence_scores'][category_name] = confidence
+                results['keywords_found'][category_name] = keywords
+        
+        # คำนวณความมั่นใจรวม
+        if results['confidence_scores']:
+            results['overall_confidence'] = max(results['confidence_scores'].values())
+        
+        # วิเคราะห์ sentiment
+        if self.config['sentiment_analysis']:
+            results['sentiment_score'] = self._analyze_sentiment(conversation_text)
+        
+        # กำหนดความสำคัญ
+        results['priority'] = self._determine_priority(results)
+        return results
+    
+    def _match_categories(self, text: str) -> Dict[int, Tuple[float, List[str]]]:
+        """ค้นหาคำสำคัญของทุกหมวดหมู่ในรอบเดียว: category_id -> (confidence, keywords)"""
+        hits: Dict[int, List[Tuple[int, Dict[str, Any]]]] = {}
+        for pattern_id in self.matcher.find(text):
+            for category_id, index, keyword_info in self._pattern_entries.get(pattern_id, ()):
+                hits.setdefault(category_id, []).append((index, keyword_info))
+        
+        matches = {}
+        for category_id, found in hits.items():
+            # เรียงตามลำดับคำสำคัญใน category เหมือนเดิม
+            found.sort(key=lambda item: item[0])
+            total_weight = self._category_weights.get(category_id, 0.0)
+            matched_weight = sum(keyword_info['weight'] for _, keyword_info in found)
+            confidence = matched_weight / total_weight if total_weight > 0 else 0.0
+            matches[category_id] = (confidence, [keyword_info['keyword'] for _, keyword_info in found])
+        return matches
+    
     def _analyze_category(self, text: str, category_id: int) -> Tuple[float, List[str]]:
         """วิเคราะห์หมวดหมู่"""
         if category_id not in self.keywords:
             return 0.0, []
         
-        found_keywords = []
-        total_weight = 0.0
-        matched_weight = 0.0
-        
-        for keyword_info in self.keywords[category_id]:
-            keyword = keyword_info['keyword']
-            weight = keyword_info['weight']
-            total_weight += weight
-            
-            # ค้นหาคำสำคัญ (case-insensitive)
-            pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-            if pattern.search(text):
-                found_keywords.append(keyword)
-                matched_weight += weight
-        
-        confidence = matched_weight / total_weight if total_weight > 0 else 0.0
-        return confidence, found_keywords
+        return self._match_categories(text).get(category_id, (0.0, []))
     
     def _analyze_sentiment(self, text: str) -> float:
         """วิเคราะห์ sentiment (แบบง่าย)"""
@@ -343,23 +492,35 @@ class AIFilter:
     
     def _save_filter_result(self, conversation_id: int, results: Dict[str, Any]):
         """บันทึกผลการกรอง"""
+        self._save_filter_results([(conversation_id, results)])
+    
+    def _save_filter_results(self, batch: List[Tuple[int, Dict[str, Any]]]):
+        """บันทึกผลการกรองหลายรายการใน transaction เดียว"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            rows = []
+            for conversation_id, results in batch:
+                for category_name in results['categories']:
+                    rows.append((
+                        conversation_id,
+                        self.categories[category_name]['id'],
+                        results['confidence_scores'][category_name],
+                        json.dumps(results['keywords_found'][category_name]),
+                        results['sentiment_score'],
+                        results['priority']
+                    ))
+            
+            if not rows:
+                return
+            
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
-            for category_name in results['categories']:
-                category_id = self.categories[category_name]['id']
-                confidence = results['confidence_scores'][category_name]
-                keywords = results['keywords_found'][category_name]
-                
-                cursor.execute('''
-                    INSERT INTO filter_results 
-                    (conversation_id, category_id, confidence, keywords_found, 
-                     sentiment_score, priority)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (conversation_id, category_id, confidence, 
-                     json.dumps(keywords), results['sentiment_score'], 
-                     results['priority']))
+            cursor.executemany('''
+                INSERT INTO filter_results 
+                (conversation_id, category_id, confidence, keywords_found, 
+                 sentiment_score, priority)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
             
             conn.commit()
             conn.close()
@@ -370,7 +531,7 @@ class AIFilter:
     def get_filter_statistics(self, days: int = 7) -> Dict[str, Any]:
         """ดึงสถิติการกรอง"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -10,13 +10,22 @@ import json
 import shutil
 import logging
 import sqlite3
-import zipfile
 import hashlib
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from pathlib import Path
 import threading
 import time
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from core import sqlite_pool
+from core.parallel_archive import create_archive, extract_archive, iter_directory_files
+from core.file_journal import FileJournal, walk_files
+
+# รายการไฟล์ที่ถูกลบ (path ภายใน backup) ของ incremental backup
+DELETED_FILES_NAME = 'deleted_files.json'
 
 class AutoBackup:
     """ระบบสำรองข้อมูลอัตโนมัติ"""
@@ -26,6 +35,9 @@ class AutoBackup:
         self.setup_logging()
         self.db_path = self.config.get('backup_database_path', 'auto_backup.db')
         self.init_database()
+        # journal สถานะไฟล์ (size, mtime_ns, inode, hash) สำหรับ incremental backup
+        self.journal = FileJournal(self.db_path)
+        self.backup_root = Path('conversation_logs/backups')
         self.running = False
         self.backup_thread = None
         
@@ -47,7 +59,11 @@ class AutoBackup:
                 '__pycache__/',
                 '*.pyc'
             ],
+            'incremental_backup': True,  # copy เฉพาะไฟล์ที่เปลี่ยนตาม file journal
+            'max_incremental_chain': 5,  # จำนวน incremental backup ต่อกันสูงสุดก่อนทำ full backup ใหม่
             'compression_enabled': True,
+            'compression_codec': 'auto',  # auto / deflate / zstd / stored
+            'compression_workers': None,  # จำนวน thread บีบอัด (ค่าเริ่มต้น = จำนวน CPU)
             'encryption_enabled': False,
             'cloud_backup_enabled': False,
             'cloud_provider': 'local'
@@ -81,7 +97,7 @@ class AutoBackup:
     def init_database(self):
         """สร้างฐานข้อมูลสำหรับ Auto Backup"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ตารางประวัติการ backup
@@ -95,10 +111,16 @@ class AutoBackup:
                     status TEXT DEFAULT 'pending',
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                     completed_at DATETIME,
-                    error_message TEXT
+                    error_message TEXT,
+                    parent_backup_id TEXT
                 )
             ''')
             
+            # ฐานข้อมูลเดิมที่ยังไม่มี parent_backup_id (backup เดิมถือเป็น full backup)
+            cursor.execute('PRAGMA table_info(backup_history)')
+            if 'parent_backup_id' not in [column[1] for column in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE backup_history ADD COLUMN parent_backup_id TEXT')
+            
             # ตารางไฟล์ที่ backup
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS backup_files (
@@ -167,7 +189,7 @@ class AutoBackup:
     def _should_create_backup(self) -> bool:
         """ตรวจสอบว่าควรสร้าง backup หรือไม่"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ดู backup ล่าสุด
@@ -197,28 +219,44 @@ class AutoBackup:
             return False
     
     def create_backup(self) -> str:
-        """สร้าง backup"""
+        """
+        สร้าง backup
+        
+        incremental backup เก็บเฉพาะไฟล์ที่เพิ่ม/แก้ไข และรายการไฟล์ที่ถูกลบ โดยอ้างถึง
+        backup ก่อนหน้า (parent_backup_id) การกู้คืนจึงไล่ใช้ full backup และทุก
+        incremental ในสาย ถ้าสายยาวถึง max_incremental_chain หรือ backup ในสาย
+        ไม่อยู่แล้ว จะทำ full backup ใหม่
+        """
         try:
-            backup_id = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            backup_dir = Path('conversation_logs/backups')
+            backup_id = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+            backup_dir = self.backup_root
             backup_dir.mkdir(parents=True, exist_ok=True)
             
             # สร้างโฟลเดอร์สำหรับ backup นี้
             backup_path = backup_dir / backup_id
             backup_path.mkdir(exist_ok=True)
             
+            # full backup = ล้าง journal แล้วทุกไฟล์จะถูกนับเป็นไฟล์ใหม่
+            parent_backup_id = self._get_incremental_parent()
+            if parent_backup_id is None:
+                self.journal.reset()
+            
             # บันทึกข้อมูล backup
-            self._save_backup_record(backup_id, str(backup_path), 'pending')
+            self._save_backup_record(backup_id, str(backup_path), 'pending', parent_backup_id)
+            
+            # เทียบสถานะไฟล์ปัจจุบันกับ journal (อ่านเฉพาะไฟล์ที่ stat เปลี่ยน)
+            destinations = {}
+            diff = self.journal.scan(self._collect_backup_files(destinations))
             
-            total_size = 0
-            file_count = 0
+            # backup เฉพาะไฟล์ที่เพิ่ม/แก้ไข
+            total_size, file_count, failed = self._backup_path(diff, destinations, backup_path)
             
-            # backup ไฟล์ตามที่กำหนด
-            for path in self.config['backup_paths']:
-                if os.path.exists(path):
-                    path_size, path_count = self._backup_path(path, backup_path)
-                    total_size += path_size
-                    file_count += path_count
+            # บันทึกไฟล์ที่ถูกลบตั้งแต่ backup ก่อน (path ภายใน backup สำหรับการกู้คืน)
+            deleted = [self._destination_for(key) for key in diff.deleted]
+            deleted = [path for path in deleted if path]
+            if deleted:
+                with open(backup_path / DELETED_FILES_NAME, 'w', encoding='utf-8') as f:
+                    json.dump(deleted, f, ensure_ascii=False, indent=2)
             
             # สร้างไฟล์ zip ถ้าเปิดใช้งานการบีบอัด
             if self.config['compression_enabled']:
@@ -226,10 +264,18 @@ class AutoBackup:
                 self._create_zip_backup(backup_path, zip_path)
                 backup_path = zip_path
             
+            # บันทึกข้อมูลไฟล์และอัปเดต journal
+            self._save_file_records(backup_id, diff, failed)
+            self.journal.commit(diff, exclude=failed)
+            
             # อัปเดตสถานะ backup
             self._update_backup_status(backup_id, 'completed', total_size, file_count)
             
-            self.logger.info(f"สร้าง backup สำเร็จ: {backup_id} ({total_size} bytes, {file_count} files)")
+            self.logger.info(
+                f"สร้าง backup สำเร็จ: {backup_id} (parent: {parent_backup_id or 'full'}, "
+                f"{total_size} bytes, {file_count} files, "
+                f"ไม่เปลี่ยนแปลง {diff.unchanged}, ถูกลบ {len(diff.deleted)})"
+            )
             return backup_id
             
         except Exception as e:
@@ -238,51 +284,130 @@ class AutoBackup:
                 self._update_backup_status(backup_id, 'failed', error_message=str(e))
             return ""
     
-    def _backup_path(self, source_path: str, backup_dir: Path) -> tuple[int, int]:
-        """backup path เดียว"""
-        total_size = 0
-        file_count = 0
+    def _get_incremental_parent(self) -> Optional[str]:
+        """
+        backup ที่ incremental backup ถัดไปจะอ้างถึง (backup ล่าสุดที่สำเร็จ)
+        คืนค่า None (ต้องทำ full backup) ถ้าปิด incremental, journal ว่าง,
+        สายยาวถึง max_incremental_chain หรือมี backup ในสายที่ไม่อยู่แล้ว
+        """
+        if not self.config.get('incremental_backup', True) or not self.journal.get_stats()['files']:
+            return None
         
+        conn = sqlite_pool.connect(self.db_path)
         try:
-            source_path_obj = Path(source_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT backup_id FROM backup_history
+                WHERE status = 'completed'
+                ORDER BY id DESC
+                LIMIT 1
+            ''')
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+        
+        if not row:
+            return None
+        
+        chain = self._get_backup_chain(row[0])
+        if not chain or len(chain) > self.config.get('max_incremental_chain', 5):
+            return None
+        return row[0]
+    
+    def _get_backup_chain(self, backup_id: str) -> Optional[List[tuple]]:
+        """
+        สายของ backup ตั้งแต่ full backup ถึง backup_id -> [(backup_id, path)]
+        คืนค่า None ถ้ามี backup ในสายที่ไม่สำเร็จหรือไม่พบไฟล์
+        """
+        conn = sqlite_pool.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            chain = []
+            current = backup_id
+            while current:
+                cursor.execute('''
+                    SELECT backup_path, status, parent_backup_id FROM backup_history
+                    WHERE backup_id = ?
+                ''', (current,))
+                row = cursor.fetchone()
+                if not row or row[1] != 'completed':
+                    return None
+                
+                backup_path = self._resolve_backup_path(row[0])
+                if backup_path is None:
+                    return None
+                chain.append((current, backup_path))
+                current = row[2]
+        finally:
+            conn.close()
+        
+        chain.reverse()
+        return chain
+    
+    @staticmethod
+    def _resolve_backup_path(backup_path: str) -> Optional[str]:
+        """path จริงของ backup (backup ที่บีบอัดแล้วถูกบันทึกด้วย path ของโฟลเดอร์เดิม)"""
+        if os.path.exists(backup_path):
+            return backup_path
+        if os.path.exists(f"{backup_path}.zip"):
+            return f"{backup_path}.zip"
+        return None
+    
+    def _destination_for(self, key: str) -> Optional[str]:
+        """path ภายใน backup ของไฟล์ (key ใน journal)"""
+        for path in self.config['backup_paths']:
+            source = os.path.normpath(path)
+            if key == source:
+                return Path(path).name
+            if key.startswith(source + os.sep):
+                return os.path.join(Path(path).name, os.path.relpath(key, source))
+        return None
+    
+    def _collect_backup_files(self, destinations: Dict[str, str]):
+        """ไล่ไฟล์ทั้งหมดใน backup_paths -> (key, source, stat); destinations เก็บ path ปลายทางใน backup"""
+        backup_root = os.path.abspath(self.backup_root)
+        
+        def include(path: str, is_dir: bool) -> bool:
+            if is_dir:
+                # ไม่ backup โฟลเดอร์ backup เอง
+                if os.path.abspath(path) == backup_root:
+                    return False
+                return self._should_backup_file(os.path.join(path, ''))
+            return self._should_backup_file(path)
+        
+        for path in self.config['backup_paths']:
+            source_path_obj = Path(path)
             if source_path_obj.is_file():
                 # backup ไฟล์เดียว
-                dest_path = backup_dir / source_path_obj.name
-                if self._should_backup_file(source_path):
-                    shutil.copy2(source_path, dest_path)
-                    file_size = source_path_obj.stat().st_size
-                    total_size += file_size
-                    file_count += 1
-                    
-                    # บันทึกข้อมูลไฟล์
-                    self._save_file_record(source_path, file_size)
-                    
+                if self._should_backup_file(path):
+                    key = os.path.normpath(path)
+                    destinations[key] = source_path_obj.name
+                    yield key, path, source_path_obj.stat()
             elif source_path_obj.is_dir():
                 # backup โฟลเดอร์
-                for root, dirs, files in os.walk(source_path):
-                    # สร้างโฟลเดอร์ใน backup
-                    rel_path = os.path.relpath(root, source_path)
-                    backup_subdir = backup_dir / source_path_obj.name / rel_path
-                    backup_subdir.mkdir(parents=True, exist_ok=True)
-                    
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        if self._should_backup_file(file_path):
-                            rel_file_path = os.path.relpath(file_path, source_path)
-                            dest_file_path = backup_dir / source_path_obj.name / rel_file_path
-                            
-                            shutil.copy2(file_path, dest_file_path)
-                            file_size = os.path.getsize(file_path)
-                            total_size += file_size
-                            file_count += 1
-                            
-                            # บันทึกข้อมูลไฟล์
-                            self._save_file_record(file_path, file_size)
-                            
-        except Exception as e:
-            self.logger.error(f"ไม่สามารถ backup path {source_path}: {e}")
-            
-        return total_size, file_count
+                for file_path, stat in walk_files(path, include):
+                    key = os.path.normpath(file_path)
+                    destinations[key] = os.path.join(source_path_obj.name, os.path.relpath(file_path, path))
+                    yield key, file_path, stat
+    
+    def _backup_path(self, diff, destinations: Dict[str, str], backup_dir: Path) -> tuple:
+        """copy ไฟล์ที่เปลี่ยนแปลงลง backup -> (total_size, file_count, failed)"""
+        total_size = 0
+        file_count = 0
+        failed = []
+        
+        for key in diff.changed:
+            try:
+                dest_file_path = backup_dir / destinations[key]
+                dest_file_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(diff.sources[key], dest_file_path)
+                total_size += diff.states[key].size
+                file_count += 1
+            except Exception as e:
+                failed.append(key)
+                self.logger.error(f"ไม่สามารถ backup ไฟล์ {key}: {e}")
+        
+        return total_size, file_count, failed
     
     def _should_backup_file(self, file_path: str) -> bool:
         """ตรวจสอบว่าควร backup ไฟล์นี้หรือไม่"""
@@ -303,12 +428,13 @@ class AutoBackup:
     def _create_zip_backup(self, source_dir: Path, zip_path: Path):
         """สร้างไฟล์ zip backup"""
         try:
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(source_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arc_name = os.path.relpath(file_path, source_dir)
-                        zipf.write(file_path, arc_name)
+            # บีบอัดหลายไฟล์พร้อมกันด้วย worker pool แล้วเขียนลง zip ตามลำดับ
+            create_archive(
+                zip_path,
+                iter_directory_files(source_dir),
+                codec=self.config.get('compression_codec', 'auto'),
+                max_workers=self.config.get('compression_workers')
+            )
             
             # ลบโฟลเดอร์ต้นฉบับ
             shutil.rmtree(source_dir)
@@ -316,16 +442,17 @@ class AutoBackup:
         except Exception as e:
             self.logger.error(f"ไม่สามารถสร้าง zip backup: {e}")
     
-    def _save_backup_record(self, backup_id: str, backup_path: str, status: str):
+    def _save_backup_record(self, backup_id: str, backup_path: str, status: str,
+                            parent_backup_id: str = None):
         """บันทึกข้อมูล backup"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
-                INSERT INTO backup_history (backup_id, backup_path, status)
-                VALUES (?, ?, ?)
-            ''', (backup_id, backup_path, status))
+                INSERT INTO backup_history (backup_id, backup_path, status, parent_backup_id)
+                VALUES (?, ?, ?, ?)
+            ''', (backup_id, backup_path, status, parent_backup_id))
             
             conn.commit()
             conn.close()
@@ -338,7 +465,7 @@ class AutoBackup:
                             error_message: str = None):
         """อัปเดตสถานะ backup"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -354,19 +481,22 @@ class AutoBackup:
         except Exception as e:
             self.logger.error(f"ไม่สามารถอัปเดตสถานะ backup: {e}")
     
-    def _save_file_record(self, file_path: str, file_size: int):
-        """บันทึกข้อมูลไฟล์"""
+    def _save_file_records(self, backup_id: str, diff, failed: List[str]):
+        """บันทึกข้อมูลไฟล์ที่ backup ทั้งหมดใน transaction เดียว"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            failed = set(failed)
+            rows = [
+                (backup_id, key, diff.states[key].size, diff.states[key].hash)
+                for key in diff.changed if key not in failed
+            ]
             
-            # คำนวณ hash ของไฟล์
-            file_hash = self._calculate_file_hash(file_path)
+            conn = sqlite_pool.connect(self.db_path)
+            cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO backup_files (file_path, file_size, file_hash)
-                VALUES (?, ?, ?)
-            ''', (file_path, file_size, file_hash))
+            cursor.executemany('''
+                INSERT INTO backup_files (backup_id, file_path, file_size, file_hash)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
             
             conn.commit()
             conn.close()
@@ -387,32 +517,40 @@ class AutoBackup:
             return ""
     
     def _cleanup_old_backups(self):
-        """ทำความสะอาด backup เก่า"""
+        """
+        ทำความสะอาด backup เก่า
+        ลบทีละสาย (full backup + incremental ที่อ้างถึง) เริ่มจากสายเก่าที่สุด
+        เฉพาะเมื่อยังเหลือ backup อย่างน้อย max_backups และไม่ลบสายล่าสุด
+        backup ที่ยังถูกอ้างถึงจึงไม่ถูกลบ
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
-            # นับจำนวน backup ที่สำเร็จ
             cursor.execute('''
-                SELECT COUNT(*) FROM backup_history 
+                SELECT backup_id, backup_path, parent_backup_id FROM backup_history 
                 WHERE status = 'completed'
+                ORDER BY id ASC
             ''')
-            backup_count = cursor.fetchone()[0]
-            
-            if backup_count > self.config['max_backups']:
-                # หา backup เก่าที่สุดที่ต้องลบ
-                cursor.execute('''
-                    SELECT backup_id, backup_path FROM backup_history 
-                    WHERE status = 'completed'
-                    ORDER BY created_at ASC
-                    LIMIT ?
-                ''', (backup_count - self.config['max_backups'],))
-                
-                old_backups = cursor.fetchall()
+            backups = cursor.fetchall()
+            
+            # จัดกลุ่มเป็นสายตาม full backup ต้นสาย
+            chains: Dict[str, List[tuple]] = {}
+            root_of: Dict[str, str] = {}
+            for backup_id, backup_path, parent_backup_id in backups:
+                root = root_of.get(parent_backup_id, backup_id) if parent_backup_id else backup_id
+                root_of[backup_id] = root
+                chains.setdefault(root, []).append((backup_id, backup_path))
+            
+            remaining = len(backups)
+            for chain in list(chains.values())[:-1]:
+                if remaining - len(chain) < self.config['max_backups']:
+                    break
                 
-                for backup_id, backup_path in old_backups:
+                for backup_id, backup_path in chain:
                     # ลบไฟล์ backup
-                    if os.path.exists(backup_path):
+                    backup_path = self._resolve_backup_path(backup_path)
+                    if backup_path:
                         if backup_path.endswith('.zip'):
                             os.remove(backup_path)
                         else:
@@ -423,23 +561,23 @@ class AutoBackup:
                     cursor.execute('DELETE FROM backup_history WHERE backup_id = ?', (backup_id,))
                     
                     self.logger.info(f"ลบ backup เก่า: {backup_id}")
-                
-                conn.commit()
+                remaining -= len(chain)
             
+            conn.commit()
             conn.close()
             
         except Exception as e:
             self.logger.error(f"ไม่สามารถทำความสะอาด backup เก่า: {e}")
     
     def restore_backup(self, backup_id: str, restore_path: str = None) -> bool:
-        """กู้คืน backup"""
+        """กู้คืน backup (ไล่ใช้ full backup และ incremental ทุกตัวในสายจนถึง backup_id)"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ดึงข้อมูล backup
             cursor.execute('''
-                SELECT backup_path, status FROM backup_history 
+                SELECT status FROM backup_history 
                 WHERE backup_id = ?
             ''', (backup_id,))
             
@@ -450,38 +588,53 @@ class AutoBackup:
                 self.logger.error(f"ไม่พบ backup: {backup_id}")
                 return False
             
-            backup_path, status = row
-            
-            if status != 'completed':
+            if row[0] != 'completed':
                 self.logger.error(f"Backup {backup_id} ไม่สำเร็จ")
                 return False
             
-            if not os.path.exists(backup_path):
-                self.logger.error(f"ไม่พบไฟล์ backup: {backup_path}")
+            chain = self._get_backup_chain(backup_id)
+            if not chain:
+                self.logger.error(f"ไม่พบไฟล์ backup ในสายของ {backup_id}")
                 return False
             
             # กำหนด path สำหรับกู้คืน
             if not restore_path:
                 restore_path = f"restored_{backup_id}"
             
-            # กู้คืนไฟล์
-            if backup_path.endswith('.zip'):
-                with zipfile.ZipFile(backup_path, 'r') as zipf:
-                    zipf.extractall(restore_path)
-            else:
-                shutil.copytree(backup_path, restore_path)
+            # กู้คืนไฟล์ทีละชั้น แล้วลบไฟล์ที่ถูกลบในชั้นนั้น
+            for _, backup_path in chain:
+                if backup_path.endswith('.zip'):
+                    extract_archive(backup_path, restore_path)
+                else:
+                    shutil.copytree(backup_path, restore_path, dirs_exist_ok=True)
+                self._apply_deleted_files(Path(restore_path))
             
-            self.logger.info(f"กู้คืน backup สำเร็จ: {backup_id} -> {restore_path}")
+            self.logger.info(f"กู้คืน backup สำเร็จ: {backup_id} ({len(chain)} ชั้น) -> {restore_path}")
             return True
             
         except Exception as e:
             self.logger.error(f"ไม่สามารถกู้คืน backup: {e}")
             return False
     
+    def _apply_deleted_files(self, restore_path: Path):
+        """ลบไฟล์ตาม deleted_files.json ของชั้นที่เพิ่งกู้คืน"""
+        deleted_file = restore_path / DELETED_FILES_NAME
+        if not deleted_file.exists():
+            return
+        
+        with open(deleted_file, 'r', encoding='utf-8') as f:
+            deleted = json.load(f)
+        deleted_file.unlink()
+        
+        for relative_path in deleted:
+            target = restore_path / relative_path
+            if target.is_file():
+                target.unlink()
+    
     def get_backup_history(self, limit: int = 50) -> List[Dict[str, Any]]:
         """ดึงประวัติการ backup"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -516,7 +669,7 @@ class AutoBackup:
     def get_backup_statistics(self) -> Dict[str, Any]:
         """ดึงสถิติการ backup"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # นับ backup ตามสถานะ
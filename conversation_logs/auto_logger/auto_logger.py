@@ -8,14 +8,57 @@ WAWAGOT.AI Auto Logger System
 import os
 import json
 import time
+import atexit
 import logging
 import threading
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Callable
 import sqlite3
 import hashlib
 import base64
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from core import sqlite_pool
+
+CONVERSATION_INSERT_SQL = '''
+    INSERT INTO conversations 
+    (session_id, user_message, ai_response, context, metadata, encrypted)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+METADATA_INSERT_SQL = '''
+    INSERT INTO metadata (conversation_id, key, value)
+    VALUES (?, ?, ?)
+'''
+
+def decrypt_value(encrypted_data: str) -> str:
+    """ถอดรหัสข้อมูลที่ AutoLogger.encrypt_data เข้ารหัสไว้"""
+    return base64.b64decode(encrypted_data.encode('utf-8')).decode('utf-8')
+
+def decode_conversation_row(row: tuple) -> Dict[str, Any]:
+    """
+    แปลงแถวของตาราง conversations เป็น dict
+    ถอดรหัสตาม flag encrypted ของแถว (ไม่ใช่ config ปัจจุบัน) เพราะแถวเก่าอาจถูกเขียนด้วย config อื่น
+    """
+    encrypted = bool(row[7])
+    
+    def decode(value):
+        return decrypt_value(value) if encrypted and value else value
+    
+    metadata = decode(row[6])
+    return {
+        'id': row[0],
+        'session_id': row[1],
+        'timestamp': row[2],
+        'user_message': decode(row[3]),
+        'ai_response': decode(row[4]),
+        'context': decode(row[5]),
+        'metadata': json.loads(metadata) if metadata else None
+    }
 
 class AutoLogger:
     """ระบบบันทึกการสนทนาอัตโนมัติ"""
@@ -28,6 +71,33 @@ class AutoLogger:
         self.running = False
         self.log_thread = None
         
+        # Async ingest: write-ahead queue + writer thread เดียว
+        self._ingest_queue: deque = deque()
+        self._ingest_cond = threading.Condition()
+        self._ingest_thread = None
+        self._ingest_running = False
+        self._ingest_atexit_registered = False
+        self._ingest_flush_requested = False
+        self._enqueued_seq = 0
+        self._flushed_seq = 0
+        self.ingest_stats = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'errors': 0,
+            'dead_lettered': 0
+        }
+        
+        # การสนทนาที่บันทึกไม่ได้ (แยกออกจาก batch เพื่อไม่ให้รายการอื่นหายไปด้วย)
+        self.dead_letters: deque = deque(maxlen=self.config['dead_letter_max_size'])
+        self._dead_letter_lock = threading.Lock()
+        
+        # callback ที่ได้รับการสนทนาหลังบันทึกสำเร็จ (ดู add_write_listener)
+        self.write_listeners: List[Callable[[List[Dict[str, Any]]], Any]] = []
+        
+        if self.config['async_ingest']:
+            self.start_async_ingest()
+        
     def _load_config(self, config_path: str = None) -> Dict[str, Any]:
         """โหลดการตั้งค่าจากไฟล์"""
         default_config = {
@@ -38,7 +108,14 @@ class AutoLogger:
             'max_log_size': 1000000,  # 1MB
             'encryption_enabled': True,
             'auto_cleanup': True,
-            'cleanup_days': 30
+            'cleanup_days': 30,
+            'async_ingest': False,  # log_conversation คืนค่าทันที แล้วเขียนแบบ batch
+            'ingest_batch_size': 500,
+            'ingest_flush_interval': 0.2,  # วินาที
+            'ingest_max_queue_size': 10000,
+            'dead_letter_max_size': 1000,
+            'write_retries': 3,  # ลองเขียน batch ใหม่เมื่อฐานข้อมูลถูกล็อกชั่วคราว
+            'write_retry_delay': 0.5  # วินาที (เพิ่มขึ้นตามจำนวนครั้ง)
         }
         
         if config_path and os.path.exists(config_path):
@@ -69,7 +146,7 @@ class AutoLogger:
     def init_database(self):
         """สร้างฐานข้อมูล SQLite"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ตารางการสนทนา
@@ -135,8 +212,7 @@ class AutoLogger:
             return encrypted_data
             
         try:
-            decoded = base64.b64decode(encrypted_data.encode('utf-8'))
-            return decoded.decode('utf-8')
+            return decrypt_value(encrypted_data)
         except Exception as e:
             self.logger.error(f"ไม่สามารถถอดรหัสข้อมูล: {e}")
             return encrypted_data
@@ -144,49 +220,340 @@ class AutoLogger:
     def log_conversation(self, session_id: str, user_message: str, 
                         ai_response: str, context: str = None, 
                         metadata: Dict[str, Any] = None) -> bool:
-        """บันทึกการสนทนา"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # เข้ารหัสข้อมูล
-            encrypted_user = self.encrypt_data(user_message)
-            encrypted_ai = self.encrypt_data(ai_response)
-            encrypted_context = self.encrypt_data(context) if context else None
-            encrypted_metadata = self.encrypt_data(json.dumps(metadata)) if metadata else None
-            
-            cursor.execute('''
-                INSERT INTO conversations 
-                (session_id, user_message, ai_response, context, metadata, encrypted)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (session_id, encrypted_user, encrypted_ai, encrypted_context, 
-                  encrypted_metadata, 1 if self.config['encryption_enabled'] else 0))
-            
-            conversation_id = cursor.lastrowid
-            
-            # บันทึก metadata
-            if metadata:
-                for key, value in metadata.items():
-                    cursor.execute('''
-                        INSERT INTO metadata (conversation_id, key, value)
-                        VALUES (?, ?, ?)
-                    ''', (conversation_id, key, str(value)))
-            
-            conn.commit()
-            conn.close()
-            
+        """บันทึกการสนทนา (ถ้าเปิด async ingest จะเข้า queue แล้วคืนค่าทันที)"""
+        entry = (session_id, user_message, ai_response, context, metadata)
+        
+        if self._ingest_running:
+            return self._enqueue(entry)
+        
+        if self._write_conversations([entry]):
             self.logger.info(f"บันทึกการสนทนาสำเร็จ: Session {session_id}")
             return True
-            
-        except Exception as e:
-            self.logger.error(f"ไม่สามารถบันทึกการสนทนา: {e}")
-            return False
+        return False
+    
+    def log_conversations_batch(self, conversations: List[Dict[str, Any]]) -> int:
+        """
+        บันทึกการสนทนาหลายรายการใน transaction เดียว
+        conversations: รายการ dict ที่มี session_id, user_message, ai_response,
+        context และ metadata (ไม่บังคับ)
+        คืนค่าจำนวนการสนทนาที่บันทึกสำเร็จ
+        """
+        entries = [
+            (conversation['session_id'], conversation.get('user_message'),
+             conversation.get('ai_response'), conversation.get('context'),
+             conversation.get('metadata'))
+            for conversation in conversations
+        ]
+        
+        written = self._write_conversations(entries)
+        if written:
+            self.logger.info(f"บันทึกการสนทนาแบบกลุ่มสำเร็จ: {written} รายการ")
+        return written
+    
+    def start_async_ingest(self):
+        """เริ่ม writer thread สำหรับ async ingest"""
+        with self._ingest_cond:
+            if self._ingest_running:
+                return
+            self._ingest_running = True
+        
+        self._ingest_thread = threading.Thread(target=self._ingest_worker, name="AutoLoggerIngest", daemon=True)
+        self._ingest_thread.start()
+        # ลงทะเบียนครั้งเดียว (start/stop ซ้ำไม่เพิ่ม hook)
+        if not self._ingest_atexit_registered:
+            atexit.register(self.stop_async_ingest)
+            self._ingest_atexit_registered = True
+        self.logger.info("เริ่มระบบบันทึกแบบ async ingest")
+    
+    def stop_async_ingest(self, timeout: float = 10.0):
+        """หยุด async ingest และเขียนข้อมูลที่ค้างอยู่ทั้งหมด"""
+        with self._ingest_cond:
+            if not self._ingest_running:
+                return
+            self._ingest_running = False
+            self._ingest_cond.notify_all()
+        
+        if self._ingest_thread:
+            self._ingest_thread.join(timeout)
+            self._ingest_thread = None
+        self.logger.info("หยุดระบบบันทึกแบบ async ingest")
+    
+    def flush_ingest(self, timeout: float = 10.0) -> bool:
+        """รอจนกว่าการสนทนาที่เข้า queue แล้วถูกเขียนลงฐานข้อมูล"""
+        deadline = time.time() + timeout
+        with self._ingest_cond:
+            target = self._enqueued_seq
+            self._ingest_flush_requested = True
+            self._ingest_cond.notify_all()
+            
+            while self._flushed_seq < target:
+                remaining = deadline - time.time()
+                if remaining <= 0 or self._ingest_thread is None or not self._ingest_thread.is_alive():
+                    return False
+                self._ingest_cond.wait(remaining)
+        return True
+    
+    def get_ingest_stats(self) -> Dict[str, Any]:
+        """ดึงสถิติของ async ingest"""
+        with self._ingest_cond:
+            stats = dict(self.ingest_stats)
+            stats['pending'] = len(self._ingest_queue)
+            stats['running'] = self._ingest_running
+        with self._dead_letter_lock:
+            stats['dead_letters'] = len(self.dead_letters)
+        return stats
+    
+    def get_dead_letters(self, clear: bool = False) -> List[Dict[str, Any]]:
+        """ดึงการสนทนาที่บันทึกไม่ได้ พร้อมสาเหตุ (clear=True เพื่อล้างรายการ)"""
+        with self._dead_letter_lock:
+            dead_letters = list(self.dead_letters)
+            if clear:
+                self.dead_letters.clear()
+        return dead_letters
+    
+    def _enqueue(self, entry: Tuple) -> bool:
+        """ใส่การสนทนาลง queue (รอถ้า queue เต็ม เพื่อไม่ให้ข้อมูลหาย)"""
+        with self._ingest_cond:
+            while (len(self._ingest_queue) >= self.config['ingest_max_queue_size']
+                   and self._ingest_running):
+                self._ingest_cond.wait(0.1)
+            
+            if not self._ingest_running:
+                return self._write_conversations([entry]) > 0
+            
+            self._ingest_queue.append(entry)
+            self._enqueued_seq += 1
+            self.ingest_stats['enqueued'] += 1
+            if len(self._ingest_queue) >= self.config['ingest_batch_size']:
+                self._ingest_cond.notify_all()
+        return True
+    
+    def _take_ingest_batch(self) -> Tuple[List[Tuple], bool]:
+        """ดึง batch ถัดไปจาก queue (รอตาม ingest_flush_interval)"""
+        batch_size = self.config['ingest_batch_size']
+        with self._ingest_cond:
+            deadline = time.time() + self.config['ingest_flush_interval']
+            while (len(self._ingest_queue) < batch_size
+                   and not self._ingest_flush_requested and self._ingest_running):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._ingest_cond.wait(remaining)
+            
+            count = min(len(self._ingest_queue), batch_size)
+            batch = [self._ingest_queue.popleft() for _ in range(count)]
+            if not self._ingest_queue:
+                self._ingest_flush_requested = False
+            
+            # ปลุก producers ที่รอ queue ว่าง
+            self._ingest_cond.notify_all()
+            return batch, not self._ingest_running and not self._ingest_queue
+    
+    def _ingest_worker(self):
+        """Writer thread ของ async ingest"""
+        while True:
+            batch, finished = self._take_ingest_batch()
+            
+            if batch:
+                written = self._write_conversations(batch)
+                with self._ingest_cond:
+                    self.ingest_stats['written'] += written
+                    self.ingest_stats['batches'] += 1
+                    if written < len(batch):
+                        self.ingest_stats['errors'] += 1
+            
+            with self._ingest_cond:
+                self._flushed_seq = self._enqueued_seq - len(self._ingest_queue)
+                self._ingest_cond.notify_all()
+            
+            if finished:
+                break
+    
+    def _write_conversations(self, entries: List[Tuple]) -> int:
+        """
+        เขียนการสนทนาและ metadata หลายรายการด้วย executemany ใน transaction เดียว
+        
+        ถ้าฐานข้อมูลถูกล็อกชั่วคราว จะรอแล้วเขียนทั้ง batch ใหม่ (write_retries ครั้ง)
+        ถ้า batch ล้มเหลวด้วยเหตุอื่น จะเขียนใหม่ทีละรายการ (savepoint ต่อรายการ) รายการที่
+        ยังล้มเหลวถูกย้ายไป dead_letters และบันทึก log ส่วนรายการอื่นถูกบันทึกตามปกติ
+        การสนทนาที่บันทึกแล้วถูกส่งต่อให้ write listeners (เช่น search index)
+        คืนค่าจำนวนการสนทนาที่บันทึกสำเร็จ
+        """
+        if not entries:
+            return 0
+        
+        # เตรียมข้อมูลทีละรายการ (รายการที่เข้ารหัส/แปลง metadata ไม่ได้ไม่กระทบรายการอื่น)
+        prepared = []
+        for entry in entries:
+            try:
+                prepared.append((entry, self._prepare_row(entry)))
+            except Exception as e:
+                self._dead_letter(entry, e)
+        
+        if not prepared:
+            return 0
+        
+        attempts = self.config['write_retries'] + 1
+        for attempt in range(1, attempts + 1):
+            conn = None
+            try:
+                conn = sqlite_pool.connect(self.db_path)
+                try:
+                    written = self._insert_batch(conn, prepared)
+                except sqlite3.Error as e:
+                    conn.rollback()
+                    if self._is_lock_error(e):
+                        raise
+                    self.logger.warning(f"บันทึก batch ไม่สำเร็จ ({len(prepared)} รายการ) เขียนใหม่ทีละรายการ: {e}")
+                    written = self._insert_rows(conn, prepared)
+                break
+                
+            except Exception as e:
+                if conn is not None:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                if self._is_lock_error(e) and attempt < attempts:
+                    self.logger.warning(f"ฐานข้อมูลถูกล็อก ลองบันทึกใหม่ ({attempt}/{attempts - 1}): {e}")
+                    time.sleep(self.config['write_retry_delay'] * attempt)
+                    continue
+                self.logger.error(f"ไม่สามารถบันทึกการสนทนา: {e}")
+                for entry, _ in prepared:
+                    self._dead_letter(entry, e)
+                return 0
+            
+            finally:
+                if conn is not None:
+                    conn.close()
+        
+        self._notify_write_listeners(written)
+        return len(written)
+    
+    @staticmethod
+    def _is_lock_error(error: Exception) -> bool:
+        """ข้อผิดพลาดชั่วคราวจากการที่ connection อื่นถือ lock ของฐานข้อมูลอยู่"""
+        message = str(error).lower()
+        return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+    
+    def _prepare_row(self, entry: Tuple) -> tuple:
+        """แปลงการสนทนาเป็นแถวของตาราง conversations (เข้ารหัสข้อมูล)"""
+        session_id, user_message, ai_response, context, metadata = entry
+        return (
+            session_id,
+            self.encrypt_data(user_message),
+            self.encrypt_data(ai_response),
+            self.encrypt_data(context) if context else None,
+            self.encrypt_data(json.dumps(metadata)) if metadata else None,
+            1 if self.config['encryption_enabled'] else 0
+        )
+    
+    def _insert_batch(self, conn, prepared: List[Tuple[Tuple, tuple]]) -> List[Tuple[int, Tuple]]:
+        """
+        เขียนทั้ง batch ด้วย executemany (ล้มเหลวทั้ง batch ถ้ามีแถวใดผิด)
+        คืนค่า [(conversation_id, entry)] ของรายการที่บันทึก
+        """
+        cursor = conn.cursor()
+        
+        # BEGIN IMMEDIATE: ถือ write lock ตลอด batch ทำให้ id ของแถวที่เพิ่มต่อเนื่องกัน
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.executemany(CONVERSATION_INSERT_SQL, [row for _, row in prepared])
+        last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+        first_id = last_id - len(prepared) + 1
+        
+        # บันทึก metadata
+        metadata_rows = [
+            (first_id + index, key, str(value))
+            for index, (entry, _) in enumerate(prepared) if entry[4]
+            for key, value in entry[4].items()
+        ]
+        if metadata_rows:
+            cursor.executemany(METADATA_INSERT_SQL, metadata_rows)
+        
+        conn.commit()
+        return [(first_id + index, entry) for index, (entry, _) in enumerate(prepared)]
+    
+    def _insert_rows(self, conn, prepared: List[Tuple[Tuple, tuple]]) -> List[Tuple[int, Tuple]]:
+        """เขียนทีละรายการใน transaction เดียว โดยใช้ savepoint แยกแต่ละรายการ"""
+        cursor = conn.cursor()
+        written = []
+        
+        cursor.execute('BEGIN IMMEDIATE')
+        for entry, row in prepared:
+            cursor.execute('SAVEPOINT conversation_row')
+            try:
+                cursor.execute(CONVERSATION_INSERT_SQL, row)
+                conversation_id = cursor.lastrowid
+                if entry[4]:
+                    cursor.executemany(METADATA_INSERT_SQL, [
+                        (conversation_id, key, str(value)) for key, value in entry[4].items()
+                    ])
+                cursor.execute('RELEASE SAVEPOINT conversation_row')
+                written.append((conversation_id, entry))
+            except sqlite3.Error as e:
+                cursor.execute('ROLLBACK TO SAVEPOINT conversation_row')
+                cursor.execute('RELEASE SAVEPOINT conversation_row')
+                self._dead_letter(entry, e)
+        
+        conn.commit()
+        return written
+    
+    def add_write_listener(self, listener: Callable[[List[Dict[str, Any]]], Any]):
+        """
+        ลงทะเบียน callback ที่ถูกเรียกหลังบันทึกการสนทนาสำเร็จ (ข้อความก่อนเข้ารหัส)
+        listener ได้รับรายการ dict ที่มี conversation_id, session_id, user_message,
+        ai_response, context และ metadata
+        """
+        self.write_listeners.append(listener)
+    
+    def _notify_write_listeners(self, written: List[Tuple[int, Tuple]]):
+        """ส่งการสนทนาที่บันทึกแล้วให้ write listeners (ข้อผิดพลาดไม่กระทบการบันทึก)"""
+        if not written or not self.write_listeners:
+            return
+        
+        conversations = [
+            {
+                'conversation_id': conversation_id,
+                'session_id': session_id,
+                'user_message': user_message,
+                'ai_response': ai_response,
+                'context': context,
+                'metadata': metadata
+            }
+            for conversation_id, (session_id, user_message, ai_response, context, metadata) in written
+        ]
+        for listener in list(self.write_listeners):
+            try:
+                listener(conversations)
+            except Exception as e:
+                self.logger.error(f"write listener ทำงานผิดพลาด: {e}")
+    
+    def _dead_letter(self, entry: Tuple, error: Exception):
+        """ย้ายการสนทนาที่บันทึกไม่ได้ไปยัง dead_letters และบันทึก log"""
+        session_id, user_message, ai_response, context, metadata = entry
+        self.logger.error(f"ย้ายการสนทนาไป dead letter (Session {session_id}): {error}")
+        with self._dead_letter_lock:
+            self.dead_letters.append({
+                'session_id': session_id,
+                'user_message': user_message,
+                'ai_response': ai_response,
+                'context': context,
+                'metadata': metadata,
+                'error': str(error),
+                'failed_at': datetime.now().isoformat()
+            })
+        with self._ingest_cond:
+            self.ingest_stats['dead_lettered'] += 1
     
     def get_conversation_history(self, session_id: str = None, 
                                 limit: int = 100) -> List[Dict[str, Any]]:
         """ดึงประวัติการสนทนา"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            # ให้เห็นข้อความที่ยังค้างอยู่ใน ingest queue ด้วย
+            if self._ingest_running:
+                self.flush_ingest()
+            
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             if session_id:
@@ -203,20 +570,7 @@ class AutoLogger:
                     LIMIT ?
                 ''', (limit,))
             
-            rows = cursor.fetchall()
-            conversations = []
-            
-            for row in rows:
-                conversation = {
-                    'id': row[0],
-                    'session_id': row[1],
-                    'timestamp': row[2],
-                    'user_message': self.decrypt_data(row[3]) if row[6] else row[3],
-                    'ai_response': self.decrypt_data(row[4]) if row[6] else row[4],
-                    'context': self.decrypt_data(row[5]) if row[5] and row[6] else row[5],
-                    'metadata': json.loads(self.decrypt_data(row[6])) if row[6] and row[6] else None
-                }
-                conversations.append(conversation)
+            conversations = [decode_conversation_row(row) for row in cursor.fetchall()]
             
             conn.close()
             return conversations
@@ -263,7 +617,7 @@ class AutoLogger:
     def _cleanup_old_data(self):
         """ทำความสะอาดข้อมูลเก่า"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ลบข้อมูลเก่ากว่า 30 วัน
@@ -286,7 +640,7 @@ class AutoLogger:
     def _update_statistics(self):
         """อัปเดตสถิติ"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # นับจำนวนการสนทนาวันนี้
@@ -320,7 +674,7 @@ class AutoLogger:
     def get_statistics(self, days: int = 7) -> Dict[str, Any]:
         """ดึงสถิติ"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
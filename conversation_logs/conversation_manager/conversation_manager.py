@@ -6,14 +6,52 @@ WAWAGOT.AI Conversation Manager System
 """
 
 import os
+import io
+import csv
 import json
+import zlib
 import logging
 import sqlite3
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterator
 from datetime import datetime, timedelta
 from pathlib import Path
 import hashlib
 import re
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from core import sqlite_pool
+from core.text_tokenizer import segment
+
+# แปลงแถวที่ AutoLogger บันทึก (ถอดรหัสตาม flag encrypted)
+try:
+    from ..auto_logger.auto_logger import decode_conversation_row
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'auto_logger'))
+    from auto_logger import decode_conversation_row
+
+# unicode61 ถือว่าสระ/วรรณยุกต์ไทย (Mn) เป็นตัวคั่นคำ จึงต้องระบุเป็น token characters
+THAI_TOKENCHARS = '\u0e31\u0e34\u0e35\u0e36\u0e37\u0e38\u0e39\u0e3a\u0e47\u0e48\u0e49\u0e4a\u0e4b\u0e4c\u0e4d\u0e4e'
+
+SEARCH_FTS_SQL = f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+        content,
+        keywords,
+        tokenize = "unicode61 tokenchars '{THAI_TOKENCHARS}'",
+        prefix = '2 3'
+    )
+'''
+
+# bm25 weights: content, keywords
+SEARCH_FTS_WEIGHTS = (1.0, 2.0)
+
+# ความยาว snippet (ตัวอักษรของข้อความต้นฉบับ)
+SNIPPET_CHARS = 80
+
+EXPORT_DIR = Path('conversation_logs/exports')
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_CSV_COLUMNS = ('id', 'session_id', 'timestamp', 'user_message', 'ai_response', 'context', 'metadata')
 
 class ConversationManager:
     """ระบบจัดการข้อมูลการสนทนา"""
@@ -22,6 +60,9 @@ class ConversationManager:
         self.config = self._load_config(config_path)
         self.setup_logging()
         self.db_path = self.config.get('manager_database_path', 'conversation_manager.db')
+        # ฐานข้อมูลการสนทนาของ AutoLogger
+        self.conversations_db_path = self.config.get('conversations_database_path', 'conversation_logs.db')
+        self.fts_enabled = False
         self.init_database()
         
     def _load_config(self, config_path: str = None) -> Dict[str, Any]:
@@ -29,12 +70,13 @@ class ConversationManager:
         default_config = {
             'log_level': 'INFO',
             'manager_database_path': 'conversation_manager.db',
+            'conversations_database_path': 'conversation_logs.db',
             'max_conversations_per_session': 1000,
             'auto_archive': True,
             'archive_days': 90,
             'search_enabled': True,
             'indexing_enabled': True,
-            'export_formats': ['json', 'csv', 'txt'],
+            'export_formats': ['json', 'jsonl', 'csv', 'txt'],
             'compression_enabled': True
         }
         
@@ -66,7 +108,7 @@ class ConversationManager:
     def init_database(self):
         """สร้างฐานข้อมูลสำหรับ Conversation Manager"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ตารางการจัดการ session
@@ -117,6 +159,9 @@ class ConversationManager:
                 )
             ''')
             
+            # Full-text index ของ search_index (ข้อความไทยถูกตัดคำก่อนเก็บ)
+            self.fts_enabled = self._init_search_fts(cursor)
+            
             # ตารางการ export
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS exports (
@@ -140,7 +185,7 @@ class ConversationManager:
                       description: str = None, metadata: Dict[str, Any] = None) -> bool:
         """สร้าง session ใหม่"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -163,7 +208,7 @@ class ConversationManager:
     def update_session_activity(self, session_id: str) -> bool:
         """อัปเดตกิจกรรมล่าสุดของ session"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -184,7 +229,7 @@ class ConversationManager:
     def get_session_info(self, session_id: str) -> Dict[str, Any]:
         """ดึงข้อมูล session"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -214,7 +259,7 @@ class ConversationManager:
     def list_sessions(self, status: str = 'active', limit: int = 100) -> List[Dict[str, Any]]:
         """รายการ sessions"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -249,7 +294,7 @@ class ConversationManager:
     def add_tag(self, name: str, color: str = '#007bff') -> bool:
         """เพิ่ม tag ใหม่"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -270,7 +315,7 @@ class ConversationManager:
     def tag_session(self, session_id: str, tag_name: str) -> bool:
         """เพิ่ม tag ให้ session"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # หา session_id และ tag_id
@@ -303,7 +348,7 @@ class ConversationManager:
     def get_session_tags(self, session_id: str) -> List[str]:
         """ดึง tags ของ session"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -322,12 +367,214 @@ class ConversationManager:
             self.logger.error(f"ไม่สามารถดึง tags ของ session: {e}")
             return []
     
+    def _init_search_fts(self, cursor) -> bool:
+        """สร้าง FTS5 table + trigger และ index แถวเดิมที่ยังไม่อยู่ใน FTS"""
+        try:
+            cursor.execute(SEARCH_FTS_SQL)
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"SQLite ไม่รองรับ FTS5 ใช้การค้นหาแบบ LIKE แทน: {e}")
+            return False
+        
+        # ลบจาก FTS อัตโนมัติเมื่อแถวใน search_index ถูกลบ
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS search_index_ad AFTER DELETE ON search_index
+            BEGIN
+                DELETE FROM search_fts WHERE rowid = old.id;
+            END
+        ''')
+        
+        cursor.execute('''
+            SELECT id, content, keywords FROM search_index
+            WHERE id NOT IN (SELECT rowid FROM search_fts)
+        ''')
+        rows = cursor.fetchall()
+        if rows:
+            cursor.executemany(
+                'INSERT INTO search_fts (rowid, content, keywords) VALUES (?, ?, ?)',
+                [(row_id, segment(content or ''), segment(keywords or '')) for row_id, content, keywords in rows]
+            )
+            self.logger.info(f"สร้าง full-text index สำหรับ {len(rows)} รายการเดิม")
+        return True
+    
+    def index_conversation(self, conversation_id: int, session_id: str, content: str,
+                           keywords: Any = None) -> bool:
+        """เพิ่มการสนทนาเข้า search index"""
+        return self.index_conversations_batch([{
+            'conversation_id': conversation_id,
+            'session_id': session_id,
+            'content': content,
+            'keywords': keywords
+        }]) > 0
+    
+    def index_conversations_batch(self, items: List[Dict[str, Any]]) -> int:
+        """
+        เพิ่มการสนทนาหลายรายการเข้า search index ใน transaction เดียว
+        items: dict ที่มี conversation_id, session_id, content, keywords (str หรือ list)
+        """
+        try:
+            conn = sqlite_pool.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            session_ids = {}
+            indexed = 0
+            for item in items:
+                session_key = item.get('session_id')
+                if session_key not in session_ids:
+                    session_ids[session_key] = self._get_or_create_session_row(cursor, session_key)
+                
+                keywords = item.get('keywords')
+                if isinstance(keywords, (list, tuple, set)):
+                    keywords = ', '.join(str(keyword) for keyword in keywords)
+                content = item.get('content') or ''
+                
+                cursor.execute('''
+                    INSERT INTO search_index (conversation_id, session_id, content, keywords)
+                    VALUES (?, ?, ?, ?)
+                ''', (item.get('conversation_id'), session_ids[session_key], content, keywords))
+                
+                if self.fts_enabled:
+                    cursor.execute('''
+                        INSERT INTO search_fts (rowid, content, keywords) VALUES (?, ?, ?)
+                    ''', (cursor.lastrowid, segment(content), segment(keywords or '')))
+                indexed += 1
+            
+            conn.commit()
+            conn.close()
+            return indexed
+            
+        except Exception as e:
+            self.logger.error(f"ไม่สามารถเพิ่ม search index: {e}")
+            return 0
+    
+    def index_logged_conversations(self, conversations: List[Dict[str, Any]]) -> int:
+        """
+        เพิ่มการสนทนาที่ AutoLogger บันทึกแล้วเข้า search index
+        (ใช้เป็น AutoLogger.add_write_listener) keywords มาจาก metadata['keywords'] ถ้ามี
+        """
+        items = []
+        for conversation in conversations:
+            metadata = conversation.get('metadata') or {}
+            content = '\n'.join(part for part in (conversation.get('user_message'),
+                                                  conversation.get('ai_response')) if part)
+            items.append({
+                'conversation_id': conversation.get('conversation_id'),
+                'session_id': conversation.get('session_id'),
+                'content': content,
+                'keywords': metadata.get('keywords') if isinstance(metadata, dict) else None
+            })
+        return self.index_conversations_batch(items)
+    
+    def _get_or_create_session_row(self, cursor, session_id: str) -> Optional[int]:
+        """id ของ session (สร้าง session ใหม่ถ้ายังไม่มี)"""
+        if session_id is None:
+            return None
+        cursor.execute('INSERT OR IGNORE INTO sessions (session_id) VALUES (?)', (session_id,))
+        cursor.execute('SELECT id FROM sessions WHERE session_id = ?', (session_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
     def search_conversations(self, query: str, session_id: str = None, 
                            limit: int = 50) -> List[Dict[str, Any]]:
-        """ค้นหาการสนทนา"""
+        """
+        ค้นหาการสนทนา
+        ใช้ FTS5 + bm25 (ผลลัพธ์มี rank และ snippet) รองรับ prefix ด้วย "คำ*"
+        snippet สร้างจากข้อความต้นฉบับใน search_index (FTS เก็บข้อความที่ตัดคำแล้ว)
+        ถ้าไม่มี FTS5 จะใช้การค้นหาแบบ LIKE
+        """
+        fts_query = self._build_fts_query(query) if self.fts_enabled else ''
+        if not fts_query:
+            return self._search_conversations_like(query, session_id, limit)
+        
+        try:
+            conn = sqlite_pool.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            sql = f'''
+                SELECT si.id, si.conversation_id, si.session_id, si.content, si.keywords, si.created_at,
+                       bm25(search_fts, {SEARCH_FTS_WEIGHTS[0]}, {SEARCH_FTS_WEIGHTS[1]}) AS score
+                FROM search_fts
+                JOIN search_index si ON si.id = search_fts.rowid
+                WHERE search_fts MATCH ?
+            '''
+            params: List[Any] = [fts_query]
+            if session_id:
+                sql += ' AND si.session_id = (SELECT id FROM sessions WHERE session_id = ?)'
+                params.append(session_id)
+            sql += ' ORDER BY score LIMIT ?'
+            params.append(limit)
+            
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            results = []
+            highlight = self._build_highlight_pattern(query)
+            
+            for row in rows:
+                results.append({
+                    'id': row[0],
+                    'conversation_id': row[1],
+                    'session_id': row[2],
+                    'content': row[3],
+                    'keywords': row[4],
+                    'created_at': row[5],
+                    'rank': row[6],
+                    'snippet': self._make_snippet(row[3] or '', highlight)
+                })
+            
+            conn.close()
+            return results
+            
+        except sqlite3.OperationalError as e:
+            # query ที่ FTS5 parse ไม่ได้
+            self.logger.warning(f"FTS query ไม่ถูกต้อง ใช้การค้นหาแบบ LIKE แทน: {e}")
+            return self._search_conversations_like(query, session_id, limit)
+        except Exception as e:
+            self.logger.error(f"ไม่สามารถค้นหาการสนทนา: {e}")
+            return []
+    
+    def _build_fts_query(self, query: str) -> str:
+        """
+        แปลงข้อความค้นหาเป็น FTS5 query
+        แต่ละคำ (ตัดคำไทยแล้ว) เป็น phrase และต้องพบทุกคำ, คำที่ลงท้ายด้วย * เป็น prefix query
+        """
+        terms = []
+        for term in (query or '').split():
+            prefix = term.endswith('*')
+            words = segment(term.rstrip('*')).split()
+            if not words:
+                continue
+            phrase = '"' + ' '.join(words).replace('"', '""') + '"'
+            terms.append(phrase + '*' if prefix else phrase)
+        return ' '.join(terms)
+    
+    @staticmethod
+    def _build_highlight_pattern(query: str) -> Optional["re.Pattern"]:
+        """regex ของคำค้นหา (ไม่สนตัวพิมพ์เล็ก/ใหญ่ คำยาวก่อน) สำหรับ highlight"""
+        terms = {term.rstrip('*') for term in (query or '').split()}
+        terms = sorted((term for term in terms if term), key=len, reverse=True)
+        if not terms:
+            return None
+        return re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    
+    @staticmethod
+    def _make_snippet(content: str, highlight: Optional["re.Pattern"],
+                      max_chars: int = SNIPPET_CHARS) -> str:
+        """ตัดข้อความต้นฉบับรอบคำที่พบครั้งแรก และครอบคำที่พบด้วย <mark>"""
+        first = highlight.search(content) if highlight else None
+        start = 0
+        if first and len(content) > max_chars:
+            start = max(0, min(first.start() - max_chars // 4, len(content) - max_chars))
+        end = min(len(content), start + max_chars)
+        
+        window = content[start:end]
+        if highlight:
+            window = highlight.sub(lambda m: f'<mark>{m.group(0)}</mark>', window)
+        return ('…' if start > 0 else '') + window + ('…' if end < len(content) else '')
+    
+    def _search_conversations_like(self, query: str, session_id: str = None,
+                                   limit: int = 50) -> List[Dict[str, Any]]:
+        """ค้นหาการสนทนาแบบ LIKE (fallback)"""
         try:
-            # ใช้ SQLite FTS หรือการค้นหาแบบง่าย
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             if session_id:
@@ -367,50 +614,30 @@ class ConversationManager:
             return []
     
     def export_session(self, session_id: str, format: str = 'json', 
-                      file_path: str = None) -> str:
-        """export session"""
+                      file_path: str = None, compress: bool = False) -> str:
+        """
+        export session ลงไฟล์แบบ streaming (ใช้หน่วยความจำคงที่ไม่ว่า session จะใหญ่แค่ไหน)
+        format: json (streaming array), jsonl, csv, txt; compress=True เขียนเป็น gzip
+        """
         try:
-            if format not in self.config['export_formats']:
-                raise ValueError(f"ไม่รองรับ format: {format}")
+            chunks = self.iter_export_chunks(session_id, format, compress)
             
             if not file_path:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                file_path = f"exports/session_{session_id}_{timestamp}.{format}"
+                extension = f"{format}.gz" if compress else format
+                file_path = str(EXPORT_DIR / f"session_{session_id}_{timestamp}.{extension}")
             
             # สร้างโฟลเดอร์ exports
-            export_dir = Path('conversation_logs/exports')
-            export_dir.mkdir(parents=True, exist_ok=True)
-            
-            # ดึงข้อมูล session
-            session_info = self.get_session_info(session_id)
-            if not session_info:
-                raise ValueError(f"ไม่พบ session: {session_id}")
-            
-            # ดึงการสนทนาทั้งหมด (ต้องเชื่อมต่อกับ AutoLogger)
-            conversations = self._get_session_conversations(session_id)
-            
-            # สร้างข้อมูล export
-            export_data = {
-                'session_info': session_info,
-                'conversations': conversations,
-                'exported_at': datetime.now().isoformat(),
-                'total_conversations': len(conversations)
-            }
+            Path(file_path).parent.mkdir(parents=True, exist_ok=True)
             
-            # บันทึกไฟล์
-            if format == 'json':
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_data, f, indent=2, ensure_ascii=False)
-            elif format == 'txt':
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(f"Session: {session_id}\n")
-                    f.write(f"Title: {session_info.get('title', 'N/A')}\n")
-                    f.write(f"Exported: {export_data['exported_at']}\n")
-                    f.write("=" * 50 + "\n\n")
-                    
-                    for conv in conversations:
-                        f.write(f"[{conv['timestamp']}] User: {conv['user_message']}\n")
-                        f.write(f"[{conv['timestamp']}] AI: {conv['ai_response']}\n\n")
+            # บันทึกไฟล์ทีละ chunk (ลบไฟล์ที่เขียนไม่ครบถ้าเกิดข้อผิดพลาดระหว่างทาง)
+            try:
+                with open(file_path, 'wb') as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+            except BaseException:
+                Path(file_path).unlink(missing_ok=True)
+                raise
             
             # บันทึกข้อมูล export
             self._save_export_record(session_id, format, file_path)
@@ -422,40 +649,126 @@ class ConversationManager:
             self.logger.error(f"ไม่สามารถ export session: {e}")
             return ""
     
+    def iter_export_chunks(self, session_id: str, format: str = 'jsonl',
+                           compress: bool = False, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        สร้าง export ของ session เป็น chunks ของ bytes (สำหรับเขียนไฟล์หรือ chunked HTTP response)
+        ตรวจสอบ format และ session ทันที ส่วนการอ่านข้อมูลเกิดขึ้นเมื่อ iterate
+        """
+        if format not in self.config['export_formats']:
+            raise ValueError(f"ไม่รองรับ format: {format}")
+        
+        # ดึงข้อมูล session
+        session_info = self.get_session_info(session_id)
+        if not session_info:
+            raise ValueError(f"ไม่พบ session: {session_id}")
+        
+        pieces = self._iter_export_text(session_id, session_info, format)
+        return self._iter_encoded_chunks(pieces, compress, chunk_size)
+    
+    def iter_session_conversations(self, session_id: str,
+                                   batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """อ่านการสนทนาของ session ทีละ batch จาก cursor (ไม่โหลดทั้งหมดเข้าหน่วยความจำ)"""
+        if not os.path.exists(self.conversations_db_path):
+            return
+        
+        # connection แยกสำหรับ streaming: consumer (เช่น HTTP response) อาจ iterate ข้าม thread
+        conn = sqlite3.connect(self.conversations_db_path, check_same_thread=False)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM conversations 
+                WHERE session_id = ? 
+                ORDER BY timestamp, id
+            ''', (session_id,))
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield decode_conversation_row(row)
+        finally:
+            conn.close()
+    
+    def _iter_export_text(self, session_id: str, session_info: Dict[str, Any],
+                          format: str) -> Iterator[str]:
+        """สร้างเนื้อหา export เป็นชิ้นข้อความตาม format"""
+        exported_at = datetime.now().isoformat()
+        conversations = self.iter_session_conversations(session_id)
+        
+        if format == 'jsonl':
+            # บรรทัดแรกเป็นข้อมูล session ตามด้วยการสนทนาบรรทัดละรายการ
+            yield json.dumps({'session_info': session_info, 'exported_at': exported_at},
+                             ensure_ascii=False) + '\n'
+            for conv in conversations:
+                yield json.dumps(conv, ensure_ascii=False) + '\n'
+        
+        elif format == 'json':
+            # streaming JSON array: โครงสร้างเดียวกับ export แบบเดิม
+            yield '{\n  "session_info": ' + json.dumps(session_info, ensure_ascii=False)
+            yield ',\n  "exported_at": ' + json.dumps(exported_at)
+            yield ',\n  "conversations": ['
+            total = 0
+            for conv in conversations:
+                yield (',\n    ' if total else '\n    ') + json.dumps(conv, ensure_ascii=False)
+                total += 1
+            yield ('\n  ]' if total else ']') + f',\n  "total_conversations": {total}\n}}\n'
+        
+        elif format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_CSV_COLUMNS)
+            for conv in conversations:
+                row = [conv[column] for column in EXPORT_CSV_COLUMNS]
+                row[-1] = json.dumps(row[-1], ensure_ascii=False) if row[-1] is not None else ''
+                writer.writerow(row)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        
+        elif format == 'txt':
+            yield f"Session: {session_id}\n"
+            yield f"Title: {session_info.get('title', 'N/A')}\n"
+            yield f"Exported: {exported_at}\n"
+            yield "=" * 50 + "\n\n"
+            
+            for conv in conversations:
+                yield f"[{conv['timestamp']}] User: {conv['user_message']}\n"
+                yield f"[{conv['timestamp']}] AI: {conv['ai_response']}\n\n"
+    
+    @staticmethod
+    def _iter_encoded_chunks(pieces: Iterator[str], compress: bool,
+                             chunk_size: int) -> Iterator[bytes]:
+        """รวมชิ้นข้อความเป็น chunks ขนาดประมาณ chunk_size (บีบอัด gzip แบบ incremental ถ้าต้องการ)"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        buffer = []
+        buffered = 0
+        
+        for piece in pieces:
+            data = piece.encode('utf-8')
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                buffer.append(data)
+                buffered += len(data)
+            if buffered >= chunk_size:
+                yield b''.join(buffer)
+                buffer = []
+                buffered = 0
+        
+        if compressor is not None:
+            buffer.append(compressor.flush())
+        if buffer:
+            tail = b''.join(buffer)
+            if tail:
+                yield tail
+    
     def _get_session_conversations(self, session_id: str) -> List[Dict[str, Any]]:
         """ดึงการสนทนาของ session (ต้องเชื่อมต่อกับ AutoLogger)"""
-        # นี้เป็น placeholder - ในระบบจริงต้องเชื่อมต่อกับ AutoLogger
         try:
-            # ตัวอย่างการเชื่อมต่อกับ AutoLogger database
-            auto_logger_db = 'conversation_logs.db'
-            if os.path.exists(auto_logger_db):
-                conn = sqlite3.connect(auto_logger_db)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    SELECT * FROM conversations 
-                    WHERE session_id = ? 
-                    ORDER BY timestamp
-                ''', (session_id,))
-                
-                rows = cursor.fetchall()
-                conversations = []
-                
-                for row in rows:
-                    conversations.append({
-                        'id': row[0],
-                        'session_id': row[1],
-                        'timestamp': row[2],
-                        'user_message': row[3],
-                        'ai_response': row[4],
-                        'context': row[5],
-                        'metadata': json.loads(row[6]) if row[6] else None
-                    })
-                
-                conn.close()
-                return conversations
-            
-            return []
+            return list(self.iter_session_conversations(session_id))
             
         except Exception as e:
             self.logger.error(f"ไม่สามารถดึงการสนทนาของ session: {e}")
@@ -464,7 +777,7 @@ class ConversationManager:
     def _save_export_record(self, session_id: str, format: str, file_path: str):
         """บันทึกข้อมูล export"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -481,7 +794,7 @@ class ConversationManager:
     def get_export_history(self, session_id: str = None) -> List[Dict[str, Any]]:
         """ดึงประวัติการ export"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             if session_id:
@@ -521,7 +834,7 @@ class ConversationManager:
     def archive_session(self, session_id: str) -> bool:
         """archived session"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -543,7 +856,7 @@ class ConversationManager:
     def get_statistics(self) -> Dict[str, Any]:
         """ดึงสถิติ"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # นับ sessions ตาม status
@@ -5,13 +5,17 @@ WAWAGOT.AI Flexible API Gateway
 API สำหรับเข้าถึง/แก้ไขข้อมูลทุกประเภทแบบยืดหยุ่น
 """
 from fastapi import FastAPI, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import sqlite3
 import logging
 import os
+import sys
 import json
 from typing import Dict, Any
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conversation_manager'))
+from conversation_manager import ConversationManager
+
 app = FastAPI()
 
 ADMIN_TOKEN = os.environ.get('WAWAGOT_ADMIN_TOKEN', 'changeme')
@@ -20,6 +24,22 @@ DB_PATH = os.environ.get('WAWAGOT_DB_PATH', 'conversation_logs.db')
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('FlexibleAPIGateway')
 
+EXPORT_MEDIA_TYPES = {
+    'json': 'application/json',
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+    'txt': 'text/plain; charset=utf-8'
+}
+
+_conversation_manager = None
+
+def get_conversation_manager() -> ConversationManager:
+    global _conversation_manager
+    if _conversation_manager is None:
+        _conversation_manager = ConversationManager()
+        _conversation_manager.conversations_db_path = DB_PATH
+    return _conversation_manager
+
 def check_admin(request: Request):
     token = request.headers.get('Authorization')
     if token != f'Bearer {ADMIN_TOKEN}':
@@ -61,6 +81,21 @@ def get_sessions(limit: int = 100, admin: Any = Depends(check_admin)):
     conn.close()
     return {'sessions': rows}
 
+@app.get('/sessions/{session_id}/export')
+def export_session(session_id: str, format: str = 'jsonl', compress: bool = False,
+                   admin: Any = Depends(check_admin)):
+    """Export session แบบ chunked streaming (หน่วยความจำคงที่)"""
+    manager = get_conversation_manager()
+    try:
+        chunks = manager.iter_export_chunks(session_id, format, compress)
+    except ValueError as e:
+        raise HTTPException(status_code=404 if format in EXPORT_MEDIA_TYPES else 400, detail=str(e))
+
+    filename = f'session_{session_id}.{format}' + ('.gz' if compress else '')
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    media_type = 'application/gzip' if compress else EXPORT_MEDIA_TYPES.get(format, 'application/octet-stream')
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
 @app.get('/tags')
 def get_tags(limit: int = 100, admin: Any = Depends(check_admin)):
     conn = sqlite3.connect(DB_PATH)
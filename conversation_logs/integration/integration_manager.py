@@ -22,6 +22,10 @@ sys.path.append('conversation_logs/ai_filter')
 sys.path.append('conversation_logs/conversation_manager')
 sys.path.append('conversation_logs/auto_backup')
 
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from core import sqlite_pool
+
 try:
     from auto_logger import AutoLogger
     from ai_filter import AIFilter
@@ -95,7 +99,7 @@ class IntegrationManager:
     def init_database(self):
         """สร้างฐานข้อมูลสำหรับ Integration Manager"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ตารางการเชื่อมต่อระบบ
@@ -167,6 +171,9 @@ class IntegrationManager:
             # เริ่มต้น ConversationManager
             if self.config['services']['conversation_manager']:
                 self.conversation_manager = ConversationManager()
+                # การสนทนาที่ AutoLogger บันทึกแล้วเข้า search index อัตโนมัติ
+                if self.auto_logger:
+                    self.auto_logger.add_write_listener(self.conversation_manager.index_logged_conversations)
                 self._update_system_status('conversation_manager', 'connected')
                 self.logger.info("เริ่มต้น ConversationManager สำเร็จ")
             
@@ -270,7 +277,7 @@ class IntegrationManager:
     def _process_pending_events(self):
         """ประมวลผล events ที่ค้างอยู่"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -411,7 +418,7 @@ class IntegrationManager:
     def get_system_status(self) -> Dict[str, Any]:
         """ดึงสถานะระบบทั้งหมด"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('SELECT * FROM system_connections')
@@ -436,7 +443,7 @@ class IntegrationManager:
     def get_integration_statistics(self) -> Dict[str, Any]:
         """ดึงสถิติการเชื่อมต่อ"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # สถิติ events
@@ -486,7 +493,7 @@ class IntegrationManager:
     def _update_system_status(self, system_name: str, status: str):
         """อัปเดตสถานะระบบ"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -507,7 +514,7 @@ class IntegrationManager:
                                 target_system: str, event_data: Dict[str, Any]):
         """สร้าง integration event"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -525,7 +532,7 @@ class IntegrationManager:
     def _update_integration_stats(self):
         """อัปเดตสถิติการเชื่อมต่อ"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # นับ events วันนี้
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test AIFilter - ทดสอบ KeywordMatcher (Aho-Corasick) เทียบกับการค้นหาแบบ substring
+และการจัดหมวดหมู่ของ AIFilter ที่ค้นหาคำสำคัญทุกหมวดในรอบเดียว
+"""
+import sys
+import os
+import random
+import sqlite3
+import threading
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_filter'))
+
+from ai_filter import AIFilter, KeywordMatcher
+
+def _naive(patterns, text):
+    """pattern ids ที่พบด้วย substring search ทีละคำ"""
+    text = text.lower()
+    return {pattern_id for pattern_id, pattern in enumerate(patterns) if pattern.lower() in text}
+
+def _create_filter(tmp_path, monkeypatch):
+    # setup_logging สร้าง conversation_logs/logs ใน cwd
+    monkeypatch.chdir(tmp_path)
+    ai_filter = AIFilter()
+    ai_filter.db_path = str(tmp_path / 'ai_filter.db')
+    ai_filter.init_database()
+    return ai_filter
+
+def test_matcher_agrees_with_substring_search():
+    """คำที่ซ้อนกัน/ทับกัน ภาษาไทย และตัวพิมพ์ใหญ่เล็ก ให้ผลเท่ากับ substring search"""
+    patterns = ['he', 'she', 'his', 'hers', 'Python', 'ระบบ', 'ระบบฐานข้อมูล', 'ข้อมูล', 'a', 'aa', 'aaa']
+    matcher = KeywordMatcher()
+    assert [matcher.add(pattern) for pattern in patterns] == list(range(len(patterns)))
+    assert matcher.add('PYTHON') == 4 and len(matcher) == len(patterns)
+
+    texts = ['ushers', 'I like PYTHON and his hat', 'ระบบฐานข้อมูลใหม่', 'aaaa', '', 'nothing here']
+    rng = random.Random(3)
+    texts += [''.join(rng.choice('ahers') for _ in range(rng.randrange(30))) for _ in range(200)]
+    for text in texts:
+        assert matcher.find(text) == _naive(patterns, text), text
+
+def test_matcher_accepts_keywords_after_find():
+    """เพิ่มคำใหม่หลังค้นหาแล้ว ตารางถูกสร้างใหม่ก่อนค้นหาครั้งถัดไป"""
+    matcher = KeywordMatcher()
+    matcher.add('error')
+    assert matcher.find('an error and a failure') == {0}
+    matcher.add('failure')
+    assert matcher.find('an error and a failure') == {0, 1}
+
+def test_find_while_adding_keywords():
+    """find ระหว่างที่อีก thread เพิ่มคำ ใช้ตารางชุดที่ build แล้วโดยไม่ error"""
+    matcher = KeywordMatcher()
+    matcher.add('base')
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        try:
+            while not stop.is_set():
+                assert 0 in matcher.find('database keyword' * 5)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=search)
+    thread.start()
+    for index in range(500):
+        matcher.add(f'keyword{index}')
+    stop.set()
+    thread.join()
+
+    assert errors == []
+    assert matcher.find('keyword499') >= {matcher.add('keyword499')}
+
+def test_filter_categorizes_in_keyword_order(tmp_path, monkeypatch):
+    """confidence = น้ำหนักที่พบ / น้ำหนักรวม และคำที่พบเรียงตามลำดับที่เพิ่ม"""
+    ai_filter = _create_filter(tmp_path, monkeypatch)
+    assert ai_filter.add_category('database', 'ฐานข้อมูล', 'high')
+    assert ai_filter.add_category('error', 'ข้อผิดพลาด')
+    for keyword, weight in (('sqlite', 1.0), ('query', 1.0), ('ฐานข้อมูล', 2.0)):
+        assert ai_filter.add_keyword('database', keyword, weight)
+    assert ai_filter.add_keyword('error', 'exception')
+
+    results = ai_filter.filter_conversation('ฐานข้อมูล SQLite ช้าเวลา Query ใหญ่')
+    assert results['categories'] == ['database']
+    assert results['keywords_found'] == {'database': ['sqlite', 'query', 'ฐานข้อมูล']}
+    assert results['confidence_scores'] == {'database': 1.0}
+
+    partial = ai_filter.filter_conversation('sqlite raised an Exception')
+    assert partial['confidence_scores'] == {'database': 0.25, 'error': 1.0}
+
+def test_filter_conversations_saves_in_one_batch(tmp_path, monkeypatch):
+    """filter_conversations บันทึกผลเฉพาะรายการที่มี conversation_id"""
+    ai_filter = _create_filter(tmp_path, monkeypatch)
+    assert ai_filter.add_category('database')
+    assert ai_filter.add_keyword('database', 'sqlite')
+
+    results = ai_filter.filter_conversations([('sqlite is fast', 1), 'sqlite again', ('no match', 2)])
+    assert [r['categories'] for r in results] == [['database'], ['database'], []]
+
+    conn = sqlite3.connect(ai_filter.db_path)
+    try:
+        rows = conn.execute('SELECT conversation_id FROM filter_results ORDER BY conversation_id').fetchall()
+    finally:
+        conn.close()
+    assert [row[0] for row in rows] == [1]
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test AutoBackup - ทดสอบ incremental backup: backup, แก้ไขไฟล์, หมุนเวียน backup เก่า แล้วกู้คืน
+"""
+import sys
+import os
+import json
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'auto_backup'))
+
+from auto_backup import AutoBackup
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def _read_tree(root):
+    """{relative path: content} ของทุกไฟล์ใน root"""
+    tree = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            with open(path, 'r', encoding='utf-8') as f:
+                tree[os.path.relpath(path, root).replace(os.sep, '/')] = f.read()
+    return tree
+
+def _restore(backup_system, backup_id):
+    restore_path = os.path.join('restored', backup_id)
+    if not backup_system.restore_backup(backup_id, restore_path):
+        return None
+    # backup_paths 'data/' ถูกเก็บเป็นโฟลเดอร์ data ภายใน backup
+    return _read_tree(os.path.join(restore_path, 'data'))
+
+def _backup_modify_rotate_restore(compression_enabled):
+    """ทดสอบ backup -> แก้ไข/ลบไฟล์ -> หมุนเวียน -> กู้คืน"""
+    print(f"=== 💾 ทดสอบ incremental backup (compression={compression_enabled}) ===")
+    workdir = tempfile.mkdtemp()
+    original_cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        with open('config.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'backup_paths': ['data/'],
+                'max_backups': 2,
+                'max_incremental_chain': 2,
+                'compression_enabled': compression_enabled
+            }, f)
+        backup_system = AutoBackup('config.json')
+
+        # full backup
+        _write('data/a.txt', 'a1')
+        _write('data/sub/b.txt', 'b1')
+        b1 = backup_system.create_backup()
+        state1 = _read_tree('data')
+
+        # incremental: แก้ไข a, ลบ b, เพิ่ม c
+        _write('data/a.txt', 'a2-modified')
+        os.remove('data/sub/b.txt')
+        _write('data/c.txt', 'c1')
+        b2 = backup_system.create_backup()
+        state2 = _read_tree('data')
+
+        # incremental: แก้ไข c
+        _write('data/c.txt', 'c2-modified')
+        b3 = backup_system.create_backup()
+        state3 = _read_tree('data')
+
+        # สายยาวครบ max_incremental_chain -> full backup ใหม่ แล้ว incremental ต่อ
+        b4 = backup_system.create_backup()
+        _write('data/sub/d.txt', 'd1')
+        b5 = backup_system.create_backup()
+        state5 = _read_tree('data')
+
+        history = {backup['backup_id']: backup for backup in backup_system.get_backup_history()}
+        print(f"สาย backup: {len(history)} backups")
+        assert [backup_system._get_backup_chain(b)[-1][0] for b in (b1, b2, b3, b4, b5)] == [b1, b2, b3, b4, b5]
+        assert [len(backup_system._get_backup_chain(b)) for b in (b1, b2, b3, b4, b5)] == [1, 2, 3, 1, 2]
+
+        restored_before = [_restore(backup_system, b) for b in (b1, b2, b3)]
+        print(f"กู้คืนก่อนหมุนเวียน: {restored_before}")
+        assert restored_before == [state1, state2, state3]
+
+        # หมุนเวียน: สายแรกถูกลบทั้งสาย สายล่าสุด (full + incremental) ยังกู้คืนได้
+        backup_system._cleanup_old_backups()
+        remaining = sorted(backup['backup_id'] for backup in backup_system.get_backup_history())
+        restored_after = _restore(backup_system, b5)
+        print(f"หมุนเวียน: เหลือ {remaining}, กู้คืนหลังหมุนเวียน: {restored_after}")
+        assert remaining == sorted([b4, b5])
+        assert restored_after == state5
+        assert not backup_system.restore_backup(b2, 'restored/gone')
+
+        # backup ในสายหายไป -> backup ถัดไปเป็น full backup
+        shutil.rmtree('conversation_logs/backups')
+        b6 = backup_system.create_backup()
+        assert len(backup_system._get_backup_chain(b6)) == 1
+        assert _restore(backup_system, b6) == state5
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_backup_modify_rotate_restore():
+    """ทดสอบ backup -> แก้ไข/ลบไฟล์ -> หมุนเวียน -> กู้คืน (บีบอัด)"""
+    _backup_modify_rotate_restore(compression_enabled=True)
+
+def test_backup_modify_rotate_restore_uncompressed():
+    """ทดสอบ backup -> แก้ไข/ลบไฟล์ -> หมุนเวียน -> กู้คืน (ไม่บีบอัด)"""
+    _backup_modify_rotate_restore(compression_enabled=False)
+
+def _run(test):
+    """รันการทดสอบหนึ่งรายการนอก pytest"""
+    try:
+        test()
+        return True
+    except Exception as e:
+        print(f"❌ {test.__name__}: {e!r}")
+        return False
+
+if __name__ == "__main__":
+    results = [_run(test) for test in (
+        test_backup_modify_rotate_restore,
+        test_backup_modify_rotate_restore_uncompressed
+    )]
+    print(f"\n📊 ผ่าน {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test AutoLogger - ทดสอบว่าการสนทนาที่เสีย (poisoned entry) ไม่ทำให้ทั้ง batch หาย
+ฐานข้อมูลที่ถูกล็อกชั่วคราวไม่ทำให้ batch ถูกทิ้ง
+และการสนทนาที่บันทึกแล้วถูกส่งเข้า search index ของ ConversationManager
+"""
+import sys
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'auto_logger'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conversation_manager'))
+
+import auto_logger as auto_logger_module
+from auto_logger import AutoLogger
+from conversation_manager import ConversationManager
+
+def _create_logger(workdir, **config):
+    """สร้าง AutoLogger ที่ใช้ฐานข้อมูลใน workdir"""
+    config['database_path'] = os.path.join(workdir, 'conversation_logs.db')
+    config_path = os.path.join(workdir, 'config.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    return AutoLogger(config_path)
+
+def _count_rows(logger, table):
+    conn = sqlite3.connect(logger.db_path)
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    finally:
+        conn.close()
+
+def _poisoned_batch():
+    """batch 5 รายการ: session_id เป็น None (ผิด NOT NULL) และ metadata ที่แปลงเป็น JSON ไม่ได้"""
+    return [
+        {'session_id': 's1', 'user_message': 'hello', 'ai_response': 'hi', 'metadata': {'turn': 1}},
+        {'session_id': None, 'user_message': 'bad', 'ai_response': 'row'},
+        {'session_id': 's1', 'user_message': 'how are you', 'ai_response': 'fine', 'metadata': {'turn': 2}},
+        {'session_id': 's1', 'user_message': 'bad', 'ai_response': 'metadata', 'metadata': {'obj': object()}},
+        {'session_id': 's2', 'user_message': 'bye', 'ai_response': 'see you'}
+    ]
+
+def test_batch_with_poisoned_entry():
+    """ทดสอบ log_conversations_batch ที่มีรายการเสีย"""
+    print("=== 🧪 ทดสอบ batch ที่มีรายการเสีย ===")
+    workdir = tempfile.mkdtemp()
+    try:
+        logger = _create_logger(workdir, encryption_enabled=False)
+        written = logger.log_conversations_batch(_poisoned_batch())
+        dead_letters = logger.get_dead_letters()
+
+        rows = _count_rows(logger, 'conversations')
+        metadata_rows = _count_rows(logger, 'metadata')
+        errors = sorted(d['user_message'] + ':' + d['ai_response'] for d in dead_letters)
+        print(f"written={written}, rows={rows}, metadata={metadata_rows}, dead_letters={errors}")
+
+        assert written == 3 and rows == 3 and metadata_rows == 2
+        assert errors == ['bad:metadata', 'bad:row']
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_async_ingest_with_poisoned_entry():
+    """ทดสอบ async ingest: รายการเสียไม่ทำให้รายการอื่นใน batch เดียวกันหาย"""
+    print("=== 🧪 ทดสอบ async ingest ที่มีรายการเสีย ===")
+    workdir = tempfile.mkdtemp()
+    try:
+        logger = _create_logger(workdir, async_ingest=True, ingest_flush_interval=5)
+        for conversation in _poisoned_batch():
+            logger.log_conversation(conversation['session_id'], conversation['user_message'],
+                                    conversation['ai_response'], metadata=conversation.get('metadata'))
+        flushed = logger.flush_ingest()
+        logger.stop_async_ingest()
+
+        stats = logger.get_ingest_stats()
+        history = logger.get_conversation_history('s1')
+        print(f"stats={stats}, s1 history={len(history)}")
+
+        assert flushed
+        assert stats['written'] == 3 and stats['dead_lettered'] == 2 and stats['batches'] == 1
+        assert len(history) == 2 and _count_rows(logger, 'conversations') == 3
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_batch_retried_when_database_locked():
+    """ทดสอบว่า batch ถูกเขียนใหม่ทั้งหมดเมื่อฐานข้อมูลถูกล็อกชั่วคราว (ไม่ถูกย้ายไป dead_letters)"""
+    print("=== 🧪 ทดสอบฐานข้อมูลถูกล็อกชั่วคราว ===")
+    workdir = tempfile.mkdtemp()
+    try:
+        logger = _create_logger(workdir, encryption_enabled=False, write_retry_delay=0.01)
+        insert_batch = logger._insert_batch
+        calls = []
+
+        def locked_once(conn, prepared):
+            calls.append(len(prepared))
+            if len(calls) == 1:
+                raise sqlite3.OperationalError('database is locked')
+            return insert_batch(conn, prepared)
+
+        logger._insert_batch = locked_once
+        written = logger.log_conversations_batch([
+            {'session_id': 's1', 'user_message': 'hello', 'ai_response': 'hi'},
+            {'session_id': 's1', 'user_message': 'again', 'ai_response': 'hi again'}
+        ])
+        print(f"written={written}, calls={calls}, dead_letters={len(logger.get_dead_letters())}")
+
+        assert written == 2 and calls == [2, 2]
+        assert logger.get_dead_letters() == []
+        assert _count_rows(logger, 'conversations') == 2
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_async_ingest_registers_atexit_once():
+    """ทดสอบว่า start/stop async ingest ซ้ำลงทะเบียน atexit hook ครั้งเดียว"""
+    print("=== 🧪 ทดสอบ atexit hook ของ async ingest ===")
+    workdir = tempfile.mkdtemp()
+    registered = []
+    register = auto_logger_module.atexit.register
+    auto_logger_module.atexit.register = registered.append
+    try:
+        logger = _create_logger(workdir, encryption_enabled=False)
+        for _ in range(3):
+            logger.start_async_ingest()
+            logger.stop_async_ingest()
+        print(f"registered={len(registered)}")
+
+        assert registered == [logger.stop_async_ingest]
+    finally:
+        auto_logger_module.atexit.register = register
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_logged_conversations_are_searchable():
+    """ทดสอบว่าการสนทนาที่บันทึกแล้วเข้า search index และ snippet เป็นข้อความต้นฉบับ"""
+    print("=== 🧪 ทดสอบ search index จากการบันทึกการสนทนา ===")
+    workdir = tempfile.mkdtemp()
+    try:
+        logger = _create_logger(workdir)
+        manager_config = os.path.join(workdir, 'manager_config.json')
+        with open(manager_config, 'w', encoding='utf-8') as f:
+            json.dump({'manager_database_path': os.path.join(workdir, 'conversation_manager.db')}, f)
+        manager = ConversationManager(manager_config)
+        logger.add_write_listener(manager.index_logged_conversations)
+
+        logger.log_conversation('s1', 'สวัสดีครับ ช่วยตั้งค่าระบบหน่อย', 'ได้เลยครับ', metadata={'keywords': ['setup']})
+        logger.log_conversations_batch([
+            {'session_id': 's2', 'user_message': 'How do I restart the Server?', 'ai_response': 'Use the dashboard.'},
+            {'session_id': None, 'user_message': 'poisoned', 'ai_response': 'server'}
+        ])
+
+        thai = manager.search_conversations('ตั้งค่า')
+        english = manager.search_conversations('server', session_id='s2')
+        by_keyword = manager.search_conversations('setup')
+
+        print(f"thai={[r['snippet'] for r in thai]}, "
+              f"english={[r['snippet'] for r in english]}, keyword={len(by_keyword)}")
+
+        assert len(thai) == 1
+        assert '<mark>ตั้งค่า</mark>' in thai[0]['snippet'] and 'สวัสดีครับ' in thai[0]['snippet']
+        assert len(english) == 1 and '<mark>Server</mark>?' in english[0]['snippet']
+        assert english[0]['conversation_id'] == 2
+        assert [r['conversation_id'] for r in by_keyword] == [1]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def _run(test):
+    """รันการทดสอบหนึ่งรายการนอก pytest"""
+    try:
+        test()
+        return True
+    except Exception as e:
+        print(f"❌ {test.__name__}: {e!r}")
+        return False
+
+if __name__ == "__main__":
+    results = [_run(test) for test in (
+        test_batch_with_poisoned_entry,
+        test_async_ingest_with_poisoned_entry,
+        test_batch_retried_when_database_locked,
+        test_async_ingest_registers_atexit_once,
+        test_logged_conversations_are_searchable
+    )]
+    print(f"\n📊 ผ่าน {sum(results)}/{len(results)}")
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Conversation Export - ทดสอบ export session จากการสนทนาที่ AutoLogger บันทึกจริง
+(ข้อความและ metadata ที่ถูกเข้ารหัส) และการลบไฟล์ export ที่เขียนไม่ครบ
+"""
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'auto_logger'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conversation_manager'))
+
+from auto_logger import AutoLogger
+from conversation_manager import ConversationManager
+
+CONVERSATIONS = [
+    ('สวัสดีครับ', 'สวัสดีค่ะ', 'greeting', {'turn': 1, 'keywords': ['ทักทาย']}),
+    ('How do I export?', 'Use export_session.', None, None),
+    ('ขอบคุณ', 'ยินดีครับ', None, {'turn': 3}),
+]
+
+def _write_config(path, config):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    return str(path)
+
+def _setup(tmp_path, monkeypatch):
+    """AutoLogger (เข้ารหัส) + ConversationManager ที่อ่านฐานข้อมูลเดียวกัน"""
+    monkeypatch.chdir(tmp_path)
+    conversations_db = str(tmp_path / 'conversation_logs.db')
+
+    logger = AutoLogger(_write_config(tmp_path / 'logger.json', {'database_path': conversations_db}))
+    for user_message, ai_response, context, metadata in CONVERSATIONS[:2]:
+        assert logger.log_conversation('s1', user_message, ai_response, context, metadata)
+
+    # แถวที่เขียนตอนปิดการเข้ารหัสอยู่ในฐานข้อมูลเดียวกันได้
+    plain_logger = AutoLogger(_write_config(tmp_path / 'plain.json', {
+        'database_path': conversations_db, 'encryption_enabled': False
+    }))
+    user_message, ai_response, context, metadata = CONVERSATIONS[2]
+    assert plain_logger.log_conversation('s1', user_message, ai_response, context, metadata)
+
+    manager = ConversationManager(_write_config(tmp_path / 'manager.json', {
+        'manager_database_path': str(tmp_path / 'conversation_manager.db'),
+        'conversations_database_path': conversations_db
+    }))
+    assert manager.create_session('s1', title='Export test')
+    return manager
+
+def _expected():
+    return [
+        {'user_message': user_message, 'ai_response': ai_response, 'context': context, 'metadata': metadata}
+        for user_message, ai_response, context, metadata in CONVERSATIONS
+    ]
+
+def _strip(conversations):
+    return [{key: conv[key] for key in ('user_message', 'ai_response', 'context', 'metadata')}
+            for conv in conversations]
+
+def test_export_logged_conversations(tmp_path, monkeypatch):
+    """export ทุก format ได้ข้อความต้นฉบับ (ถอดรหัสแล้ว) ครบทุกแถว"""
+    manager = _setup(tmp_path, monkeypatch)
+
+    with open(manager.export_session('s1', 'json'), encoding='utf-8') as f:
+        exported = json.load(f)
+    assert exported['total_conversations'] == 3
+    assert _strip(exported['conversations']) == _expected()
+
+    with gzip.open(manager.export_session('s1', 'jsonl', compress=True), 'rt', encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]['session_info']['title'] == 'Export test'
+    assert _strip(lines[1:]) == _expected()
+
+    with open(manager.export_session('s1', 'csv'), encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['user_message'] for row in rows] == [conv[0] for conv in CONVERSATIONS]
+    assert json.loads(rows[0]['metadata']) == CONVERSATIONS[0][3]
+
+    with open(manager.export_session('s1', 'txt'), encoding='utf-8') as f:
+        text = f.read()
+    assert 'User: สวัสดีครับ' in text and 'AI: ยินดีครับ' in text
+
+def test_failed_export_removes_partial_file(tmp_path, monkeypatch):
+    """export ที่ล้มเหลวระหว่างทางคืน "" และไม่เหลือไฟล์ที่เขียนไม่ครบ"""
+    manager = _setup(tmp_path, monkeypatch)
+    real_iter = manager.iter_session_conversations
+
+    def failing_iter(session_id, batch_size=1000):
+        for index, conv in enumerate(real_iter(session_id, batch_size)):
+            if index == 1:
+                raise ValueError('corrupt row')
+            yield conv
+
+    monkeypatch.setattr(manager, 'iter_session_conversations', failing_iter)
+    target = tmp_path / 'exports' / 'partial.jsonl'
+    # chunk เล็กเพื่อให้มีข้อมูลถูกเขียนลงไฟล์ก่อนเกิดข้อผิดพลาด
+    monkeypatch.setattr(manager, 'iter_export_chunks',
+                        lambda *args: ConversationManager.iter_export_chunks(manager, 's1', 'jsonl', False, 1))
+
+    assert manager.export_session('s1', 'jsonl', file_path=str(target)) == ''
+    assert not target.exists()
+    assert manager.get_export_history('s1') == []
@@ -9,7 +9,6 @@ for the entire system including memory, configurations, and data.
 import os
 import json
 import shutil
-import zipfile
 import hashlib
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -23,9 +22,17 @@ import threading
 from core.logger import get_logger
 from core.memory_manager import get_memory_manager, MemoryItem
 from core.config_manager import ConfigManager
+from core.chunk_store import ChunkStore, FAST_CHUNKING
+from core.parallel_archive import create_archive, extract_archive, archive_checksums, iter_directory_files
 
 logger = get_logger(__name__)
 
+# Chunking without numpy runs a per-byte Python loop; fall back to zip backups
+DEFAULT_BACKUP_FORMAT = "chunked" if FAST_CHUNKING else "zip"
+
+# Chunked backups are stored as <backup_name>.manifest.json + shared chunk store
+MANIFEST_SUFFIX = ".manifest.json"
+
 class BackupManager:
     """
     Comprehensive backup and restore system
@@ -44,6 +51,12 @@ class BackupManager:
         # Load backup configuration
         self.backup_config = self._load_backup_config(config_path)
         
+        # Content-addressed chunk store shared by all chunked backups
+        self.chunk_store = ChunkStore(
+            str(self.backup_dir / "store"),
+            compression=self.backup_config.get("compression", True)
+        )
+        
         # Initialize backup scheduler
         self.scheduler_thread = None
         self.scheduler_running = False
@@ -57,6 +70,9 @@ class BackupManager:
             "schedule": "0 2 * * *",  # Daily at 2 AM
             "retention_days": 30,
             "compression": True,
+            "backup_format": DEFAULT_BACKUP_FORMAT,  # "chunked" (deduplicating chunk store) or "zip"
+            "compression_codec": "auto",  # zip backups: "auto", "deflate", "zstd" or "stored"
+            "compression_workers": None,  # zip backups: worker threads (default: CPU count)
             "encryption": False,
             "backup_memory": True,
             "backup_configs": True,
@@ -94,6 +110,12 @@ class BackupManager:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 backup_name = f"wawagot_backup_{timestamp}"
             
+            if self.backup_config.get("backup_format", DEFAULT_BACKUP_FORMAT) == "chunked":
+                manifest_path = await self._create_chunked_backup(backup_name)
+                await self._cleanup_old_backups()
+                logger.info(f"Backup completed successfully: {manifest_path}")
+                return str(manifest_path)
+            
             backup_path = self.backup_dir / f"{backup_name}.zip"
             temp_backup_dir = self.temp_dir / backup_name
             
@@ -148,6 +170,116 @@ class BackupManager:
                 await self._notify_backup_failure(str(e))
             raise
     
+    async def _create_chunked_backup(self, backup_name: str) -> Path:
+        """
+        Create a backup in the chunk store
+        
+        Only generated content (memory exports) is staged; all other files are
+        chunked in place, and files unchanged since the previous backup reuse
+        its chunk list without being read.
+        """
+        temp_backup_dir = self.temp_dir / backup_name
+        temp_backup_dir.mkdir(exist_ok=True)
+        
+        try:
+            logger.info(f"Starting chunked backup: {backup_name}")
+            
+            if self.backup_config.get("backup_memory", True):
+                await self._backup_memory(temp_backup_dir)
+            
+            sources = self._collect_backup_sources(temp_backup_dir)
+            previous = self._load_latest_manifest()
+            previous_files = previous.get("files") if previous else None
+            
+            reused_before = self.chunk_store.stats["files_reused"]
+            loop = asyncio.get_running_loop()
+            files = await loop.run_in_executor(None, self.chunk_store.store_files, sources, previous_files)
+            reused = self.chunk_store.stats["files_reused"] - reused_before
+            
+            manifest = {
+                "backup_name": backup_name,
+                "created_at": datetime.now().isoformat(),
+                "version": "3.0.0",
+                "format": "chunked",
+                "components": sorted({path.split("/", 1)[0] for path in files}),
+                "total_size": sum(entry["size"] for entry in files.values()),
+                "files": files
+            }
+            
+            # Verify backup: every referenced chunk must be in the store
+            if self.backup_config.get("verify_backups", True):
+                problems = self.chunk_store.verify(files)
+                if problems:
+                    raise ValueError(f"Backup verification failed: {problems[:5]}")
+            
+            manifest_path = self.backup_dir / f"{backup_name}{MANIFEST_SUFFIX}"
+            temp_manifest = manifest_path.with_suffix(".tmp")
+            with open(temp_manifest, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(temp_manifest, manifest_path)
+            
+            logger.info(f"Chunked backup stored: {len(files)} files, {reused} unchanged files reused")
+            return manifest_path
+            
+        finally:
+            shutil.rmtree(temp_backup_dir, ignore_errors=True)
+    
+    def _collect_backup_sources(self, staging_dir: Path) -> Dict[str, Path]:
+        """Map archive paths to source files (same layout as the zip backups)"""
+        sources: Dict[str, Path] = {}
+        
+        def add_tree(root: Path, prefix: str):
+            for item in root.rglob("*"):
+                if item.is_file():
+                    sources[f"{prefix}/{item.relative_to(root).as_posix()}"] = item
+        
+        # Staged generated content (memory exports)
+        for item in staging_dir.rglob("*"):
+            if item.is_file():
+                sources[item.relative_to(staging_dir).as_posix()] = item
+        
+        if self.backup_config.get("backup_configs", True):
+            if Path("config").exists():
+                add_tree(Path("config"), "configs/config")
+            for pattern in [".cursorrules", ".cursor/mcp.json", "requirements.txt", "requirements_*.txt"]:
+                for file_path in Path(".").glob(pattern):
+                    if file_path.is_file():
+                        sources[f"configs/{file_path.name}"] = file_path
+        
+        if self.backup_config.get("backup_logs", True) and Path("logs").exists():
+            add_tree(Path("logs"), "logs/logs")
+        
+        if self.backup_config.get("backup_data", True) and Path("data").exists():
+            for item in Path("data").iterdir():
+                if item.name in ("backups", "temp"):
+                    continue
+                if item.is_file():
+                    sources[f"data/{item.name}"] = item
+                elif item.is_dir():
+                    add_tree(item, f"data/{item.name}")
+        
+        if self.backup_config.get("backup_pleamthinking", True) and Path("pleamthinking").exists():
+            add_tree(Path("pleamthinking"), "pleamthinking")
+        
+        return sources
+    
+    def list_manifests(self) -> List[Path]:
+        """Chunked backup manifests, oldest first"""
+        return sorted(self.backup_dir.glob(f"*{MANIFEST_SUFFIX}"), key=lambda path: path.stat().st_mtime)
+    
+    def _load_manifest(self, manifest_path: Path) -> Dict[str, Any]:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _load_latest_manifest(self) -> Optional[Dict[str, Any]]:
+        """Latest readable manifest (used to skip unchanged files)"""
+        for manifest_path in reversed(self.list_manifests()):
+            try:
+                return self._load_manifest(manifest_path)
+            except Exception as e:
+                logger.warning(f"Unreadable backup manifest {manifest_path}: {e}")
+        return None
+    
     async def _backup_memory(self, backup_dir: Path):
         """Backup memory data"""
         try:
@@ -300,15 +432,19 @@ class BackupManager:
             return {}
     
     async def _create_compressed_backup(self, source_dir: Path, backup_path: Path, metadata: Dict[str, Any]):
-        """Create compressed backup archive"""
+        """Create compressed backup archive (members compressed in parallel)"""
         try:
-            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for item in source_dir.rglob("*"):
-                    if item.is_file():
-                        arcname = str(item.relative_to(source_dir))
-                        zipf.write(item, arcname)
+            codec = self.backup_config.get("compression_codec", "auto")
+            if not self.backup_config.get("compression", True):
+                codec = "stored"
+            
+            loop = asyncio.get_running_loop()
+            entries = await loop.run_in_executor(
+                None, create_archive, backup_path, iter_directory_files(source_dir),
+                codec, None, self.backup_config.get("compression_workers")
+            )
             
-            logger.info(f"Compressed backup created: {backup_path}")
+            logger.info(f"Compressed backup created: {backup_path} ({len(entries)} files, codec: {codec})")
             
         except Exception as e:
             logger.error(f"Failed to create compressed backup: {e}")
@@ -317,21 +453,19 @@ class BackupManager:
     async def _verify_backup(self, backup_path: Path, metadata: Dict[str, Any]):
         """Verify backup integrity"""
         try:
-            with zipfile.ZipFile(backup_path, 'r') as zipf:
-                # Check if all files are present
-                file_list = zipf.namelist()
-                
-                for expected_file in metadata.get("checksums", {}).keys():
-                    if expected_file not in file_list:
-                        raise ValueError(f"Missing file in backup: {expected_file}")
-                
-                # Verify checksums
-                for file_path, expected_checksum in metadata.get("checksums", {}).items():
-                    if file_path in file_list:
-                        with zipf.open(file_path) as f:
-                            file_hash = hashlib.sha256(f.read()).hexdigest()
-                            if file_hash != expected_checksum:
-                                raise ValueError(f"Checksum mismatch for {file_path}")
+            # Read every member back (zstd members included)
+            loop = asyncio.get_running_loop()
+            archived = await loop.run_in_executor(None, archive_checksums, backup_path)
+            
+            # Check if all files are present
+            for expected_file in metadata.get("checksums", {}).keys():
+                if expected_file not in archived:
+                    raise ValueError(f"Missing file in backup: {expected_file}")
+            
+            # Verify checksums
+            for file_path, expected_checksum in metadata.get("checksums", {}).items():
+                if archived[file_path] != expected_checksum:
+                    raise ValueError(f"Checksum mismatch for {file_path}")
             
             logger.info("Backup verification completed successfully")
             
@@ -359,9 +493,16 @@ class BackupManager:
             
             logger.info(f"Starting restore from: {backup_path}")
             
-            # Extract backup
-            with zipfile.ZipFile(backup_file, 'r') as zipf:
-                zipf.extractall(restore_dir)
+            if backup_file.name.endswith(MANIFEST_SUFFIX):
+                # Rebuild files from the chunk store (chunks restored in parallel)
+                manifest = self._load_manifest(backup_file)
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self.chunk_store.restore_files, manifest["files"], restore_dir)
+                logger.info(f"Restoring backup: {manifest.get('backup_name', 'Unknown')}")
+            else:
+                # Extract backup
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, extract_archive, backup_file, restore_dir)
             
             # Load metadata
             metadata_file = restore_dir / "backup_metadata.json"
@@ -498,7 +639,7 @@ class BackupManager:
             cutoff_date = datetime.now() - timedelta(days=retention_days)
             
             deleted_count = 0
-            for backup_file in self.backup_dir.glob("*.zip"):
+            for backup_file in self._list_backup_files():
                 file_time = datetime.fromtimestamp(backup_file.stat().st_mtime)
                 if file_time < cutoff_date:
                     backup_file.unlink()
@@ -506,10 +647,28 @@ class BackupManager:
             
             if deleted_count > 0:
                 logger.info(f"Cleaned up {deleted_count} old backups")
+                self._collect_chunk_garbage()
             
         except Exception as e:
             logger.error(f"Failed to cleanup old backups: {e}")
     
+    def _collect_chunk_garbage(self):
+        """Delete chunks that no remaining manifest references"""
+        try:
+            manifests = [self._load_manifest(path)["files"] for path in self.list_manifests()]
+        except Exception as e:
+            # Never sweep with an incomplete view of the live manifests
+            logger.warning(f"Skipping chunk garbage collection: {e}")
+            return
+        
+        deleted = self.chunk_store.collect_garbage(manifests)
+        if deleted > 0:
+            logger.info(f"Removed {deleted} unreferenced backup chunks")
+    
+    def _list_backup_files(self) -> List[Path]:
+        """Zip archives and chunked backup manifests"""
+        return list(self.backup_dir.glob("*.zip")) + self.list_manifests()
+    
     async def _notify_backup_failure(self, error_message: str):
         """Notify about backup failure"""
         try:
@@ -580,7 +739,7 @@ class BackupManager:
     def get_backup_stats(self) -> Dict[str, Any]:
         """Get backup system statistics"""
         try:
-            backup_files = list(self.backup_dir.glob("*.zip"))
+            backup_files = self._list_backup_files()
             
             stats = {
                 "total_backups": len(backup_files),
@@ -589,7 +748,9 @@ class BackupManager:
                 "newest_backup": None,
                 "scheduled_backups_enabled": self.backup_config.get("enabled", True),
                 "retention_days": self.backup_config.get("retention_days", 30),
-                "scheduler_running": self.scheduler_running
+                "scheduler_running": self.scheduler_running,
+                "backup_format": self.backup_config.get("backup_format", DEFAULT_BACKUP_FORMAT),
+                "chunk_store": self.chunk_store.get_stats()
             }
             
             if backup_files:
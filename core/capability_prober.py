@@ -0,0 +1,201 @@
+"""
+WAWAGOT.AI - Capability Prober
+==============================
+
+Background prober for dashboard capability status.
+
+Each capability has an optional expensive ``initializer`` (import or
+construct the component) that runs once, and is only retried after
+``retry_ttl`` when it fails, plus a cheap ``probe`` (liveness check)
+that runs every ``ttl`` seconds. Results are kept in a cached snapshot
+with a content ETag, so status endpoints answer in O(1) and can reply
+304 Not Modified when nothing changed.
+"""
+
+import copy
+import hashlib
+import importlib
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Tuple
+
+STATUS_UNKNOWN = "unknown"
+
+def import_component(import_path: str, class_name: Optional[str] = None) -> Any:
+    """
+    Import a module (or one class from it) for use as a capability initializer
+
+    Returns None when it is not importable. Nothing is cached here, so a
+    later retry picks up a component that has been installed since.
+    """
+    try:
+        module = importlib.import_module(import_path)
+        return getattr(module, class_name) if class_name else module
+    except Exception:
+        # Finder caches may still hide files added after this failure
+        importlib.invalidate_caches()
+        return None
+
+class _Capability:
+    __slots__ = ("key", "info", "probe", "ttl", "initializer", "retry_ttl",
+                 "component", "initialized", "status", "error", "checked_at", "next_due")
+
+    def __init__(self, key: str, info: Dict[str, Any], probe: Optional[Callable[[Any], str]],
+                 ttl: float, initializer: Optional[Callable[[], Any]], retry_ttl: float):
+        self.key = key
+        self.info = info
+        self.probe = probe
+        self.ttl = ttl
+        self.initializer = initializer
+        self.retry_ttl = retry_ttl
+        self.component = None
+        self.initialized = initializer is None
+        self.status = STATUS_UNKNOWN
+        self.error = None
+        self.checked_at = None
+        self.next_due = 0.0
+
+class CapabilityProber:
+    """Probe capabilities in a background thread and serve a cached snapshot"""
+
+    def __init__(self, default_ttl: float = 30.0,
+                 on_change: Optional[Callable[[str, str, str], None]] = None):
+        self.default_ttl = default_ttl
+        self.on_change = on_change
+
+        self._capabilities: Dict[str, _Capability] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Cached snapshot, replaced as a whole (readers never lock)
+        self._snapshot: Tuple[Dict[str, Dict[str, Any]], str, str] = ({}, "", datetime.now().isoformat())
+        self.stats = {"probes": 0, "initializations": 0, "changes": 0}
+
+    def register(self, key: str, info: Dict[str, Any], probe: Optional[Callable[[Any], str]] = None,
+                 ttl: Optional[float] = None, initializer: Optional[Callable[[], Any]] = None,
+                 retry_ttl: float = 300.0):
+        """
+        Register a capability
+
+        info: static fields returned with the status (name, description, icon, ...)
+        initializer: expensive setup, its result is passed to probe
+        probe: cheap check returning 'ready' / 'warning' / 'error'
+               (default: 'ready' when the initializer returned something)
+        """
+        capability = _Capability(key, dict(info), probe, ttl or self.default_ttl, initializer, retry_ttl)
+        with self._lock:
+            self._capabilities[key] = capability
+            self._rebuild_snapshot()
+        self._wake.set()
+
+    def start(self):
+        """Start the prober thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="CapabilityProber", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the prober thread"""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def refresh(self, key: Optional[str] = None):
+        """Mark one (or all) capabilities as due now"""
+        with self._lock:
+            for capability in self._capabilities.values():
+                if key is None or capability.key == key:
+                    capability.next_due = 0.0
+        self._wake.set()
+
+    def snapshot(self) -> Tuple[Dict[str, Dict[str, Any]], str, str]:
+        """(capabilities, etag, updated_at) of the latest probe results"""
+        return self._snapshot
+
+    def get_capabilities(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of the cached capabilities"""
+        return copy.deepcopy(self._snapshot[0])
+
+    @property
+    def etag(self) -> str:
+        return self._snapshot[1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prober statistics"""
+        stats = dict(self.stats)
+        stats["capabilities"] = len(self._capabilities)
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+    # Helper methods
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake.clear()
+            now = time.time()
+            for capability in list(self._capabilities.values()):
+                if capability.next_due <= now:
+                    self._check(capability)
+
+            next_due = min((c.next_due for c in self._capabilities.values()), default=now + self.default_ttl)
+            self._wake.wait(max(0.0, next_due - time.time()))
+
+    def _check(self, capability: _Capability):
+        now = time.time()
+        error = None
+        try:
+            if not capability.initialized:
+                self.stats["initializations"] += 1
+                capability.component = capability.initializer()
+                capability.initialized = capability.component is not None
+
+            if capability.initializer is not None and not capability.initialized:
+                status = "error"
+            elif capability.probe is not None:
+                status = capability.probe(capability.component) or "error"
+            else:
+                status = "ready"
+        except Exception as e:
+            status = "error"
+            error = str(e)
+
+        self.stats["probes"] += 1
+        if capability.initializer is not None and not capability.initialized:
+            ttl = capability.retry_ttl
+        else:
+            ttl = capability.ttl
+
+        with self._lock:
+            old_status = capability.status
+            capability.error = error
+            capability.checked_at = datetime.fromtimestamp(now).isoformat()
+            capability.next_due = now + ttl
+            changed = old_status != status
+            if changed:
+                capability.status = status
+                self.stats["changes"] += 1
+                self._rebuild_snapshot()
+
+        if changed and self.on_change:
+            try:
+                self.on_change(capability.key, old_status, status)
+            except Exception as e:
+                print(f"❌ Capability change callback error: {e}")
+
+    def _rebuild_snapshot(self):
+        capabilities = {}
+        for key, capability in self._capabilities.items():
+            entry = dict(capability.info)
+            entry["status"] = capability.status
+            capabilities[key] = entry
+
+        digest = hashlib.sha1(json.dumps(capabilities, sort_keys=True).encode("utf-8")).hexdigest()
+        self._snapshot = (capabilities, digest[:16], datetime.now().isoformat())
@@ -0,0 +1,244 @@
+"""
+WAWAGOT.AI - File State Journal
+===============================
+
+Persistent per-path record of (size, mtime_ns, inode, sha256) used by
+incremental backups. A scan stats every file and only reads the ones
+whose stat no longer matches the journal:
+
+- stat unchanged: unchanged, never opened
+- stat changed, content hash unchanged (touched / copied back): the new
+  stat is recorded but the file is not reported as modified
+- otherwise: added or modified
+- journal paths that were not seen: deleted (kept as tombstones)
+
+Journal updates for a scan are written in a single transaction by
+commit(), after the caller has copied the changed files.
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Callable, Tuple
+
+from core import sqlite_pool
+
+JOURNAL_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS file_journal (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        inode INTEGER NOT NULL,
+        hash TEXT,
+        updated_at REAL NOT NULL,
+        deleted_at REAL
+    )
+'''
+
+UPSERT_SQL = '''
+    INSERT INTO file_journal (path, size, mtime_ns, inode, hash, updated_at, deleted_at)
+    VALUES (?, ?, ?, ?, ?, ?, NULL)
+    ON CONFLICT(path) DO UPDATE SET
+        size = excluded.size, mtime_ns = excluded.mtime_ns, inode = excluded.inode,
+        hash = excluded.hash, updated_at = excluded.updated_at, deleted_at = NULL
+'''
+
+HASH_READ_SIZE = 1024 * 1024
+
+@dataclass
+class FileState:
+    """Journal entry for one file"""
+    size: int
+    mtime_ns: int
+    inode: int
+    hash: Optional[str] = None
+
+    def same_stat(self, other: "FileState") -> bool:
+        return (self.size == other.size and self.mtime_ns == other.mtime_ns
+                and self.inode == other.inode)
+
+@dataclass
+class JournalDiff:
+    """Result of FileJournal.scan()"""
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    touched: int = 0
+    sources: Dict[str, str] = field(default_factory=dict)
+    states: Dict[str, FileState] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> List[str]:
+        """Added and modified paths"""
+        return self.added + self.modified
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "modified": len(self.modified),
+            "deleted": len(self.deleted),
+            "unchanged": self.unchanged,
+            "touched": self.touched
+        }
+
+def hash_file(path: str) -> str:
+    """Streaming SHA-256 of a file"""
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+def walk_files(root: str, include: Optional[Callable[[str, bool], bool]] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    Yield (path, stat) for every regular file under root
+
+    Uses os.scandir so directory entries are not stat'ed twice;
+    include(path, is_dir) can prune directories and skip files.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if include is not None and not include(entry.path, is_dir):
+                            continue
+                        if is_dir:
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+class FileJournal:
+    """SQLite-backed file state journal"""
+
+    def __init__(self, db_path: str, max_workers: Optional[int] = None):
+        self.db_path = db_path
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2))
+
+        conn = sqlite_pool.connect(self.db_path)
+        conn.execute(JOURNAL_SCHEMA)
+        conn.commit()
+        conn.close()
+
+    def load(self) -> Dict[str, FileState]:
+        """Live (non-deleted) journal entries"""
+        conn = sqlite_pool.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT path, size, mtime_ns, inode, hash FROM file_journal WHERE deleted_at IS NULL"
+            ).fetchall()
+        finally:
+            conn.close()
+        return {path: FileState(size, mtime_ns, inode, file_hash) for path, size, mtime_ns, inode, file_hash in rows}
+
+    def scan(self, files: Iterable[Tuple[str, str, os.stat_result]]) -> JournalDiff:
+        """
+        Diff the current files against the journal
+
+        files: (journal key, source path, stat) for every file in the backup set
+        """
+        journal = self.load()
+        diff = JournalDiff()
+        candidates = []
+
+        for key, source, stat in files:
+            state = FileState(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            previous = journal.pop(key, None)
+            if previous is not None and previous.same_stat(state):
+                diff.unchanged += 1
+                continue
+            diff.sources[key] = source
+            diff.states[key] = state
+            candidates.append((key, source, previous))
+
+        # Only files whose stat changed are read
+        def hash_candidate(candidate):
+            key, source, previous = candidate
+            try:
+                return key, previous, hash_file(source)
+            except OSError:
+                return key, previous, None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for key, previous, file_hash in executor.map(hash_candidate, candidates):
+                if file_hash is None:
+                    # Vanished or unreadable since the walk
+                    del diff.states[key]
+                    del diff.sources[key]
+                    if previous is not None:
+                        journal[key] = previous
+                    continue
+
+                diff.states[key].hash = file_hash
+                if previous is None:
+                    diff.added.append(key)
+                elif previous.hash == file_hash:
+                    diff.touched += 1
+                else:
+                    diff.modified.append(key)
+
+        diff.deleted = sorted(journal)
+        diff.added.sort()
+        diff.modified.sort()
+        return diff
+
+    def commit(self, diff: JournalDiff, exclude: Iterable[str] = ()):
+        """
+        Write the journal updates of a scan in one transaction
+
+        exclude: changed paths that were not backed up (e.g. copy failed),
+        so they are reported again by the next scan.
+        """
+        exclude = set(exclude)
+        now = time.time()
+        rows = [
+            (key, state.size, state.mtime_ns, state.inode, state.hash, now)
+            for key, state in diff.states.items() if key not in exclude
+        ]
+
+        conn = sqlite_pool.connect(self.db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(UPSERT_SQL, rows)
+            conn.executemany(
+                "UPDATE file_journal SET deleted_at = ? WHERE path = ?",
+                [(now, key) for key in diff.deleted]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def reset(self):
+        """Forget every entry (next scan reports all files as added)"""
+        conn = sqlite_pool.connect(self.db_path)
+        try:
+            conn.execute("DELETE FROM file_journal")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Journal statistics"""
+        conn = sqlite_pool.connect(self.db_path)
+        try:
+            live, deleted, total_size = conn.execute('''
+                SELECT SUM(deleted_at IS NULL), SUM(deleted_at IS NOT NULL),
+                       SUM(CASE WHEN deleted_at IS NULL THEN size ELSE 0 END)
+                FROM file_journal
+            ''').fetchone()
+        finally:
+            conn.close()
+        return {"files": live or 0, "deleted": deleted or 0, "total_size": total_size or 0}
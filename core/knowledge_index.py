@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Knowledge Index - Inverted index สำหรับค้นหาฐานความรู้
+เก็บ token → posting list (พร้อมน้ำหนักตาม field) และจัดอันดับด้วย BM25
+"""
+
+import json
+import math
+import os
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Any, Tuple
+
+from core.text_tokenizer import tokenize
+
+class KnowledgeIndex:
+    """Inverted index แบบ incremental สำหรับ KnowledgeManager"""
+
+    # น้ำหนักของแต่ละ field (BM25F แบบง่าย)
+    FIELD_WEIGHTS = {
+        "title": 3.0,
+        "tags": 2.0,
+        "description": 1.5,
+        "content": 1.0
+    }
+    INDEX_VERSION = 1
+
+    def __init__(self, index_file: str, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize Knowledge Index
+
+        Args:
+            index_file: Path of the persisted index file
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.index_file = index_file
+        self.k1 = k1
+        self.b = b
+        self.logger = logging.getLogger(__name__)
+
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.doc_categories: Dict[str, str] = {}
+        self.total_length = 0.0
+        self.signature: Optional[str] = None
+
+    def add(self, item: Dict[str, Any]):
+        """เพิ่ม (หรือแทนที่) เอกสารใน index"""
+        doc_id = item["id"]
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+
+        weighted_tf = Counter()
+        length = 0.0
+        for field, weight in self.FIELD_WEIGHTS.items():
+            value = item.get(field) or ""
+            if isinstance(value, list):
+                value = " ".join(value)
+            tokens = tokenize(value)
+            length += weight * len(tokens)
+            for token in tokens:
+                weighted_tf[token] += weight
+
+        for token, tf in weighted_tf.items():
+            self.postings.setdefault(token, {})[doc_id] = tf
+
+        self.doc_terms[doc_id] = list(weighted_tf)
+        self.doc_lengths[doc_id] = length
+        self.doc_categories[doc_id] = item.get("category")
+        self.total_length += length
+
+    def remove(self, doc_id: str):
+        """ลบเอกสารออกจาก index"""
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        for token in terms:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[token]
+
+        self.total_length -= self.doc_lengths.pop(doc_id, 0.0)
+        self.doc_categories.pop(doc_id, None)
+
+    def rebuild(self, items: List[Dict[str, Any]]):
+        """สร้าง index ใหม่ทั้งหมด"""
+        self.postings = {}
+        self.doc_lengths = {}
+        self.doc_terms = {}
+        self.doc_categories = {}
+        self.total_length = 0.0
+        for item in items:
+            self.add(item)
+
+    def search(self, query: str, category: str = None, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        ค้นหาด้วย BM25
+
+        Returns:
+            List of (doc_id, score) sorted by score
+        """
+        query_terms = set(tokenize(query))
+        doc_count = len(self.doc_lengths)
+        if not query_terms or doc_count == 0:
+            return []
+
+        avg_length = self.total_length / doc_count or 1.0
+        scores: Dict[str, float] = {}
+
+        for token in query_terms:
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                if category and self.doc_categories.get(doc_id) != category:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:limit]
+
+    def load(self, signature: str) -> bool:
+        """โหลด index จากไฟล์ (ใช้ได้เฉพาะเมื่อ signature ตรงกับฐานความรู้)"""
+        try:
+            if not os.path.exists(self.index_file):
+                return False
+
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get("version") != self.INDEX_VERSION or data.get("signature") != signature:
+                return False
+
+            self.postings = data["postings"]
+            self.doc_lengths = data["doc_lengths"]
+            self.doc_categories = data["doc_categories"]
+            self.doc_terms = {doc_id: [] for doc_id in self.doc_lengths}
+            for token, posting in self.postings.items():
+                for doc_id in posting:
+                    self.doc_terms[doc_id].append(token)
+            self.total_length = sum(self.doc_lengths.values())
+            self.signature = signature
+            return True
+
+        except Exception as e:
+            self.logger.error(f"❌ Error loading knowledge index: {e}")
+            return False
+
+    def save(self, signature: str) -> bool:
+        """บันทึก index ลงไฟล์"""
+        try:
+            data = {
+                "version": self.INDEX_VERSION,
+                "signature": signature,
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths,
+                "doc_categories": self.doc_categories
+            }
+            tmp_file = self.index_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_file, self.index_file)
+            self.signature = signature
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Error saving knowledge index: {e}")
+            return False
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        return {
+            "documents": len(self.doc_lengths),
+            "terms": len(self.postings),
+            "avg_doc_length": self.total_length / len(self.doc_lengths) if self.doc_lengths else 0
+        }
@@ -15,6 +15,9 @@ import hashlib
 from urllib.parse import urlparse
 import re
 
+from core.knowledge_index import KnowledgeIndex
+from core.knowledge_store import KnowledgeStore
+
 class KnowledgeManager:
     def __init__(self, base_path: str = "Learning-doc-datafiles"):
         """
@@ -26,25 +29,46 @@ class KnowledgeManager:
         self.base_path = base_path
         self.knowledge_file = os.path.join(base_path, "knowledge-base.json")
         self.categories_file = os.path.join(base_path, "categories.json")
+        self.index_file = os.path.join(base_path, "knowledge-index.json")
+        self.log_file = os.path.join(base_path, "knowledge-base.log.jsonl")
         self.logger = logging.getLogger(__name__)
         
         # Create directory if not exists
         os.makedirs(base_path, exist_ok=True)
         
+        # Append-only mutation log + snapshot (knowledge-base.json)
+        self.store = KnowledgeStore(self.knowledge_file, self.log_file)
+        self._replayed_ids: List[str] = []
+        
         # Initialize knowledge base
         self.knowledge_base = self._load_knowledge_base()
         self.categories = self._load_categories()
         
+        # Initialize search index
+        self.index = KnowledgeIndex(self.index_file)
+        self._items_by_id = {item["id"]: item for item in self.knowledge_base["knowledge"]}
+        if self.index.load(self._index_signature()):
+            # Index matches the snapshot, apply only the replayed log tail
+            for knowledge_id in set(self._replayed_ids):
+                item = self._find_item(knowledge_id)
+                if item is not None:
+                    self._index_item(item)
+                else:
+                    self._unindex_item(knowledge_id)
+        else:
+            self.index.rebuild(self.knowledge_base["knowledge"])
+            self.index.save(self._index_signature())
+        
         self.logger.info(f"🧠 Knowledge Manager initialized at {base_path}")
         
     def _load_knowledge_base(self) -> Dict[str, Any]:
         """Load knowledge base from file"""
         try:
-            if os.path.exists(self.knowledge_file):
-                with open(self.knowledge_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.logger.info(f"📚 Loaded {len(data.get('knowledge', []))} knowledge items")
-                    return data
+            data, self._replayed_ids = self.store.load()
+            if data is not None:
+                self.logger.info(f"📚 Loaded {len(data.get('knowledge', []))} knowledge items "
+                                 f"({len(self._replayed_ids)} replayed from log)")
+                return data
             else:
                 # Create new knowledge base
                 default_kb = {
@@ -63,15 +87,75 @@ class KnowledgeManager:
             return {"metadata": {}, "knowledge": [], "categories": []}
     
     def _save_knowledge_base(self, data: Dict[str, Any]) -> bool:
-        """Save knowledge base to file"""
+        """Save full knowledge base snapshot and reset the mutation log (compaction)"""
         try:
-            with open(self.knowledge_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if not self.store.compact(data):
+                return False
+            
+            # Keep persisted search index in sync with the snapshot
+            if hasattr(self, "index"):
+                self.index.save(self._index_signature())
             return True
         except Exception as e:
             self.logger.error(f"❌ Error saving knowledge base: {e}")
             return False
     
+    def _persist_mutation(self, op: str, item: Dict[str, Any] = None, knowledge_id: str = None) -> bool:
+        """Append a single add/update/delete to the mutation log (compacting when it grows)"""
+        metadata = {
+            "total_items": self.knowledge_base["metadata"].get("total_items"),
+            "last_updated": self.knowledge_base["metadata"].get("last_updated")
+        }
+        if not self.store.append(op, item=item, knowledge_id=knowledge_id, metadata=metadata):
+            return False
+        
+        if self.store.needs_compaction():
+            return self._save_knowledge_base(self.knowledge_base)
+        return True
+    
+    def export_knowledge_base(self, path: str = None) -> Dict[str, Any]:
+        """
+        Export the knowledge base in the classic knowledge-base.json format
+        
+        Args:
+            path: Output path (defaults to compacting into knowledge-base.json)
+            
+        Returns:
+            Dict with result status and output path
+        """
+        try:
+            if path is None or os.path.abspath(path) == os.path.abspath(self.knowledge_file):
+                success = self._save_knowledge_base(self.knowledge_base)
+                path = self.knowledge_file
+            else:
+                self.store.write_snapshot(self.knowledge_base, path)
+                success = True
+            
+            if success:
+                return {"success": True, "path": path}
+            return {"success": False, "error": "Failed to export knowledge base"}
+        except Exception as e:
+            self.logger.error(f"❌ Error exporting knowledge base: {e}")
+            return {"success": False, "error": str(e)}
+    
+    def _index_signature(self) -> str:
+        """Signature used to check that the persisted index matches the current snapshot"""
+        return f"{self.store.generation}:{self.store.snapshot_items}"
+    
+    def _find_item(self, knowledge_id: str) -> Optional[Dict[str, Any]]:
+        """Find the first knowledge item with the given ID"""
+        return next((item for item in self.knowledge_base["knowledge"] if item["id"] == knowledge_id), None)
+    
+    def _index_item(self, item: Dict[str, Any]):
+        """Add or refresh a knowledge item in the search index"""
+        self._items_by_id[item["id"]] = item
+        self.index.add(item)
+    
+    def _unindex_item(self, knowledge_id: str):
+        """Remove a knowledge item from the search index"""
+        self._items_by_id.pop(knowledge_id, None)
+        self.index.remove(knowledge_id)
+    
     def _load_categories(self) -> Dict[str, Any]:
         """Load categories configuration"""
         try:
@@ -158,9 +242,10 @@ class KnowledgeManager:
             self.knowledge_base["knowledge"].append(knowledge_item)
             self.knowledge_base["metadata"]["total_items"] = len(self.knowledge_base["knowledge"])
             self.knowledge_base["metadata"]["last_updated"] = datetime.now().isoformat()
+            self._index_item(knowledge_item)
             
-            # Save to file
-            if self._save_knowledge_base(self.knowledge_base):
+            # Append to mutation log
+            if self._persist_mutation("add", item=knowledge_item):
                 self.logger.info(f"✅ Knowledge added successfully: {knowledge_item['id']}")
                 return {
                     "success": True,
@@ -211,9 +296,10 @@ class KnowledgeManager:
             self.knowledge_base["knowledge"].append(knowledge_item)
             self.knowledge_base["metadata"]["total_items"] = len(self.knowledge_base["knowledge"])
             self.knowledge_base["metadata"]["last_updated"] = datetime.now().isoformat()
+            self._index_item(knowledge_item)
             
-            # Save to file
-            if self._save_knowledge_base(self.knowledge_base):
+            # Append to mutation log
+            if self._persist_mutation("add", item=knowledge_item):
                 self.logger.info(f"✅ Knowledge added successfully: {knowledge_item['id']}")
                 return {
                     "success": True,
@@ -255,8 +341,11 @@ class KnowledgeManager:
                         item["summary"] = self._generate_summary(item["content"])
                         item["tags"] = self._extract_tags(item["content"])
                     
-                    # Save to file
-                    if self._save_knowledge_base(self.knowledge_base):
+                    self.knowledge_base["metadata"]["last_updated"] = item["metadata"]["last_updated"]
+                    self._index_item(item)
+                    
+                    # Append to mutation log
+                    if self._persist_mutation("update", item=item):
                         self.logger.info(f"✅ Knowledge updated successfully: {knowledge_id}")
                         return {"success": True, "message": "Knowledge updated successfully"}
                     else:
@@ -285,9 +374,14 @@ class KnowledgeManager:
                     deleted_item = self.knowledge_base["knowledge"].pop(i)
                     self.knowledge_base["metadata"]["total_items"] = len(self.knowledge_base["knowledge"])
                     self.knowledge_base["metadata"]["last_updated"] = datetime.now().isoformat()
+                    remaining = self._find_item(knowledge_id)
+                    if remaining is not None:
+                        self._index_item(remaining)
+                    else:
+                        self._unindex_item(knowledge_id)
                     
-                    # Save to file
-                    if self._save_knowledge_base(self.knowledge_base):
+                    # Append to mutation log
+                    if self._persist_mutation("delete", knowledge_id=knowledge_id):
                         self.logger.info(f"✅ Knowledge deleted successfully: {knowledge_id}")
                         return {"success": True, "message": "Knowledge deleted successfully"}
                     else:
@@ -312,35 +406,19 @@ class KnowledgeManager:
             List of matching knowledge items
         """
         try:
-            query_lower = query.lower()
             results = []
             
-            for item in self.knowledge_base["knowledge"]:
-                # Filter by category if specified
-                if category and item["category"] != category:
+            # Ranked lookup through the inverted index (BM25)
+            for knowledge_id, score in self.index.search(query, category=category, limit=limit):
+                item = self._items_by_id.get(knowledge_id)
+                if item is None:
                     continue
-                
-                # Search in title, description, content, and tags
-                searchable_text = f"{item['title']} {item['description']} {item['content']} {' '.join(item.get('tags', []))}"
-                
-                if query_lower in searchable_text.lower():
-                    # Calculate relevance score (simple implementation)
-                    relevance = 0
-                    if query_lower in item['title'].lower():
-                        relevance += 10
-                    if query_lower in item['description'].lower():
-                        relevance += 5
-                    if query_lower in item['content'].lower():
-                        relevance += 1
-                    
-                    results.append({
-                        **item,
-                        "relevance_score": relevance
-                    })
+                results.append({
+                    **item,
+                    "relevance_score": round(score, 4)
+                })
             
-            # Sort by relevance and limit results
-            results.sort(key=lambda x: x["relevance_score"], reverse=True)
-            return results[:limit]
+            return results
             
         except Exception as e:
             self.logger.error(f"❌ Error searching knowledge: {e}")
@@ -357,10 +435,7 @@ class KnowledgeManager:
     def get_knowledge_by_id(self, knowledge_id: str) -> Optional[Dict[str, Any]]:
         """Get knowledge item by ID"""
         try:
-            for item in self.knowledge_base["knowledge"]:
-                if item["id"] == knowledge_id:
-                    return item
-            return None
+            return self._items_by_id.get(knowledge_id)
         except Exception as e:
             self.logger.error(f"❌ Error getting knowledge by ID: {e}")
             return None
@@ -415,7 +490,8 @@ class KnowledgeManager:
                 "total_items": total_items,
                 "categories": categories,
                 "last_updated": self.knowledge_base["metadata"].get("last_updated"),
-                "created": self.knowledge_base["metadata"].get("created")
+                "created": self.knowledge_base["metadata"].get("created"),
+                "index": self.index.get_statistics()
             }
         except Exception as e:
             self.logger.error(f"❌ Error getting statistics: {e}")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Knowledge Store - Log-structured storage for the knowledge base
+เก็บการเปลี่ยนแปลงแบบ append-only (JSONL) และ compact เป็น snapshot เป็นระยะ
+"""
+
+import json
+import os
+import logging
+from typing import Dict, List, Optional, Any, Tuple
+
+class KnowledgeStore:
+    """Append-only mutation log + snapshot for knowledge-base.json"""
+
+    def __init__(self, snapshot_file: str, log_file: str, compact_threshold: int = 1000,
+                 fsync: bool = False):
+        """
+        Initialize Knowledge Store
+
+        Args:
+            snapshot_file: Snapshot path (existing knowledge-base.json format)
+            log_file: Append-only JSONL mutation log
+            compact_threshold: Number of log records before compaction
+            fsync: fsync the log after every append
+        """
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.logger = logging.getLogger(__name__)
+
+        self.generation = 0
+        self.snapshot_items = 0
+        self.log_records = 0
+        # knowledge id -> byte offset of its latest record in the log
+        self.offsets: Dict[str, int] = {}
+        self._log_handle = None
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """
+        Load snapshot and replay the log tail
+
+        Returns:
+            (knowledge base dict or None, ids touched by the replayed tail)
+        """
+        data = None
+        if os.path.exists(self.snapshot_file):
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.generation = data.get("metadata", {}).get("log_generation", 0)
+            self.snapshot_items = len(data.get("knowledge", []))
+
+        touched = self._replay(data) if data is not None else []
+        return data, touched
+
+    def append(self, op: str, item: Dict[str, Any] = None, knowledge_id: str = None,
+               metadata: Dict[str, Any] = None) -> bool:
+        """Append one mutation record (add/update/delete) to the log"""
+        try:
+            record = {"op": op, "metadata": metadata or {}}
+            if item is not None:
+                record["item"] = item
+                knowledge_id = item["id"]
+            record["id"] = knowledge_id
+
+            handle = self._open_log()
+            offset = handle.tell()
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+            handle.flush()
+            if self.fsync:
+                os.fsync(handle.fileno())
+
+            if op == "delete":
+                self.offsets.pop(knowledge_id, None)
+            else:
+                self.offsets[knowledge_id] = offset
+            self.log_records += 1
+            return True
+
+        except Exception as e:
+            self.logger.error(f"❌ Error appending knowledge log: {e}")
+            return False
+
+    def needs_compaction(self) -> bool:
+        """Check whether the log has grown past the compaction threshold"""
+        return self.log_records >= self.compact_threshold
+
+    def compact(self, data: Dict[str, Any]) -> bool:
+        """Write a new snapshot (atomic rename) and start an empty log"""
+        try:
+            self.generation += 1
+            data.setdefault("metadata", {})["log_generation"] = self.generation
+            self.write_snapshot(data, self.snapshot_file)
+            self.snapshot_items = len(data.get("knowledge", []))
+
+            # Start a fresh log for the new generation
+            self._close_log()
+            self._write_header(self.log_file)
+            self.offsets = {}
+            self.log_records = 0
+            return True
+
+        except Exception as e:
+            self.logger.error(f"❌ Error compacting knowledge store: {e}")
+            return False
+
+    def read_item(self, knowledge_id: str) -> Optional[Dict[str, Any]]:
+        """Read the latest logged version of an item straight from the log"""
+        offset = self.offsets.get(knowledge_id)
+        if offset is None:
+            return None
+
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            f.seek(offset)
+            return json.loads(f.readline()).get("item")
+
+    def write_snapshot(self, data: Dict[str, Any], path: str):
+        """Write the knowledge base in the classic JSON format via atomic rename"""
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+
+    def close(self):
+        """Close the log file handle"""
+        self._close_log()
+
+    # Helper methods
+    def _replay(self, data: Dict[str, Any]) -> List[str]:
+        """Apply log records of the current generation on top of the snapshot"""
+        touched = []
+        if not os.path.exists(self.log_file):
+            return touched
+
+        items = data.setdefault("knowledge", [])
+        valid_end = 0
+
+        with open(self.log_file, 'rb') as f:
+            header = f.readline()
+            try:
+                generation = json.loads(header.decode('utf-8')).get("generation")
+            except ValueError:
+                generation = None
+
+        if generation != self.generation:
+            # Stale log from before the last compaction (already in the snapshot)
+            self._write_header(self.log_file)
+            return touched
+
+        with open(self.log_file, 'rb') as f:
+            f.readline()
+            valid_end = f.tell()
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                try:
+                    record = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    # Torn write at the tail (crash mid-append)
+                    self.logger.warning("⚠️ Truncating incomplete knowledge log record")
+                    break
+
+                valid_end = f.tell()
+                self._apply(items, record)
+                data.setdefault("metadata", {}).update(record.get("metadata", {}))
+                knowledge_id = record.get("id")
+                if record["op"] == "delete":
+                    self.offsets.pop(knowledge_id, None)
+                else:
+                    self.offsets[knowledge_id] = offset
+                touched.append(knowledge_id)
+                self.log_records += 1
+
+        if valid_end < os.path.getsize(self.log_file):
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(valid_end)
+
+        return touched
+
+    def _apply(self, items: List[Dict[str, Any]], record: Dict[str, Any]):
+        """Apply one mutation record to the in-memory item list"""
+        op = record["op"]
+        if op == "add":
+            items.append(record["item"])
+        elif op == "update":
+            for i, item in enumerate(items):
+                if item["id"] == record["id"]:
+                    items[i] = record["item"]
+                    break
+        elif op == "delete":
+            for i, item in enumerate(items):
+                if item["id"] == record["id"]:
+                    items.pop(i)
+                    break
+
+    def _open_log(self):
+        """Open the log for appending (creating it with a header if needed)"""
+        if self._log_handle is None:
+            if not os.path.exists(self.log_file) or os.path.getsize(self.log_file) == 0:
+                self._write_header(self.log_file)
+            self._log_handle = open(self.log_file, 'a', encoding='utf-8')
+        return self._log_handle
+
+    def _close_log(self):
+        if self._log_handle is not None:
+            self._log_handle.close()
+            self._log_handle = None
+
+    def _write_header(self, path: str):
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"generation": self.generation}) + "\n")
+        os.replace(tmp_file, path)
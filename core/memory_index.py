@@ -0,0 +1,167 @@
+"""
+WAWAGOT.AI - Local Memory Index
+===============================
+
+Secondary indexes over MemoryManager.local_cache so that offline
+retrieval and search do not need to scan the whole cache.
+"""
+
+import bisect
+import heapq
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Set, Iterable, Tuple
+
+from core.text_tokenizer import tokenize
+
+ALL_CATEGORIES = "*"
+
+class LocalMemoryIndex:
+    """
+    In-memory secondary indexes for the local memory cache
+
+    - category -> list of (created_ts, id) kept sorted by creation time
+    - tag -> set of ids
+    - token -> set of ids (title + content)
+
+    The lowercased title + content is kept per entry for the substring
+    fallback of search().
+    """
+
+    def __init__(self):
+        self.by_category: Dict[str, List[Tuple[float, str]]] = {}
+        self.by_tag: Dict[str, Set[str]] = {}
+        self.by_token: Dict[str, Set[str]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, memory_id: str, data: Dict[str, Any]):
+        """Index (or re-index) one cache entry"""
+        if memory_id in self._entries:
+            self.remove(memory_id)
+
+        created_ts = self._timestamp(data.get('created_at'))
+        category = data.get('category', '')
+        tags = list(data.get('tags') or [])
+        text = f"{data.get('title', '')} {data.get('content', '')}"
+        tokens = set(tokenize(text))
+
+        key = (created_ts, memory_id)
+        bisect.insort(self.by_category.setdefault(category, []), key)
+        bisect.insort(self.by_category.setdefault(ALL_CATEGORIES, []), key)
+        for tag in tags:
+            self.by_tag.setdefault(tag, set()).add(memory_id)
+        for token in tokens:
+            self.by_token.setdefault(token, set()).add(memory_id)
+
+        self._entries[memory_id] = {
+            "created_ts": created_ts,
+            "category": category,
+            "tags": tags,
+            "tokens": tokens,
+            "text": f"{data.get('title', '')}\n{data.get('content', '')}".lower()
+        }
+
+    def remove(self, memory_id: str):
+        """Remove one cache entry from all indexes"""
+        entry = self._entries.pop(memory_id, None)
+        if entry is None:
+            return
+
+        key = (entry["created_ts"], memory_id)
+        for category in (entry["category"], ALL_CATEGORIES):
+            keys = self.by_category.get(category)
+            if keys:
+                position = bisect.bisect_left(keys, key)
+                if position < len(keys) and keys[position] == key:
+                    keys.pop(position)
+                if not keys:
+                    del self.by_category[category]
+
+        self._discard(self.by_tag, entry["tags"], memory_id)
+        self._discard(self.by_token, entry["tokens"], memory_id)
+
+    def rebuild(self, cache: Dict[str, Dict[str, Any]]):
+        """Rebuild all indexes from the cache"""
+        self.by_category = {}
+        self.by_tag = {}
+        self.by_token = {}
+        self._entries = {}
+        for memory_id, data in cache.items():
+            self.add(memory_id, data)
+
+    def newest(self, category: Optional[str] = None, tags: Optional[List[str]] = None,
+               limit: int = 50) -> List[str]:
+        """Return ids of the newest items matching category/any of tags"""
+        if not tags:
+            keys = self.by_category.get(category or ALL_CATEGORIES, [])
+            return [memory_id for _, memory_id in reversed(keys[-limit:])] if limit > 0 else []
+
+        candidates = set()
+        for tag in tags:
+            candidates |= self.by_tag.get(tag, set())
+        return self._newest_of(candidates, category, limit)
+
+    def search(self, query: str, category: Optional[str] = None,
+               limit: Optional[int] = None) -> List[str]:
+        """
+        Return ids matching the query, newest first
+
+        Items whose title/content contain every query token are returned
+        from the token index. When no item matches that way (partial words
+        such as "ell" in "hello", or part of a Thai word), the items of the
+        category are scanned for the query as a case-insensitive substring
+        of the title or content.
+        """
+        tokens = set(tokenize(query))
+        candidates = set()
+        if tokens:
+            postings = sorted((self.by_token.get(token, set()) for token in tokens), key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    break
+
+        if not candidates:
+            candidates = self._substring_matches(query, category)
+
+        return self._newest_of(candidates, category, limit)
+
+    # Helper methods
+    def _substring_matches(self, query: str, category: Optional[str]) -> Set[str]:
+        needle = query.strip().lower()
+        if not needle:
+            return set()
+        return {memory_id for _, memory_id in self.by_category.get(category or ALL_CATEGORIES, [])
+                if needle in self._entries[memory_id]["text"]}
+
+    def _newest_of(self, ids: Iterable[str], category: Optional[str], limit: Optional[int]) -> List[str]:
+        keyed = [(self._entries[memory_id]["created_ts"], memory_id) for memory_id in ids
+                 if not category or self._entries[memory_id]["category"] == category]
+        if limit is None:
+            keyed.sort(reverse=True)
+        else:
+            keyed = heapq.nlargest(limit, keyed)
+        return [memory_id for _, memory_id in keyed]
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], keys: Iterable[str], memory_id: str):
+        for key in keys:
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(memory_id)
+                if not ids:
+                    del index[key]
+
+    @staticmethod
+    def _timestamp(value: Any) -> float:
+        if isinstance(value, datetime):
+            return value.timestamp()
+        if value:
+            try:
+                return datetime.fromisoformat(str(value)).timestamp()
+            except ValueError:
+                pass
+        return 0.0
@@ -9,6 +9,9 @@ integrating Supabase database with local file storage for optimal performance.
 import os
 import json
 import logging
+import threading
+import atexit
+import weakref
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass, asdict
@@ -26,9 +29,21 @@ except ImportError:
 # Local imports
 from core.logger import get_logger
 from core.config_manager import ConfigManager
+from core.memory_index import LocalMemoryIndex
 
 logger = get_logger(__name__)
 
+# Live managers flushed by a single atexit hook (weak refs, so a manager
+# that is dropped without close() can still be garbage collected)
+_live_managers: "weakref.WeakSet[MemoryManager]" = weakref.WeakSet()
+
+def _flush_live_managers():
+    """Flush pending local cache saves of every live MemoryManager"""
+    for manager in list(_live_managers):
+        manager.close()
+
+atexit.register(_flush_live_managers)
+
 @dataclass
 class MemoryItem:
     """Represents a single memory item"""
@@ -53,22 +68,89 @@ class MemoryItem:
         if self.updated_at is None:
             self.updated_at = datetime.now()
 
+class CategoryFileWriter:
+    """
+    Append-only writer for pleamthinking/<category>.txt with size-based rotation
+    
+    The active file is always <category>.txt; when it would grow past
+    max_bytes it is renamed to <category>.<n>.txt and a new one is started.
+    """
+    
+    def __init__(self, directory: Path, max_bytes: int = 5 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def append(self, category: str, entry: str):
+        """Append one entry to the category file (rotating when needed)"""
+        data = entry.encode('utf-8')
+        
+        with self._lock:
+            category_file = self.directory / f"{category}.txt"
+            size = self._sizes.get(category)
+            if size is None:
+                size = category_file.stat().st_size if category_file.exists() else 0
+            
+            if size > 0 and size + len(data) > self.max_bytes:
+                self._rotate(category, category_file)
+                size = 0
+            
+            with open(category_file, 'ab') as f:
+                f.write(data)
+            
+            self._sizes[category] = size + len(data)
+    
+    def get_files(self, category: str) -> List[Path]:
+        """Get all files of a category, oldest first"""
+        rotated = sorted(
+            self.directory.glob(f"{category}.*.txt"),
+            key=lambda p: int(p.stem.rsplit('.', 1)[-1]) if p.stem.rsplit('.', 1)[-1].isdigit() else 0
+        )
+        current = self.directory / f"{category}.txt"
+        return rotated + ([current] if current.exists() else [])
+    
+    def _rotate(self, category: str, category_file: Path):
+        """Move the active file aside as <category>.<n>.txt"""
+        index = 1
+        for path in self.directory.glob(f"{category}.*.txt"):
+            suffix = path.stem.rsplit('.', 1)[-1]
+            if suffix.isdigit():
+                index = max(index, int(suffix) + 1)
+        os.replace(category_file, self.directory / f"{category}.{index}.txt")
+        logger.info(f"Rotated category file: {category} -> {category}.{index}.txt")
+
 class MemoryManager:
     """
     Advanced memory management system with cloud-first approach
     """
     
-    def __init__(self, config_path: str = "config/supabase_config.json"):
+    def __init__(self, config_path: str = "config/supabase_config.json",
+                 cache_flush_delay: float = 2.0,
+                 category_file_max_bytes: int = 5 * 1024 * 1024):
         self.config = ConfigManager()
         self.supabase: Optional[Client] = None
         self.local_cache: Dict[str, Any] = {}
-        self.memory_dir = Path("pleamthinking")
-        self.backup_dir = Path("data/memory_backups")
+        self.local_index = LocalMemoryIndex()
+        self._memory_objects: Dict[str, MemoryItem] = {}
+        # Absolute paths: the debounced/atexit flush may run after a chdir
+        self.memory_dir = Path("pleamthinking").resolve()
+        self.backup_dir = Path("data/memory_backups").resolve()
         
         # Ensure directories exist
         self.memory_dir.mkdir(exist_ok=True)
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         
+        # Append-only category files
+        self.category_writer = CategoryFileWriter(self.memory_dir, category_file_max_bytes)
+        
+        # Debounced local cache persistence
+        self.cache_flush_delay = cache_flush_delay
+        self._cache_dirty = False
+        self._cache_timer: Optional[threading.Timer] = None
+        self._cache_lock = threading.Lock()
+        _live_managers.add(self)
+        
         # Initialize Supabase connection
         self._init_supabase(config_path)
         
@@ -123,21 +205,80 @@ class MemoryManager:
             if cache_file.exists():
                 with open(cache_file, 'r', encoding='utf-8') as f:
                     self.local_cache = json.load(f)
+                self._rebuild_local_index()
                 logger.info(f"Loaded local cache with {len(self.local_cache)} items")
         except Exception as e:
             logger.error(f"Failed to load local cache: {e}")
             self.local_cache = {}
+            self._rebuild_local_index()
     
     def _save_local_cache(self):
         """Save local memory cache to files"""
         try:
+            with self._cache_lock:
+                self._cache_dirty = False
+                if self._cache_timer is not None:
+                    self._cache_timer.cancel()
+                    self._cache_timer = None
+                snapshot = dict(self.local_cache)
+            
             cache_file = self.memory_dir / "memory_cache.json"
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.local_cache, f, ensure_ascii=False, indent=2, default=str)
+            tmp_file = cache_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp_file, cache_file)
             logger.info("Local cache saved successfully")
         except Exception as e:
             logger.error(f"Failed to save local cache: {e}")
     
+    def _rebuild_local_index(self):
+        """Rebuild secondary indexes over the local cache"""
+        self._memory_objects = {}
+        self.local_index.rebuild(self.local_cache)
+    
+    def _cache_put(self, memory_id: str, data: Dict[str, Any]):
+        """Insert or replace a local cache entry and keep indexes in sync"""
+        self.local_cache[memory_id] = data
+        self._memory_objects.pop(memory_id, None)
+        self.local_index.add(memory_id, data)
+    
+    def _cache_remove(self, memory_id: str):
+        """Remove a local cache entry and its index entries"""
+        self.local_cache.pop(memory_id, None)
+        self._memory_objects.pop(memory_id, None)
+        self.local_index.remove(memory_id)
+    
+    def _cached_memory(self, memory_id: str) -> MemoryItem:
+        """Get a parsed MemoryItem for a cache entry (parsed once)"""
+        memory = self._memory_objects.get(memory_id)
+        if memory is None:
+            memory = self._dict_to_memory(self.local_cache[memory_id])
+            self._memory_objects[memory_id] = memory
+        return memory
+    
+    def _mark_cache_dirty(self):
+        """Schedule a debounced save of the local cache"""
+        with self._cache_lock:
+            self._cache_dirty = True
+            if self._cache_timer is None:
+                self._cache_timer = threading.Timer(self.cache_flush_delay, self.flush_local_cache)
+                self._cache_timer.daemon = True
+                self._cache_timer.start()
+    
+    def flush_local_cache(self):
+        """Save the local cache now if it has unsaved changes"""
+        if self._cache_dirty:
+            self._save_local_cache()
+    
+    def close(self):
+        """Cancel the pending debounced save and flush the local cache"""
+        with self._cache_lock:
+            if self._cache_timer is not None:
+                self._cache_timer.cancel()
+                self._cache_timer = None
+        self.flush_local_cache()
+        _live_managers.discard(self)
+    
     async def store_memory(self, memory: MemoryItem) -> bool:
         """
         Store a memory item (cloud-first approach)
@@ -150,17 +291,17 @@ class MemoryManager:
             if memory.expires_at:
                 memory_data['expires_at'] = memory.expires_at.isoformat()
             
-            # Store in Supabase (primary storage)
+            # Store in Supabase (primary storage, off the event loop)
             if self.supabase:
-                result = self.supabase.table('memory').insert(memory_data).execute()
+                result = await asyncio.to_thread(self.supabase.table('memory').insert(memory_data).execute)
                 if result.data:
                     memory.id = result.data[0]['id']
                     logger.info(f"Memory stored in Supabase with ID: {memory.id}")
             
             # Store in local cache (backup)
             if memory.id:
-                self.local_cache[memory.id] = memory_data
-                self._save_local_cache()
+                self._cache_put(memory.id, memory_data)
+                self._mark_cache_dirty()
             
             # Store in category-specific file
             await self._store_in_category_file(memory)
@@ -171,17 +312,130 @@ class MemoryManager:
             logger.error(f"Failed to store memory: {e}")
             return False
     
+    def _memory_to_row(self, memory: MemoryItem) -> Dict[str, Any]:
+        """Convert MemoryItem to a database row"""
+        memory_data = asdict(memory)
+        memory_data['created_at'] = memory.created_at.isoformat()
+        memory_data['updated_at'] = datetime.now().isoformat()
+        if memory.expires_at:
+            memory_data['expires_at'] = memory.expires_at.isoformat()
+        if memory_data.get('id') is None:
+            # Let the database assign the ID
+            del memory_data['id']
+        return memory_data
+    
+    async def _run_chunks(self, func, chunks: List[Any], max_concurrency: int) -> List[Any]:
+        """Run blocking chunk calls in worker threads with bounded concurrency"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run(chunk):
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(func, chunk)
+                except Exception as e:
+                    return e
+        
+        return await asyncio.gather(*(run(chunk) for chunk in chunks))
+    
+    async def store_memories_bulk(self, memories: List[MemoryItem], chunk_size: int = 500,
+                                  max_concurrency: int = 4, upsert: bool = False) -> List[Dict[str, Any]]:
+        """
+        Store many memory items with multi-row inserts (or upserts)
+        
+        Returns one outcome per input item:
+        {"index", "success", "id", "error"}
+        """
+        outcomes = [{"index": i, "success": False, "id": memory.id, "error": None}
+                    for i, memory in enumerate(memories)]
+        if not memories:
+            return outcomes
+        
+        rows = [self._memory_to_row(memory) for memory in memories]
+        indexed_chunks = [list(range(start, min(start + chunk_size, len(rows))))
+                          for start in range(0, len(rows), chunk_size)]
+        
+        if self.supabase:
+            def execute_chunk(indexes: List[int]):
+                table = self.supabase.table('memory')
+                chunk_rows = [rows[i] for i in indexes]
+                if upsert:
+                    request = table.upsert(chunk_rows, default_to_null=False)
+                else:
+                    request = table.insert(chunk_rows, default_to_null=False)
+                return request.execute()
+            
+            results = await self._run_chunks(execute_chunk, indexed_chunks, max_concurrency)
+            
+            for indexes, result in zip(indexed_chunks, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Bulk store chunk failed ({len(indexes)} items): {result}")
+                    for i in indexes:
+                        outcomes[i]["error"] = str(result)
+                    continue
+                
+                # PostgREST returns rows in insert order
+                returned = result.data or []
+                for position, i in enumerate(indexes):
+                    if position < len(returned):
+                        memories[i].id = returned[position].get('id', memories[i].id)
+                        rows[i] = {**rows[i], **returned[position]}
+                    outcomes[i]["success"] = True
+                    outcomes[i]["id"] = memories[i].id
+        else:
+            # Local-only mode (same behaviour as store_memory)
+            for outcome in outcomes:
+                outcome["success"] = True
+        
+        # Local cache + category files for stored items
+        for outcome in outcomes:
+            if not outcome["success"]:
+                continue
+            i = outcome["index"]
+            memory = memories[i]
+            if memory.id:
+                self._cache_put(memory.id, {**rows[i], 'id': memory.id})
+            await self._store_in_category_file(memory)
+        self._mark_cache_dirty()
+        
+        stored = sum(1 for outcome in outcomes if outcome["success"])
+        logger.info(f"Bulk stored {stored}/{len(memories)} memory items")
+        return outcomes
+    
+    async def retrieve_memories_bulk(self, memory_ids: List[str], chunk_size: int = 200,
+                                     max_concurrency: int = 4) -> Dict[str, Optional[MemoryItem]]:
+        """
+        Retrieve many memory items by ID with batched `in` queries
+        
+        Returns a mapping of every requested ID to its MemoryItem (or None if not found)
+        """
+        found: Dict[str, Optional[MemoryItem]] = {memory_id: None for memory_id in memory_ids}
+        unique_ids = list(found)
+        
+        if self.supabase and unique_ids:
+            chunks = [unique_ids[start:start + chunk_size] for start in range(0, len(unique_ids), chunk_size)]
+            
+            def execute_chunk(ids: List[str]):
+                return self.supabase.table('memory').select('*').in_('id', ids).execute()
+            
+            results = await self._run_chunks(execute_chunk, chunks, max_concurrency)
+            for ids, result in zip(chunks, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Bulk retrieve chunk failed ({len(ids)} ids): {result}")
+                    continue
+                for item in result.data or []:
+                    found[str(item.get('id'))] = self._dict_to_memory(item)
+        
+        # Fallback to local cache for anything not returned
+        for memory_id, memory in found.items():
+            if memory is None and memory_id in self.local_cache:
+                found[memory_id] = self._cached_memory(memory_id)
+        
+        logger.info(f"Bulk retrieved {sum(1 for m in found.values() if m)}/{len(found)} memory items")
+        return found
+    
     async def _store_in_category_file(self, memory: MemoryItem):
         """Store memory in category-specific file"""
         try:
-            category_file = self.memory_dir / f"{memory.category}.txt"
-            
-            # Read existing content
-            existing_content = ""
-            if category_file.exists():
-                with open(category_file, 'r', encoding='utf-8') as f:
-                    existing_content = f.read()
-            
             # Add new memory
             new_entry = f"""
 ===============================================================================
@@ -195,9 +449,8 @@ class MemoryManager:
 
 """
             
-            # Write back to file
-            with open(category_file, 'w', encoding='utf-8') as f:
-                f.write(existing_content + new_entry)
+            # Append to file (rotated by size)
+            self.category_writer.append(memory.category, new_entry)
                 
         except Exception as e:
             logger.error(f"Failed to store in category file: {e}")
@@ -230,19 +483,10 @@ class MemoryManager:
                     memory = self._dict_to_memory(item)
                     memories.append(memory)
             
-            # Fallback to local cache
+            # Fallback to local cache (indexed, already newest first)
             if not memories and self.local_cache:
-                for item_id, item_data in self.local_cache.items():
-                    if category and item_data.get('category') != category:
-                        continue
-                    if tags and not any(tag in item_data.get('tags', []) for tag in tags):
-                        continue
-                    
-                    memory = self._dict_to_memory(item_data)
-                    memories.append(memory)
-                    
-                    if len(memories) >= limit:
-                        break
+                memory_ids = self.local_index.newest(category=category, tags=tags, limit=limit)
+                memories = [self._cached_memory(memory_id) for memory_id in memory_ids]
             
             # Sort by creation date
             memories.sort(key=lambda x: x.created_at, reverse=True)
@@ -300,19 +544,10 @@ class MemoryManager:
                     memory = self._dict_to_memory(item)
                     memories.append(memory)
             
-            # Fallback to local search
+            # Fallback to local search (token index, then substring; newest first)
             if not memories:
-                for item_id, item_data in self.local_cache.items():
-                    if category and item_data.get('category') != category:
-                        continue
-                    
-                    content = item_data.get('content', '').lower()
-                    title = item_data.get('title', '').lower()
-                    query_lower = query.lower()
-                    
-                    if query_lower in content or query_lower in title:
-                        memory = self._dict_to_memory(item_data)
-                        memories.append(memory)
+                memory_ids = self.local_index.search(query, category=category)
+                memories = [self._cached_memory(memory_id) for memory_id in memory_ids]
             
             logger.info(f"Search found {len(memories)} items for query: {query}")
             return memories
@@ -336,8 +571,8 @@ class MemoryManager:
             
             # Update local cache
             if memory_id in self.local_cache:
-                self.local_cache[memory_id].update(updates)
-                self._save_local_cache()
+                self._cache_put(memory_id, {**self.local_cache[memory_id], **updates})
+                self._mark_cache_dirty()
             
             return True
             
@@ -357,8 +592,8 @@ class MemoryManager:
             
             # Delete from local cache
             if memory_id in self.local_cache:
-                del self.local_cache[memory_id]
-                self._save_local_cache()
+                self._cache_remove(memory_id)
+                self._mark_cache_dirty()
             
             return True
             
@@ -420,6 +655,7 @@ class MemoryManager:
             
             # Restore local cache
             self.local_cache = {item.get('id', str(i)): item for i, item in enumerate(memories)}
+            self._rebuild_local_index()
             self._save_local_cache()
             
             logger.info(f"Memory restored from backup: {backup_file}")
@@ -456,11 +692,11 @@ class MemoryManager:
                         expired_ids.append(item_id)
             
             for item_id in expired_ids:
-                del self.local_cache[item_id]
+                self._cache_remove(item_id)
                 count += 1
             
             if count > 0:
-                self._save_local_cache()
+                self._mark_cache_dirty()
                 logger.info(f"Cleaned up {count} expired memory items")
             
             return count
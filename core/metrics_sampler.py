@@ -0,0 +1,346 @@
+"""
+WAWAGOT.AI - Central Metrics Sampler
+====================================
+
+One background thread samples system metrics (psutil) at a fixed cadence
+and publishes each snapshot to every monitor in the process:
+
+- latest(): lock-free latest-value slot (a single reference swap)
+- history(): fixed-size ring of recent snapshots
+- subscribe(): callbacks delivered on the sampler thread, each at its own
+  interval (rounded up to the sampler cadence)
+- add_collector(): extra probes published in snapshot.extra; slow probes
+  (subprocesses, network) run on their own thread with background=True so
+  they never delay a snapshot, only their last value is published
+
+CPU usage is measured with non-blocking psutil.cpu_percent(interval=None),
+i.e. the utilisation since the previous sample, so no consumer has to
+block for a second per reading any more.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable
+
+import psutil
+
+@dataclass
+class MetricsSnapshot:
+    """System metrics at one point in time"""
+    timestamp: float
+    cpu_percent: float
+    cpu_count: int
+    cpu_freq_mhz: Optional[float]
+    memory_total: int
+    memory_available: int
+    memory_used: int
+    memory_percent: float
+    disk_total: int
+    disk_used: int
+    disk_free: int
+    disk_percent: float
+    disk_read_bytes: Optional[int]
+    disk_write_bytes: Optional[int]
+    net_bytes_sent: int
+    net_bytes_recv: int
+    net_packets_sent: int
+    net_packets_recv: int
+    process_count: int
+    load_average: Optional[tuple]
+    process_rss: int
+    process_vms: int
+    process_cpu_percent: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def iso_timestamp(self) -> str:
+        return datetime.fromtimestamp(self.timestamp).isoformat()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["iso_timestamp"] = self.iso_timestamp
+        return data
+
+class _Subscription:
+    __slots__ = ("callback", "interval", "last_delivered")
+
+    def __init__(self, callback: Callable[[MetricsSnapshot], None], interval: float):
+        self.callback = callback
+        self.interval = interval
+        self.last_delivered = 0.0
+
+class _Collector:
+    __slots__ = ("name", "func", "interval", "last_run", "value", "background", "stop_event", "thread")
+
+    def __init__(self, name: str, func: Callable[[], Any], interval: float, background: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.last_run = 0.0
+        self.value = None
+        self.background = background
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def run_once(self):
+        try:
+            self.value = self.func()
+        except Exception as e:
+            self.value = {"error": str(e)}
+        self.last_run = time.time()
+
+class MetricsSampler:
+    """Single shared sampler thread for system metrics"""
+
+    def __init__(self, interval: float = 5.0, history_size: int = 720, disk_path: str = "/"):
+        self.interval = interval
+        self.history_size = history_size
+        self.disk_path = disk_path
+
+        # Latest-value slot and history ring (written only by the sampler)
+        self._latest: Optional[MetricsSnapshot] = None
+        self._ring: List[Optional[MetricsSnapshot]] = [None] * history_size
+        self._seq = 0
+
+        # Copy-on-write lists, replaced under _lock and read without it
+        self._subscriptions: List[_Subscription] = []
+        self._collectors: List[_Collector] = []
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+
+        self._process = psutil.Process()
+        self._cpu_count = psutil.cpu_count()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"samples": 0, "errors": 0, "callback_errors": 0, "last_sample_ms": 0.0}
+
+        # Prime the non-blocking cpu counters
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent()
+
+    def start(self):
+        """Start the sampler thread (idempotent)"""
+        with self._lock:
+            for collector in self._collectors:
+                self._start_collector(collector)
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="MetricsSampler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the sampler thread (and background collectors)"""
+        self._stop_event.set()
+        for collector in self._collectors:
+            collector.stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def subscribe(self, callback: Callable[[MetricsSnapshot], None],
+                  interval: Optional[float] = None) -> _Subscription:
+        """Deliver snapshots to callback at most every `interval` seconds"""
+        subscription = _Subscription(callback, interval or 0.0)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription: _Subscription):
+        """Remove a subscription"""
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def add_collector(self, name: str, func: Callable[[], Any], interval: Optional[float] = None,
+                      background: bool = False):
+        """
+        Add an extra probe whose result goes to snapshot.extra[name]
+
+        By default the probe runs on the sampler thread (and inside
+        sample_now()). With background=True it runs every `interval` seconds
+        on its own thread and snapshots only publish its latest value, so a
+        slow or hung probe cannot stall sampling.
+        """
+        collector = _Collector(name, func, interval or 0.0, background)
+        self.remove_collector(name)
+        with self._lock:
+            self._collectors = self._collectors + [collector]
+        self.start()
+
+    def remove_collector(self, name: str):
+        """Remove an extra probe"""
+        with self._lock:
+            for collector in self._collectors:
+                if collector.name == name:
+                    collector.stop_event.set()
+            self._collectors = [c for c in self._collectors if c.name != name]
+
+    def latest(self, max_age: Optional[float] = None) -> MetricsSnapshot:
+        """
+        Latest snapshot
+
+        Samples synchronously only when nothing has been sampled yet or the
+        latest snapshot is older than max_age seconds.
+        """
+        snapshot = self._latest
+        if snapshot is None or (max_age is not None and time.time() - snapshot.timestamp > max_age):
+            snapshot = self.sample_now()
+        return snapshot
+
+    def history(self, seconds: Optional[float] = None) -> List[MetricsSnapshot]:
+        """Recent snapshots, oldest first"""
+        seq = self._seq
+        ring = list(self._ring)
+        count = min(seq, self.history_size)
+        start = seq - count
+        snapshots = [ring[i % self.history_size] for i in range(start, seq)]
+        snapshots = [s for s in snapshots if s is not None]
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            snapshots = [s for s in snapshots if s.timestamp >= cutoff]
+        return snapshots
+
+    def sample_now(self) -> MetricsSnapshot:
+        """Take a snapshot immediately and publish it"""
+        with self._sample_lock:
+            started = time.perf_counter()
+            snapshot = self._collect()
+            self._publish(snapshot)
+            self.stats["samples"] += 1
+            self.stats["last_sample_ms"] = (time.perf_counter() - started) * 1000
+        return snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sampler statistics"""
+        stats = dict(self.stats)
+        stats.update({
+            "interval": self.interval,
+            "subscribers": len(self._subscriptions),
+            "collectors": [c.name for c in self._collectors],
+            "history": min(self._seq, self.history_size),
+            "running": self._thread is not None and self._thread.is_alive()
+        })
+        return stats
+
+    # Helper methods
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.time()
+            try:
+                snapshot = self.sample_now()
+                self._deliver(snapshot)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"❌ Metrics sampler error: {e}")
+            self._stop_event.wait(max(0.0, self.interval - (time.time() - started)))
+
+    def _start_collector(self, collector: _Collector):
+        """Start the thread of a background collector (caller holds _lock)"""
+        if not collector.background or (collector.thread is not None and collector.thread.is_alive()):
+            return
+        collector.stop_event.clear()
+        collector.thread = threading.Thread(
+            target=self._run_collector, args=(collector,),
+            name=f"MetricsCollector-{collector.name}", daemon=True
+        )
+        collector.thread.start()
+
+    def _run_collector(self, collector: _Collector):
+        # A minimum wait keeps a zero-interval probe from spinning
+        interval = max(collector.interval, self.interval)
+        while not collector.stop_event.is_set():
+            collector.run_once()
+            collector.stop_event.wait(interval)
+
+    def _collect(self) -> MetricsSnapshot:
+        now = time.time()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(self.disk_path)
+        network = psutil.net_io_counters()
+        process_memory = self._process.memory_info()
+
+        cpu_freq = None
+        try:
+            freq = psutil.cpu_freq()
+            cpu_freq = freq.current if freq else None
+        except Exception:
+            pass
+
+        disk_io = None
+        try:
+            disk_io = psutil.disk_io_counters()
+        except Exception:
+            pass
+
+        load_average = None
+        try:
+            load_average = os.getloadavg() if hasattr(os, 'getloadavg') else None
+        except OSError:
+            pass
+
+        extra = {}
+        for collector in self._collectors:
+            if not collector.background and now - collector.last_run >= collector.interval:
+                collector.run_once()
+            extra[collector.name] = collector.value
+
+        return MetricsSnapshot(
+            timestamp=now,
+            cpu_percent=psutil.cpu_percent(interval=None),
+            cpu_count=self._cpu_count,
+            cpu_freq_mhz=cpu_freq,
+            memory_total=memory.total,
+            memory_available=memory.available,
+            memory_used=memory.used,
+            memory_percent=memory.percent,
+            disk_total=disk.total,
+            disk_used=disk.used,
+            disk_free=disk.free,
+            disk_percent=disk.percent,
+            disk_read_bytes=disk_io.read_bytes if disk_io else None,
+            disk_write_bytes=disk_io.write_bytes if disk_io else None,
+            net_bytes_sent=network.bytes_sent,
+            net_bytes_recv=network.bytes_recv,
+            net_packets_sent=network.packets_sent,
+            net_packets_recv=network.packets_recv,
+            process_count=len(psutil.pids()),
+            load_average=load_average,
+            process_rss=process_memory.rss,
+            process_vms=process_memory.vms,
+            process_cpu_percent=self._process.cpu_percent(),
+            extra=extra
+        )
+
+    def _publish(self, snapshot: MetricsSnapshot):
+        self._ring[self._seq % self.history_size] = snapshot
+        self._seq += 1
+        self._latest = snapshot
+
+    def _deliver(self, snapshot: MetricsSnapshot):
+        for subscription in self._subscriptions:
+            # small tolerance so a 5s subscriber is not skipped by scheduling jitter
+            if snapshot.timestamp - subscription.last_delivered < subscription.interval - 0.05 * self.interval:
+                continue
+            subscription.last_delivered = snapshot.timestamp
+            try:
+                subscription.callback(snapshot)
+            except Exception as e:
+                self.stats["callback_errors"] += 1
+                print(f"❌ Metrics subscriber error: {e}")
+
+# Global sampler instance
+_metrics_sampler: Optional[MetricsSampler] = None
+_sampler_lock = threading.Lock()
+
+def get_metrics_sampler() -> MetricsSampler:
+    """Get global metrics sampler instance"""
+    global _metrics_sampler
+    if _metrics_sampler is None:
+        with _sampler_lock:
+            if _metrics_sampler is None:
+                _metrics_sampler = MetricsSampler()
+    return _metrics_sampler
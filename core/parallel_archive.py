@@ -0,0 +1,408 @@
+"""
+WAWAGOT.AI - Parallel Archive Writer
+====================================
+
+Multi-core ZIP writer for backups. Files are read, hashed and compressed
+on a worker pool and assembled into the archive in input order by a
+single writer, so archive creation scales with the number of cores.
+
+Codecs:
+- "stored": no compression
+- "deflate": standard ZIP deflate (fast level by default)
+- "zstd": ZIP method 93, only when the zstandard package is installed
+- "auto": zstd if available, else deflate; already-compressed media
+  (images, video, archives) is always stored
+
+zlib, hashlib and zstandard release the GIL while working on large
+buffers, so a thread pool gives real parallelism without copying file
+contents between processes. Large files are streamed by the writer
+itself to keep memory bounded.
+
+Archives are regular ZIP files (ZIP64 when needed). Use extract_archive()
+to restore them, since zipfile cannot read zstd members before Python 3.14.
+"""
+
+import hashlib
+import os
+import struct
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Tuple, Union
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+METHOD_STORED = 0
+METHOD_DEFLATE = 8
+METHOD_ZSTD = 93
+
+DEFAULT_LEVELS = {"deflate": 3, "zstd": 3}
+
+# Extensions whose content is already compressed
+COMPRESSED_EXTENSIONS = frozenset([
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".zst", ".lz4",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic",
+    ".mp3", ".aac", ".ogg", ".flac", ".m4a",
+    ".mp4", ".mkv", ".avi", ".mov", ".webm",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".whl", ".jar"
+])
+
+# Files larger than this are streamed by the writer instead of a worker
+STREAM_THRESHOLD = 8 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_MARKER = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+def available_codecs() -> List[str]:
+    """Codecs usable in this environment"""
+    codecs = ["stored", "deflate", "auto"]
+    if ZSTD_AVAILABLE:
+        codecs.append("zstd")
+    return codecs
+
+def _resolve_codec(codec: str) -> str:
+    if codec == "auto":
+        return "zstd" if ZSTD_AVAILABLE else "deflate"
+    if codec == "zstd" and not ZSTD_AVAILABLE:
+        logger.warning("zstandard not installed, falling back to deflate")
+        return "deflate"
+    if codec not in ("stored", "deflate", "zstd"):
+        raise ValueError(f"Unknown archive codec: {codec}")
+    return codec
+
+class _Compressor:
+    """Streaming compressor for one member"""
+
+    def __init__(self, codec: str, level: int):
+        self.codec = codec
+        if codec == "deflate":
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, -15)
+        elif codec == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self._obj = None
+
+    @property
+    def method(self) -> int:
+        return {"stored": METHOD_STORED, "deflate": METHOD_DEFLATE, "zstd": METHOD_ZSTD}[self.codec]
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) if self._obj else data
+
+    def flush(self) -> bytes:
+        return self._obj.flush() if self._obj else b""
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+def _compress_file(path: Path, codec: str, level: int) -> Dict[str, Any]:
+    """Worker: read, hash and compress one file in memory"""
+    stat = path.stat()
+    with open(path, "rb") as f:
+        data = f.read()
+
+    method = METHOD_STORED
+    payload = data
+    if codec != "stored" and data:
+        compressor = _Compressor(codec, level)
+        compressed = compressor.compress(data) + compressor.flush()
+        # Keep the original bytes when compression does not help
+        if len(compressed) < len(data):
+            payload = compressed
+            method = compressor.method
+
+    return {
+        "payload": payload,
+        "method": method,
+        "size": len(data),
+        "crc32": zlib.crc32(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "mtime": stat.st_mtime,
+        "mode": stat.st_mode
+    }
+
+class ParallelArchiveWriter:
+    """Write a ZIP archive with members compressed on a worker pool"""
+
+    def __init__(self, archive_path: Union[str, Path], codec: str = "auto",
+                 level: Optional[int] = None, max_workers: Optional[int] = None,
+                 stream_threshold: int = STREAM_THRESHOLD):
+        self.archive_path = Path(archive_path)
+        self.codec = _resolve_codec(codec)
+        self.level = level if level is not None else DEFAULT_LEVELS.get(self.codec, 0)
+        self.max_workers = max_workers or (os.cpu_count() or 2)
+        self.stream_threshold = stream_threshold
+
+        self._file = open(self.archive_path, "wb")
+        self._central: List[bytes] = []
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write_files(self, files: Iterable[Tuple[Union[str, Path], str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Add (source path, archive name) pairs; members keep the input order
+
+        Returns arcname -> {size, compressed_size, crc32, sha256, method}
+        """
+        window = self.max_workers * 2
+        pending: deque = deque()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for source, arcname in files:
+                source = Path(source)
+                codec = self._codec_for(source)
+                if source.stat().st_size > self.stream_threshold:
+                    pending.append((arcname, source, codec, None))
+                else:
+                    pending.append((arcname, source, codec,
+                                    executor.submit(_compress_file, source, codec, self.level)))
+
+                # Bounded window: assemble finished members in order
+                while len(pending) > window:
+                    self._write_pending(pending.popleft())
+
+            while pending:
+                self._write_pending(pending.popleft())
+
+        return self.entries
+
+    def close(self):
+        """Write the central directory"""
+        if self._file is None:
+            return
+
+        cd_offset = self._file.tell()
+        for record in self._central:
+            self._file.write(record)
+        cd_size = self._file.tell() - cd_offset
+        count = len(self._central)
+
+        if count >= ZIP64_COUNT_LIMIT or cd_offset >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+            zip64_offset = self._file.tell()
+            self._file.write(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, 45, 45, 0, 0,
+                                         count, count, cd_size, cd_offset))
+            self._file.write(struct.pack("<IIQI", 0x07064b50, 0, zip64_offset, 1))
+            self._file.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, 0xFFFF, 0xFFFF,
+                                         0xFFFFFFFF, 0xFFFFFFFF, 0))
+        else:
+            self._file.write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, count, count,
+                                         cd_size, cd_offset, 0))
+
+        self._file.close()
+        self._file = None
+
+    # Helper methods
+    def _codec_for(self, source: Path) -> str:
+        if source.suffix.lower() in COMPRESSED_EXTENSIONS:
+            return "stored"
+        return self.codec
+
+    def _write_pending(self, item):
+        arcname, source, codec, future = item
+        if future is None:
+            self._write_streamed(arcname, source, codec)
+        else:
+            result = future.result()
+            self._write_member(arcname, result["payload"], result["method"], result["size"],
+                               result["crc32"], result["mtime"], result["mode"])
+            self.entries[arcname]["sha256"] = result["sha256"]
+
+    def _write_member(self, arcname: str, payload: bytes, method: int, size: int,
+                      crc: int, mtime: float, mode: int):
+        offset = self._file.tell()
+        zip64 = size >= ZIP64_LIMIT or len(payload) >= ZIP64_LIMIT
+        self._write_local_header(arcname, method, crc, len(payload), size, mtime, zip64)
+        self._file.write(payload)
+        self._add_central(arcname, method, crc, len(payload), size, mtime, mode, offset)
+
+    def _write_streamed(self, arcname: str, source: Path, codec: str):
+        """Compress a large file chunk by chunk straight into the archive"""
+        stat = source.stat()
+        offset = self._file.tell()
+        compressor = _Compressor(codec, self.level)
+        self._write_local_header(arcname, compressor.method, 0, 0, 0, stat.st_mtime, True)
+
+        data_start = self._file.tell()
+        crc = 0
+        size = 0
+        file_hash = hashlib.sha256()
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(READ_SIZE), b""):
+                crc = zlib.crc32(block, crc)
+                size += len(block)
+                file_hash.update(block)
+                self._file.write(compressor.compress(block))
+        self._file.write(compressor.flush())
+        data_end = self._file.tell()
+        compressed_size = data_end - data_start
+
+        # Patch crc and sizes into the local header
+        self._file.seek(offset + 14)
+        self._file.write(struct.pack("<I", crc))
+        self._file.seek(offset + 30 + len(arcname.encode("utf-8")) + 4)
+        self._file.write(struct.pack("<QQ", size, compressed_size))
+        self._file.seek(data_end)
+
+        self._add_central(arcname, compressor.method, crc, compressed_size, size,
+                          stat.st_mtime, stat.st_mode, offset)
+        self.entries[arcname]["sha256"] = file_hash.hexdigest()
+
+    def _write_local_header(self, arcname: str, method: int, crc: int, compressed_size: int,
+                            size: int, mtime: float, zip64: bool):
+        name = arcname.encode("utf-8")
+        flags = 0x800 if not arcname.isascii() else 0
+        dos_time, dos_date = _dos_datetime(mtime)
+        extra = b""
+        if zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, size, compressed_size)
+            compressed_size = size = ZIP64_MARKER
+        version = 63 if method == METHOD_ZSTD else (45 if zip64 else 20)
+        self._file.write(struct.pack("<IHHHHHIIIHH", 0x04034b50, version, flags, method,
+                                     dos_time, dos_date, crc, compressed_size, size,
+                                     len(name), len(extra)))
+        self._file.write(name)
+        self._file.write(extra)
+
+    def _add_central(self, arcname: str, method: int, crc: int, compressed_size: int,
+                     size: int, mtime: float, mode: int, offset: int):
+        name = arcname.encode("utf-8")
+        flags = 0x800 if not arcname.isascii() else 0
+        dos_time, dos_date = _dos_datetime(mtime)
+
+        extra_fields = []
+        header_size, header_csize, header_offset = size, compressed_size, offset
+        if size >= ZIP64_LIMIT:
+            extra_fields.append(size)
+            header_size = ZIP64_MARKER
+        if compressed_size >= ZIP64_LIMIT:
+            extra_fields.append(compressed_size)
+            header_csize = ZIP64_MARKER
+        if offset >= ZIP64_LIMIT:
+            extra_fields.append(offset)
+            header_offset = ZIP64_MARKER
+        extra = b""
+        if extra_fields:
+            extra = struct.pack(f"<HH{len(extra_fields)}Q", 0x0001, 8 * len(extra_fields), *extra_fields)
+
+        version = 63 if method == METHOD_ZSTD else (45 if extra_fields else 20)
+        self._central.append(struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014b50, (3 << 8) | version, version, flags, method,
+            dos_time, dos_date, crc, header_csize, header_size, len(name), len(extra),
+            0, 0, 0, (mode & 0xFFFF) << 16, header_offset
+        ) + name + extra)
+
+        self.entries[arcname] = {
+            "size": size,
+            "compressed_size": compressed_size,
+            "crc32": crc,
+            "method": method
+        }
+
+def iter_directory_files(source_dir: Union[str, Path]) -> List[Tuple[Path, str]]:
+    """(path, archive name) pairs for every file under a directory, sorted"""
+    source_dir = Path(source_dir)
+    return sorted(
+        ((path, path.relative_to(source_dir).as_posix()) for path in source_dir.rglob("*") if path.is_file()),
+        key=lambda item: item[1]
+    )
+
+def create_archive(archive_path: Union[str, Path], files: Iterable[Tuple[Union[str, Path], str]],
+                   codec: str = "auto", level: Optional[int] = None,
+                   max_workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """Create a ZIP archive from (path, archive name) pairs using all cores"""
+    with ParallelArchiveWriter(archive_path, codec, level, max_workers) as writer:
+        return writer.write_files(files)
+
+def _iter_member_blocks(zipf: zipfile.ZipFile, archive_path: Union[str, Path],
+                       info: zipfile.ZipInfo) -> Iterable[bytes]:
+    """Decompressed blocks of one member, CRC-checked"""
+    if info.compress_type != METHOD_ZSTD:
+        with zipf.open(info) as member:
+            yield from iter(lambda: member.read(READ_SIZE), b"")
+        return
+
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError(f"zstandard is required to read {info.filename}")
+
+    with open(archive_path, "rb") as archive:
+        archive.seek(info.header_offset)
+        header = archive.read(30)
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        archive.seek(info.header_offset + 30 + name_length + extra_length)
+
+        reader = zstandard.ZstdDecompressor().stream_reader(archive, read_across_frames=False)
+        crc = 0
+        remaining = info.file_size
+        while remaining > 0:
+            block = reader.read(min(READ_SIZE, remaining))
+            if not block:
+                break
+            crc = zlib.crc32(block, crc)
+            remaining -= len(block)
+            yield block
+
+    if crc != info.CRC or remaining:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file {info.filename!r}")
+
+def extract_archive(archive_path: Union[str, Path], dest_dir: Union[str, Path]) -> int:
+    """Extract a ZIP archive, including zstd (method 93) members"""
+    dest_dir = Path(dest_dir)
+    count = 0
+    with zipfile.ZipFile(archive_path, "r") as zipf:
+        for info in zipf.infolist():
+            if info.compress_type != METHOD_ZSTD:
+                zipf.extract(info, dest_dir)
+                count += 1
+                continue
+
+            # Same path sanitising rules as zipfile: no absolute paths or '..'
+            parts = [part for part in info.filename.replace("\\", "/").split("/")
+                     if part not in ("", ".", "..")]
+            target = dest_dir.joinpath(*parts)
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(target, "wb") as out:
+                for block in _iter_member_blocks(zipf, archive_path, info):
+                    out.write(block)
+            count += 1
+    return count
+
+def archive_checksums(archive_path: Union[str, Path]) -> Dict[str, str]:
+    """SHA-256 of every member's content, read back from the archive"""
+    checksums = {}
+    with zipfile.ZipFile(archive_path, "r") as zipf:
+        for info in zipf.infolist():
+            if info.is_dir():
+                continue
+            file_hash = hashlib.sha256()
+            for block in _iter_member_blocks(zipf, archive_path, info):
+                file_hash.update(block)
+            checksums[info.filename] = file_hash.hexdigest()
+    return checksums
@@ -4,7 +4,6 @@ Performance Monitor for WAWAGOT.AI
 """
 
 import time
-import psutil
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
@@ -12,12 +11,15 @@ from collections import deque
 import json
 from pathlib import Path
 
+from core.metrics_sampler import get_metrics_sampler, MetricsSnapshot
+
 class PerformanceMonitor:
     def __init__(self, max_history: int = 1000):
         self.max_history = max_history
         self.metrics_history = deque(maxlen=max_history)
         self.is_monitoring = False
         self.monitor_thread = None
+        self.metrics_subscription = None
         
         # Performance thresholds
         self.cpu_threshold = 80.0  # %
@@ -33,86 +35,64 @@ class PerformanceMonitor:
             return
             
         self.is_monitoring = True
-        self.monitor_thread = threading.Thread(
-            target=self._monitor_loop, 
-            args=(interval,),
-            daemon=True
-        )
-        self.monitor_thread.start()
+        # ใช้ shared metrics sampler แทนการสร้าง thread ของตัวเอง
+        self.metrics_subscription = get_metrics_sampler().subscribe(self._on_snapshot, interval=interval)
         print(f"🔍 Performance Monitor เริ่มต้น (interval: {interval}s)")
         
     def stop_monitoring(self):
         """หยุดการ monitor"""
         self.is_monitoring = False
-        if self.monitor_thread:
-            self.monitor_thread.join(timeout=1.0)
+        if self.metrics_subscription:
+            get_metrics_sampler().unsubscribe(self.metrics_subscription)
+            self.metrics_subscription = None
         print("⏹️ Performance Monitor หยุดแล้ว")
         
-    def _monitor_loop(self, interval: float):
-        """Loop หลักสำหรับ monitoring"""
-        while self.is_monitoring:
-            try:
-                metrics = self._collect_metrics()
-                self.metrics_history.append(metrics)
-                
-                # ตรวจสอบ alerts
-                self._check_alerts(metrics)
-                
-                time.sleep(interval)
-            except Exception as e:
-                print(f"❌ Performance Monitor Error: {e}")
-                time.sleep(interval)
-                
-    def _collect_metrics(self) -> Dict:
-        """เก็บ metrics ระบบ"""
+    def _on_snapshot(self, snapshot: MetricsSnapshot):
+        """รับ snapshot จาก metrics sampler"""
         try:
-            # CPU
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
-            cpu_freq = psutil.cpu_freq()
-            
-            # Memory
-            memory = psutil.virtual_memory()
-            
-            # Disk
-            disk = psutil.disk_usage('/')
+            metrics = self._collect_metrics(snapshot)
+            self.metrics_history.append(metrics)
             
-            # Network
-            network = psutil.net_io_counters()
-            
-            # Process info
-            current_process = psutil.Process()
-            process_memory = current_process.memory_info()
+            # ตรวจสอบ alerts
+            self._check_alerts(metrics)
+        except Exception as e:
+            print(f"❌ Performance Monitor Error: {e}")
+                
+    def _collect_metrics(self, snapshot: Optional[MetricsSnapshot] = None) -> Dict:
+        """เก็บ metrics ระบบ (จาก snapshot ล่าสุดของ metrics sampler)"""
+        try:
+            if snapshot is None:
+                snapshot = get_metrics_sampler().latest(max_age=1.0)
             
             metrics = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': snapshot.iso_timestamp,
                 'cpu': {
-                    'percent': cpu_percent,
-                    'count': cpu_count,
-                    'frequency': cpu_freq.current if cpu_freq else None
+                    'percent': snapshot.cpu_percent,
+                    'count': snapshot.cpu_count,
+                    'frequency': snapshot.cpu_freq_mhz
                 },
                 'memory': {
-                    'total': memory.total,
-                    'available': memory.available,
-                    'percent': memory.percent,
-                    'used': memory.used
+                    'total': snapshot.memory_total,
+                    'available': snapshot.memory_available,
+                    'percent': snapshot.memory_percent,
+                    'used': snapshot.memory_used
                 },
                 'disk': {
-                    'total': disk.total,
-                    'used': disk.used,
-                    'free': disk.free,
-                    'percent': (disk.used / disk.total) * 100
+                    'total': snapshot.disk_total,
+                    'used': snapshot.disk_used,
+                    'free': snapshot.disk_free,
+                    'percent': (snapshot.disk_used / snapshot.disk_total) * 100
                 },
                 'network': {
-                    'bytes_sent': network.bytes_sent,
-                    'bytes_recv': network.bytes_recv,
-                    'packets_sent': network.packets_sent,
-                    'packets_recv': network.packets_recv
+                    'bytes_sent': snapshot.net_bytes_sent,
+                    'bytes_recv': snapshot.net_bytes_recv,
+                    'packets_sent': snapshot.net_packets_sent,
+                    'packets_recv': snapshot.net_packets_recv
                 },
                 'process': {
-                    'memory_rss': process_memory.rss,
-                    'memory_vms': process_memory.vms,
-                    'cpu_percent': current_process.cpu_percent()
+                    'memory_rss': snapshot.process_rss,
+                    'memory_vms': snapshot.process_vms,
+                    'cpu_percent': snapshot.process_cpu_percent
                 }
             }
             
@@ -0,0 +1,227 @@
+"""
+WAWAGOT.AI - Shared SQLite Connection Manager
+=============================================
+
+Thread-aware pool of persistent SQLite connections shared by every
+SQLite-backed subsystem. Each thread keeps its own idle connections per
+database path, so ``connect(path)`` / ``conn.close()`` become a cheap
+checkout / return instead of opening the database file every time.
+
+Every pooled connection is tuned once when it is created:
+WAL journal, synchronous=NORMAL, larger page cache, mmap I/O and a
+bigger prepared-statement cache.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -8000,          # ~8MB page cache
+    "mmap_size": 64 * 1024 * 1024,
+    "temp_store": "MEMORY"
+}
+
+class PooledConnection:
+    """
+    sqlite3.Connection proxy handed out by the pool
+
+    close() returns the connection to the pool instead of closing it.
+    Uncommitted work is rolled back and row_factory is reset, so callers
+    see the same behaviour as with a fresh connection.
+    """
+
+    def __init__(self, manager: "SQLiteConnectionManager", key: str, conn: sqlite3.Connection,
+                 identity: tuple = None):
+        object.__setattr__(self, "_manager", manager)
+        object.__setattr__(self, "_key", key)
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_identity", identity)
+        object.__setattr__(self, "_owner", threading.get_ident())
+
+    def __getattr__(self, name: str) -> Any:
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        return getattr(conn, name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        """Return the connection to the pool"""
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            return
+        object.__setattr__(self, "_conn", None)
+        if threading.get_ident() == self._owner:
+            self._manager._release(self._key, conn, self._identity)
+        # Garbage collected on another thread: drop it, sqlite closes it on dealloc
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+class SQLiteConnectionManager:
+    """Per-thread pool of tuned SQLite connections keyed by database path"""
+
+    def __init__(self, pragmas: Dict[str, Any] = None, cached_statements: int = 256,
+                 timeout: float = 30.0, max_idle_per_thread: int = 4):
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self.max_idle_per_thread = max_idle_per_thread
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        # Last file identity seen per database path (shared by all threads)
+        self._identities: Dict[str, Optional[tuple]] = {}
+        self.stats = {"created": 0, "reused": 0, "closed": 0}
+
+    def connect(self, db_path: Union[str, Path]) -> Union[PooledConnection, sqlite3.Connection]:
+        """Check out a connection for the current thread"""
+        path = str(db_path)
+        if path == ":memory:" or path.startswith("file::memory:"):
+            # Every in-memory connection is its own database, never pool it
+            return sqlite3.connect(path, timeout=self.timeout)
+
+        key = os.path.abspath(path)
+        idle = self._idle().get(key)
+        identity = self._file_identity(key)
+
+        conn = None
+        while idle and conn is None:
+            candidate, candidate_identity = idle.pop()
+            if candidate_identity == identity:
+                conn = candidate
+                with self._stats_lock:
+                    self.stats["reused"] += 1
+            else:
+                # Database file was replaced or removed (e.g. restore), drop stale handle
+                self._drop_stale(key, candidate, identity)
+
+        if conn is None:
+            conn = self._create(path)
+            identity = self._file_identity(key)
+            with self._stats_lock:
+                self._identities[key] = identity
+
+        return PooledConnection(self, key, conn, identity)
+
+    @contextmanager
+    def transaction(self, db_path: Union[str, Path]):
+        """Check out a connection and commit (or roll back) around the block"""
+        conn = self.connect(db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def close_thread_connections(self):
+        """Close idle connections owned by the current thread"""
+        idle = self._idle()
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+                with self._stats_lock:
+                    self.stats["closed"] += 1
+        idle.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._stats_lock:
+            return dict(self.stats)
+
+    # Helper methods
+    def _idle(self) -> Dict[str, List[tuple]]:
+        idle = getattr(self._local, "idle", None)
+        if idle is None:
+            idle = {}
+            self._local.idle = idle
+        return idle
+
+    @staticmethod
+    def _file_identity(path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+            return (stat.st_dev, stat.st_ino)
+        except OSError:
+            return None
+
+    def _drop_stale(self, key: str, conn: sqlite3.Connection, identity: Optional[tuple]):
+        """Close a handle to a replaced database file"""
+        with self._stats_lock:
+            first = self._identities.get(key) != identity
+            self._identities[key] = identity
+            self.stats["closed"] += 1
+
+        if first and identity is not None:
+            # The old file's WAL keeps its name and would be replayed onto the
+            # replacement; fold it into the old file and truncate it first
+            try:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error:
+                pass
+        conn.close()
+
+    def _create(self, path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, timeout=self.timeout, cached_statements=self.cached_statements)
+        for name, value in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {name}={value}")
+            except sqlite3.DatabaseError:
+                # e.g. WAL not supported on this filesystem
+                pass
+        with self._stats_lock:
+            self.stats["created"] += 1
+        return conn
+
+    def _release(self, key: str, conn: sqlite3.Connection, identity: Optional[tuple]):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            conn.text_factory = str
+        except sqlite3.Error:
+            conn.close()
+            return
+
+        idle = self._idle().setdefault(key, [])
+        if len(idle) < self.max_idle_per_thread:
+            idle.append((conn, identity))
+        else:
+            conn.close()
+            with self._stats_lock:
+                self.stats["closed"] += 1
+
+# Global connection manager instance
+_connection_manager: Optional[SQLiteConnectionManager] = None
+_manager_lock = threading.Lock()
+
+def get_connection_manager() -> SQLiteConnectionManager:
+    """Get global SQLite connection manager instance"""
+    global _connection_manager
+    if _connection_manager is None:
+        with _manager_lock:
+            if _connection_manager is None:
+                _connection_manager = SQLiteConnectionManager()
+    return _connection_manager
+
+def connect(db_path: Union[str, Path]):
+    """Drop-in replacement for sqlite3.connect backed by the shared pool"""
+    return get_connection_manager().connect(db_path)
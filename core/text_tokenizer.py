@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Text Tokenizer - ตัดคำสำหรับงานค้นหา (รองรับภาษาไทยและอังกฤษ)
+ใช้ pythainlp ตัดคำภาษาไทยถ้ามี ไม่เช่นนั้นใช้ character bigrams แทน
+"""
+
+import re
+from functools import lru_cache
+from typing import List
+
+try:
+    from pythainlp import word_tokenize
+    PYTHAINLP_AVAILABLE = True
+except ImportError:
+    PYTHAINLP_AVAILABLE = False
+
+# ช่วงตัวอักษรไทย / คำภาษาอื่น (ตัวอักษร ตัวเลข underscore)
+_THAI_RUN = re.compile(r'[฀-๿]+')
+_TOKEN_RUN = re.compile(r'[฀-๿]+|[^\W฀-๿]+', re.UNICODE)
+
+STOPWORDS = frozenset([
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'a', 'an', 'is', 'are', 'was', 'be', 'it', 'this', 'that', 'as', 'from'
+])
+
+@lru_cache(maxsize=50000)
+def _segment_thai(run: str) -> tuple:
+    """ตัดคำภาษาไทยหนึ่งช่วง"""
+    if PYTHAINLP_AVAILABLE:
+        return tuple(word.strip() for word in word_tokenize(run, engine="newmm", keep_whitespace=False) if word.strip())
+
+    # Fallback: character bigrams (ค้นหาได้แม้ไม่มีตัวตัดคำ)
+    if len(run) < 2:
+        return (run,)
+    return tuple(run[i:i + 2] for i in range(len(run) - 1))
+
+def tokenize(text: str, remove_stopwords: bool = True) -> List[str]:
+    """ตัดข้อความเป็น tokens ตัวพิมพ์เล็ก"""
+    if not text:
+        return []
+
+    tokens = []
+    for run in _TOKEN_RUN.findall(text.lower()):
+        if _THAI_RUN.match(run):
+            tokens.extend(_segment_thai(run))
+        elif not remove_stopwords or run not in STOPWORDS:
+            tokens.append(run)
+    return tokens
+
+def segment(text: str) -> str:
+    """แทรกช่องว่างระหว่างคำภาษาไทย (สำหรับ tokenizer ที่แยกคำด้วยช่องว่าง)"""
+    if not text:
+        return ""
+    return _THAI_RUN.sub(lambda m: " ".join(_segment_thai(m.group(0))), text)
@@ -4,7 +4,7 @@
 Real-time Dashboard Server for Backup-byGod - Enhanced Version
 """
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, render_template, jsonify, request, send_file, Response
 from flask_socketio import SocketIO, emit
 import json
 import time
@@ -18,10 +18,12 @@ import sqlite3
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.capability_prober import CapabilityProber, import_component
 
 # Add error handling for imports
 try:
     import psutil
+    from core.metrics_sampler import get_metrics_sampler
 except ImportError:
     print("Warning: psutil not available, system monitoring limited")
     psutil = None
@@ -71,8 +73,6 @@ system_status = {
     'last_update': datetime.now().isoformat()
 }
 
-# เพิ่ม state cache สำหรับ capabilities
-capability_state_cache = {}
 # เพิ่ม cache สำหรับ component imports เพื่อป้องกันการ import ซ้ำ
 component_cache = {}
 
@@ -129,294 +129,141 @@ else:
     dashboard_logger.add_log('warning', 'God Mode Knowledge Manager not available')
 
 def safe_import_component(component_name, import_path, class_name=None):
-    """Import component อย่างปลอดภัยและ cache ผลลัพธ์"""
+    """Import component อย่างปลอดภัยและ cache ผลลัพธ์ที่สำเร็จ"""
     if component_name in component_cache:
         return component_cache[component_name]
     
-    try:
-        module = __import__(import_path, fromlist=[class_name] if class_name else [])
-        if class_name:
-            component = getattr(module, class_name)
-        else:
-            component = module
+    # cache เฉพาะที่ import สำเร็จ ให้ prober ลองใหม่ได้เมื่อ component พร้อมภายหลัง
+    component = import_component(import_path, class_name)
+    if component is not None:
         component_cache[component_name] = component
-        return component
-    except Exception as e:
-        component_cache[component_name] = None
-        return None
+    return component
 
 def get_system_capabilities():
-    """Get system capabilities status (log เฉพาะเมื่อสถานะเปลี่ยน)"""
-    global capability_state_cache
-    capabilities = {
-        'chrome_automation': {
-            'name': 'Chrome Automation',
-            'description': 'ควบคุม Chrome ด้วย AI และ Selenium',
-            'status': 'unknown',
-            'icon': '🌐'
-        },
-        'ai_integration': {
-            'name': 'AI Integration',
-            'description': 'การประมวลผล AI แบบ Multimodal',
-            'status': 'unknown',
-            'icon': '🧠'
-        },
-        'thai_processor': {
-            'name': 'Thai Language Processor',
-            'description': 'ประมวลผลภาษาไทยและ OCR',
-            'status': 'unknown',
-            'icon': '🇹🇭'
-        },
-        'visual_recognition': {
-            'name': 'Visual Recognition',
-            'description': 'การจดจำภาพและวิเคราะห์ภาพ',
-            'status': 'unknown',
-            'icon': '👁️'
-        },
-        'backup_controller': {
-            'name': 'Backup Controller',
-            'description': 'ควบคุมการสำรองข้อมูลอัตโนมัติ',
-            'status': 'unknown',
-            'icon': '💾'
-        },
-        'supabase_integration': {
-            'name': 'Supabase Database',
-            'description': 'Cloud Database และ Real-time Features',
-            'status': 'unknown',
-            'icon': '☁️'
-        },
-        'environment_cards': {
-            'name': 'Environment Cards',
-            'description': 'แสดงข้อมูล Environment ของโปรแกรมต่างๆ',
-            'status': 'unknown',
-            'icon': '📋'
-        },
-        'knowledge_manager': {
-            'name': 'Knowledge Manager',
-            'description': 'จัดการฐานความรู้สำหรับการเรียนรู้และควบคุมระบบ',
-            'status': 'unknown',
-            'icon': '🧠'
-        },
-        'godmode_knowledge': {
-            'name': 'God Mode Knowledge',
-            'description': 'ฐานข้อมูลความรู้ถาวรสำหรับ God Mode',
-            'status': 'unknown',
-            'icon': '⚡'
-        },
-        'gpu_processing': {
-            'name': 'GPU Processing',
-            'description': 'การประมวลผลด้วย GPU (RTX 4060)',
-            'status': 'unknown',
-            'icon': '🎮'
-        },
-        'smart_allocator': {
-            'name': 'Smart Resource Allocator',
-            'description': 'จัดสรรทรัพยากรอัจฉริยะ',
-            'status': 'unknown',
-            'icon': '⚡'
-        }
+    """Get system capabilities status (cached snapshot จาก background prober)"""
+    return capability_prober.get_capabilities()
+
+# Capability metadata (status มาจาก background prober)
+CAPABILITY_INFO = {
+    'chrome_automation': {
+        'name': 'Chrome Automation',
+        'description': 'ควบคุม Chrome ด้วย AI และ Selenium',
+        'icon': '🌐'
+    },
+    'ai_integration': {
+        'name': 'AI Integration',
+        'description': 'การประมวลผล AI แบบ Multimodal',
+        'icon': '🧠'
+    },
+    'thai_processor': {
+        'name': 'Thai Language Processor',
+        'description': 'ประมวลผลภาษาไทยและ OCR',
+        'icon': '🇹🇭'
+    },
+    'visual_recognition': {
+        'name': 'Visual Recognition',
+        'description': 'การจดจำภาพและวิเคราะห์ภาพ',
+        'icon': '👁️'
+    },
+    'backup_controller': {
+        'name': 'Backup Controller',
+        'description': 'ควบคุมการสำรองข้อมูลอัตโนมัติ',
+        'icon': '💾'
+    },
+    'supabase_integration': {
+        'name': 'Supabase Database',
+        'description': 'Cloud Database และ Real-time Features',
+        'icon': '☁️'
+    },
+    'environment_cards': {
+        'name': 'Environment Cards',
+        'description': 'แสดงข้อมูล Environment ของโปรแกรมต่างๆ',
+        'icon': '📋'
+    },
+    'knowledge_manager': {
+        'name': 'Knowledge Manager',
+        'description': 'จัดการฐานความรู้สำหรับการเรียนรู้และควบคุมระบบ',
+        'icon': '🧠'
+    },
+    'godmode_knowledge': {
+        'name': 'God Mode Knowledge',
+        'description': 'ฐานข้อมูลความรู้ถาวรสำหรับ God Mode',
+        'icon': '⚡'
+    },
+    'gpu_processing': {
+        'name': 'GPU Processing',
+        'description': 'การประมวลผลด้วย GPU (RTX 4060)',
+        'icon': '🎮'
+    },
+    'smart_allocator': {
+        'name': 'Smart Resource Allocator',
+        'description': 'จัดสรรทรัพยากรอัจฉริยะ',
+        'icon': '⚡'
     }
-    
-    # Check each capability with error handling
-    def log_if_changed(key, status, msg_ready, msg_error):
-        """Log only if status changed"""
-        if key not in capability_state_cache or capability_state_cache[key] != status:
-            capability_state_cache[key] = status
-            if status == 'ready':
-                dashboard_logger.add_log('success', msg_ready)
-            elif status == 'error':
-                dashboard_logger.add_log('error', msg_error)
-        return status
-
-    # Chrome Automation
-    try:
-        if chrome_controller and hasattr(chrome_controller, 'is_ready'):
-            if chrome_controller.is_ready():
-                capabilities['chrome_automation']['status'] = log_if_changed(
-                    'chrome_automation', 'ready', 
-                    'Chrome Controller พร้อมใช้งาน', 
-                    'Chrome Controller มีปัญหา'
-                )
-            else:
-                capabilities['chrome_automation']['status'] = log_if_changed(
-                    'chrome_automation', 'warning', 
-                    'Chrome Controller พร้อมใช้งาน', 
-                    'Chrome Controller กำลังเตรียมตัว'
-                )
-        else:
-            capabilities['chrome_automation']['status'] = log_if_changed(
-                'chrome_automation', 'error', 
-                'Chrome Controller พร้อมใช้งาน', 
-                'Chrome Controller ไม่พร้อมใช้งาน'
-            )
-    except:
-        capabilities['chrome_automation']['status'] = log_if_changed(
-            'chrome_automation', 'error', 
-            'Chrome Controller พร้อมใช้งาน', 
-            'Chrome Controller ไม่พร้อมใช้งาน'
-        )
-
-    # AI Integration
-    try:
-        ai_integration = safe_import_component('ai_integration', 'core.ai_integration', 'MultimodalAIIntegration')
-        if ai_integration:
-            capabilities['ai_integration']['status'] = log_if_changed(
-                'ai_integration', 'ready', 
-                'AI Integration พร้อมใช้งาน', 
-                'AI Integration มีปัญหา'
-            )
-        else:
-            capabilities['ai_integration']['status'] = log_if_changed(
-                'ai_integration', 'error', 
-                'AI Integration พร้อมใช้งาน', 
-                'AI Integration ไม่พร้อมใช้งาน'
-            )
-    except:
-        capabilities['ai_integration']['status'] = log_if_changed(
-            'ai_integration', 'error', 
-            'AI Integration พร้อมใช้งาน', 
-            'AI Integration ไม่พร้อมใช้งาน'
-        )
-
-    # Thai Processor
-    try:
-        thai_processor = safe_import_component('thai_processor', 'core.thai_processor', 'FullThaiProcessor')
-        if thai_processor:
-            capabilities['thai_processor']['status'] = log_if_changed(
-                'thai_processor', 'ready', 
-                'Thai Processor พร้อมใช้งาน', 
-                'Thai Processor มีปัญหา'
-            )
-        else:
-            capabilities['thai_processor']['status'] = log_if_changed(
-                'thai_processor', 'error', 
-                'Thai Processor พร้อมใช้งาน', 
-                'Thai Processor ไม่พร้อมใช้งาน'
-            )
-    except:
-        capabilities['thai_processor']['status'] = log_if_changed(
-            'thai_processor', 'error', 
-            'Thai Processor พร้อมใช้งาน', 
-            'Thai Processor ไม่พร้อมใช้งาน'
-        )
-
-    # Visual Recognition
-    try:
-        visual_recognition = safe_import_component('visual_recognition', 'core.visual_recognition', 'VisualRecognition')
-        if visual_recognition:
-            capabilities['visual_recognition']['status'] = log_if_changed(
-                'visual_recognition', 'ready', 
-                'Visual Recognition พร้อมใช้งาน', 
-                'Visual Recognition มีปัญหา'
-            )
-        else:
-            capabilities['visual_recognition']['status'] = log_if_changed(
-                'visual_recognition', 'error', 
-                'Visual Recognition พร้อมใช้งาน', 
-                'Visual Recognition ไม่พร้อมใช้งาน'
-            )
-    except:
-        capabilities['visual_recognition']['status'] = log_if_changed(
-            'visual_recognition', 'error', 
-            'Visual Recognition พร้อมใช้งาน', 
-            'Visual Recognition ไม่พร้อมใช้งาน'
-        )
-
-    # Backup Controller
-    try:
-        backup_controller = safe_import_component('backup_controller', 'core.backup_controller', 'BackupController')
-        if backup_controller:
-            capabilities['backup_controller']['status'] = log_if_changed(
-                'backup_controller', 'ready', 
-                'Backup Controller พร้อมใช้งาน', 
-                'Backup Controller มีปัญหา'
-            )
-        else:
-            capabilities['backup_controller']['status'] = log_if_changed(
-                'backup_controller', 'error', 
-                'Backup Controller พร้อมใช้งาน', 
-                'Backup Controller ไม่พร้อมใช้งาน'
-            )
-    except:
-        capabilities['backup_controller']['status'] = log_if_changed(
-            'backup_controller', 'error', 
-            'Backup Controller พร้อมใช้งาน', 
-            'Backup Controller ไม่พร้อมใช้งาน'
-        )
-
-    # Supabase Integration
-    try:
-        supabase_integration = safe_import_component('supabase_integration', 'core.supabase_integration', 'SupabaseIntegration')
-        if supabase_integration:
-            capabilities['supabase_integration']['status'] = log_if_changed(
-                'supabase_integration', 'ready', 
-                'Supabase Integration พร้อมใช้งาน', 
-                'Supabase Integration มีปัญหา'
-            )
-        else:
-            capabilities['supabase_integration']['status'] = log_if_changed(
-                'supabase_integration', 'error', 
-                'Supabase Integration พร้อมใช้งาน', 
-                'Supabase Integration ไม่พร้อมใช้งาน'
-            )
-    except:
-        capabilities['supabase_integration']['status'] = log_if_changed(
-            'supabase_integration', 'error', 
-            'Supabase Integration พร้อมใช้งาน', 
-            'Supabase Integration ไม่พร้อมใช้งาน'
-        )
-
-    # Environment Cards
-    try:
-        environment_cards = safe_import_component('environment_cards', 'core.environment_cards', 'EnvironmentCards')
-        if environment_cards:
-            capabilities['environment_cards']['status'] = log_if_changed(
-                'environment_cards', 'ready', 
-                'Environment Cards พร้อมใช้งาน', 
-                'Environment Cards มีปัญหา'
-            )
-        else:
-            capabilities['environment_cards']['status'] = log_if_changed(
-                'environment_cards', 'error', 
-                'Environment Cards พร้อมใช้งาน', 
-                'Environment Cards ไม่พร้อมใช้งาน'
-            )
-    except:
-        capabilities['environment_cards']['status'] = log_if_changed(
-            'environment_cards', 'error', 
-            'Environment Cards พร้อมใช้งาน', 
-            'Environment Cards ไม่พร้อมใช้งาน'
-        )
+}
 
-    # Knowledge Manager
-    if KNOWLEDGE_MANAGER_AVAILABLE:
-        capabilities['knowledge_manager']['status'] = log_if_changed(
-            'knowledge_manager', 'ready', 
-            'Knowledge Manager พร้อมใช้งาน', 
-            'Knowledge Manager มีปัญหา'
-        )
-    else:
-        capabilities['knowledge_manager']['status'] = log_if_changed(
-            'knowledge_manager', 'error', 
-            'Knowledge Manager พร้อมใช้งาน', 
-            'Knowledge Manager ไม่พร้อมใช้งาน'
-        )
+# ชื่อที่ใช้ใน log เมื่อสถานะเปลี่ยน
+CAPABILITY_LABELS = {
+    'chrome_automation': 'Chrome Controller',
+    'ai_integration': 'AI Integration',
+    'thai_processor': 'Thai Processor',
+    'visual_recognition': 'Visual Recognition',
+    'backup_controller': 'Backup Controller',
+    'supabase_integration': 'Supabase Integration',
+    'environment_cards': 'Environment Cards',
+    'knowledge_manager': 'Knowledge Manager',
+    'godmode_knowledge': 'God Mode Knowledge'
+}
 
-    # God Mode Knowledge
-    if GODMODE_KM_AVAILABLE:
-        capabilities['godmode_knowledge']['status'] = log_if_changed(
-            'godmode_knowledge', 'ready', 
-            'God Mode Knowledge พร้อมใช้งาน', 
-            'God Mode Knowledge มีปัญหา'
-        )
-    else:
-        capabilities['godmode_knowledge']['status'] = log_if_changed(
-            'godmode_knowledge', 'error', 
-            'God Mode Knowledge พร้อมใช้งาน', 
-            'God Mode Knowledge ไม่พร้อมใช้งาน'
+def log_capability_change(key, old_status, new_status):
+    """Log เฉพาะเมื่อสถานะเปลี่ยน"""
+    label = CAPABILITY_LABELS.get(key, key)
+    if new_status == 'ready':
+        dashboard_logger.add_log('success', f'{label} พร้อมใช้งาน')
+    elif new_status == 'error':
+        dashboard_logger.add_log('error', f'{label} ไม่พร้อมใช้งาน')
+
+def probe_chrome(_component):
+    """Cheap liveness check ของ Chrome Controller"""
+    if chrome_controller and hasattr(chrome_controller, 'is_ready'):
+        return 'ready' if chrome_controller.is_ready() else 'warning'
+    return 'error'
+
+capability_prober = CapabilityProber(default_ttl=30.0, on_change=log_capability_change)
+
+def register_capabilities():
+    """ลงทะเบียน capabilities กับ background prober"""
+    component_imports = {
+        'ai_integration': ('core.ai_integration', 'MultimodalAIIntegration'),
+        'thai_processor': ('core.thai_processor', 'FullThaiProcessor'),
+        'visual_recognition': ('core.visual_recognition', 'VisualRecognition'),
+        'backup_controller': ('core.backup_controller', 'BackupController'),
+        'supabase_integration': ('core.supabase_integration', 'SupabaseIntegration'),
+        'environment_cards': ('core.environment_cards', 'EnvironmentCards')
+    }
+    
+    capability_prober.register('chrome_automation', CAPABILITY_INFO['chrome_automation'],
+                               probe=probe_chrome, ttl=15)
+    
+    # Components: import ครั้งเดียว (ลองใหม่ทุก 5 นาทีถ้าไม่สำเร็จ)
+    for key, (import_path, class_name) in component_imports.items():
+        capability_prober.register(
+            key, CAPABILITY_INFO[key], ttl=300, retry_ttl=300,
+            initializer=lambda key=key, import_path=import_path, class_name=class_name:
+                safe_import_component(key, import_path, class_name)
         )
+    
+    capability_prober.register('knowledge_manager', CAPABILITY_INFO['knowledge_manager'], ttl=300,
+                               probe=lambda _: 'ready' if KNOWLEDGE_MANAGER_AVAILABLE else 'error')
+    capability_prober.register('godmode_knowledge', CAPABILITY_INFO['godmode_knowledge'], ttl=300,
+                               probe=lambda _: 'ready' if GODMODE_KM_AVAILABLE else 'error')
+    
+    # ยังไม่มีการตรวจสอบสำหรับ GPU / Smart Allocator ใน dashboard นี้
+    for key in ('gpu_processing', 'smart_allocator'):
+        capability_prober.register(key, CAPABILITY_INFO[key], ttl=3600, probe=lambda _: 'unknown')
 
-    return capabilities
+register_capabilities()
+capability_prober.start()
 
 def get_godmode_data():
     """Get God Mode Knowledge Base data"""
@@ -469,9 +316,8 @@ def get_system_resources():
                 'error': 'psutil not available'
             }
         
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('.')
+        # ใช้ snapshot จาก shared metrics sampler (ไม่ block request 1 วินาที)
+        snapshot = get_metrics_sampler().latest(max_age=10)
         
         # Get GPU info if available
         gpu_info = None
@@ -492,19 +338,19 @@ def get_system_resources():
         
         return {
             'cpu': {
-                'percent': cpu_percent,
-                'count': psutil.cpu_count()
+                'percent': snapshot.cpu_percent,
+                'count': snapshot.cpu_count
             },
             'memory': {
-                'total_gb': round(memory.total / 1024**3, 2),
-                'available_gb': round(memory.available / 1024**3, 2),
-                'percent': memory.percent
+                'total_gb': round(snapshot.memory_total / 1024**3, 2),
+                'available_gb': round(snapshot.memory_available / 1024**3, 2),
+                'percent': snapshot.memory_percent
             },
             'disk': {
-                'total_gb': round(disk.total / 1024**3, 2),
-                'used_gb': round(disk.used / 1024**3, 2),
-                'free_gb': round(disk.free / 1024**3, 2),
-                'percent': disk.percent
+                'total_gb': round(snapshot.disk_total / 1024**3, 2),
+                'used_gb': round(snapshot.disk_used / 1024**3, 2),
+                'free_gb': round(snapshot.disk_free / 1024**3, 2),
+                'percent': snapshot.disk_percent
             },
             'gpu': gpu_info
         }
@@ -640,89 +486,110 @@ def test_api():
     """Test API endpoint"""
     return render_template('test.html')
 
-@app.route('/api/status')
-def api_status():
-    """API endpoint for system status"""
-    try:
-        capabilities = get_system_capabilities()
-        ready_count = sum(1 for cap in capabilities.values() if cap['status'] == 'ready')
-        total_count = len(capabilities)
-        status_percent = (ready_count / total_count) * 100 if total_count > 0 else 0
-        
-        # Mock data for testing
-        mock_system_resources = {
-            'cpu': {'percent': 45, 'count': 8},
-            'memory': {'percent': 62, 'available_gb': 12.5},
-            'disk': {'percent': 78, 'free_gb': 156.2},
-            'gpu': {'available': True, 'name': 'NVIDIA RTX 4060', 'used_memory_mb': 2048, 'total_memory_gb': 8},
-            'network': {'status': 'Connected'}
-        }
-        
-        mock_godmode_data = {
-            'statistics': {
-                'total_sessions': 15,
-                'total_commands': 127,
-                'total_patterns': 23,
-                'success_rate': 87.5
+# Cached /api/status response: (etag, JSON body)
+status_response_cache = {'etag': None, 'body': None}
+
+def build_status_payload(capabilities, updated_at):
+    """สร้าง payload ของ /api/status จาก capabilities snapshot"""
+    ready_count = sum(1 for cap in capabilities.values() if cap['status'] == 'ready')
+    total_count = len(capabilities)
+    status_percent = (ready_count / total_count) * 100 if total_count > 0 else 0
+    
+    # Mock data for testing
+    mock_system_resources = {
+        'cpu': {'percent': 45, 'count': 8},
+        'memory': {'percent': 62, 'available_gb': 12.5},
+        'disk': {'percent': 78, 'free_gb': 156.2},
+        'gpu': {'available': True, 'name': 'NVIDIA RTX 4060', 'used_memory_mb': 2048, 'total_memory_gb': 8},
+        'network': {'status': 'Connected'}
+    }
+    
+    mock_godmode_data = {
+        'statistics': {
+            'total_sessions': 15,
+            'total_commands': 127,
+            'total_patterns': 23,
+            'success_rate': 87.5
+        },
+        'sessions': [
+            {
+                'session_id': 'session_001',
+                'status': 'completed',
+                'commands_count': 8,
+                'start_time': '2024-01-15T10:30:00Z'
             },
-            'sessions': [
-                {
-                    'session_id': 'session_001',
-                    'status': 'completed',
-                    'commands_count': 8,
-                    'start_time': '2024-01-15T10:30:00Z'
-                },
-                {
-                    'session_id': 'session_002',
-                    'status': 'active',
-                    'commands_count': 3,
-                    'start_time': '2024-01-15T14:20:00Z'
-                }
-            ],
-            'commands': [
-                {
-                    'command_text': 'Analyze system performance and generate report',
-                    'command_type': 'analysis',
-                    'success': True,
-                    'execution_time': '2024-01-15T10:35:00Z'
-                },
-                {
-                    'command_text': 'Backup critical data files',
-                    'command_type': 'backup',
-                    'success': True,
-                    'execution_time': '2024-01-15T10:40:00Z'
-                }
-            ]
-        }
-        
-        mock_recommendations = [
             {
-                'type': 'success',
-                'message': 'ระบบทำงานปกติ ทุก component พร้อมใช้งาน'
+                'session_id': 'session_002',
+                'status': 'active',
+                'commands_count': 3,
+                'start_time': '2024-01-15T14:20:00Z'
+            }
+        ],
+        'commands': [
+            {
+                'command_text': 'Analyze system performance and generate report',
+                'command_type': 'analysis',
+                'success': True,
+                'execution_time': '2024-01-15T10:35:00Z'
             },
             {
-                'type': 'info',
-                'message': 'แนะนำให้ทำ backup ข้อมูลทุกสัปดาห์'
+                'command_text': 'Backup critical data files',
+                'command_type': 'backup',
+                'success': True,
+                'execution_time': '2024-01-15T10:40:00Z'
             }
         ]
-        
-        # เพิ่ม field system สำหรับ frontend
-        system = {
-            'cpu_usage': f"{mock_system_resources['cpu']['percent']}%",
-            'memory_usage': f"{mock_system_resources['memory']['percent']}%",
-            'disk_usage': f"{mock_system_resources['disk']['percent']}%"
+    }
+    
+    mock_recommendations = [
+        {
+            'type': 'success',
+            'message': 'ระบบทำงานปกติ ทุก component พร้อมใช้งาน'
+        },
+        {
+            'type': 'info',
+            'message': 'แนะนำให้ทำ backup ข้อมูลทุกสัปดาห์'
         }
-        return jsonify({
-            'capabilities': capabilities,
-            'components': capabilities,
-            'status_percent': status_percent,
-            'status_message': get_status_message(status_percent),
-            'system_resources': mock_system_resources,
-            'system': system,
-            'godmode_data': mock_godmode_data,
-            'recommendations': mock_recommendations,
-            'last_update': datetime.now().isoformat()
-        })
+    ]
+    
+    # เพิ่ม field system สำหรับ frontend
+    system = {
+        'cpu_usage': f"{mock_system_resources['cpu']['percent']}%",
+        'memory_usage': f"{mock_system_resources['memory']['percent']}%",
+        'disk_usage': f"{mock_system_resources['disk']['percent']}%"
+    }
+    return {
+        'capabilities': capabilities,
+        'components': capabilities,
+        'status_percent': status_percent,
+        'status_message': get_status_message(status_percent),
+        'system_resources': mock_system_resources,
+        'system': system,
+        'godmode_data': mock_godmode_data,
+        'recommendations': mock_recommendations,
+        'last_update': updated_at
+    }
+
+@app.route('/api/status')
+def api_status():
+    """API endpoint for system status (รองรับ ETag / If-None-Match)"""
+    try:
+        capabilities, etag, updated_at = capability_prober.snapshot()
+        
+        # สถานะไม่เปลี่ยน: ตอบ 304 โดยไม่ต้องสร้าง body
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        
+        if status_response_cache['etag'] != etag:
+            status_response_cache['body'] = json.dumps(build_status_payload(capabilities, updated_at))
+            status_response_cache['etag'] = etag
+        
+        response = Response(status_response_cache['body'], mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         dashboard_logger.add_log('error', f'API Status Error: {str(e)}')
         return jsonify({'error': str(e)}), 500
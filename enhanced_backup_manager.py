@@ -7,30 +7,72 @@ WAWAGOT.AI - Enhanced Backup Manager
 
 import os
 import shutil
-import zipfile
 import json
 import schedule
 import time
 import threading
+import zipfile
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 from core.logger import get_logger
+from core.parallel_archive import create_archive, extract_archive, iter_directory_files
+from core.file_journal import FileJournal, walk_files
+
+# Written into every full/incremental backup: {"backup_type", "parent", "created_at"}
+MANIFEST_NAME = "backup_manifest.json"
+# Paths (relative to the backup) deleted since the parent backup
+DELETED_FILES_NAME = "deleted_files.json"
 
 class EnhancedBackupManager:
-    def __init__(self):
+    # Files and directories to backup
+    BACKUP_ITEMS = [
+        "core/",
+        "config/",
+        "conversation_logs/",
+        "dashboard/",
+        "data/",
+        "pleamthinking/",
+        "*.py",
+        "*.md",
+        "*.txt",
+        "*.json",
+        "*.env"
+    ]
+    
+    # Exclude items
+    EXCLUDE_ITEMS = [
+        "__pycache__/",
+        "*.pyc",
+        "*.log",
+        "backups/",
+        "node_modules/",
+        ".git/",
+        "venv/",
+        "env/"
+    ]
+
+    def __init__(self, project_root=None):
         self.logger = get_logger("backup_manager")
-        self.project_root = Path(__file__).parent
+        self.project_root = Path(project_root) if project_root else Path(__file__).parent
         self.backup_dir = self.project_root / "backups"
         self.backup_dir.mkdir(exist_ok=True)
         
+        # File state journal (size, mtime_ns, inode, hash) for incremental backups.
+        # journal_baseline.txt names the backup the journal currently describes.
+        self.journal = FileJournal(str(self.backup_dir / "file_journal.db"))
+        self.baseline_file = self.backup_dir / "journal_baseline.txt"
+        
         # Backup configuration
         self.config = {
             "backup_enabled": True,
             "backup_schedule": "0 2 * * *",  # ทุกวันเวลา 02:00
             "retention_days": 30,
             "compression": True,
+            "compression_codec": "auto",  # auto / deflate / zstd / stored
+            "compression_workers": None,  # จำนวน thread บีบอัด (ค่าเริ่มต้น = จำนวน CPU)
             "max_backup_size": "1GB",
+            "max_incremental_chain": 7,  # incremental backups on top of a full backup before a new full one
             "backup_types": {
                 "full": True,
                 "incremental": True,
@@ -90,7 +132,7 @@ class EnhancedBackupManager:
     def create_backup(self, backup_type="full"):
         """Create backup"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
             backup_name = f"wawagot_backup_{backup_type}_{timestamp}"
             backup_path = self.backup_dir / backup_name
             
@@ -107,6 +149,14 @@ class EnhancedBackupManager:
             elif backup_type == "logs":
                 self._create_logs_backup(backup_path)
             
+            # Pack the backup directory into a zip (compressed in parallel)
+            if self.config["compression"] and backup_path.is_dir():
+                self._compress_backup(backup_path)
+            
+            # The journal now describes this backup; the next incremental builds on it
+            if backup_type in ("full", "incremental"):
+                self._set_journal_baseline(backup_name)
+            
             # Update last backup time
             with open(self.backup_dir / "last_backup.txt", 'w') as f:
                 f.write(datetime.now().isoformat())
@@ -122,69 +172,182 @@ class EnhancedBackupManager:
             return False
 
     def _create_full_backup(self, backup_path):
-        """Create full backup"""
-        backup_path.mkdir(exist_ok=True)
-        
-        # Files and directories to backup
-        items_to_backup = [
-            "core/",
-            "config/",
-            "conversation_logs/",
-            "dashboard/",
-            "data/",
-            "pleamthinking/",
-            "*.py",
-            "*.md",
-            "*.txt",
-            "*.json",
-            "*.env"
-        ]
-        
-        # Exclude items
-        exclude_items = [
-            "__pycache__/",
-            "*.pyc",
-            "*.log",
-            "backups/",
-            "node_modules/",
-            ".git/",
-            "venv/",
-            "env/"
-        ]
-        
-        for item in items_to_backup:
-            if item.endswith("/"):
-                # Directory
-                src_dir = self.project_root / item.rstrip("/")
-                if src_dir.exists():
-                    dst_dir = backup_path / item.rstrip("/")
-                    self._copy_directory(src_dir, dst_dir, exclude_items)
-            else:
-                # File pattern
-                for file_path in self.project_root.glob(item):
-                    if self._should_include_file(file_path, exclude_items):
-                        dst_file = backup_path / file_path.name
-                        shutil.copy2(file_path, dst_file)
+        """Create full backup (copies every file in BACKUP_ITEMS and resets the journal baseline)"""
+        self.journal.reset()
+        self._create_journal_backup(backup_path, None)
 
     def _create_incremental_backup(self, backup_path):
-        """Create incremental backup"""
-        # Find last backup
-        last_backup = self._get_last_backup()
-        if not last_backup:
+        """Create incremental backup of files changed since the journal baseline backup"""
+        parent = self._get_incremental_parent()
+        if parent is None:
+            # No usable baseline (none yet, removed, or chain too long)
             self._create_full_backup(backup_path)
             return
         
+        self._create_journal_backup(backup_path, parent)
+
+    def _create_journal_backup(self, backup_path, parent):
+        """Copy files changed since the journal baseline and record the parent chain"""
+        # Until this backup completes the journal no longer matches any backup
+        self._set_journal_baseline(None)
         backup_path.mkdir(exist_ok=True)
         
-        # Get files modified since last backup
-        last_backup_time = datetime.fromtimestamp(last_backup.stat().st_mtime)
+        # Diff against the journal; only files whose stat changed are read
+        diff = self.journal.scan(self._iter_backup_files())
         
-        for file_path in self.project_root.rglob("*"):
-            if file_path.is_file() and file_path.stat().st_mtime > last_backup_time.timestamp():
-                relative_path = file_path.relative_to(self.project_root)
+        failed = []
+        for relative_path in diff.changed:
+            try:
                 dst_file = backup_path / relative_path
                 dst_file.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(file_path, dst_file)
+                shutil.copy2(diff.sources[relative_path], dst_file)
+            except Exception as e:
+                failed.append(relative_path)
+                self.logger.error(f"Error copying {relative_path}: {e}")
+        
+        # Record deletions so a restore can replay them
+        if diff.deleted:
+            with open(backup_path / DELETED_FILES_NAME, 'w', encoding='utf-8') as f:
+                json.dump(diff.deleted, f, indent=2, ensure_ascii=False)
+        
+        with open(backup_path / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump({
+                "backup_type": "incremental" if parent else "full",
+                "parent": parent,
+                "created_at": datetime.now().isoformat()
+            }, f, indent=2)
+        
+        self.journal.commit(diff, exclude=failed)
+        self.logger.info(f"Backup changes (parent: {parent or 'none'}): {diff.summary()}")
+
+    def _get_incremental_parent(self):
+        """Backup the journal describes, if its whole chain still exists and is short enough"""
+        baseline = self._get_journal_baseline()
+        if not baseline or not self.journal.get_stats()["files"]:
+            return None
+        
+        chain = self._get_backup_chain(baseline)
+        if not chain or len(chain) > self.config.get("max_incremental_chain", 7):
+            return None
+        return baseline
+
+    def _get_journal_baseline(self):
+        if self.baseline_file.exists():
+            return self.baseline_file.read_text(encoding='utf-8').strip() or None
+        return None
+
+    def _set_journal_baseline(self, backup_name):
+        if backup_name:
+            self.baseline_file.write_text(backup_name, encoding='utf-8')
+        elif self.baseline_file.exists():
+            self.baseline_file.unlink()
+
+    def _find_backup(self, backup_name):
+        """Backup directory or zip archive by name"""
+        for candidate in (self.backup_dir / backup_name, self.backup_dir / f"{backup_name}.zip"):
+            if candidate.exists():
+                return candidate
+        return None
+
+    @staticmethod
+    def _backup_name(backup):
+        return backup.name[:-len(".zip")] if backup.suffix == ".zip" else backup.name
+
+    def _read_manifest(self, backup):
+        """Manifest of a backup directory or zip archive ({} for backups without one)"""
+        try:
+            if backup.is_dir():
+                manifest_file = backup / MANIFEST_NAME
+                if not manifest_file.exists():
+                    return {}
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            with zipfile.ZipFile(backup) as zipf:
+                if MANIFEST_NAME not in zipf.namelist():
+                    return {}
+                return json.loads(zipf.read(MANIFEST_NAME).decode('utf-8'))
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            self.logger.error(f"Error reading manifest of {backup.name}: {e}")
+            return {}
+
+    def _get_ancestor_names(self, backup):
+        """Names of the backups an incremental backup builds on"""
+        names = []
+        parent = self._read_manifest(backup).get("parent")
+        while parent and parent not in names:
+            names.append(parent)
+            parent_backup = self._find_backup(parent)
+            if parent_backup is None:
+                break
+            parent = self._read_manifest(parent_backup).get("parent")
+        return names
+
+    def _get_backup_chain(self, backup_name):
+        """[full backup, incremental, ..., backup_name] or None if any link is missing"""
+        chain = []
+        current = backup_name
+        while current:
+            backup = self._find_backup(current)
+            if backup is None or backup in chain:
+                return None
+            chain.append(backup)
+            current = self._read_manifest(backup).get("parent")
+        chain.reverse()
+        return chain
+
+    def restore_backup(self, backup_name, restore_path=None):
+        """Restore a backup by replaying its full backup, every incremental on top and their deletions"""
+        try:
+            chain = self._get_backup_chain(backup_name)
+            if not chain:
+                self.logger.error(f"Backup chain of {backup_name} is incomplete")
+                return False
+            
+            restore_path = Path(restore_path) if restore_path else self.project_root / f"restored_{backup_name}"
+            restore_path.mkdir(parents=True, exist_ok=True)
+            
+            for backup in chain:
+                if backup.is_dir():
+                    shutil.copytree(backup, restore_path, dirs_exist_ok=True)
+                else:
+                    extract_archive(backup, restore_path)
+                
+                deleted_file = restore_path / DELETED_FILES_NAME
+                if deleted_file.exists():
+                    with open(deleted_file, 'r', encoding='utf-8') as f:
+                        deleted = json.load(f)
+                    deleted_file.unlink()
+                    for relative_path in deleted:
+                        target = restore_path / relative_path
+                        if target.is_file():
+                            target.unlink()
+            
+            manifest_file = restore_path / MANIFEST_NAME
+            if manifest_file.exists():
+                manifest_file.unlink()
+            
+            self.logger.info(f"Restored {backup_name} ({len(chain)} backups) to {restore_path}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Restore failed: {e}")
+            return False
+
+    def _iter_backup_files(self):
+        """(relative path, source path, stat) for every file in BACKUP_ITEMS"""
+        def include(path, is_dir):
+            return self._should_include_file(Path(path), self.EXCLUDE_ITEMS)
+        
+        for item in self.BACKUP_ITEMS:
+            if item.endswith("/"):
+                src_dir = self.project_root / item.rstrip("/")
+                if src_dir.is_dir():
+                    for file_path, stat in walk_files(str(src_dir), include):
+                        yield Path(file_path).relative_to(self.project_root).as_posix(), file_path, stat
+            else:
+                for file_path in self.project_root.glob(item):
+                    if file_path.is_file() and self._should_include_file(file_path, self.EXCLUDE_ITEMS):
+                        yield file_path.name, str(file_path), file_path.stat()
 
     def _create_database_backup(self, backup_path):
         """Create database backup"""
@@ -275,25 +438,58 @@ class EnhancedBackupManager:
                     return False
         return True
 
+    def _compress_backup(self, backup_path):
+        """Archive a backup directory as <backup_path>.zip and remove the directory"""
+        zip_path = backup_path.with_name(f"{backup_path.name}.zip")
+        entries = create_archive(
+            zip_path,
+            iter_directory_files(backup_path),
+            codec=self.config.get("compression_codec", "auto"),
+            max_workers=self.config.get("compression_workers")
+        )
+        shutil.rmtree(backup_path)
+        self.logger.info(f"Compressed backup: {zip_path.name} ({len(entries)} files)")
+        return zip_path
+
+    def _list_backups(self):
+        """Backup directories and zip archives"""
+        return [
+            item for item in self.backup_dir.iterdir()
+            if item.name.startswith("wawagot_backup") and (item.is_dir() or item.suffix == ".zip")
+        ]
+
     def _get_last_backup(self):
-        """Get last backup directory"""
-        backups = [d for d in self.backup_dir.iterdir() if d.is_dir() and d.name.startswith("wawagot_backup")]
+        """Get last backup (directory or zip archive)"""
+        backups = self._list_backups()
         if backups:
             return max(backups, key=lambda x: x.stat().st_mtime)
         return None
 
     def cleanup_old_backups(self):
-        """Clean up old backups"""
+        """Clean up old backups (expired backups still needed by a kept incremental backup stay)"""
         try:
             retention_days = self.config["retention_days"]
             cutoff_date = datetime.now() - timedelta(days=retention_days)
             
-            for backup_dir in self.backup_dir.iterdir():
-                if backup_dir.is_dir() and backup_dir.name.startswith("wawagot_backup"):
-                    backup_time = datetime.fromtimestamp(backup_dir.stat().st_mtime)
-                    if backup_time < cutoff_date:
-                        shutil.rmtree(backup_dir)
-                        self.logger.info(f"Removed old backup: {backup_dir.name}")
+            backups = self._list_backups()
+            expired = [
+                backup for backup in backups
+                if datetime.fromtimestamp(backup.stat().st_mtime) < cutoff_date
+            ]
+            
+            # Every ancestor of a kept backup is needed to restore it
+            needed = set()
+            for backup in backups:
+                if backup not in expired:
+                    needed.update(self._get_ancestor_names(backup))
+            
+            for backup in expired:
+                if self._backup_name(backup) not in needed:
+                    if backup.is_dir():
+                        shutil.rmtree(backup)
+                    else:
+                        backup.unlink()
+                    self.logger.info(f"Removed old backup: {backup.name}")
             
         except Exception as e:
             self.logger.error(f"Error cleaning up old backups: {e}")
@@ -326,7 +522,7 @@ class EnhancedBackupManager:
                     last_backup_time = datetime.fromisoformat(f.read().strip())
                 return {
                     "last_backup": last_backup_time.isoformat(),
-                    "backup_count": len([d for d in self.backup_dir.iterdir() if d.is_dir()]),
+                    "backup_count": len(self._list_backups()),
                     "backup_size": self._get_backup_size(),
                     "next_backup": "02:00 daily"
                 }
@@ -344,11 +540,13 @@ class EnhancedBackupManager:
     def _get_backup_size(self):
         """Get total backup size"""
         total_size = 0
-        for backup_dir in self.backup_dir.iterdir():
-            if backup_dir.is_dir():
-                for file_path in backup_dir.rglob("*"):
-                    if file_path.is_file():
-                        total_size += file_path.stat().st_size
+        for backup in self._list_backups():
+            if backup.is_file():
+                total_size += backup.stat().st_size
+                continue
+            for file_path in backup.rglob("*"):
+                if file_path.is_file():
+                    total_size += file_path.stat().st_size
         
         # Convert to MB
         return f"{total_size / (1024*1024):.1f} MB"
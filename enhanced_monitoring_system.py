@@ -14,6 +14,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 from core.logger import get_logger
+from core.metrics_sampler import get_metrics_sampler
 import schedule
 
 class EnhancedMonitoringSystem:
@@ -152,23 +153,19 @@ class EnhancedMonitoringSystem:
     def _monitor_system(self):
         """Monitor system resources"""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # Memory usage
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
+            # CPU / Memory จาก shared metrics sampler (ไม่ต้อง block 1 วินาที)
+            snapshot = get_metrics_sampler().latest(max_age=self.config["check_interval"])
             
             # System load (Windows equivalent)
-            load_avg = psutil.getloadavg() if hasattr(psutil, 'getloadavg') else [0, 0, 0]
+            load_avg = list(snapshot.load_average) if snapshot.load_average else [0, 0, 0]
             
             self.monitoring_data["system_status"] = {
-                "cpu_usage": cpu_percent,
-                "memory_usage": memory_percent,
-                "memory_available": memory.available / (1024**3),  # GB
-                "memory_total": memory.total / (1024**3),  # GB
+                "cpu_usage": snapshot.cpu_percent,
+                "memory_usage": snapshot.memory_percent,
+                "memory_available": snapshot.memory_available / (1024**3),  # GB
+                "memory_total": snapshot.memory_total / (1024**3),  # GB
                 "load_average": load_avg,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": snapshot.iso_timestamp
             }
             
         except Exception as e:
@@ -234,15 +231,15 @@ class EnhancedMonitoringSystem:
                     continue
             
             # Network I/O
-            network_io = psutil.net_io_counters()
+            snapshot = get_metrics_sampler().latest(max_age=self.config["check_interval"])
             
             self.monitoring_data["network"] = {
                 "interfaces": list(network_interfaces.keys()),
                 "connections": network_connections,
-                "bytes_sent": network_io.bytes_sent,
-                "bytes_recv": network_io.bytes_recv,
-                "packets_sent": network_io.packets_sent,
-                "packets_recv": network_io.packets_recv
+                "bytes_sent": snapshot.net_bytes_sent,
+                "bytes_recv": snapshot.net_bytes_recv,
+                "packets_sent": snapshot.net_packets_sent,
+                "packets_recv": snapshot.net_packets_recv
             }
             
         except Exception as e:
@@ -23,6 +23,8 @@ from typing import Dict, List, Any, Optional, Tuple
 import subprocess
 import psutil
 
+from core.metrics_sampler import get_metrics_sampler
+
 # GPU Libraries
 try:
     import torch
@@ -56,6 +58,7 @@ class GPUManager:
         self.gpu_models = {}
         self.monitoring_active = False
         self.monitoring_thread = None
+        self.monitoring_subscription = None
         self.gpu_utilization = {}
         self.gpu_memory = {}
         self.gpu_temperature = {}
@@ -254,61 +257,69 @@ class GPUManager:
 # ===============================================================================
 
     async def _start_gpu_monitoring(self):
-        """เริ่มต้น GPU Monitoring"""
+        """เริ่มต้น GPU Monitoring (ผลลัพธ์ส่งผ่าน shared metrics sampler)"""
         if not self.monitoring_active:
             self.monitoring_active = True
-            self.monitoring_thread = threading.Thread(target=self._gpu_monitoring_loop)
-            self.monitoring_thread.daemon = True
-            self.monitoring_thread.start()
+            sampler = get_metrics_sampler()
+            # nvidia-smi อาจช้า/ค้าง: รันบน thread ของตัวเอง sampler ส่งเฉพาะค่าล่าสุด
+            sampler.add_collector("gpu", self._query_gpu_utilization, interval=5, background=True)
+            self.monitoring_subscription = sampler.subscribe(self._on_metrics_snapshot, interval=5)
             print("📊 เริ่มต้น GPU Monitoring")
     
     def stop_gpu_monitoring(self):
         """หยุด GPU Monitoring"""
         self.monitoring_active = False
-        if self.monitoring_thread:
-            self.monitoring_thread.join()
+        sampler = get_metrics_sampler()
+        sampler.remove_collector("gpu")
+        if self.monitoring_subscription:
+            sampler.unsubscribe(self.monitoring_subscription)
+            self.monitoring_subscription = None
         print("🛑 หยุด GPU Monitoring")
     
-    def _gpu_monitoring_loop(self):
-        """ลูปการติดตาม GPU"""
-        while self.monitoring_active:
-            try:
-                asyncio.run(self._update_gpu_status())
-                time.sleep(5)  # อัพเดททุก 5 วินาที
-            except Exception as e:
-                print(f"❌ เกิดข้อผิดพลาดในการติดตาม GPU: {e}")
-                time.sleep(10)
+    def _on_metrics_snapshot(self, snapshot):
+        """รับผลการวัด GPU จาก metrics sampler"""
+        utilization = snapshot.extra.get("gpu")
+        if isinstance(utilization, dict) and "error" not in utilization:
+            self.gpu_utilization.update(utilization)
     
     async def _update_gpu_status(self):
         """อัพเดทสถานะ GPU"""
         try:
-            # อัพเดท GPU utilization
-            if TORCH_AVAILABLE and cuda.is_available():
-                for i in range(cuda.device_count()):
-                    # ใช้ nvidia-smi สำหรับข้อมูล real-time
-                    try:
-                        result = subprocess.run([
-                            'nvidia-smi', 
-                            '--query-gpu=index,utilization.gpu,memory.used,memory.total,temperature.gpu',
-                            '--format=csv,noheader,nounits',
-                            '-i', str(i)
-                        ], capture_output=True, text=True, timeout=5)
-                        
-                        if result.returncode == 0:
-                            parts = result.stdout.strip().split(', ')
-                            if len(parts) >= 5:
-                                self.gpu_utilization[i] = {
-                                    "gpu_usage": int(parts[1]),
-                                    "memory_used": int(parts[2]) // 1024,  # GB
-                                    "memory_total": int(parts[3]) // 1024,  # GB
-                                    "temperature": int(parts[4]),
-                                    "timestamp": datetime.now(TZ_BANGKOK).isoformat()
-                                }
-                    except Exception:
-                        pass
-                        
+            self.gpu_utilization.update(self._query_gpu_utilization())
         except Exception as e:
             print(f"❌ เกิดข้อผิดพลาดในการอัพเดทสถานะ GPU: {e}")
+    
+    def _query_gpu_utilization(self) -> Dict[int, Dict[str, Any]]:
+        """ดึงสถานะ GPU ทุกตัวด้วย nvidia-smi ครั้งเดียว"""
+        utilization = {}
+        if not (TORCH_AVAILABLE and cuda.is_available()):
+            return utilization
+        
+        try:
+            result = subprocess.run([
+                'nvidia-smi', 
+                '--query-gpu=index,utilization.gpu,memory.used,memory.total,temperature.gpu',
+                '--format=csv,noheader,nounits'
+            ], capture_output=True, text=True, timeout=5)
+        except Exception:
+            return utilization
+        
+        if result.returncode == 0:
+            timestamp = datetime.now(TZ_BANGKOK).isoformat()
+            for line in result.stdout.strip().splitlines():
+                parts = line.split(', ')
+                if len(parts) >= 5:
+                    try:
+                        utilization[int(parts[0])] = {
+                            "gpu_usage": int(parts[1]),
+                            "memory_used": int(parts[2]) // 1024,  # GB
+                            "memory_total": int(parts[3]) // 1024,  # GB
+                            "temperature": int(parts[4]),
+                            "timestamp": timestamp
+                        }
+                    except ValueError:
+                        continue
+        return utilization
 
 # ===============================================================================
 # GPU OPERATIONS
@@ -14,10 +14,18 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 import hashlib
+import heapq
 import re
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, OrderedDict
 import threading
 import time
+import os
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from core import sqlite_pool
+from core.text_tokenizer import tokenize
 
 # Import existing components
 try:
@@ -31,7 +39,7 @@ try:
     from .supabase_integration import SupabaseIntegration
     from .auto_learning_manager import AutoLearningManager
 except ImportError:
-    # Mock classes for development
+    # Mock classes for development (สร้างด้วยชื่อ component ใน SmartCommandHub)
     class MockComponent:
         def __init__(self, name):
             self.name = name
@@ -40,15 +48,15 @@ except ImportError:
         async def execute(self, command, params):
             return {"status": "success", "component": self.name, "result": f"Mock {command}"}
     
-    KnowledgeManager = MockComponent("KnowledgeManager")
-    AIIntegration = MockComponent("AIIntegration")
-    ChromeController = MockComponent("ChromeController")
-    ThaiProcessor = MockComponent("ThaiProcessor")
-    VisualRecognition = MockComponent("VisualRecognition")
-    BackupController = MockComponent("BackupController")
-    RestoreController = MockComponent("RestoreController")
-    SupabaseIntegration = MockComponent("SupabaseIntegration")
-    AutoLearningManager = MockComponent("AutoLearningManager")
+    KnowledgeManager = MockComponent
+    AIIntegration = MockComponent
+    ChromeController = MockComponent
+    ThaiProcessor = MockComponent
+    VisualRecognition = MockComponent
+    BackupController = MockComponent
+    RestoreController = MockComponent
+    SupabaseIntegration = MockComponent
+    AutoLearningManager = MockComponent
 
 @dataclass
 class CommandDefinition:
@@ -97,6 +105,113 @@ class CommandPattern:
     usage_count: int = 0
     last_used: Optional[str] = None
 
+class CommandPatternIndex:
+    """
+    Inverted index: token -> {pattern_id: weight}
+    
+    weight ของแต่ละ token คือ 1 / จำนวน token ของ pattern ดังนั้นผลรวม weight
+    ของ token ที่ตรงกับ input เท่ากับ calculate_pattern_score และการให้คะแนน
+    แตะเฉพาะ patterns ที่มี token ร่วมกับ input
+    """
+    
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = {}
+        # pattern_id -> [command_id, confidence, usage_count, tokens]
+        self.patterns: Dict[str, list] = {}
+        # command_id -> pattern_ids ที่สร้างจากชื่อ/ตัวอย่างของคำสั่ง
+        self.command_patterns: Dict[str, List[str]] = {}
+        self.lock = threading.Lock()
+    
+    def add(self, pattern_id: str, pattern: str, command_id: str,
+            confidence: float = 0.8, usage_count: int = 0):
+        """เพิ่ม (หรือแทนที่) pattern"""
+        tokens = set(tokenize(pattern))
+        with self.lock:
+            self._remove(pattern_id)
+            if not tokens:
+                return
+            
+            weight = 1.0 / len(tokens)
+            for token in tokens:
+                self.postings.setdefault(token, {})[pattern_id] = weight
+            self.patterns[pattern_id] = [command_id, confidence, usage_count, tokens]
+    
+    def add_command(self, command: "CommandDefinition", confidence: float = 0.5):
+        """index ชื่อและตัวอย่างของคำสั่งเป็น patterns (แทนที่ของเดิม)"""
+        self.remove_command(command.id)
+        if not command.is_active:
+            return
+        
+        pattern_ids = []
+        for n, text in enumerate([command.name] + list(command.examples)):
+            pattern_id = f"cmd:{command.id}:{n}"
+            self.add(pattern_id, text, command.id, confidence)
+            pattern_ids.append(pattern_id)
+        with self.lock:
+            self.command_patterns[command.id] = pattern_ids
+    
+    def remove_command(self, command_id: str):
+        """ลบ patterns ที่สร้างจากคำสั่ง"""
+        with self.lock:
+            for pattern_id in self.command_patterns.pop(command_id, []):
+                self._remove(pattern_id)
+    
+    def record_use(self, pattern_id: str):
+        """เพิ่ม usage_count (ใช้ตัดสินเมื่อคะแนนเท่ากัน)"""
+        with self.lock:
+            if pattern_id in self.patterns:
+                self.patterns[pattern_id][2] += 1
+    
+    def match(self, text: str, top_k: int = 5) -> Tuple[Optional[Tuple[str, str, float]], List[Tuple[str, float]]]:
+        """
+        ให้คะแนน patterns ที่มี token ร่วมกับ text
+        
+        Returns:
+            (pattern ที่ดีที่สุด (pattern_id, command_id, score) หรือ None,
+             top_k คำสั่ง [(command_id, score)] เรียงตามคะแนน)
+        """
+        scores: Dict[str, float] = defaultdict(float)
+        best = None
+        best_key = None
+        command_scores: Dict[str, float] = {}
+        
+        with self.lock:
+            for token in set(tokenize(text)):
+                for pattern_id, weight in self.postings.get(token, {}).items():
+                    scores[pattern_id] += weight
+            
+            for pattern_id, score in scores.items():
+                command_id, confidence, usage_count, _ = self.patterns[pattern_id]
+                # คะแนนเท่ากัน: confidence แล้วจึง usage_count (ลำดับเดียวกับ get_patterns)
+                key = (score, confidence, usage_count)
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best = (pattern_id, command_id, score)
+                if score > command_scores.get(command_id, 0.0):
+                    command_scores[command_id] = score
+        
+        ranked = heapq.nlargest(top_k, command_scores.items(), key=lambda x: x[1])
+        return best, ranked
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """สถิติของ index"""
+        return {
+            "patterns": len(self.patterns),
+            "tokens": len(self.postings),
+            "commands": len(self.command_patterns)
+        }
+    
+    def _remove(self, pattern_id: str):
+        entry = self.patterns.pop(pattern_id, None)
+        if entry is None:
+            return
+        for token in entry[3]:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(pattern_id, None)
+                if not posting:
+                    del self.postings[token]
+
 class SmartCommandHub:
     """Smart Command Hub - ศูนย์กลางคำสั่งอัจฉริยะ"""
     
@@ -120,13 +235,21 @@ class SmartCommandHub:
         # Initialize database
         self.init_database()
         
-        # Load default commands
-        self.load_default_commands()
-        
         # Initialize AI for pattern recognition
         self.pattern_cache = {}
         self.command_cache = {}
+        # top-k ของ input ล่าสุด (LRU จำกัดขนาด - input จากผู้ใช้ไม่ซ้ำกันได้ไม่จำกัด)
+        self.suggestion_cache: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+        self.suggestion_cache_size = 256
         self.user_preferences = {}
+        self.suggestion_limit = 5
+        
+        # Inverted index ของ patterns (โหลดจากฐานข้อมูลครั้งเดียว)
+        self.pattern_index = CommandPatternIndex()
+        self._load_pattern_index()
+        
+        # Load default commands
+        self.load_default_commands()
         
         # Background tasks
         self.background_thread = None
@@ -137,7 +260,7 @@ class SmartCommandHub:
     
     def init_database(self):
         """สร้างฐานข้อมูล"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS commands (
                     id TEXT PRIMARY KEY,
@@ -372,7 +495,7 @@ class SmartCommandHub:
     
     def add_command(self, command: CommandDefinition):
         """เพิ่มคำสั่งใหม่"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO commands 
                 (id, name, description, category, component, command, parameters, 
@@ -389,13 +512,15 @@ class SmartCommandHub:
             ))
             conn.commit()
         
-        # Clear cache
+        # Update index and clear cache
+        self.pattern_index.add_command(command)
         self.command_cache.clear()
+        self.suggestion_cache.clear()
         logging.info(f"✅ Added command: {command.name}")
     
     def get_command(self, command_id: str) -> Optional[CommandDefinition]:
         """ดึงคำสั่งตาม ID"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT * FROM commands WHERE id = ?
             """, (command_id,))
@@ -414,7 +539,7 @@ class SmartCommandHub:
     
     def get_commands_by_category(self, category: str) -> List[CommandDefinition]:
         """ดึงคำสั่งตามหมวดหมู่"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT * FROM commands WHERE category = ? AND is_active = 1
                 ORDER BY usage_count DESC, name ASC
@@ -435,7 +560,7 @@ class SmartCommandHub:
     def search_commands(self, query: str) -> List[CommandDefinition]:
         """ค้นหาคำสั่ง"""
         query = query.lower()
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT * FROM commands WHERE is_active = 1 AND 
                 (LOWER(name) LIKE ? OR LOWER(description) LIKE ? OR 
@@ -555,16 +680,13 @@ class SmartCommandHub:
         if user_input in self.command_cache:
             return self.command_cache[user_input]
         
-        # Search by patterns
-        patterns = await self.get_patterns()
+        # Search by patterns (เฉพาะ patterns ที่มี token ร่วมกับ input)
+        best_pattern, ranked = self.pattern_index.match(user_input, self.suggestion_limit)
+        self._cache_suggestions(user_input, ranked)
         best_match = None
-        best_score = 0
         
-        for pattern in patterns:
-            score = self.calculate_pattern_score(user_input, pattern.pattern)
-            if score > best_score and score > 0.7:  # Minimum confidence
-                best_score = score
-                best_match = self.get_command(pattern.command_id)
+        if best_pattern and best_pattern[2] > 0.7:  # Minimum confidence
+            best_match = self.get_command(best_pattern[1])
         
         # If no pattern match, search by keywords
         if not best_match:
@@ -576,11 +698,18 @@ class SmartCommandHub:
         self.command_cache[user_input] = best_match
         return best_match
     
+    def _cache_suggestions(self, user_input: str, ranked: List[Tuple[str, float]]):
+        """เก็บ top-k ไว้ให้ get_suggestions ใช้ซ้ำ (ตัด input ที่ใช้นานที่สุดออกเมื่อเกินขนาด)"""
+        self.suggestion_cache[user_input] = ranked
+        self.suggestion_cache.move_to_end(user_input)
+        while len(self.suggestion_cache) > self.suggestion_cache_size:
+            self.suggestion_cache.popitem(last=False)
+    
     def calculate_pattern_score(self, user_input: str, pattern: str) -> float:
         """คำนวณคะแนนความเหมาะสมของ pattern"""
-        # Simple pattern matching for now
-        user_words = set(user_input.lower().split())
-        pattern_words = set(pattern.lower().split())
+        # Token matching (ตัดคำภาษาไทยด้วย) - เหมือนการให้คะแนนของ pattern_index
+        user_words = set(tokenize(user_input))
+        pattern_words = set(tokenize(pattern))
         
         if not pattern_words:
             return 0
@@ -623,32 +752,63 @@ class SmartCommandHub:
         return parameters
     
     async def get_suggestions(self, user_input: str) -> List[Dict[str, Any]]:
-        """ให้คำแนะนำคำสั่ง"""
+        """ให้คำแนะนำคำสั่ง (คำสั่งที่ตรงกับ input ก่อน แล้วตามด้วยคำสั่งยอดนิยม)"""
         suggestions = []
         
-        # Get popular commands
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT id, name, description, usage_count 
-                FROM commands 
-                WHERE is_active = 1 
-                ORDER BY usage_count DESC 
-                LIMIT 5
-            """)
+        # top-k จากการให้คะแนนรอบเดียวกับ find_best_command
+        ranked = self.suggestion_cache.get(user_input)
+        if ranked is None:
+            _, ranked = self.pattern_index.match(user_input, self.suggestion_limit)
+            self._cache_suggestions(user_input, ranked)
+        else:
+            self.suggestion_cache.move_to_end(user_input)
+        scores = dict(ranked)
+        
+        with sqlite_pool.connect(self.db_path) as conn:
+            if scores:
+                placeholders = ",".join("?" * len(scores))
+                rows = conn.execute(f"""
+                    SELECT id, name, description, usage_count
+                    FROM commands
+                    WHERE is_active = 1 AND id IN ({placeholders})
+                """, list(scores)).fetchall()
+                
+                for row in sorted(rows, key=lambda r: scores[r[0]], reverse=True):
+                    suggestions.append({
+                        "id": row[0],
+                        "name": row[1],
+                        "description": row[2],
+                        "usage_count": row[3],
+                        "score": scores[row[0]]
+                    })
             
-            for row in cursor.fetchall():
-                suggestions.append({
-                    "id": row[0],
-                    "name": row[1],
-                    "description": row[2],
-                    "usage_count": row[3]
-                })
+            # Fill with popular commands
+            if len(suggestions) < self.suggestion_limit:
+                cursor = conn.execute("""
+                    SELECT id, name, description, usage_count
+                    FROM commands
+                    WHERE is_active = 1
+                    ORDER BY usage_count DESC
+                    LIMIT ?
+                """, (self.suggestion_limit + len(suggestions),))
+                
+                for row in cursor.fetchall():
+                    if len(suggestions) >= self.suggestion_limit:
+                        break
+                    if row[0] in scores:
+                        continue
+                    suggestions.append({
+                        "id": row[0],
+                        "name": row[1],
+                        "description": row[2],
+                        "usage_count": row[3]
+                    })
         
         return suggestions
     
     async def record_execution(self, execution: CommandExecution):
         """บันทึกการประมวลผล"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             conn.execute("""
                 INSERT INTO executions 
                 (id, command_id, user_input, parameters, result, execution_time, 
@@ -664,7 +824,7 @@ class SmartCommandHub:
     
     async def update_command_stats(self, command_id: str, success: bool):
         """อัปเดตสถิติคำสั่ง"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             # Get current stats
             cursor = conn.execute("""
                 SELECT usage_count, success_rate FROM commands WHERE id = ?
@@ -692,7 +852,7 @@ class SmartCommandHub:
     
     async def get_patterns(self) -> List[CommandPattern]:
         """ดึง patterns ทั้งหมด"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT id, pattern, command_id, confidence, usage_count, last_used
                 FROM patterns ORDER BY confidence DESC, usage_count DESC
@@ -710,13 +870,37 @@ class SmartCommandHub:
         """เพิ่ม pattern ใหม่"""
         pattern_id = hashlib.md5(f"{pattern}{command_id}".encode()).hexdigest()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             conn.execute("""
                 INSERT OR REPLACE INTO patterns 
                 (id, pattern, command_id, confidence, usage_count, last_used)
                 VALUES (?, ?, ?, ?, 0, ?)
             """, (pattern_id, pattern, command_id, confidence, datetime.now().isoformat()))
             conn.commit()
+        
+        # Update index and clear cache
+        self.pattern_index.add(pattern_id, pattern, command_id, confidence)
+        self.command_cache.clear()
+        self.suggestion_cache.clear()
+    
+    def _load_pattern_index(self):
+        """สร้าง pattern index จากคำสั่งและ patterns ในฐานข้อมูล"""
+        with sqlite_pool.connect(self.db_path) as conn:
+            command_rows = conn.execute("""
+                SELECT id, name, examples FROM commands WHERE is_active = 1
+            """).fetchall()
+            pattern_rows = conn.execute("""
+                SELECT id, pattern, command_id, confidence, usage_count FROM patterns
+            """).fetchall()
+        
+        for command_id, name, examples in command_rows:
+            self.pattern_index.add_command(CommandDefinition(
+                id=command_id, name=name, description="", category="", component="",
+                command="", parameters={}, examples=json.loads(examples or "[]"), tags=[]
+            ))
+        
+        for pattern_id, pattern, command_id, confidence, usage_count in pattern_rows:
+            self.pattern_index.add(pattern_id, pattern, command_id, confidence, usage_count or 0)
     
     def start_background_tasks(self):
         """เริ่มงานในพื้นหลัง"""
@@ -728,7 +912,7 @@ class SmartCommandHub:
         while self.is_running:
             try:
                 # Clean old executions (older than 30 days)
-                with sqlite3.connect(self.db_path) as conn:
+                with sqlite_pool.connect(self.db_path) as conn:
                     thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
                     conn.execute("DELETE FROM executions WHERE timestamp < ?", (thirty_days_ago,))
                     conn.commit()
@@ -744,7 +928,7 @@ class SmartCommandHub:
     
     def _update_pattern_usage(self):
         """อัปเดตการใช้งาน patterns"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             # Get recent executions
             cursor = conn.execute("""
                 SELECT user_input, command_id FROM executions 
@@ -766,12 +950,13 @@ class SmartCommandHub:
                             SET usage_count = usage_count + 1, last_used = ?
                             WHERE id = ?
                         """, (datetime.now().isoformat(), pattern_id))
+                        self.pattern_index.record_use(pattern_id)
             
             conn.commit()
     
     def get_statistics(self) -> Dict[str, Any]:
         """ดึงสถิติระบบ"""
-        with sqlite3.connect(self.db_path) as conn:
+        with sqlite_pool.connect(self.db_path) as conn:
             # Total commands
             total_commands = conn.execute("SELECT COUNT(*) FROM commands WHERE is_active = 1").fetchone()[0]
             
@@ -8,10 +8,25 @@ from .logger_manager import LoggerManager
 from .workflow_monitor import WorkflowMonitor
 from .performance_tracker import PerformanceTracker
 from .alert_system import AlertSystem
+from .log_sink import AsyncLogSink, BackpressurePolicy
+from .log_broadcaster import LogBroadcaster, LogSubscription
+from .metrics_rollup import MetricsRollup
+from .event_dispatcher import EventDispatcher, EventSubscription, DropPolicy
+from .rule_engine import RuleEngine, CompiledRule
 
 __all__ = [
     'LoggerManager',
     'WorkflowMonitor', 
     'PerformanceTracker',
-    'AlertSystem'
+    'AlertSystem',
+    'AsyncLogSink',
+    'BackpressurePolicy',
+    'LogBroadcaster',
+    'LogSubscription',
+    'MetricsRollup',
+    'EventDispatcher',
+    'EventSubscription',
+    'DropPolicy',
+    'RuleEngine',
+    'CompiledRule'
 ] 
\ No newline at end of file
@@ -5,6 +5,8 @@ Alert System - ระบบจัดการ alerts และ notifications
 จัดการ alerts แบบ real-time และส่ง notifications ไปยัง dashboard
 """
 
+import atexit
+import heapq
 import json
 import threading
 import time
@@ -13,8 +15,24 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
-from collections import deque
+from collections import deque, defaultdict
 import queue
+import os
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from core import sqlite_pool
+
+try:
+    from .event_dispatcher import EventDispatcher, DropPolicy
+except ImportError:
+    from event_dispatcher import EventDispatcher, DropPolicy
+
+try:
+    from .rule_engine import RuleEngine
+except ImportError:
+    from rule_engine import RuleEngine
 
 class AlertSeverity(Enum):
     """ระดับความรุนแรงของ alert"""
@@ -54,15 +72,57 @@ class Alert:
     expires_at: str = None
     auto_dismiss: bool = True
     dismiss_after_hours: int = 24
+    fingerprint: str = None
+    occurrence_count: int = 1
+    first_seen: str = None
+    last_seen: str = None
+
+SEVERITY_ORDER = {
+    AlertSeverity.INFO: 0,
+    AlertSeverity.WARNING: 1,
+    AlertSeverity.ERROR: 2,
+    AlertSeverity.CRITICAL: 3
+}
+
+ALERT_OCCURRENCE_UPDATE_SQL = '''
+    UPDATE alerts
+    SET occurrence_count = ?, last_seen = ?, severity = ?, message = ?, metadata = ?
+    WHERE id = ?
+'''
+
+def make_fingerprint(alert_type: AlertType, module: str = None, rule: str = None) -> str:
+    """fingerprint สำหรับรวม alert ซ้ำ: (type, module, rule)"""
+    return f"{alert_type.value}|{module or ''}|{rule or ''}"
 
 class AlertSystem:
     """ระบบจัดการ alerts และ notifications"""
     
-    def __init__(self, db_path: str = "logs/alerts.db"):
+    def __init__(self, db_path: str = "logs/alerts.db", flush_interval: float = 5.0,
+                 repeat_notify_interval: float = 300.0):
         self.db_path = db_path
         self.alerts_buffer = deque(maxlen=1000)
         self.alert_queue = queue.Queue()
         
+        # active alerts อยู่ในหน่วยความจำ (SQLite เป็น journal สำหรับความคงทนเท่านั้น)
+        # id -> alert เรียงตามเวลาที่สร้าง + index ตาม severity / type / module
+        self.active_alerts: Dict[str, Alert] = {}
+        self._index_by_severity: Dict[str, set] = defaultdict(set)
+        self._index_by_type: Dict[str, set] = defaultdict(set)
+        self._index_by_module: Dict[str, set] = defaultdict(set)
+        
+        # min-heap ของ (เวลาหมดอายุ, alert id) - alert ที่ถูก dismiss แล้วจะถูกข้ามตอน pop
+        self._expiry_heap: List[tuple] = []
+        self._expiry_wakeup = threading.Event()
+        
+        # รวม alert ซ้ำ: fingerprint -> alert ที่ยัง active
+        self.flush_interval = flush_interval
+        self.repeat_notify_interval = repeat_notify_interval
+        self.active_by_fingerprint: Dict[str, Alert] = {}
+        self._dirty_fingerprints = set()
+        self._last_notified: Dict[str, float] = {}
+        self._flush_event = threading.Event()
+        self.stats = {"created": 0, "coalesced": 0, "notifications_suppressed": 0, "flushed_updates": 0}
+        
         # สร้างโฟลเดอร์
         import os
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -73,24 +133,32 @@ class AlertSystem:
         # Thread lock
         self.lock = threading.Lock()
         
-        # Callbacks สำหรับ real-time updates
+        # Callbacks สำหรับ real-time updates (ส่งผ่าน dispatcher ไม่ block ผู้สร้าง alert)
         self.callbacks: Dict[str, List[Callable]] = {
             "alert_created": [],
+            "alert_repeated": [],
             "alert_acknowledged": [],
             "alert_expired": []
         }
+        self.event_dispatcher = EventDispatcher("AlertEvents")
         
-        # Alert rules
+        # Alert rules (compile ครั้งเดียว index ตาม field ที่ rule ใช้)
         self.alert_rules = self._load_alert_rules()
+        self.rule_engine = RuleEngine()
+        self.rule_engine.load(self.alert_rules)
+        
+        # โหลด alert ที่ยัง active เข้าหน่วยความจำ (รวม alert ซ้ำต่อหลัง restart ได้)
+        self._load_active_alerts()
         
         # เริ่ม background processing
         self._start_background_processing()
+        atexit.register(self.flush_alert_updates)
         
         print("🚨 Alert System initialized")
     
     def _init_database(self):
         """สร้างฐานข้อมูล SQLite สำหรับ alerts"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # ตาราง alerts
@@ -111,10 +179,22 @@ class AlertSystem:
                 expires_at TEXT,
                 auto_dismiss BOOLEAN DEFAULT TRUE,
                 dismiss_after_hours INTEGER DEFAULT 24,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                fingerprint TEXT,
+                occurrence_count INTEGER DEFAULT 1,
+                first_seen TEXT,
+                last_seen TEXT
             )
         ''')
         
+        # ฐานข้อมูลเดิม: เพิ่มคอลัมน์สำหรับรวม alert ซ้ำ
+        cursor.execute('PRAGMA table_info(alerts)')
+        existing_columns = {row[1] for row in cursor.fetchall()}
+        for column, definition in (("fingerprint", "TEXT"), ("occurrence_count", "INTEGER DEFAULT 1"),
+                                   ("first_seen", "TEXT"), ("last_seen", "TEXT")):
+            if column not in existing_columns:
+                cursor.execute(f'ALTER TABLE alerts ADD COLUMN {column} {definition}')
+        
         # ตาราง alert rules
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS alert_rules (
@@ -147,6 +227,8 @@ class AlertSystem:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_module ON alerts(module)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_acknowledged ON alerts(acknowledged)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_fingerprint ON alerts(fingerprint)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_alerts_expires_at ON alerts(expires_at)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_alert_rules_enabled ON alert_rules(enabled)')
         
         conn.commit()
@@ -155,7 +237,7 @@ class AlertSystem:
     def _load_alert_rules(self) -> List[Dict[str, Any]]:
         """โหลด alert rules จากฐานข้อมูล"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('SELECT * FROM alert_rules WHERE enabled = TRUE')
@@ -243,31 +325,58 @@ class AlertSystem:
     def create_alert(self, alert_type: AlertType, severity: AlertSeverity, 
                     title: str, message: str, module: str = None,
                     workflow_id: str = None, metadata: Dict[str, Any] = None,
-                    auto_dismiss: bool = True, dismiss_after_hours: int = 24) -> str:
-        """สร้าง alert ใหม่"""
+                    auto_dismiss: bool = True, dismiss_after_hours: int = 24,
+                    rule: str = None) -> str:
+        """
+        สร้าง alert ใหม่
+        
+        alert ที่ fingerprint (type, module, rule) ตรงกับ alert ที่ยัง active
+        จะถูกรวมเข้ากับ alert เดิม (นับจำนวนครั้ง + last_seen) แทนการสร้างแถวใหม่
+        rule ไม่ระบุ = ใช้ title
+        """
         try:
             import uuid
-            alert_id = str(uuid.uuid4())
-            
-            # คำนวณเวลาหมดอายุ
-            expires_at = None
-            if auto_dismiss:
-                expires_at = (datetime.now() + timedelta(hours=dismiss_after_hours)).isoformat()
-            
-            alert = Alert(
-                id=alert_id,
-                type=alert_type,
-                severity=severity,
-                title=title,
-                message=message,
-                timestamp=datetime.now().isoformat(),
-                module=module,
-                workflow_id=workflow_id,
-                metadata=metadata or {},
-                auto_dismiss=auto_dismiss,
-                dismiss_after_hours=dismiss_after_hours,
-                expires_at=expires_at
-            )
+            now = datetime.now()
+            timestamp = now.isoformat()
+            fingerprint = make_fingerprint(alert_type, module, rule or title)
+            
+            with self.lock:
+                existing = self.active_by_fingerprint.get(fingerprint)
+                if existing is not None and (not existing.expires_at or existing.expires_at > timestamp):
+                    notify = self._coalesce_alert(existing, severity, message, metadata, timestamp)
+                else:
+                    existing = None
+                    
+                    # คำนวณเวลาหมดอายุ
+                    expires_at = None
+                    if auto_dismiss:
+                        expires_at = (now + timedelta(hours=dismiss_after_hours)).isoformat()
+                    
+                    alert = Alert(
+                        id=str(uuid.uuid4()),
+                        type=alert_type,
+                        severity=severity,
+                        title=title,
+                        message=message,
+                        timestamp=timestamp,
+                        module=module,
+                        workflow_id=workflow_id,
+                        metadata=metadata or {},
+                        auto_dismiss=auto_dismiss,
+                        dismiss_after_hours=dismiss_after_hours,
+                        expires_at=expires_at,
+                        fingerprint=fingerprint,
+                        first_seen=timestamp,
+                        last_seen=timestamp
+                    )
+                    self._index_alert(alert)
+                    self._last_notified[fingerprint] = time.time()
+                    self.stats["created"] += 1
+            
+            if existing is not None:
+                if notify:
+                    self._trigger_callbacks("alert_repeated", existing)
+                return existing.id
             
             # บันทึกลงฐานข้อมูล
             self._save_alert(alert)
@@ -275,6 +384,10 @@ class AlertSystem:
             # เพิ่มใน buffer
             with self.lock:
                 self.alerts_buffer.append(alert)
+                # alert ซ้ำที่ถูกรวมก่อน INSERT เสร็จ: flush ที่ทำไปแล้วอาจ UPDATE ไม่พบแถว
+                # จึงทำเครื่องหมายใหม่ให้ flush ครั้งถัดไปบันทึกจำนวนครั้งล่าสุด
+                if alert.occurrence_count > 1:
+                    self._dirty_fingerprints.add(fingerprint)
             
             # ส่งไปยัง queue
             self.alert_queue.put(alert)
@@ -282,23 +395,227 @@ class AlertSystem:
             # เรียก callbacks
             self._trigger_callbacks("alert_created", alert)
             
-            return alert_id
+            return alert.id
             
         except Exception as e:
             print(f"❌ Error creating alert: {e}")
             return None
     
+    def _coalesce_alert(self, alert: Alert, severity: AlertSeverity, message: str,
+                        metadata: Dict[str, Any], timestamp: str) -> bool:
+        """
+        รวม alert ซ้ำเข้ากับ alert เดิม - O(1) ไม่แตะฐานข้อมูล (ต้องถือ self.lock)
+        
+        คืนค่า True ถ้าควรแจ้ง callback alert_repeated
+        """
+        alert.occurrence_count += 1
+        alert.last_seen = timestamp
+        alert.message = message
+        if metadata:
+            alert.metadata = metadata
+        
+        escalated = SEVERITY_ORDER[severity] > SEVERITY_ORDER[alert.severity]
+        if escalated:
+            self._discard_index(self._index_by_severity, alert.severity.value, alert.id)
+            alert.severity = severity
+            self._index_by_severity[severity.value].add(alert.id)
+        
+        self._dirty_fingerprints.add(alert.fingerprint)
+        self.stats["coalesced"] += 1
+        
+        # จำกัดการแจ้งเตือนซ้ำต่อ fingerprint (แจ้งทันทีถ้าความรุนแรงเพิ่มขึ้น)
+        now = time.time()
+        if escalated or now - self._last_notified.get(alert.fingerprint, 0.0) >= self.repeat_notify_interval:
+            self._last_notified[alert.fingerprint] = now
+            return True
+        
+        self.stats["notifications_suppressed"] += 1
+        return False
+    
+    def flush_alert_updates(self) -> int:
+        """
+        บันทึกจำนวนครั้ง/last_seen ของ alert ที่ถูกรวมลงฐานข้อมูลเป็น batch
+        
+        ถ้าเขียนไม่สำเร็จ fingerprint ถูกทำเครื่องหมายกลับเพื่อให้ flush ครั้งถัดไปลองใหม่
+        """
+        with self.lock:
+            if not self._dirty_fingerprints:
+                return 0
+            fingerprints = list(self._dirty_fingerprints)
+            rows = []
+            for fingerprint in fingerprints:
+                alert = self.active_by_fingerprint.get(fingerprint)
+                if alert is not None:
+                    rows.append((
+                        alert.occurrence_count,
+                        alert.last_seen,
+                        alert.severity.value,
+                        alert.message,
+                        json.dumps(alert.metadata) if alert.metadata else None,
+                        alert.id
+                    ))
+            self._dirty_fingerprints.clear()
+        
+        try:
+            conn = sqlite_pool.connect(self.db_path)
+            try:
+                conn.executemany(ALERT_OCCURRENCE_UPDATE_SQL, rows)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"❌ Error flushing alert updates: {e}")
+            with self.lock:
+                # alert ที่ยัง active: ค่าล่าสุดในหน่วยความจำจะถูกเขียนในรอบถัดไป
+                self._dirty_fingerprints.update(
+                    fingerprint for fingerprint in fingerprints if fingerprint in self.active_by_fingerprint
+                )
+            return 0
+        
+        with self.lock:
+            self.stats["flushed_updates"] += len(rows)
+        return len(rows)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """สถิติการรวม alert ซ้ำ"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["active_alerts"] = len(self.active_alerts)
+            stats["active_fingerprints"] = len(self.active_by_fingerprint)
+            stats["pending_updates"] = len(self._dirty_fingerprints)
+        stats["rule_engine"] = self.rule_engine.get_stats()
+        return stats
+    
+    def _load_active_alerts(self):
+        """โหลด alert ที่ยังไม่หมดอายุจากฐานข้อมูลเข้าหน่วยความจำ"""
+        try:
+            conn = sqlite_pool.connect(self.db_path)
+            cursor = conn.cursor()
+            now = datetime.now().isoformat()
+            
+            # alert ที่หมดอายุระหว่างที่ระบบปิดอยู่
+            cursor.execute('''
+                DELETE FROM alerts WHERE expires_at IS NOT NULL AND expires_at <= ?
+            ''', (now,))
+            conn.commit()
+            
+            cursor.execute('''
+                SELECT id, type, severity, title, message, timestamp, module, workflow_id,
+                       metadata, acknowledged, acknowledged_by, acknowledged_at, expires_at,
+                       auto_dismiss, dismiss_after_hours, fingerprint, occurrence_count,
+                       first_seen, last_seen
+                FROM alerts
+                ORDER BY timestamp
+            ''')
+            
+            with self.lock:
+                for row in cursor.fetchall():
+                    self._index_alert(Alert(
+                        id=row[0],
+                        type=AlertType(row[1]),
+                        severity=AlertSeverity(row[2]),
+                        title=row[3],
+                        message=row[4],
+                        timestamp=row[5],
+                        module=row[6],
+                        workflow_id=row[7],
+                        metadata=json.loads(row[8]) if row[8] else {},
+                        acknowledged=bool(row[9]),
+                        acknowledged_by=row[10],
+                        acknowledged_at=row[11],
+                        expires_at=row[12],
+                        auto_dismiss=bool(row[13]),
+                        dismiss_after_hours=row[14],
+                        fingerprint=row[15],
+                        occurrence_count=row[16] or 1,
+                        first_seen=row[17] or row[5],
+                        last_seen=row[18] or row[5]
+                    ))
+            
+            conn.close()
+            
+        except Exception as e:
+            print(f"❌ Error loading active alerts: {e}")
+    
+    def _index_alert(self, alert: Alert):
+        """เพิ่ม alert เข้า active set, indexes และ expiry heap (ต้องถือ self.lock)"""
+        self.active_alerts[alert.id] = alert
+        self._index_by_severity[alert.severity.value].add(alert.id)
+        self._index_by_type[alert.type.value].add(alert.id)
+        self._index_by_module[alert.module or ""].add(alert.id)
+        if alert.fingerprint:
+            self.active_by_fingerprint[alert.fingerprint] = alert
+        
+        if alert.expires_at:
+            expires_at = datetime.fromisoformat(alert.expires_at).timestamp()
+            earliest = not self._expiry_heap or expires_at < self._expiry_heap[0][0]
+            heapq.heappush(self._expiry_heap, (expires_at, alert.id))
+            if earliest:
+                # ให้ background thread ตั้งเวลาตื่นใหม่
+                self._expiry_wakeup.set()
+    
+    def _unindex_alert(self, alert_id: str) -> Optional[Alert]:
+        """เอา alert ออกจาก active set และ indexes (ต้องถือ self.lock)"""
+        alert = self.active_alerts.pop(alert_id, None)
+        if alert is None:
+            return None
+        
+        self._discard_index(self._index_by_severity, alert.severity.value, alert_id)
+        self._discard_index(self._index_by_type, alert.type.value, alert_id)
+        self._discard_index(self._index_by_module, alert.module or "", alert_id)
+        
+        fingerprint = alert.fingerprint
+        if fingerprint and self.active_by_fingerprint.get(fingerprint) is alert:
+            del self.active_by_fingerprint[fingerprint]
+            self._dirty_fingerprints.discard(fingerprint)
+            self._last_notified.pop(fingerprint, None)
+        
+        return alert
+    
+    @staticmethod
+    def _discard_index(index: Dict[str, set], key: str, alert_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(alert_id)
+            if not ids:
+                del index[key]
+    
+    @staticmethod
+    def _alert_to_dict(alert: Alert) -> Dict[str, Any]:
+        return {
+            "id": alert.id,
+            "type": alert.type.value,
+            "severity": alert.severity.value,
+            "title": alert.title,
+            "message": alert.message,
+            "timestamp": alert.timestamp,
+            "module": alert.module,
+            "workflow_id": alert.workflow_id,
+            "metadata": alert.metadata or None,
+            "acknowledged": alert.acknowledged,
+            "acknowledged_by": alert.acknowledged_by,
+            "acknowledged_at": alert.acknowledged_at,
+            "expires_at": alert.expires_at,
+            "auto_dismiss": alert.auto_dismiss,
+            "dismiss_after_hours": alert.dismiss_after_hours,
+            "fingerprint": alert.fingerprint,
+            "occurrence_count": alert.occurrence_count,
+            "first_seen": alert.first_seen,
+            "last_seen": alert.last_seen
+        }
+    
     def _save_alert(self, alert: Alert):
         """บันทึก alert ลงฐานข้อมูล"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
                 INSERT INTO alerts 
                 (id, type, severity, title, message, timestamp, module, workflow_id,
-                 metadata, auto_dismiss, dismiss_after_hours, expires_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 metadata, auto_dismiss, dismiss_after_hours, expires_at,
+                 fingerprint, occurrence_count, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 alert.id,
                 alert.type.value,
@@ -311,7 +628,11 @@ class AlertSystem:
                 json.dumps(alert.metadata) if alert.metadata else None,
                 alert.auto_dismiss,
                 alert.dismiss_after_hours,
-                alert.expires_at
+                alert.expires_at,
+                alert.fingerprint,
+                alert.occurrence_count,
+                alert.first_seen,
+                alert.last_seen
             ))
             
             conn.commit()
@@ -323,7 +644,7 @@ class AlertSystem:
     def acknowledge_alert(self, alert_id: str, user: str = "system") -> bool:
         """ยืนยันการรับทราบ alert"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -343,14 +664,15 @@ class AlertSystem:
                 conn.commit()
                 conn.close()
                 
-                # อัปเดต buffer
+                # อัปเดต active set และ buffer
                 with self.lock:
-                    for alert in self.alerts_buffer:
-                        if alert.id == alert_id:
+                    acknowledged_at = datetime.now().isoformat()
+                    active = self.active_alerts.get(alert_id)
+                    for alert in [active] + [a for a in self.alerts_buffer if a.id == alert_id]:
+                        if alert is not None:
                             alert.acknowledged = True
                             alert.acknowledged_by = user
-                            alert.acknowledged_at = datetime.now().isoformat()
-                            break
+                            alert.acknowledged_at = acknowledged_at
                 
                 # เรียก callbacks
                 self._trigger_callbacks("alert_acknowledged", alert_id, user)
@@ -367,7 +689,7 @@ class AlertSystem:
     def dismiss_alert(self, alert_id: str, user: str = "system") -> bool:
         """ปิด alert"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('DELETE FROM alerts WHERE id = ?', (alert_id,))
@@ -383,12 +705,13 @@ class AlertSystem:
                 conn.commit()
                 conn.close()
                 
-                # ลบออกจาก buffer
+                # ลบออกจาก buffer และ active set
                 with self.lock:
                     self.alerts_buffer = deque(
                         [alert for alert in self.alerts_buffer if alert.id != alert_id],
                         maxlen=1000
                     )
+                    self._unindex_alert(alert_id)
                 
                 return True
             
@@ -401,52 +724,32 @@ class AlertSystem:
     
     def get_active_alerts(self, severity: AlertSeverity = None, 
                          alert_type: AlertType = None, module: str = None) -> List[Dict[str, Any]]:
-        """ดึง alerts ที่ยังไม่หมดอายุ"""
+        """ดึง alerts ที่ยังไม่หมดอายุ (อ่านจากหน่วยความจำ)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            query = "SELECT * FROM alerts WHERE (expires_at IS NULL OR expires_at > ?)"
-            params = [datetime.now().isoformat()]
-            
-            if severity:
-                query += " AND severity = ?"
-                params.append(severity.value)
-            
-            if alert_type:
-                query += " AND type = ?"
-                params.append(alert_type.value)
-            
-            if module:
-                query += " AND module = ?"
-                params.append(module)
-            
-            query += " ORDER BY timestamp DESC"
-            
-            cursor.execute(query, params)
-            
-            alerts = []
-            for row in cursor.fetchall():
-                alerts.append({
-                    "id": row[0],
-                    "type": row[1],
-                    "severity": row[2],
-                    "title": row[3],
-                    "message": row[4],
-                    "timestamp": row[5],
-                    "module": row[6],
-                    "workflow_id": row[7],
-                    "metadata": json.loads(row[8]) if row[8] else None,
-                    "acknowledged": bool(row[9]),
-                    "acknowledged_by": row[10],
-                    "acknowledged_at": row[11],
-                    "expires_at": row[12],
-                    "auto_dismiss": bool(row[13]),
-                    "dismiss_after_hours": row[14]
-                })
+            # บันทึก alert ซ้ำที่ค้างอยู่ก่อน ให้ฐานข้อมูลตรงกับสิ่งที่คืนไป
+            self.flush_alert_updates()
             
-            conn.close()
-            return alerts
+            with self.lock:
+                candidates = None
+                for index, key in ((self._index_by_severity, severity.value if severity else None),
+                                   (self._index_by_type, alert_type.value if alert_type else None),
+                                   (self._index_by_module, module or None)):
+                    if key is None:
+                        continue
+                    ids = index.get(key, set())
+                    candidates = ids if candidates is None else candidates & ids
+                
+                # ใหม่สุดก่อน
+                if candidates is None:
+                    alerts = list(reversed(self.active_alerts.values()))
+                else:
+                    alerts = sorted((self.active_alerts[alert_id] for alert_id in candidates),
+                                    key=lambda alert: alert.timestamp, reverse=True)
+                
+                # alert ที่ถึงเวลาหมดอายุแล้วแต่ background thread ยังไม่ได้ลบ
+                now = datetime.now().isoformat()
+                return [self._alert_to_dict(alert) for alert in alerts
+                        if not alert.expires_at or alert.expires_at > now]
             
         except Exception as e:
             print(f"❌ Error getting active alerts: {e}")
@@ -455,7 +758,7 @@ class AlertSystem:
     def get_alert_history(self, hours: int = 24) -> List[Dict[str, Any]]:
         """ดึงประวัติ alerts"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cutoff_time = datetime.now() - timedelta(hours=hours)
@@ -526,7 +829,7 @@ class AlertSystem:
                       conditions: Dict[str, Any], actions: Dict[str, Any]) -> bool:
         """เพิ่ม alert rule ใหม่"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -543,8 +846,9 @@ class AlertSystem:
             conn.commit()
             conn.close()
             
-            # อัปเดต rules ใน memory
+            # อัปเดต rules ใน memory และ compile ใหม่ (hot reload)
             self.alert_rules = self._load_alert_rules()
+            self.rule_engine.load(self.alert_rules)
             
             return True
             
@@ -553,76 +857,26 @@ class AlertSystem:
             return False
     
     def evaluate_rules(self, data: Dict[str, Any]) -> List[Alert]:
-        """ประเมิน alert rules"""
+        """
+        ประเมิน alert rules
+        
+        รัน predicate เฉพาะ rules ที่อ้างถึง field ที่เปลี่ยนค่าจากข้อมูลชุดก่อน
+        (ของ module/workflow เดียวกัน) rule อื่นใช้ผลลัพธ์ล่าสุด rule แบบ window ใช้ conditions
+        "window_samples" และ "window_required" เช่น 5 และ 3 = จริง 3 จาก 5 samples
+        """
         triggered_alerts = []
         
-        for rule in self.alert_rules:
+        for compiled_rule in self.rule_engine.evaluate(data):
             try:
-                if self._evaluate_rule(rule, data):
-                    # สร้าง alert ตาม rule
-                    alert = self._create_alert_from_rule(rule, data)
-                    if alert:
-                        triggered_alerts.append(alert)
+                # สร้าง alert ตาม rule
+                alert = self._create_alert_from_rule(compiled_rule.rule, data)
+                if alert:
+                    triggered_alerts.append(alert)
             except Exception as e:
-                print(f"❌ Error evaluating rule {rule['rule_name']}: {e}")
+                print(f"❌ Error evaluating rule {compiled_rule.name}: {e}")
         
         return triggered_alerts
     
-    def _evaluate_rule(self, rule: Dict[str, Any], data: Dict[str, Any]) -> bool:
-        """ประเมิน rule เดียว"""
-        conditions = rule["conditions"]
-        rule_type = rule["rule_type"]
-        
-        if rule_type == "performance":
-            return self._evaluate_performance_rule(conditions, data)
-        elif rule_type == "workflow":
-            return self._evaluate_workflow_rule(conditions, data)
-        elif rule_type == "chrome_automation":
-            return self._evaluate_chrome_rule(conditions, data)
-        else:
-            return False
-    
-    def _evaluate_performance_rule(self, conditions: Dict[str, Any], data: Dict[str, Any]) -> bool:
-        """ประเมิน performance rule"""
-        metric = conditions.get("metric")
-        threshold = conditions.get("threshold")
-        
-        if metric in data and threshold is not None:
-            return data[metric] >= threshold
-        
-        return False
-    
-    def _evaluate_workflow_rule(self, conditions: Dict[str, Any], data: Dict[str, Any]) -> bool:
-        """ประเมิน workflow rule"""
-        status = conditions.get("status")
-        consecutive_failures = conditions.get("consecutive_failures", 1)
-        
-        if status and "workflow_status" in data:
-            if data["workflow_status"] == status:
-                # ตรวจสอบ consecutive failures
-                if "failure_count" in data:
-                    return data["failure_count"] >= consecutive_failures
-        
-        return False
-    
-    def _evaluate_chrome_rule(self, conditions: Dict[str, Any], data: Dict[str, Any]) -> bool:
-        """ประเมิน chrome automation rule"""
-        error_type = conditions.get("error_type")
-        frequency = conditions.get("frequency", "low")
-        
-        if error_type and "chrome_error" in data:
-            if data["chrome_error"] == error_type:
-                # ตรวจสอบ frequency
-                if "error_count" in data:
-                    if frequency == "high" and data["error_count"] >= 5:
-                        return True
-                    elif frequency == "medium" and data["error_count"] >= 3:
-                        return True
-                    elif frequency == "low" and data["error_count"] >= 1:
-                        return True
-        
-        return False
-    
     def _create_alert_from_rule(self, rule: Dict[str, Any], data: Dict[str, Any]) -> Optional[Alert]:
         """สร้าง alert จาก rule"""
         actions = rule["actions"]
@@ -644,89 +898,103 @@ class AlertSystem:
             workflow_id=data.get("workflow_id"),
             metadata=data,
             auto_dismiss=auto_dismiss,
-            dismiss_after_hours=dismiss_after_hours
+            dismiss_after_hours=dismiss_after_hours,
+            rule=rule["rule_name"]
         )
         
         return alert_id
     
-    def add_callback(self, event: str, callback: Callable):
-        """เพิ่ม callback สำหรับ event"""
+    def add_callback(self, event: str, callback: Callable, max_queue_size: int = None,
+                     policy: DropPolicy = None, max_retries: int = None):
+        """
+        เพิ่ม callback สำหรับ event
+        
+        callback ถูกเรียกบน worker ของ dispatcher (หรือ event loop ถ้าเป็น async def)
+        max_queue_size / policy / max_retries: ตั้งค่า queue และการ retry ราย subscriber
+        """
         if event in self.callbacks:
             self.callbacks[event].append(callback)
+            self.event_dispatcher.subscribe(event, callback, max_queue_size=max_queue_size,
+                                            policy=policy, max_retries=max_retries)
     
     def _trigger_callbacks(self, event: str, *args):
-        """เรียก callbacks"""
-        for callback in self.callbacks.get(event, []):
-            try:
-                callback(*args)
-            except Exception as e:
-                print(f"❌ Callback error for {event}: {e}")
+        """ส่ง event ให้ callbacks (คืนค่าทันที)"""
+        self.event_dispatcher.emit(event, *args)
     
     def _start_background_processing(self):
         """เริ่ม background processing"""
         def process_alerts():
             while True:
                 try:
+                    self._expiry_wakeup.clear()
+                    
                     # ตรวจสอบ alerts ที่หมดอายุ
-                    self._cleanup_expired_alerts()
+                    next_expiry = self._cleanup_expired_alerts()
                     
                     # ประมวลผล alert queue
                     while not self.alert_queue.empty():
                         alert = self.alert_queue.get_nowait()
                         # สามารถเพิ่มการประมวลผลเพิ่มเติมได้ที่นี่
                     
-                    time.sleep(60)  # ตรวจสอบทุก 1 นาที
+                    # หลับจนถึงเวลาหมดอายุของ alert ถัดไป (สูงสุด 1 นาที)
+                    timeout = 60.0 if next_expiry is None else min(60.0, max(0.0, next_expiry - time.time()))
+                    self._expiry_wakeup.wait(timeout)
                     
                 except Exception as e:
                     print(f"❌ Alert processing error: {e}")
                     time.sleep(120)
         
+        def flush_updates():
+            while True:
+                self._flush_event.wait(self.flush_interval)
+                self._flush_event.clear()
+                self.flush_alert_updates()
+        
         process_thread = threading.Thread(target=process_alerts, daemon=True)
         process_thread.start()
+        
+        flush_thread = threading.Thread(target=flush_updates, name="AlertUpdateFlusher", daemon=True)
+        flush_thread.start()
     
-    def _cleanup_expired_alerts(self):
-        """ลบ alerts ที่หมดอายุ"""
+    def _cleanup_expired_alerts(self) -> Optional[float]:
+        """ลบ alerts ที่หมดอายุตาม expiry heap - คืนเวลาหมดอายุของ alert ถัดไป"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            current_time = datetime.now().isoformat()
-            
-            # ดึง alerts ที่หมดอายุ
-            cursor.execute('''
-                SELECT id FROM alerts 
-                WHERE expires_at IS NOT NULL AND expires_at <= ?
-            ''', (current_time,))
-            
-            expired_alerts = cursor.fetchall()
+            now = time.time()
+            expired = []
             
-            # ลบ alerts ที่หมดอายุ
-            cursor.execute('''
-                DELETE FROM alerts 
-                WHERE expires_at IS NOT NULL AND expires_at <= ?
-            ''', (current_time,))
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            conn.close()
-            
-            if deleted_count > 0:
-                print(f"🧹 Cleaned up {deleted_count} expired alerts")
+            with self.lock:
+                while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                    _, alert_id = heapq.heappop(self._expiry_heap)
+                    if self._unindex_alert(alert_id) is not None:
+                        expired.append(alert_id)
                 
-                # ลบออกจาก buffer
-                with self.lock:
+                if expired:
+                    expired_ids = set(expired)
                     self.alerts_buffer = deque(
-                        [alert for alert in self.alerts_buffer 
-                         if not alert.expires_at or alert.expires_at > current_time],
+                        [alert for alert in self.alerts_buffer if alert.id not in expired_ids],
                         maxlen=1000
                     )
                 
+                next_expiry = self._expiry_heap[0][0] if self._expiry_heap else None
+            
+            if expired:
+                # ลบจากฐานข้อมูลเป็น batch
+                conn = sqlite_pool.connect(self.db_path)
+                conn.executemany('DELETE FROM alerts WHERE id = ?', [(alert_id,) for alert_id in expired])
+                conn.commit()
+                conn.close()
+                
+                print(f"🧹 Cleaned up {len(expired)} expired alerts")
+                
                 # เรียก callbacks
-                for alert_id, in expired_alerts:
+                for alert_id in expired:
                     self._trigger_callbacks("alert_expired", alert_id)
             
+            return next_expiry
+            
         except Exception as e:
             print(f"❌ Error cleaning up expired alerts: {e}")
+            return None
 
 
 # Global alert system instance
@@ -742,7 +1010,8 @@ def get_alert_system() -> AlertSystem:
 def create_alert(alert_type: AlertType, severity: AlertSeverity, 
                 title: str, message: str, module: str = None,
                 workflow_id: str = None, metadata: Dict[str, Any] = None,
-                auto_dismiss: bool = True, dismiss_after_hours: int = 24) -> str:
+                auto_dismiss: bool = True, dismiss_after_hours: int = 24,
+                rule: str = None) -> str:
     """สร้าง alert (helper function)"""
     alert_system = get_alert_system()
     return alert_system.create_alert(
@@ -754,5 +1023,6 @@ def create_alert(alert_type: AlertType, severity: AlertSeverity,
         workflow_id=workflow_id,
         metadata=metadata,
         auto_dismiss=auto_dismiss,
-        dismiss_after_hours=dismiss_after_hours
+        dismiss_after_hours=dismiss_after_hours,
+        rule=rule
     ) 
\ No newline at end of file
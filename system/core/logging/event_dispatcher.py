@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Event Dispatcher - ส่ง event ไปยัง callbacks แบบ asynchronous
+ผู้ส่ง event (emit) ไม่ต้องรอ callback: แต่ละ subscriber มี queue ของตัวเอง
+และถูก drain โดย worker pool ขนาดจำกัด (subscriber เดียวใช้ worker ได้ทีละ 1 ตัว
+event จึงถึง callback ตามลำดับ) ส่วน coroutine callbacks ถูก await ทีละตัวตามลำดับ
+บน event loop เฉพาะ
+
+worker pool และ event loop ใช้ร่วมกันทุก dispatcher ใน process (สร้างเมื่อใช้ครั้งแรก)
+dispatcher ที่ไม่ถูกอ้างถึงแล้วจึงไม่ทิ้ง threads หรือ atexit hook ไว้
+"""
+
+import asyncio
+import atexit
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Dict, List, Any, Optional, Callable
+
+# worker pool / event loop ที่ dispatcher ทุกตัวใช้ร่วมกัน
+SHARED_MAX_WORKERS = 4
+_shared_lock = threading.Lock()
+_shared_executor: Optional[ThreadPoolExecutor] = None
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# dispatcher ที่ยังไม่ถูกปิด (ส่ง event ที่ค้างตอนปิดโปรแกรมด้วย atexit hook เดียว)
+_live_dispatchers: "weakref.WeakSet[EventDispatcher]" = weakref.WeakSet()
+
+def _get_shared_executor() -> ThreadPoolExecutor:
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(max_workers=SHARED_MAX_WORKERS,
+                                                  thread_name_prefix="EventDispatcher")
+        return _shared_executor
+
+def _get_shared_loop() -> asyncio.AbstractEventLoop:
+    """event loop สำหรับ coroutine callbacks (สร้างเมื่อใช้ครั้งแรก)"""
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="EventDispatcher-loop", daemon=True).start()
+            _shared_loop = loop
+        return _shared_loop
+
+def _close_live_dispatchers():
+    for dispatcher in list(_live_dispatchers):
+        dispatcher.close()
+
+atexit.register(_close_live_dispatchers)
+
+class DropPolicy(Enum):
+    """นโยบายเมื่อ queue ของ subscriber เต็ม (ผู้ส่งไม่ถูก block ทุกกรณี)"""
+    DROP_OLDEST = "drop_oldest"  # ทิ้ง event ที่เก่าที่สุดใน queue
+    DROP_NEWEST = "drop_newest"  # ทิ้ง event ที่เพิ่งเข้ามา
+
+class EventSubscription:
+    """callback หนึ่งตัวที่ลงทะเบียนกับ event หนึ่ง"""
+
+    def __init__(self, event: str, callback: Callable, max_queue_size: int,
+                 policy: DropPolicy, max_retries: int, retry_delay: float):
+        self.event = event
+        self.callback = callback
+        self.max_queue_size = max_queue_size
+        self.policy = DropPolicy(policy)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.is_coroutine = asyncio.iscoroutinefunction(callback)
+
+        self.queue: deque = deque()
+        self.scheduled = False
+        self.stats = {"delivered": 0, "dropped": 0, "retried": 0, "failed": 0}
+
+class EventDispatcher:
+    """กระจาย event ไปยัง subscribers ด้วย worker pool โดยไม่ block ผู้ส่ง"""
+
+    def __init__(self, name: str = "EventDispatcher", max_workers: int = None,
+                 max_queue_size: int = 1000, policy: DropPolicy = DropPolicy.DROP_OLDEST,
+                 max_retries: int = 0, retry_delay: float = 0.5, batch_size: int = 100):
+        self.name = name
+        self.max_queue_size = max_queue_size
+        self.policy = DropPolicy(policy)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+
+        # event -> tuple ของ subscriptions (copy-on-write อ่านได้โดยไม่ต้อง lock)
+        self._subscriptions: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._closed = False
+
+        # max_workers ไม่ระบุ = ใช้ worker pool ร่วม, ระบุ = pool ของ dispatcher นี้เอง
+        self._own_executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name) if max_workers else None
+        )
+        _live_dispatchers.add(self)
+
+    def subscribe(self, event: str, callback: Callable, max_queue_size: int = None,
+                  policy: DropPolicy = None, max_retries: int = None,
+                  retry_delay: float = None) -> EventSubscription:
+        """ลงทะเบียน callback (ฟังก์ชันธรรมดาหรือ async def)"""
+        subscription = EventSubscription(
+            event, callback,
+            max_queue_size or self.max_queue_size,
+            policy or self.policy,
+            self.max_retries if max_retries is None else max_retries,
+            self.retry_delay if retry_delay is None else retry_delay
+        )
+        with self._lock:
+            self._subscriptions[event] = self._subscriptions.get(event, ()) + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        """ยกเลิก subscription (event ที่ค้างใน queue ถูกทิ้ง)"""
+        with self._lock:
+            current = self._subscriptions.get(subscription.event, ())
+            self._subscriptions[subscription.event] = tuple(s for s in current if s is not subscription)
+            self._pending -= len(subscription.queue)
+            subscription.queue.clear()
+            self._idle.notify_all()
+
+    def has_subscribers(self, event: str) -> bool:
+        return bool(self._subscriptions.get(event))
+
+    def emit(self, event: str, *args):
+        """ส่ง event - คืนค่าทันที ไม่รอ callback"""
+        for subscription in self._subscriptions.get(event, ()):
+            with self._lock:
+                if self._closed:
+                    return
+                if len(subscription.queue) >= subscription.max_queue_size:
+                    subscription.stats["dropped"] += 1
+                    if subscription.policy == DropPolicy.DROP_NEWEST:
+                        continue
+                    subscription.queue.popleft()
+                    self._pending -= 1
+                subscription.queue.append(args)
+                self._pending += 1
+                schedule = not subscription.scheduled
+                subscription.scheduled = True
+
+            if schedule:
+                self._schedule(subscription)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """รอจน event ที่ค้างอยู่ถูกส่งครบ (คืนค่า False ถ้าหมดเวลา)"""
+        deadline = time.time() + timeout
+        with self._idle:
+            while self._pending > 0:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 2.0):
+        """ส่ง event ที่ค้างอยู่แล้วหยุดรับ event (pool ของ dispatcher นี้เองถูกปิดด้วย)"""
+        if self._closed:
+            return
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+        if self._own_executor is not None:
+            self._own_executor.shutdown(wait=False)
+        _live_dispatchers.discard(self)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """สถิติรวมและราย event"""
+        events = {}
+        totals = {"delivered": 0, "dropped": 0, "retried": 0, "failed": 0}
+        for event, subscriptions in list(self._subscriptions.items()):
+            event_stats = {"subscribers": len(subscriptions), "queued": 0}
+            for subscription in subscriptions:
+                event_stats["queued"] += len(subscription.queue)
+                for key, value in subscription.stats.items():
+                    event_stats[key] = event_stats.get(key, 0) + value
+                    totals[key] += value
+            events[event] = event_stats
+        totals["pending"] = self._pending
+        totals["events"] = events
+        return totals
+
+    # Helper methods
+    def _schedule(self, subscription: EventSubscription):
+        try:
+            if subscription.is_coroutine:
+                # coroutine ของ subscriber เดียวถูก await ทีละตัว (ไม่กิน worker ระหว่างรอ)
+                asyncio.run_coroutine_threadsafe(self._drain_async(subscription), _get_shared_loop())
+            else:
+                (self._own_executor or _get_shared_executor()).submit(self._drain, subscription)
+        except RuntimeError:
+            # executor ถูกปิดแล้ว
+            with self._lock:
+                self._pending -= len(subscription.queue)
+                subscription.queue.clear()
+                subscription.scheduled = False
+                self._idle.notify_all()
+
+    def _drain(self, subscription: EventSubscription):
+        """ส่ง event ใน queue ของ subscriber ทีละตัวตามลำดับ"""
+        for _ in range(self.batch_size):
+            with self._lock:
+                if not subscription.queue:
+                    subscription.scheduled = False
+                    return
+                args = subscription.queue.popleft()
+
+            self._deliver(subscription, args)
+            self._done()
+
+        # คืน worker ให้ subscriber อื่นก่อน แล้วค่อยทำต่อ
+        self._schedule(subscription)
+
+    async def _drain_async(self, subscription: EventSubscription):
+        """await coroutine callback ทีละ event ตามลำดับ (event ถัดไปเริ่มหลังตัวก่อนเสร็จ)"""
+        while True:
+            with self._lock:
+                if not subscription.queue:
+                    subscription.scheduled = False
+                    return
+                args = subscription.queue.popleft()
+
+            try:
+                await self._deliver_async(subscription, args)
+            finally:
+                self._done()
+
+    def _deliver(self, subscription: EventSubscription, args: tuple):
+        for attempt in range(subscription.max_retries + 1):
+            try:
+                subscription.callback(*args)
+                subscription.stats["delivered"] += 1
+                return
+            except Exception as e:
+                if attempt < subscription.max_retries:
+                    subscription.stats["retried"] += 1
+                    time.sleep(subscription.retry_delay * (2 ** attempt))
+                else:
+                    subscription.stats["failed"] += 1
+                    print(f"❌ Callback error for {subscription.event}: {e}")
+
+    async def _deliver_async(self, subscription: EventSubscription, args: tuple):
+        for attempt in range(subscription.max_retries + 1):
+            try:
+                await subscription.callback(*args)
+                subscription.stats["delivered"] += 1
+                return
+            except Exception as e:
+                if attempt < subscription.max_retries:
+                    subscription.stats["retried"] += 1
+                    await asyncio.sleep(subscription.retry_delay * (2 ** attempt))
+                else:
+                    subscription.stats["failed"] += 1
+                    print(f"❌ Callback error for {subscription.event}: {e}")
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending <= 0:
+                self._idle.notify_all()
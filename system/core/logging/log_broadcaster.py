@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Log Broadcaster - ระบบกระจาย log แบบ push ไปยัง subscribers
+ดึง log จาก LoggerManager.log_queue ครั้งเดียว แล้วกระจายไปยังทุก subscriber
+ผ่าน ring buffer ของแต่ละคน พร้อม filter ฝั่ง server และ resume cursor
+
+cursor คือ id ของ log ในตาราง logs (กำหนดโดย AsyncLogSink) จึงใช้ resume ได้
+หลัง restart และเทียบกับ get_recent_logs ได้ cursor ที่เก่ากว่า history ใน
+หน่วยความจำจะถูกเติมจากฐานข้อมูลผ่าน backfill ส่วน cursor ที่ไม่รู้จัก
+(มากกว่า id ล่าสุด เช่นฐานข้อมูลถูกสร้างใหม่) จะได้ resync ทั้งหมด
+"""
+
+import asyncio
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+from typing import Dict, List, Any, Optional, Callable
+
+class LogSubscription:
+    """Subscriber หนึ่งราย (เช่น dashboard หนึ่งแท็บ)"""
+
+    def __init__(self, subscription_id: int, module: str = None, level: str = None,
+                 buffer_size: int = 1000, loop: asyncio.AbstractEventLoop = None):
+        self.id = subscription_id
+        self.module = module
+        self.level = level
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.loop = loop
+        self.event = asyncio.Event() if loop else None
+        self.notified = False
+        self.closed = False
+        # cursor ของ client ไม่ตรงกับ log ที่มีอยู่: client ต้องล้างข้อมูลเดิม
+        self.resync = False
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        """ตรวจสอบ filter ของ subscriber"""
+        if self.module and record.get("module") != self.module:
+            return False
+        if self.level and record.get("level") != self.level:
+            return False
+        return True
+
+    def push(self, record: Dict[str, Any]):
+        """เพิ่ม record ลง ring buffer (เรียกจาก pump thread)"""
+        with self.lock:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(record)
+
+            # ปลุก event loop เพียงครั้งเดียวต่อรอบการ drain
+            notify = self.event is not None and not self.notified
+            self.notified = True
+
+        if notify:
+            try:
+                self.loop.call_soon_threadsafe(self.event.set)
+            except RuntimeError:
+                # event loop ถูกปิดไปแล้ว
+                self.closed = True
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """ดึง records ทั้งหมดที่ค้างอยู่"""
+        with self.lock:
+            records = list(self.buffer)
+            self.buffer.clear()
+            self.notified = False
+        return records
+
+    async def wait(self, timeout: float = None) -> List[Dict[str, Any]]:
+        """รอ records ใหม่ (สำหรับ async consumers)"""
+        records = self.drain()
+        if records or self.event is None:
+            return records
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+
+        while not records:
+            self.event.clear()
+            # ตรวจซ้ำหลัง clear เพื่อไม่พลาด record ที่เข้ามาระหว่างนั้น
+            records = self.drain()
+            if records:
+                break
+
+            remaining = deadline - loop.time() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+
+            try:
+                await asyncio.wait_for(self.event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+            records = self.drain()
+
+        return records
+
+class LogBroadcaster:
+    """กระจาย log จาก queue เดียวไปยัง subscribers หลายราย"""
+
+    def __init__(self, source_queue: queue.Queue, history_size: int = 5000,
+                 subscriber_buffer_size: int = 5000, last_id: int = 0,
+                 backfill: Callable[..., List[Dict[str, Any]]] = None):
+        """
+        Args:
+            last_id: id ล่าสุดที่บันทึกไว้แล้วตอนเริ่มต้น
+            backfill: backfill(after_id, module, level, limit) -> logs ล่าสุดไม่เกิน limit
+                      รายการที่ id > after_id จากฐานข้อมูล เรียงตาม id
+        """
+        self.source_queue = source_queue
+        self.subscriber_buffer_size = subscriber_buffer_size
+        self.backfill = backfill
+
+        # ประวัติล่าสุดสำหรับ resume cursor
+        self.history = deque(maxlen=history_size)
+        self.last_id = last_id
+
+        self.subscribers: Dict[int, LogSubscription] = {}
+        self._subscriber_ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+        self._running = True
+        self._pump = threading.Thread(target=self._pump_loop, name="LogBroadcaster", daemon=True)
+        self._pump.start()
+
+    def subscribe(self, module: str = None, level: str = None, last_id: int = None,
+                  loop: asyncio.AbstractEventLoop = None) -> LogSubscription:
+        """สมัครรับ log ใหม่ (ส่ง last_id เพื่อ resume จาก record ที่เคยได้รับ)"""
+        subscription = LogSubscription(
+            next(self._subscriber_ids), module=module, level=level,
+            buffer_size=self.subscriber_buffer_size, loop=loop
+        )
+
+        with self.lock:
+            if last_id is not None:
+                if last_id > self.last_id:
+                    # cursor ไม่รู้จัก: ส่ง history ทั้งหมดพร้อมสั่ง resync
+                    subscription.resync = True
+                    last_id = 0
+
+                records = [record for record in self.history
+                           if record["id"] > last_id and subscription.matches(record)]
+                oldest_id = self.history[0]["id"] if self.history else self.last_id + 1
+                if self.backfill is not None and last_id < oldest_id - 1 and not subscription.resync:
+                    records = self._backfill(last_id, subscription, records)
+
+                for record in records:
+                    subscription.push(record)
+            self.subscribers[subscription.id] = subscription
+
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription):
+        """ยกเลิกการสมัครรับ log"""
+        subscription.closed = True
+        with self.lock:
+            self.subscribers.pop(subscription.id, None)
+
+    def publish(self, log_entry: Dict[str, Any]) -> Dict[str, Any]:
+        """กำหนด id ให้ log แล้วกระจายไปยัง subscribers ที่ตรง filter"""
+        record = dict(log_entry)
+        for field in ("context", "metadata"):
+            if isinstance(record.get(field), str):
+                try:
+                    record[field] = json.loads(record[field])
+                except ValueError:
+                    pass
+
+        with self.lock:
+            if record.get("id") is None:
+                # log ที่ไม่ได้ถูกบันทึก (เช่นถูก sample ออก) ไม่เลื่อน cursor
+                record["id"] = self.last_id
+            else:
+                self.last_id = max(self.last_id, record["id"])
+            self.history.append(record)
+
+            closed = []
+            for subscription in self.subscribers.values():
+                if subscription.closed:
+                    closed.append(subscription.id)
+                elif subscription.matches(record):
+                    subscription.push(record)
+
+            for subscription_id in closed:
+                self.subscribers.pop(subscription_id, None)
+
+        return record
+
+    def get_stats(self) -> Dict[str, Any]:
+        """ดึงสถิติของ broadcaster"""
+        with self.lock:
+            return {
+                "last_id": self.last_id,
+                "history_size": len(self.history),
+                "subscribers": len(self.subscribers),
+                "dropped": sum(s.dropped for s in self.subscribers.values())
+            }
+
+    def stop(self):
+        """หยุด pump thread"""
+        self._running = False
+
+    def _backfill(self, last_id: int, subscription: LogSubscription,
+                  records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """รวม logs จากฐานข้อมูล (id > last_id) กับ history ในหน่วยความจำ"""
+        try:
+            stored = self.backfill(last_id, subscription.module, subscription.level,
+                                   self.subscriber_buffer_size)
+        except Exception as e:
+            print(f"❌ Error backfilling logs: {e}")
+            return records
+
+        if len(stored) >= self.subscriber_buffer_size:
+            # มี log ที่ส่งให้ไม่ครบ
+            subscription.resync = True
+
+        stored_ids = {record["id"] for record in stored}
+        merged = stored + [record for record in records if record["id"] not in stored_ids]
+        merged.sort(key=lambda record: record["id"])
+        return merged[-self.subscriber_buffer_size:]
+
+    def _pump_loop(self):
+        """ดึง log จาก source queue แล้วกระจาย"""
+        while self._running:
+            try:
+                log_entry = self.source_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            try:
+                self.publish(log_entry)
+            except Exception as e:
+                print(f"❌ Error broadcasting log: {e}")
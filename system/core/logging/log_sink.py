@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Async Log Sink - ระบบเขียน log ลงฐานข้อมูลแบบ batch
+รับ log entries ผ่าน bounded queue แล้วให้ writer thread เดียวเขียนลง SQLite
+ด้วย connection ถาวร (WAL mode) และ executemany ตามขนาด/เวลาที่กำหนด
+id ของแต่ละ log ถูกกำหนดโดย SQLite ตอนเขียน (อ่านกลับภายใน transaction เดียวกัน)
+จึงเขียนลงฐานข้อมูลเดียวกันจากหลาย LoggerManager/process ได้โดย id ไม่ชนกัน
+"""
+
+import atexit
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional, Tuple
+import os
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from core import sqlite_pool
+
+class BackpressurePolicy(Enum):
+    """นโยบายเมื่อ queue เต็ม"""
+    BLOCK = "block"              # รอจนกว่าจะมีที่ว่าง
+    DROP_OLDEST = "drop_oldest"  # ทิ้ง entry ที่เก่าที่สุด
+    SAMPLE = "sample"            # สุ่มเก็บบางส่วนตาม sample_rate
+
+LOG_INSERT_SQL = '''
+    INSERT INTO logs
+    (timestamp, module, level, message, workflow_id, step,
+     duration_ms, status, context, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+LOG_COLUMNS = (
+    "timestamp", "module", "level", "message", "workflow_id",
+    "step", "duration_ms", "status", "context", "metadata"
+)
+
+class AsyncLogSink:
+    """เขียน log ลง SQLite แบบ asynchronous ด้วย writer thread เดียว"""
+
+    def __init__(self, db_path: str, max_queue_size: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 0.5,
+                 policy: BackpressurePolicy = BackpressurePolicy.DROP_OLDEST,
+                 sample_rate: float = 0.1,
+                 listener: Callable[[Dict[str, Any]], None] = None):
+        """
+        Args:
+            listener: เรียกจาก writer thread พร้อม log entry ที่เขียนลงฐานข้อมูลแล้ว
+                      (มี id) ตามลำดับ id; entry ที่ถูกทิ้ง ถูก sample ออก
+                      หรือเขียนไม่สำเร็จจะไม่ถูกส่งให้ listener
+        """
+        self.db_path = str(db_path)
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = BackpressurePolicy(policy)
+        self.sample_rate = sample_rate
+        self.listener = listener
+
+        # Bounded queue (ใช้ deque + condition เพื่อรองรับ drop-oldest)
+        self._pending: deque = deque()
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._flushed_seq = 0
+        self._enqueued_seq = 0
+        # seq สุดท้ายของ batch ที่เขียนไม่สำเร็จ (รอรายงานผ่าน flush)
+        self._failed_seqs: deque = deque(maxlen=1000)
+        self._closed = False
+        self._last_id = self._load_last_id()
+
+        # สถิติ
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "batches": 0,
+            "errors": 0
+        }
+
+        self._writer = threading.Thread(target=self._writer_loop, name="AsyncLogSink", daemon=True)
+        self._writer.start()
+
+        # Flush ก่อนปิดโปรแกรม
+        atexit.register(self.close)
+
+    @property
+    def last_id(self) -> int:
+        """id ล่าสุดที่ sink เขียนลงตาราง logs"""
+        with self._cond:
+            return self._last_id
+
+    def submit(self, log_entry: Dict[str, Any]) -> bool:
+        """
+        ส่ง log entry เข้า queue (ไม่ทำ I/O บน thread ที่เรียก)
+
+        log_entry["id"] ถูกกำหนดหลังจากเขียนลงตาราง logs แล้ว
+        """
+        with self._cond:
+            if self._closed:
+                return False
+
+            if len(self._pending) >= self.max_queue_size:
+                if self.policy == BackpressurePolicy.BLOCK:
+                    while len(self._pending) >= self.max_queue_size and not self._closed:
+                        self._cond.wait(0.1)
+                    if self._closed:
+                        return False
+                elif self.policy == BackpressurePolicy.DROP_OLDEST:
+                    self._pending.popleft()
+                    self.stats["dropped"] += 1
+                else:
+                    if random.random() >= self.sample_rate:
+                        self.stats["sampled_out"] += 1
+                        return False
+                    self._pending.popleft()
+                    self.stats["dropped"] += 1
+
+            self._pending.append(log_entry)
+            self._enqueued_seq += 1
+            self.stats["enqueued"] += 1
+
+            # ปลุก writer เมื่อครบ batch หรือ queue เต็ม (ไม่ต้องรอ flush_interval)
+            if len(self._pending) >= min(self.batch_size, self.max_queue_size):
+                self._cond.notify_all()
+
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        รอจนกว่า entries ที่ส่งเข้ามาแล้วถูกเขียนลงฐานข้อมูล
+
+        คืน False เมื่อหมดเวลา หรือมี batch ที่เขียนไม่สำเร็จตั้งแต่การ flush ครั้งก่อน
+        """
+        deadline = time.time() + timeout
+
+        with self._cond:
+            target = self._enqueued_seq
+            self._flush_requested = True
+            self._cond.notify_all()
+
+            while self._flushed_seq < target:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._writer.is_alive():
+                    return False
+                self._cond.wait(remaining)
+
+            failed = False
+            while self._failed_seqs and self._failed_seqs[0] <= target:
+                self._failed_seqs.popleft()
+                failed = True
+
+        return not failed
+
+    def close(self, timeout: float = 5.0):
+        """ปิด sink และเขียน entries ที่ค้างอยู่ทั้งหมด"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+
+        self._writer.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """ดึงสถิติของ sink"""
+        with self._cond:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._pending)
+            stats["policy"] = self.policy.value
+        return stats
+
+    def _connect(self) -> sqlite3.Connection:
+        """สร้าง connection ถาวรสำหรับ writer thread"""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Pool connections ถูกตั้งค่า WAL + synchronous=NORMAL ไว้แล้ว
+        return sqlite_pool.connect(self.db_path)
+
+    def _load_last_id(self) -> int:
+        """id สูงสุดในตาราง logs ตอนเริ่มต้น"""
+        try:
+            conn = self._connect()
+            try:
+                return conn.execute("SELECT MAX(id) FROM logs").fetchone()[0] or 0
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return 0
+
+    def _insert_batch(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        """เขียน batch แล้วกำหนด log_entry["id"] ตาม id ที่ SQLite ให้"""
+        rows = [tuple(entry.get(column) for column in LOG_COLUMNS) for entry in batch]
+        with conn:
+            # BEGIN IMMEDIATE: ถือ write lock ตลอด batch ทำให้ id ของแถวที่เพิ่มต่อเนื่องกัน
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(LOG_INSERT_SQL, rows)
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+        first_id = last_id - len(batch) + 1
+        for index, entry in enumerate(batch):
+            entry["id"] = first_id + index
+
+        with self._cond:
+            self._last_id = max(self._last_id, last_id)
+
+    def _take_batch(self) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """ดึง batch ถัดไปจาก queue (รอตาม flush_interval)"""
+        with self._cond:
+            deadline = time.time() + self.flush_interval
+            while (len(self._pending) < min(self.batch_size, self.max_queue_size)
+                   and not self._flush_requested and not self._closed):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            count = min(len(self._pending), self.batch_size)
+            batch = [self._pending.popleft() for _ in range(count)]
+
+            if not self._pending:
+                self._flush_requested = False
+
+            # ปลุก producers ที่ถูก block อยู่
+            self._cond.notify_all()
+            batch_seq = self._enqueued_seq - len(self._pending)
+            return batch, batch_seq, self._closed and not self._pending
+
+    def _writer_loop(self):
+        """Writer thread หลัก"""
+        conn: Optional[sqlite3.Connection] = None
+
+        while True:
+            batch, batch_seq, finished = self._take_batch()
+
+            if batch:
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    self._insert_batch(conn, batch)
+
+                    with self._cond:
+                        self.stats["written"] += len(batch)
+                        self.stats["batches"] += 1
+                    self._notify_listener(batch)
+                except Exception as e:
+                    print(f"❌ Error writing log batch: {e}")
+                    with self._cond:
+                        self.stats["errors"] += 1
+                        self._failed_seqs.append(batch_seq)
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+
+            with self._cond:
+                # entries ที่ส่งเข้ามาก่อนหน้านี้ถูกจัดการแล้ว (เขียนหรือ error)
+                self._flushed_seq = self._enqueued_seq - len(self._pending)
+                self._cond.notify_all()
+
+            if finished:
+                break
+
+        if conn is not None:
+            conn.close()
+
+    def _notify_listener(self, entries: List[Dict[str, Any]]):
+        """ส่ง entries ที่เขียนแล้วให้ listener (writer thread เดียว จึงเรียงตาม id)"""
+        if self.listener is None:
+            return
+        for entry in entries:
+            try:
+                self.listener(entry)
+            except Exception as e:
+                print(f"❌ Error in log sink listener: {e}")
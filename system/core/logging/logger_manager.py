@@ -16,11 +16,26 @@ from pathlib import Path
 import sqlite3
 from collections import deque
 import queue
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from core import sqlite_pool
+
+try:
+    from .log_sink import AsyncLogSink, BackpressurePolicy
+    from .log_broadcaster import LogBroadcaster
+except ImportError:
+    from log_sink import AsyncLogSink, BackpressurePolicy
+    from log_broadcaster import LogBroadcaster
 
 class LoggerManager:
     """ระบบจัดการ log แบบรวมศูนย์"""
     
-    def __init__(self, base_path: str = "logs"):
+    def __init__(self, base_path: str = "logs",
+                 sink_policy: BackpressurePolicy = BackpressurePolicy.DROP_OLDEST,
+                 sink_queue_size: int = 10000, sink_batch_size: int = 500,
+                 sink_flush_interval: float = 0.5):
         self.base_path = Path(base_path)
         self.db_path = self.base_path / "wawagot_logs.db"
         self.log_retention_days = 1  # เก็บ log 1 วัน
@@ -31,13 +46,30 @@ class LoggerManager:
         # ตั้งค่าฐานข้อมูล
         self._init_database()
         
-        # ตั้งค่า logging
-        self._setup_logging()
-        
         # Thread-safe queues สำหรับ real-time updates
         self.log_queue = queue.Queue()
         self.workflow_queue = queue.Queue()
         
+        # Async sink สำหรับเขียน log แบบ batch (ไม่ทำ I/O บน thread ที่เรียก)
+        # เฉพาะ log ที่เขียนลงฐานข้อมูลแล้ว (มี id) ถูกส่งต่อไปยัง log_queue
+        self.log_sink = AsyncLogSink(
+            self.db_path,
+            max_queue_size=sink_queue_size,
+            batch_size=sink_batch_size,
+            flush_interval=sink_flush_interval,
+            policy=sink_policy,
+            listener=self.log_queue.put
+        )
+        
+        # ตั้งค่า logging
+        self._setup_logging()
+        
+        # กระจาย log จาก log_queue ไปยัง stream subscribers (push-based)
+        # cursor คือ id ในตาราง logs (resume ได้หลัง restart)
+        self.log_broadcaster = LogBroadcaster(
+            self.log_queue, last_id=self.log_sink.last_id, backfill=self.get_logs_since
+        )
+        
         # In-memory log buffer (เก็บ log ล่าสุด 1000 entries)
         self.log_buffer = deque(maxlen=1000)
         self.workflow_buffer = deque(maxlen=100)
@@ -56,7 +88,7 @@ class LoggerManager:
     
     def _init_database(self):
         """สร้างฐานข้อมูล SQLite สำหรับ log"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # ตาราง logs
@@ -208,48 +240,26 @@ class LoggerManager:
                 "metadata": json.dumps(metadata) if metadata else None
             }
             
-            # บันทึกลงฐานข้อมูล
-            self._save_log_to_db(log_entry)
-            
-            # เพิ่มใน buffer
             with self.lock:
+                # เพิ่มใน buffer
                 self.log_buffer.append(log_entry)
             
-            # ส่งไปยัง queue สำหรับ real-time updates
-            self.log_queue.put(log_entry)
+            # ส่งเข้า async sink (writer thread จะเขียนลงฐานข้อมูลแบบ batch)
+            # ไม่ถือ self.lock ไว้ เพราะ policy BLOCK อาจรอจนกว่า queue ว่าง
+            # sink ส่ง log ที่เขียนแล้วต่อไปยัง log_queue สำหรับ real-time updates
+            self.log_sink.submit(log_entry)
             
         except Exception as e:
             print(f"❌ Error logging: {e}")
     
-    def _save_log_to_db(self, log_entry: Dict[str, Any]):
-        """บันทึก log ลงฐานข้อมูล"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO logs 
-                (timestamp, module, level, message, workflow_id, step, 
-                 duration_ms, status, context, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                log_entry["timestamp"],
-                log_entry["module"],
-                log_entry["level"],
-                log_entry["message"],
-                log_entry["workflow_id"],
-                log_entry["step"],
-                log_entry["duration_ms"],
-                log_entry["status"],
-                log_entry["context"],
-                log_entry["metadata"]
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-        except Exception as e:
-            print(f"❌ Error saving log to DB: {e}")
+    def flush_logs(self, timeout: float = 5.0) -> bool:
+        """รอจนกว่า log ที่ค้างอยู่ใน sink ถูกเขียนลงฐานข้อมูล (False ถ้าหมดเวลาหรือเขียนไม่สำเร็จ)"""
+        return self.log_sink.flush(timeout)
+    
+    def shutdown(self):
+        """ปิด logger manager และเขียน log ที่ค้างอยู่ทั้งหมด"""
+        self.log_sink.close()
+        self.log_broadcaster.stop()
     
     def start_workflow(self, workflow_id: str, workflow_type: str) -> str:
         """เริ่มต้น workflow ใหม่"""
@@ -310,7 +320,7 @@ class LoggerManager:
     def _save_workflow_to_db(self, workflow: Dict[str, Any]):
         """บันทึก workflow ลงฐานข้อมูล"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -338,7 +348,7 @@ class LoggerManager:
     def _save_workflow_step_to_db(self, step: Dict[str, Any]):
         """บันทึก workflow step ลงฐานข้อมูล"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -367,7 +377,7 @@ class LoggerManager:
     def _update_workflow_status(self, workflow_id: str, step_status: str):
         """อัปเดตสถานะ workflow"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # นับ steps ตามสถานะ
@@ -407,7 +417,7 @@ class LoggerManager:
     def get_recent_logs(self, limit: int = 100, module: str = None, level: str = None) -> List[Dict[str, Any]]:
         """ดึง log ล่าสุด"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             query = "SELECT * FROM logs WHERE 1=1"
@@ -426,21 +436,7 @@ class LoggerManager:
             
             cursor.execute(query, params)
             
-            logs = []
-            for row in cursor.fetchall():
-                logs.append({
-                    "id": row[0],
-                    "timestamp": row[1],
-                    "module": row[2],
-                    "level": row[3],
-                    "message": row[4],
-                    "workflow_id": row[5],
-                    "step": row[6],
-                    "duration_ms": row[7],
-                    "status": row[8],
-                    "context": json.loads(row[9]) if row[9] else None,
-                    "metadata": json.loads(row[10]) if row[10] else None
-                })
+            logs = [self._log_row_to_dict(row) for row in cursor.fetchall()]
             
             conn.close()
             return logs
@@ -449,10 +445,52 @@ class LoggerManager:
             print(f"❌ Error getting recent logs: {e}")
             return []
     
+    def get_logs_since(self, after_id: int, module: str = None, level: str = None,
+                       limit: int = 1000) -> List[Dict[str, Any]]:
+        """ดึง log ที่ id > after_id (ล่าสุดไม่เกิน limit รายการ เรียงตาม id)"""
+        conn = sqlite_pool.connect(self.db_path)
+        try:
+            query = "SELECT * FROM logs WHERE id > ?"
+            params = [after_id]
+            
+            if module:
+                query += " AND module = ?"
+                params.append(module)
+            
+            if level:
+                query += " AND level = ?"
+                params.append(level)
+            
+            query += " ORDER BY id DESC LIMIT ?"
+            params.append(limit)
+            
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        
+        return [self._log_row_to_dict(row) for row in reversed(rows)]
+    
+    @staticmethod
+    def _log_row_to_dict(row: tuple) -> Dict[str, Any]:
+        """แปลงแถวของตาราง logs เป็น dict"""
+        return {
+            "id": row[0],
+            "timestamp": row[1],
+            "module": row[2],
+            "level": row[3],
+            "message": row[4],
+            "workflow_id": row[5],
+            "step": row[6],
+            "duration_ms": row[7],
+            "status": row[8],
+            "context": json.loads(row[9]) if row[9] else None,
+            "metadata": json.loads(row[10]) if row[10] else None
+        }
+    
     def get_active_workflows(self) -> List[Dict[str, Any]]:
         """ดึง workflows ที่กำลังทำงานอยู่"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -488,7 +526,7 @@ class LoggerManager:
         try:
             cutoff_time = datetime.now() - timedelta(days=self.log_retention_days)
             
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             # ลบ logs เก่า
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics Rollup - ตาราง time-series แบบ downsample สำหรับ dashboard
+เก็บ min/max/avg/p95 ของ system metrics ที่ความละเอียด 1 นาที, 5 นาที และ 1 ชั่วโมง
+อัปเดตแบบ incremental ทุกครั้งที่มี sample ใหม่ และลบ raw samples ที่เกินระยะเก็บ
+"""
+
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional
+
+# ความละเอียดของ rollup (ชื่อ -> วินาที) เรียงจากละเอียดไปหยาบ
+ROLLUP_RESOLUTIONS = {
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600
+}
+
+# ระยะเวลาเก็บข้อมูลของแต่ละความละเอียด (ชั่วโมง)
+ROLLUP_RETENTION_HOURS = {
+    "1m": 24 * 7,
+    "5m": 24 * 30,
+    "1h": 24 * 365
+}
+
+# คอลัมน์ของ system_metrics ที่ทำ rollup
+ROLLUP_FIELDS = (
+    "cpu_percent",
+    "memory_percent",
+    "memory_used_gb",
+    "memory_total_gb",
+    "disk_usage_percent",
+    "disk_used_gb",
+    "disk_total_gb",
+    "network_bytes_sent",
+    "network_bytes_recv",
+    "active_processes",
+    "load_average"
+)
+
+ROLLUP_STATS = ("min", "max", "avg", "p95")
+
+class MetricsRollup:
+    """ดูแลตาราง rollup ของ system metrics"""
+
+    def __init__(self, raw_table: str = "system_metrics", raw_retention_hours: int = 48,
+                 sample_interval: float = 30.0, fields: tuple = ROLLUP_FIELDS,
+                 resolutions: Dict[str, int] = None):
+        self.raw_table = raw_table
+        self.raw_retention_hours = raw_retention_hours
+        self.sample_interval = sample_interval
+        self.fields = fields
+        self.resolutions = dict(resolutions or ROLLUP_RESOLUTIONS)
+
+        # bucket ที่ยังเปิดอยู่ของแต่ละความละเอียด: resolution -> (bucket_start, {field: [values]})
+        self._open_buckets: Dict[str, tuple] = {}
+        self.lock = threading.Lock()
+
+    def table_name(self, resolution: str) -> str:
+        """ชื่อตาราง rollup ของความละเอียดที่กำหนด"""
+        return f"{self.raw_table}_{resolution}"
+
+    def init_tables(self, cursor):
+        """สร้างตาราง rollup"""
+        columns = ",\n".join(
+            f"                {field}_{stat} REAL" for field in self.fields for stat in ROLLUP_STATS
+        )
+        for resolution in self.resolutions:
+            table = self.table_name(resolution)
+            cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket_start TEXT PRIMARY KEY,
+                sample_count INTEGER NOT NULL,
+{columns}
+            )
+            ''')
+
+    def seed(self, cursor):
+        """โหลด bucket ที่ยังเปิดอยู่จาก raw samples (หลัง restart)"""
+        coarsest = max(self.resolutions.values())
+        since = self._bucket_start(datetime.now(), coarsest)
+
+        cursor.execute(f'''
+            SELECT timestamp, {", ".join(self.fields)} FROM {self.raw_table}
+            WHERE timestamp >= ?
+            ORDER BY timestamp
+        ''', (since.isoformat(),))
+
+        with self.lock:
+            self._open_buckets = {}
+            for row in cursor.fetchall():
+                try:
+                    timestamp = datetime.fromisoformat(row[0])
+                except ValueError:
+                    continue
+                self._add_to_buckets(timestamp, dict(zip(self.fields, row[1:])))
+
+    def add_sample(self, cursor, timestamp: datetime, values: Dict[str, Any]):
+        """เพิ่ม sample ใหม่และอัปเดตแถว rollup ของ bucket ปัจจุบันทุกความละเอียด"""
+        with self.lock:
+            for resolution in self._add_to_buckets(timestamp, values):
+                bucket_start, samples = self._open_buckets[resolution]
+                self._write_bucket(cursor, resolution, bucket_start, samples)
+
+    def choose_resolution(self, hours: float, max_points: int = 500) -> str:
+        """
+        เลือกความละเอียดสำหรับช่วงเวลาที่ขอ
+        ใช้ raw ถ้าจำนวนจุดไม่เกิน max_points และยังอยู่ในระยะเก็บ raw
+        ไม่เช่นนั้นใช้ rollup ที่ละเอียดที่สุดซึ่งให้จำนวนจุดไม่เกิน max_points
+        """
+        window_seconds = hours * 3600
+        if hours <= self.raw_retention_hours and window_seconds / self.sample_interval <= max_points:
+            return "raw"
+
+        ordered = sorted(self.resolutions.items(), key=lambda item: item[1])
+        for resolution, seconds in ordered:
+            if window_seconds / seconds <= max_points:
+                return resolution
+        return ordered[-1][0]
+
+    def query(self, cursor, resolution: str, since: datetime) -> List[Dict[str, Any]]:
+        """ดึงแถว rollup ตั้งแต่เวลาที่กำหนด (ใหม่สุดก่อน)"""
+        table = self.table_name(resolution)
+        since_bucket = self._bucket_start(since, self.resolutions[resolution])
+        cursor.execute(f'''
+            SELECT * FROM {table}
+            WHERE bucket_start >= ?
+            ORDER BY bucket_start DESC
+        ''', (since_bucket.isoformat(),))
+
+        names = [description[0] for description in cursor.description]
+        results = []
+        for row in cursor.fetchall():
+            item = dict(zip(names, row))
+            point = {
+                "timestamp": item["bucket_start"],
+                "resolution": resolution,
+                "sample_count": item["sample_count"]
+            }
+            for field in self.fields:
+                # ค่าหลักของ field ใช้ค่าเฉลี่ย เพื่อให้ใช้แทน raw row ได้
+                point[field] = item[f"{field}_avg"]
+                for stat in ("min", "max", "p95"):
+                    point[f"{field}_{stat}"] = item[f"{field}_{stat}"]
+            results.append(point)
+        return results
+
+    def average(self, cursor, since: datetime, fields: List[str]) -> Dict[str, Optional[float]]:
+        """ค่าเฉลี่ยถ่วงน้ำหนักจาก rollup ที่ละเอียดที่สุดตั้งแต่เวลาที่กำหนด"""
+        resolution = min(self.resolutions, key=self.resolutions.get)
+        table = self.table_name(resolution)
+        since_bucket = self._bucket_start(since, self.resolutions[resolution])
+        selects = ", ".join(
+            f"SUM({field}_avg * sample_count) / SUM(CASE WHEN {field}_avg IS NULL THEN 0 ELSE sample_count END)"
+            for field in fields
+        )
+        cursor.execute(f'''
+            SELECT {selects} FROM {table}
+            WHERE bucket_start >= ?
+        ''', (since_bucket.isoformat(),))
+        row = cursor.fetchone() or (None,) * len(fields)
+        return dict(zip(fields, row))
+
+    def prune(self, cursor, now: datetime = None) -> Dict[str, int]:
+        """ลบ raw samples ที่เกินระยะเก็บ และแถว rollup ที่เก่าเกินกำหนด"""
+        now = now or datetime.now()
+        deleted = {}
+
+        cutoff = now - timedelta(hours=self.raw_retention_hours)
+        cursor.execute(f"DELETE FROM {self.raw_table} WHERE timestamp < ?", (cutoff.isoformat(),))
+        deleted["raw"] = cursor.rowcount
+
+        for resolution in self.resolutions:
+            hours = ROLLUP_RETENTION_HOURS.get(resolution)
+            if hours is None:
+                continue
+            cutoff = now - timedelta(hours=hours)
+            cursor.execute(f"DELETE FROM {self.table_name(resolution)} WHERE bucket_start < ?",
+                           (cutoff.isoformat(),))
+            deleted[resolution] = cursor.rowcount
+
+        return deleted
+
+    # Helper methods
+    @staticmethod
+    def _bucket_start(timestamp: datetime, seconds: int) -> datetime:
+        midnight = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        offset = int((timestamp - midnight).total_seconds()) // seconds * seconds
+        return midnight + timedelta(seconds=offset)
+
+    def _add_to_buckets(self, timestamp: datetime, values: Dict[str, Any]) -> List[str]:
+        touched = []
+        for resolution, seconds in self.resolutions.items():
+            bucket_start = self._bucket_start(timestamp, seconds)
+            current = self._open_buckets.get(resolution)
+            if current is None or current[0] != bucket_start:
+                if current is not None and current[0] > bucket_start:
+                    # sample ย้อนหลังของ bucket ที่ปิดไปแล้ว ข้ามไป
+                    continue
+                current = (bucket_start, {field: [] for field in self.fields})
+                self._open_buckets[resolution] = current
+
+            samples = current[1]
+            for field in self.fields:
+                value = values.get(field)
+                if value is not None:
+                    samples[field].append(float(value))
+            touched.append(resolution)
+        return touched
+
+    def _write_bucket(self, cursor, resolution: str, bucket_start: datetime,
+                      samples: Dict[str, List[float]]):
+        stats = []
+        sample_count = 0
+        for field in self.fields:
+            values = sorted(samples[field])
+            sample_count = max(sample_count, len(values))
+            if values:
+                p95 = values[max(0, math.ceil(0.95 * len(values)) - 1)]
+                stats.extend([values[0], values[-1], sum(values) / len(values), p95])
+            else:
+                stats.extend([None, None, None, None])
+
+        columns = ", ".join(f"{field}_{stat}" for field in self.fields for stat in ROLLUP_STATS)
+        placeholders = ", ".join("?" for _ in range(len(stats) + 2))
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO {self.table_name(resolution)}
+            (bucket_start, sample_count, {columns})
+            VALUES ({placeholders})
+        ''', [bucket_start.isoformat(), sample_count] + stats)
@@ -6,6 +6,8 @@ Performance Tracker - ระบบติดตามประสิทธิภ
 """
 
 import time
+import atexit
+import bisect
 import threading
 import psutil
 import json
@@ -15,6 +17,17 @@ from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 from collections import deque
 import os
+import sys
+
+# Shared SQLite connection pool (core/sqlite_pool.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from core import sqlite_pool
+from core.metrics_sampler import get_metrics_sampler, MetricsSnapshot
+
+try:
+    from .metrics_rollup import MetricsRollup
+except ImportError:
+    from metrics_rollup import MetricsRollup
 
 @dataclass
 class SystemMetrics:
@@ -44,14 +57,144 @@ class ModuleMetrics:
     status: str
     metadata: Dict[str, Any] = None
 
+# ขอบเขต bucket ของ histogram ระยะเวลา (ms) - bucket สุดท้ายคือ > 60000
+DURATION_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+class ModuleMetricsRing:
+    """Ring buffer ขนาดคงที่ (จองพื้นที่ล่วงหน้า) สำหรับ module metrics ที่รอเขียนลงฐานข้อมูล"""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._slots: List[Optional[tuple]] = [None] * capacity
+        self._head = 0      # ตำแหน่งที่จะเขียนถัดไป
+        self._size = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, row: tuple):
+        """เพิ่ม row (ถ้าเต็มจะเขียนทับ row ที่เก่าที่สุด)"""
+        self._slots[self._head] = row
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self.dropped += 1
+
+    def drain(self) -> List[tuple]:
+        """ดึง rows ทั้งหมดตามลำดับเวลาแล้วล้าง ring"""
+        start = (self._head - self._size) % self.capacity
+        if start + self._size <= self.capacity:
+            rows = self._slots[start:start + self._size]
+        else:
+            rows = self._slots[start:] + self._slots[:self._head]
+        self._slots = [None] * self.capacity
+        self._head = 0
+        self._size = 0
+        return rows
+
+class OperationHistogram:
+    """Histogram ระยะเวลาของ (module, operation) ภายในหนึ่งช่วงเวลา flush"""
+
+    __slots__ = ("count", "fail_count", "total_ms", "min_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.fail_count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+        self.buckets = [0] * (len(DURATION_BUCKETS_MS) + 1)
+
+    def record(self, duration_ms: float, failed: bool = False):
+        """บันทึกระยะเวลาหนึ่งครั้ง"""
+        self.count += 1
+        self.total_ms += duration_ms
+        if failed:
+            self.fail_count += 1
+        if self.min_ms is None or duration_ms < self.min_ms:
+            self.min_ms = duration_ms
+        if self.max_ms is None or duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        self.buckets[bisect.bisect_left(DURATION_BUCKETS_MS, duration_ms)] += 1
+
+    def merge(self, other: "OperationHistogram"):
+        """รวม histogram อื่นเข้ามา"""
+        self.count += other.count
+        self.fail_count += other.fail_count
+        self.total_ms += other.total_ms
+        if other.min_ms is not None and (self.min_ms is None or other.min_ms < self.min_ms):
+            self.min_ms = other.min_ms
+        if other.max_ms is not None and (self.max_ms is None or other.max_ms > self.max_ms):
+            self.max_ms = other.max_ms
+        for index, value in enumerate(other.buckets):
+            self.buckets[index] += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """ประมาณค่า percentile จาก bucket (ใช้ขอบบนของ bucket)"""
+        if self.count == 0:
+            return None
+        target = q / 100.0 * self.count
+        seen = 0
+        for index, value in enumerate(self.buckets):
+            seen += value
+            if seen >= target and value:
+                upper = DURATION_BUCKETS_MS[index] if index < len(DURATION_BUCKETS_MS) else self.max_ms
+                return min(upper, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """แปลงเป็น dictionary"""
+        return {
+            "count": self.count,
+            "fail_count": self.fail_count,
+            "total_duration_ms": self.total_ms,
+            "avg_duration_ms": self.total_ms / self.count if self.count else 0,
+            "min_duration_ms": self.min_ms,
+            "max_duration_ms": self.max_ms,
+            "p50_duration_ms": self.percentile(50),
+            "p95_duration_ms": self.percentile(95),
+            "p99_duration_ms": self.percentile(99),
+            "buckets": list(self.buckets)
+        }
+
 class PerformanceTracker:
     """ระบบติดตามประสิทธิภาพระบบ"""
     
-    def __init__(self, db_path: str = "logs/performance.db"):
+    def __init__(self, db_path: str = "logs/performance.db", ring_capacity: int = 4096,
+                 flush_interval: float = 5.0, process_sample_interval: float = 1.0,
+                 monitor_interval: float = 30.0, raw_retention_hours: int = 48,
+                 alert_cooldown: float = 300.0):
         self.db_path = db_path
+        self.monitor_interval = monitor_interval
+        
+        # threshold alert ล่าสุดต่อประเภท: type -> (severity, เวลาที่บันทึก)
+        self.alert_cooldown = alert_cooldown
+        self._last_alerts: Dict[str, tuple] = {}
         self.metrics_buffer = deque(maxlen=1000)
         self.module_metrics_buffer = deque(maxlen=500)
         
+        # Low-overhead recording path สำหรับ track_module_operation
+        self.flush_interval = flush_interval
+        self.process_sample_interval = process_sample_interval
+        self.module_metrics_ring = ModuleMetricsRing(ring_capacity)
+        self.operation_histograms: Dict[tuple, OperationHistogram] = {}
+        self._window_start = time.time()
+        self._flush_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        
+        # Cache process handle และค่า memory/cpu ล่าสุด (สุ่มวัดตามช่วงเวลา)
+        self._process = psutil.Process()
+        self._process.cpu_percent()
+        self._process_sample = (0.0, 0.0)
+        self._process_sampled_at = 0.0
+        
+        # Rollup tables (1m/5m/1h) สำหรับ dashboard
+        self.rollup = MetricsRollup(raw_retention_hours=raw_retention_hours,
+                                    sample_interval=monitor_interval)
+        self._last_prune = 0.0
+        
         # สร้างโฟลเดอร์
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
@@ -63,12 +206,14 @@ class PerformanceTracker:
         
         # เริ่ม background monitoring
         self._start_monitoring()
+        self._start_flusher()
+        atexit.register(self.flush_module_metrics)
         
         print("📊 Performance Tracker initialized")
     
     def _init_database(self):
         """สร้างฐานข้อมูล SQLite สำหรับ performance metrics"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite_pool.connect(self.db_path)
         cursor = conn.cursor()
         
         # ตาราง system metrics
@@ -107,6 +252,25 @@ class PerformanceTracker:
             )
         ''')
         
+        # ตารางสรุป histogram ของแต่ละ (module, operation) ต่อช่วงเวลา flush
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS module_operation_stats (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                window_start TEXT NOT NULL,
+                window_end TEXT NOT NULL,
+                module TEXT NOT NULL,
+                operation TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                fail_count INTEGER NOT NULL,
+                total_duration_ms REAL NOT NULL,
+                min_duration_ms REAL,
+                max_duration_ms REAL,
+                p95_duration_ms REAL,
+                buckets TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
         # ตาราง performance alerts
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS performance_alerts (
@@ -126,58 +290,36 @@ class PerformanceTracker:
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_system_metrics_timestamp ON system_metrics(timestamp)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_module_metrics_timestamp ON module_metrics(timestamp)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_module_metrics_module ON module_metrics(module)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_module_operation_stats_window ON module_operation_stats(window_start)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_performance_alerts_timestamp ON performance_alerts(timestamp)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_performance_alerts_type ON performance_alerts(alert_type)')
         
+        # ตาราง rollup และ bucket ที่ยังเปิดอยู่จาก raw samples
+        self.rollup.init_tables(cursor)
+        self.rollup.seed(cursor)
+        
         conn.commit()
         conn.close()
     
-    def track_system_metrics(self) -> SystemMetrics:
-        """ติดตาม metrics ของระบบ"""
+    def track_system_metrics(self, snapshot: MetricsSnapshot = None) -> SystemMetrics:
+        """ติดตาม metrics ของระบบ (ใช้ snapshot จาก shared metrics sampler)"""
         try:
-            # CPU
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # Memory
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
-            memory_used_gb = memory.used / (1024**3)
-            memory_total_gb = memory.total / (1024**3)
-            
-            # Disk
-            disk = psutil.disk_usage('/')
-            disk_usage_percent = disk.percent
-            disk_used_gb = disk.used / (1024**3)
-            disk_total_gb = disk.total / (1024**3)
-            
-            # Network
-            network = psutil.net_io_counters()
-            network_bytes_sent = network.bytes_sent
-            network_bytes_recv = network.bytes_recv
-            
-            # Active processes
-            active_processes = len(psutil.pids())
-            
-            # Load average (เฉพาะ Linux)
-            load_average = None
-            try:
-                load_average = os.getloadavg()[0] if hasattr(os, 'getloadavg') else None
-            except:
-                pass
+            if snapshot is None:
+                snapshot = get_metrics_sampler().latest(max_age=self.monitor_interval)
             
             metrics = SystemMetrics(
-                timestamp=datetime.now().isoformat(),
-                cpu_percent=cpu_percent,
-                memory_percent=memory_percent,
-                memory_used_gb=memory_used_gb,
-                memory_total_gb=memory_total_gb,
-                disk_usage_percent=disk_usage_percent,
-                disk_used_gb=disk_used_gb,
-                disk_total_gb=disk_total_gb,
-                network_bytes_sent=network_bytes_sent,
-                network_bytes_recv=network_bytes_recv,
-                active_processes=active_processes,
-                load_average=load_average
+                timestamp=snapshot.iso_timestamp,
+                cpu_percent=snapshot.cpu_percent,
+                memory_percent=snapshot.memory_percent,
+                memory_used_gb=snapshot.memory_used / (1024**3),
+                memory_total_gb=snapshot.memory_total / (1024**3),
+                disk_usage_percent=snapshot.disk_percent,
+                disk_used_gb=snapshot.disk_used / (1024**3),
+                disk_total_gb=snapshot.disk_total / (1024**3),
+                network_bytes_sent=snapshot.net_bytes_sent,
+                network_bytes_recv=snapshot.net_bytes_recv,
+                active_processes=snapshot.process_count,
+                load_average=snapshot.load_average[0] if snapshot.load_average else None
             )
             
             # บันทึกลงฐานข้อมูล
@@ -200,42 +342,131 @@ class PerformanceTracker:
                              duration_ms: int, memory_usage_mb: float = None,
                              cpu_usage_percent: float = None, status: str = "completed",
                              metadata: Dict[str, Any] = None):
-        """ติดตามการทำงานของ module"""
+        """
+        ติดตามการทำงานของ module
+        
+        บันทึกลง ring buffer และ histogram ในหน่วยความจำเท่านั้น
+        background flusher จะเขียนลงฐานข้อมูลแบบ batch ทุก flush_interval วินาที
+        """
         try:
-            # ถ้าไม่ได้ระบุ memory และ cpu ให้วัดจาก process ปัจจุบัน
-            if memory_usage_mb is None:
-                process = psutil.Process()
-                memory_usage_mb = process.memory_info().rss / (1024**2)
-            
-            if cpu_usage_percent is None:
-                process = psutil.Process()
-                cpu_usage_percent = process.cpu_percent()
-            
-            module_metrics = ModuleMetrics(
-                timestamp=datetime.now().isoformat(),
-                module=module,
-                operation=operation,
-                duration_ms=duration_ms,
-                memory_usage_mb=memory_usage_mb,
-                cpu_usage_percent=cpu_usage_percent,
-                status=status,
-                metadata=metadata or {}
-            )
-            
-            # บันทึกลงฐานข้อมูล
-            self._save_module_metrics(module_metrics)
+            # ถ้าไม่ได้ระบุ memory และ cpu ให้ใช้ค่าที่สุ่มวัดจาก process ปัจจุบันล่าสุด
+            if memory_usage_mb is None or cpu_usage_percent is None:
+                sampled_memory, sampled_cpu = self._sample_process()
+                if memory_usage_mb is None:
+                    memory_usage_mb = sampled_memory
+                if cpu_usage_percent is None:
+                    cpu_usage_percent = sampled_cpu
+            
+            row = (time.time(), module, operation, duration_ms, memory_usage_mb,
+                   cpu_usage_percent, status, metadata)
+            key = (module, operation)
             
-            # เพิ่มใน buffer
             with self.lock:
-                self.module_metrics_buffer.append(module_metrics)
+                self.module_metrics_ring.append(row)
+                histogram = self.operation_histograms.get(key)
+                if histogram is None:
+                    histogram = self.operation_histograms[key] = OperationHistogram()
+                histogram.record(duration_ms, status != "completed")
+                ring_size = len(self.module_metrics_ring)
+            
+            # ปลุก flusher ก่อนกำหนดเมื่อ ring ใกล้เต็ม
+            if ring_size >= self.module_metrics_ring.capacity // 2:
+                self._flush_event.set()
             
         except Exception as e:
             print(f"❌ Error tracking module operation: {e}")
     
+    def flush_module_metrics(self) -> int:
+        """เขียน module metrics และ histograms ที่ค้างอยู่ลงฐานข้อมูล"""
+        with self._flush_lock:
+            with self.lock:
+                rows = self.module_metrics_ring.drain()
+                histograms = self.operation_histograms
+                self.operation_histograms = {}
+                window_start = self._window_start
+                self._window_start = time.time()
+            
+            if not rows and not histograms:
+                return 0
+            
+            module_metrics = [self._row_to_module_metrics(row) for row in rows]
+            self._save_module_metrics_batch(module_metrics, histograms, window_start, self._window_start)
+            
+            # เก็บรายการล่าสุดไว้ใน buffer สำหรับการอ่านแบบเร็ว
+            with self.lock:
+                self.module_metrics_buffer.extend(module_metrics)
+            
+            return len(module_metrics)
+    
+    def get_operation_stats(self, module: str = None, hours: int = 24) -> Dict[str, Dict[str, Any]]:
+        """ดึงสถิติ histogram ของแต่ละ module/operation (รวมทุกช่วงเวลา flush)"""
+        self.flush_module_metrics()
+        try:
+            conn = sqlite_pool.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cutoff_time = datetime.now() - timedelta(hours=hours)
+            query = '''
+                SELECT module, operation, count, fail_count, total_duration_ms,
+                       min_duration_ms, max_duration_ms, buckets
+                FROM module_operation_stats
+                WHERE window_end > ?
+            '''
+            params = [cutoff_time.isoformat()]
+            if module:
+                query += " AND module = ?"
+                params.append(module)
+            cursor.execute(query, params)
+            
+            merged: Dict[tuple, OperationHistogram] = {}
+            for row in cursor.fetchall():
+                window = OperationHistogram()
+                window.count, window.fail_count, window.total_ms = row[2], row[3], row[4]
+                window.min_ms, window.max_ms = row[5], row[6]
+                window.buckets = json.loads(row[7])
+                merged.setdefault((row[0], row[1]), OperationHistogram()).merge(window)
+            
+            conn.close()
+            
+            stats: Dict[str, Dict[str, Any]] = {}
+            for (module_name, operation), histogram in merged.items():
+                stats.setdefault(module_name, {})[operation] = histogram.to_dict()
+            return stats
+            
+        except Exception as e:
+            print(f"❌ Error getting operation stats: {e}")
+            return {}
+    
+    def _sample_process(self) -> tuple:
+        """ดึง (memory_mb, cpu_percent) ของ process ปัจจุบัน (วัดใหม่ไม่เกินทุก process_sample_interval)"""
+        now = time.monotonic()
+        if now - self._process_sampled_at >= self.process_sample_interval:
+            self._process_sample = (
+                self._process.memory_info().rss / (1024**2),
+                self._process.cpu_percent()
+            )
+            self._process_sampled_at = now
+        return self._process_sample
+    
+    @staticmethod
+    def _row_to_module_metrics(row: tuple) -> ModuleMetrics:
+        """แปลง row ใน ring buffer เป็น ModuleMetrics"""
+        timestamp, module, operation, duration_ms, memory_usage_mb, cpu_usage_percent, status, metadata = row
+        return ModuleMetrics(
+            timestamp=datetime.fromtimestamp(timestamp).isoformat(),
+            module=module,
+            operation=operation,
+            duration_ms=duration_ms,
+            memory_usage_mb=memory_usage_mb,
+            cpu_usage_percent=cpu_usage_percent,
+            status=status,
+            metadata=metadata or {}
+        )
+    
     def _save_system_metrics(self, metrics: SystemMetrics):
         """บันทึก system metrics ลงฐานข้อมูล"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -259,6 +490,14 @@ class PerformanceTracker:
                 metrics.load_average
             ))
             
+            # อัปเดต rollup แบบ incremental
+            self.rollup.add_sample(cursor, datetime.fromisoformat(metrics.timestamp), asdict(metrics))
+            
+            # ลบ raw samples ที่เกินระยะเก็บ (ชั่วโมงละครั้ง)
+            if time.time() - self._last_prune >= 3600:
+                self.rollup.prune(cursor)
+                self._last_prune = time.time()
+            
             conn.commit()
             conn.close()
             
@@ -268,7 +507,7 @@ class PerformanceTracker:
     def _save_module_metrics(self, metrics: ModuleMetrics):
         """บันทึก module metrics ลงฐานข้อมูล"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -293,6 +532,57 @@ class PerformanceTracker:
         except Exception as e:
             print(f"❌ Error saving module metrics: {e}")
     
+    def _save_module_metrics_batch(self, metrics: List[ModuleMetrics],
+                                   histograms: Dict[tuple, OperationHistogram],
+                                   window_start: float, window_end: float):
+        """บันทึก module metrics และ histograms ลงฐานข้อมูลใน transaction เดียว"""
+        try:
+            conn = sqlite_pool.connect(self.db_path)
+            cursor = conn.cursor()
+            
+            cursor.executemany('''
+                INSERT INTO module_metrics 
+                (timestamp, module, operation, duration_ms, memory_usage_mb,
+                 cpu_usage_percent, status, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(
+                m.timestamp,
+                m.module,
+                m.operation,
+                m.duration_ms,
+                m.memory_usage_mb,
+                m.cpu_usage_percent,
+                m.status,
+                json.dumps(m.metadata) if m.metadata else None
+            ) for m in metrics])
+            
+            start_iso = datetime.fromtimestamp(window_start).isoformat()
+            end_iso = datetime.fromtimestamp(window_end).isoformat()
+            cursor.executemany('''
+                INSERT INTO module_operation_stats 
+                (window_start, window_end, module, operation, count, fail_count,
+                 total_duration_ms, min_duration_ms, max_duration_ms, p95_duration_ms, buckets)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(
+                start_iso,
+                end_iso,
+                module,
+                operation,
+                histogram.count,
+                histogram.fail_count,
+                histogram.total_ms,
+                histogram.min_ms,
+                histogram.max_ms,
+                histogram.percentile(95),
+                json.dumps(histogram.buckets)
+            ) for (module, operation), histogram in histograms.items()])
+            
+            conn.commit()
+            conn.close()
+            
+        except Exception as e:
+            print(f"❌ Error saving module metrics batch: {e}")
+    
     def _check_alerts(self, metrics: SystemMetrics):
         """ตรวจสอบ alerts"""
         alerts = []
@@ -327,14 +617,26 @@ class PerformanceTracker:
                 "current": metrics.disk_usage_percent
             })
         
-        # บันทึก alerts
+        # บันทึก alerts (alert เดิมที่ยังค้างอยู่บันทึกซ้ำได้ไม่เกิน 1 ครั้งต่อ alert_cooldown
+        # ยกเว้นความรุนแรงเปลี่ยน) - กัน sample ทุก 5 วินาทีท่วมฐานข้อมูลตอนเกิดเหตุ
+        now = time.time()
         for alert in alerts:
+            last = self._last_alerts.get(alert["type"])
+            if last and last[0] == alert["severity"] and now - last[1] < self.alert_cooldown:
+                continue
+            self._last_alerts[alert["type"]] = (alert["severity"], now)
             self._save_alert(alert)
+        
+        # alert ที่หายไปแล้ว: ครั้งหน้าบันทึกทันที
+        active_types = {alert["type"] for alert in alerts}
+        for alert_type in list(self._last_alerts):
+            if alert_type not in active_types:
+                del self._last_alerts[alert_type]
     
     def _save_alert(self, alert: Dict[str, Any]):
         """บันทึก alert ลงฐานข้อมูล"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -356,14 +658,28 @@ class PerformanceTracker:
         except Exception as e:
             print(f"❌ Error saving alert: {e}")
     
-    def get_system_metrics(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """ดึง system metrics"""
+    def get_system_metrics(self, hours: int = 24, resolution: str = "auto",
+                           max_points: int = 500) -> List[Dict[str, Any]]:
+        """
+        ดึง system metrics
+        
+        resolution="auto" จะเลือก raw หรือ rollup (1m/5m/1h) ที่ให้จำนวนจุดไม่เกิน max_points
+        แถว rollup มี field เดียวกับ raw (ค่าเฉลี่ย) พร้อม _min/_max/_p95
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cutoff_time = datetime.now() - timedelta(hours=hours)
             
+            if resolution == "auto":
+                resolution = self.rollup.choose_resolution(hours, max_points)
+            
+            if resolution != "raw":
+                metrics = self.rollup.query(cursor, resolution, cutoff_time)
+                conn.close()
+                return metrics
+            
             cursor.execute('''
                 SELECT * FROM system_metrics 
                 WHERE timestamp > ? 
@@ -397,8 +713,9 @@ class PerformanceTracker:
     
     def get_module_metrics(self, module: str = None, hours: int = 24) -> List[Dict[str, Any]]:
         """ดึง module metrics"""
+        self.flush_module_metrics()
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cutoff_time = datetime.now() - timedelta(hours=hours)
@@ -440,7 +757,7 @@ class PerformanceTracker:
     def get_performance_alerts(self, hours: int = 24) -> List[Dict[str, Any]]:
         """ดึง performance alerts"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite_pool.connect(self.db_path)
             cursor = conn.cursor()
             
             cutoff_time = datetime.now() - timedelta(hours=hours)
@@ -475,40 +792,36 @@ class PerformanceTracker:
         """ดึงสรุปประสิทธิภาพ"""
         try:
             # ข้อมูลล่าสุด
-            recent_metrics = self.get_system_metrics(hours=1)
-            recent_module_metrics = self.get_module_metrics(hours=1)
+            latest = self._latest_system_metrics()
             recent_alerts = self.get_performance_alerts(hours=1)
             
-            if not recent_metrics:
+            if not latest:
                 return {}
             
-            latest = recent_metrics[0]
-            
-            # คำนวณค่าเฉลี่ย
-            avg_cpu = sum(m["cpu_percent"] for m in recent_metrics) / len(recent_metrics)
-            avg_memory = sum(m["memory_percent"] for m in recent_metrics) / len(recent_metrics)
-            avg_disk = sum(m["disk_usage_percent"] for m in recent_metrics) / len(recent_metrics)
+            # คำนวณค่าเฉลี่ยจาก rollup 1 นาที (ไม่ต้องดึง raw rows)
+            conn = sqlite_pool.connect(self.db_path)
+            averages = self.rollup.average(conn.cursor(), datetime.now() - timedelta(hours=1),
+                                           ["cpu_percent", "memory_percent", "disk_usage_percent"])
+            conn.close()
+            avg_cpu = averages["cpu_percent"]
+            avg_memory = averages["memory_percent"]
+            avg_disk = averages["disk_usage_percent"]
             
-            # สรุป module performance
+            # สรุป module performance จาก histogram ที่ aggregate ไว้แล้ว
             module_summary = {}
-            for metric in recent_module_metrics:
-                module = metric["module"]
-                if module not in module_summary:
-                    module_summary[module] = {
-                        "operations": 0,
-                        "total_duration": 0,
-                        "avg_duration": 0,
-                        "success_count": 0,
-                        "fail_count": 0
-                    }
-                
-                module_summary[module]["operations"] += 1
-                module_summary[module]["total_duration"] += metric["duration_ms"]
-                
-                if metric["status"] == "completed":
-                    module_summary[module]["success_count"] += 1
-                else:
-                    module_summary[module]["fail_count"] += 1
+            for module, operations in self.get_operation_stats(hours=1).items():
+                module_summary[module] = {
+                    "operations": 0,
+                    "total_duration": 0,
+                    "avg_duration": 0,
+                    "success_count": 0,
+                    "fail_count": 0
+                }
+                for stats in operations.values():
+                    module_summary[module]["operations"] += stats["count"]
+                    module_summary[module]["total_duration"] += stats["total_duration_ms"]
+                    module_summary[module]["success_count"] += stats["count"] - stats["fail_count"]
+                    module_summary[module]["fail_count"] += stats["fail_count"]
             
             # คำนวณค่าเฉลี่ย duration
             for module in module_summary:
@@ -540,19 +853,52 @@ class PerformanceTracker:
             print(f"❌ Error getting performance summary: {e}")
             return {}
     
+    def _latest_system_metrics(self) -> Optional[Dict[str, Any]]:
+        """ดึง system metrics ล่าสุด (จาก buffer ก่อน แล้วค่อยจากฐานข้อมูล)"""
+        with self.lock:
+            if self.metrics_buffer:
+                return asdict(self.metrics_buffer[-1])
+        
+        conn = sqlite_pool.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT timestamp, cpu_percent, memory_percent, disk_usage_percent, active_processes
+            FROM system_metrics
+            WHERE timestamp > ?
+            ORDER BY timestamp DESC LIMIT 1
+        ''', ((datetime.now() - timedelta(hours=1)).isoformat(),))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if not row:
+            return None
+        return {
+            "timestamp": row[0],
+            "cpu_percent": row[1],
+            "memory_percent": row[2],
+            "disk_usage_percent": row[3],
+            "active_processes": row[4]
+        }
+    
     def _start_monitoring(self):
-        """เริ่ม background monitoring"""
-        def monitor_system():
+        """เริ่ม background monitoring (รับ snapshot จาก shared metrics sampler)"""
+        self.metrics_subscription = get_metrics_sampler().subscribe(
+            self.track_system_metrics, interval=self.monitor_interval
+        )
+    
+    def _start_flusher(self):
+        """เริ่ม background flusher สำหรับ module metrics"""
+        def flush_metrics():
             while True:
+                self._flush_event.wait(self.flush_interval)
+                self._flush_event.clear()
                 try:
-                    self.track_system_metrics()
-                    time.sleep(30)  # อัปเดตทุก 30 วินาที
+                    self.flush_module_metrics()
                 except Exception as e:
-                    print(f"❌ System monitoring error: {e}")
-                    time.sleep(60)
+                    print(f"❌ Module metrics flush error: {e}")
         
-        monitor_thread = threading.Thread(target=monitor_system, daemon=True)
-        monitor_thread.start()
+        flush_thread = threading.Thread(target=flush_metrics, daemon=True)
+        flush_thread.start()
 
 
 # Global performance tracker instance
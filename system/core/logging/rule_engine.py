@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rule Engine - compile alert rules ครั้งเดียวเป็น predicate
+rule ถูก index ตาม field ของข้อมูลที่อ้างถึง ข้อมูลใหม่จึงรัน predicate เฉพาะ rule
+ที่ field เปลี่ยนค่า (rule อื่นใช้ผลลัพธ์ล่าสุด) และรองรับเงื่อนไขแบบ window (เช่น cpu > 90 อย่างน้อย
+3 จาก 5 samples ล่าสุด) โดยเก็บแค่ bitmask ของผลลัพธ์ ไม่เก็บประวัติข้อมูล
+"""
+
+import hashlib
+import json
+import operator
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+OPERATORS = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+    "!=": operator.ne
+}
+
+# chrome rule: frequency -> จำนวน error ขั้นต่ำ
+CHROME_FREQUENCY_THRESHOLDS = {"high": 5, "medium": 3, "low": 1}
+
+class CompiledRule:
+    """rule ที่ compile แล้ว: predicate + field ที่ใช้ + ขนาด window"""
+
+    __slots__ = ("name", "rule", "keys", "predicate", "window_samples", "window_required", "signature")
+
+    def __init__(self, rule: Dict[str, Any], keys: Tuple[str, ...], predicate: Callable[[Dict[str, Any]], bool],
+                 window_samples: int = 1, window_required: int = 1):
+        self.name = rule["rule_name"]
+        self.rule = rule
+        self.keys = keys
+        self.predicate = predicate
+        self.window_samples = window_samples
+        self.window_required = window_required
+        self.signature = hashlib.sha1(json.dumps(
+            [self.name, rule.get("rule_type"), rule.get("conditions")], sort_keys=True, default=str
+        ).encode("utf-8")).hexdigest()
+
+    @property
+    def windowed(self) -> bool:
+        return self.window_samples > 1
+
+class _RuleState:
+    """ผลลัพธ์ล่าสุดของ rule ใน scope หนึ่ง (bitmask ของ window samples)"""
+
+    __slots__ = ("bits", "samples", "last_result")
+
+    def __init__(self):
+        self.bits = 0
+        self.samples = 0
+        self.last_result = False
+
+    def push(self, result: bool, window_samples: int) -> int:
+        """เพิ่มผลลัพธ์ลง window คืนจำนวน sample ที่เป็นจริงใน window"""
+        self.bits = ((self.bits << 1) | int(result)) & ((1 << window_samples) - 1)
+        self.samples = min(self.samples + 1, window_samples)
+        self.last_result = result
+        return bin(self.bits).count("1")
+
+def _compile_performance(conditions: Dict[str, Any]) -> Optional[Tuple[Tuple[str, ...], Callable]]:
+    metric = conditions.get("metric")
+    threshold = conditions.get("threshold")
+    compare = OPERATORS.get(conditions.get("operator", ">="))
+    if not metric or threshold is None or compare is None:
+        return None
+
+    def predicate(data: Dict[str, Any]) -> bool:
+        value = data.get(metric)
+        return value is not None and compare(value, threshold)
+
+    return (metric,), predicate
+
+def _compile_workflow(conditions: Dict[str, Any]) -> Optional[Tuple[Tuple[str, ...], Callable]]:
+    status = conditions.get("status")
+    consecutive_failures = conditions.get("consecutive_failures", 1)
+    if not status:
+        return None
+
+    def predicate(data: Dict[str, Any]) -> bool:
+        return (data.get("workflow_status") == status
+                and "failure_count" in data
+                and data["failure_count"] >= consecutive_failures)
+
+    return ("workflow_status", "failure_count"), predicate
+
+def _compile_chrome(conditions: Dict[str, Any]) -> Optional[Tuple[Tuple[str, ...], Callable]]:
+    error_type = conditions.get("error_type")
+    min_errors = CHROME_FREQUENCY_THRESHOLDS.get(conditions.get("frequency", "low"))
+    if not error_type or min_errors is None:
+        return None
+
+    def predicate(data: Dict[str, Any]) -> bool:
+        return (data.get("chrome_error") == error_type
+                and "error_count" in data
+                and data["error_count"] >= min_errors)
+
+    return ("chrome_error", "error_count"), predicate
+
+RULE_COMPILERS = {
+    "performance": _compile_performance,
+    "workflow": _compile_workflow,
+    "chrome_automation": _compile_chrome
+}
+
+def compile_rule(rule: Dict[str, Any]) -> Optional[CompiledRule]:
+    """compile rule dict -> CompiledRule (None ถ้า rule ใช้ไม่ได้)"""
+    compiler = RULE_COMPILERS.get(rule.get("rule_type"))
+    if compiler is None:
+        return None
+
+    conditions = rule.get("conditions") or {}
+    compiled = compiler(conditions)
+    if compiled is None:
+        return None
+
+    keys, predicate = compiled
+    window_samples = max(1, int(conditions.get("window_samples", 1)))
+    window_required = min(window_samples, max(1, int(conditions.get("window_required", window_samples))))
+    return CompiledRule(rule, keys, predicate, window_samples, window_required)
+
+class RuleEngine:
+    """
+    ประเมิน compiled rules กับข้อมูลที่เข้ามาทีละชุด
+
+    state (ค่าล่าสุดของแต่ละ field และ window ของแต่ละ rule) แยกตาม scope
+    (module, workflow_id) ของข้อมูล เพื่อไม่ให้ข้อมูลจากหลายแหล่งปนกัน
+    """
+
+    def __init__(self, max_scopes: int = 1000):
+        self.max_scopes = max_scopes
+        self.rules: List[CompiledRule] = []
+        self._by_key: Dict[str, List[CompiledRule]] = {}
+        self._lock = threading.Lock()
+
+        # scope -> (ค่าล่าสุดของ field, rule signature -> _RuleState)
+        self._scopes: "OrderedDict[tuple, Tuple[Dict[str, Any], Dict[str, _RuleState]]]" = OrderedDict()
+        self.stats = {"evaluations": 0, "predicates": 0, "skipped": 0, "errors": 0}
+
+    def load(self, rules: List[Dict[str, Any]]) -> int:
+        """compile rules ใหม่ทั้งหมด (window state ของ rule ที่ไม่เปลี่ยนยังอยู่)"""
+        compiled = []
+        for rule in rules:
+            try:
+                compiled_rule = compile_rule(rule)
+            except (TypeError, ValueError) as e:
+                print(f"❌ Error compiling rule {rule.get('rule_name')}: {e}")
+                continue
+            if compiled_rule is not None:
+                compiled.append(compiled_rule)
+
+        by_key: Dict[str, List[CompiledRule]] = {}
+        for compiled_rule in compiled:
+            for key in compiled_rule.keys:
+                by_key.setdefault(key, []).append(compiled_rule)
+
+        signatures = {compiled_rule.signature for compiled_rule in compiled}
+        with self._lock:
+            self.rules = compiled
+            self._by_key = by_key
+            for _, states in self._scopes.values():
+                for signature in [s for s in states if s not in signatures]:
+                    del states[signature]
+
+        return len(compiled)
+
+    def evaluate(self, data: Dict[str, Any]) -> List[CompiledRule]:
+        """คืน rules ที่ trigger สำหรับข้อมูลชุดนี้"""
+        triggered = []
+        with self._lock:
+            self.stats["evaluations"] += 1
+            last_values, states = self._scope(data)
+
+            # field ที่เปลี่ยนค่าจากข้อมูลชุดก่อน (ใน scope เดียวกัน)
+            changed = set()
+            for key in self._by_key:
+                if key in data:
+                    value = data[key]
+                    if key not in last_values or last_values[key] != value:
+                        changed.add(key)
+                        last_values[key] = value
+
+            seen = set()
+            for key in self._by_key:
+                if key not in data:
+                    continue
+                for rule in self._by_key[key]:
+                    if rule.signature in seen:
+                        continue
+                    seen.add(rule.signature)
+
+                    dirty = any(rule_key in changed for rule_key in rule.keys)
+                    state = states.get(rule.signature)
+
+                    if dirty or state is None:
+                        self.stats["predicates"] += 1
+                        try:
+                            result = bool(rule.predicate(data))
+                        except Exception as e:
+                            # ข้อมูลผิดรูปแบบ: ข้ามเฉพาะ rule นี้ และประเมินใหม่ใน sample ถัดไป
+                            print(f"❌ Error evaluating rule {rule.name}: {e}")
+                            self.stats["errors"] += 1
+                            for rule_key in rule.keys:
+                                last_values.pop(rule_key, None)
+                            continue
+                        if state is None:
+                            state = states[rule.signature] = _RuleState()
+                    else:
+                        # ค่าไม่เปลี่ยน: ผลลัพธ์เท่าเดิม (นับเป็น sample ใหม่ใน window ด้วย)
+                        self.stats["skipped"] += 1
+                        result = state.last_result
+
+                    if state.push(result, rule.window_samples) >= rule.window_required:
+                        triggered.append(rule)
+
+        return triggered
+
+    def reset(self):
+        """ล้าง state ทั้งหมด"""
+        with self._lock:
+            self._scopes.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["rules"] = len(self.rules)
+        stats["indexed_keys"] = sorted(self._by_key)
+        stats["scopes"] = len(self._scopes)
+        return stats
+
+    # Helper methods
+    def _scope(self, data: Dict[str, Any]):
+        scope_key = (data.get("module"), data.get("workflow_id"))
+        scope = self._scopes.get(scope_key)
+        if scope is None:
+            scope = self._scopes[scope_key] = ({}, {})
+            if len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        else:
+            self._scopes.move_to_end(scope_key)
+        return scope
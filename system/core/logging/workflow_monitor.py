@@ -13,8 +13,18 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Callable
 from dataclasses import dataclass, asdict
 from enum import Enum
-import psutil
 import sqlite3
+import os
+import sys
+
+# Shared metrics sampler (core/metrics_sampler.py at project root)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+from core.metrics_sampler import get_metrics_sampler
+
+try:
+    from .event_dispatcher import EventDispatcher, DropPolicy
+except ImportError:
+    from event_dispatcher import EventDispatcher, DropPolicy
 
 class WorkflowStatus(Enum):
     """สถานะของ workflow"""
@@ -88,6 +98,9 @@ class WorkflowMonitor:
             "step_failed": []
         }
         
+        # ส่ง events ให้ callbacks แบบ asynchronous - callback ที่ช้าไม่ทำให้ workflow ช้าตาม
+        self.event_dispatcher = EventDispatcher("WorkflowEvents")
+        
         # Thread lock
         self.lock = threading.Lock()
         
@@ -425,10 +438,18 @@ class WorkflowMonitor:
             "network_io": self.performance_metrics["network_io"][-100:] if self.performance_metrics["network_io"] else []
         }
     
-    def add_callback(self, event: str, callback: Callable):
-        """เพิ่ม callback สำหรับ event"""
+    def add_callback(self, event: str, callback: Callable, max_queue_size: int = None,
+                     policy: DropPolicy = None, max_retries: int = None):
+        """
+        เพิ่ม callback สำหรับ event
+        
+        callback ถูกเรียกบน worker ของ dispatcher (หรือ event loop ถ้าเป็น async def)
+        max_queue_size / policy / max_retries: ตั้งค่า queue และการ retry ราย subscriber
+        """
         if event in self.callbacks:
             self.callbacks[event].append(callback)
+            self.event_dispatcher.subscribe(event, callback, max_queue_size=max_queue_size,
+                                            policy=policy, max_retries=max_retries)
     
     def _find_step(self, workflow: WorkflowInfo, step_id: str) -> Optional[WorkflowStep]:
         """ค้นหา step ใน workflow"""
@@ -459,66 +480,50 @@ class WorkflowMonitor:
         }
     
     def _trigger_callbacks(self, event: str, workflow: WorkflowInfo, step: WorkflowStep = None):
-        """เรียก callbacks"""
-        for callback in self.callbacks.get(event, []):
-            try:
-                if step:
-                    callback(workflow, step)
-                else:
-                    callback(workflow)
-            except Exception as e:
-                print(f"❌ Callback error for {event}: {e}")
+        """ส่ง event ให้ callbacks (คืนค่าทันที)"""
+        if step:
+            self.event_dispatcher.emit(event, workflow, step)
+        else:
+            self.event_dispatcher.emit(event, workflow)
     
     def _start_monitoring(self):
-        """เริ่ม background monitoring"""
-        def monitor_performance():
-            while True:
-                try:
-                    # CPU usage
-                    cpu_percent = psutil.cpu_percent(interval=1)
-                    self.performance_metrics["cpu_usage"].append({
-                        "timestamp": datetime.now().isoformat(),
-                        "value": cpu_percent
-                    })
-                    
-                    # Memory usage
-                    memory = psutil.virtual_memory()
-                    self.performance_metrics["memory_usage"].append({
-                        "timestamp": datetime.now().isoformat(),
-                        "value": memory.percent
-                    })
-                    
-                    # Disk I/O
-                    disk_io = psutil.disk_io_counters()
-                    if disk_io:
-                        self.performance_metrics["disk_io"].append({
-                            "timestamp": datetime.now().isoformat(),
-                            "read_bytes": disk_io.read_bytes,
-                            "write_bytes": disk_io.write_bytes
-                        })
-                    
-                    # Network I/O
-                    network_io = psutil.net_io_counters()
-                    if network_io:
-                        self.performance_metrics["network_io"].append({
-                            "timestamp": datetime.now().isoformat(),
-                            "bytes_sent": network_io.bytes_sent,
-                            "bytes_recv": network_io.bytes_recv
-                        })
-                    
-                    # จำกัดขนาดของ metrics
-                    for key in self.performance_metrics:
-                        if len(self.performance_metrics[key]) > 1000:
-                            self.performance_metrics[key] = self.performance_metrics[key][-1000:]
-                    
-                    time.sleep(5)  # อัปเดตทุก 5 วินาที
-                    
-                except Exception as e:
-                    print(f"❌ Performance monitoring error: {e}")
-                    time.sleep(10)
-        
-        monitor_thread = threading.Thread(target=monitor_performance, daemon=True)
-        monitor_thread.start()
+        """เริ่ม background monitoring (รับ snapshot จาก shared metrics sampler ทุก 5 วินาที)"""
+        def record_performance(snapshot):
+            timestamp = snapshot.iso_timestamp
+            
+            # CPU usage
+            self.performance_metrics["cpu_usage"].append({
+                "timestamp": timestamp,
+                "value": snapshot.cpu_percent
+            })
+            
+            # Memory usage
+            self.performance_metrics["memory_usage"].append({
+                "timestamp": timestamp,
+                "value": snapshot.memory_percent
+            })
+            
+            # Disk I/O
+            if snapshot.disk_read_bytes is not None:
+                self.performance_metrics["disk_io"].append({
+                    "timestamp": timestamp,
+                    "read_bytes": snapshot.disk_read_bytes,
+                    "write_bytes": snapshot.disk_write_bytes
+                })
+            
+            # Network I/O
+            self.performance_metrics["network_io"].append({
+                "timestamp": timestamp,
+                "bytes_sent": snapshot.net_bytes_sent,
+                "bytes_recv": snapshot.net_bytes_recv
+            })
+            
+            # จำกัดขนาดของ metrics
+            for key in self.performance_metrics:
+                if len(self.performance_metrics[key]) > 1000:
+                    self.performance_metrics[key] = self.performance_metrics[key][-1000:]
+        
+        self.metrics_subscription = get_metrics_sampler().subscribe(record_performance, interval=5)
 
 
 # Global workflow monitor instance
@@ -5,7 +5,7 @@ Logging API Endpoints - FastAPI endpoints สำหรับ real-time logging
 ให้ dashboard เข้าถึงข้อมูล log และ workflow แบบ real-time
 """
 
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends, Request
 from fastapi.responses import StreamingResponse
 from typing import Dict, List, Any, Optional
 import json
@@ -99,38 +99,50 @@ async def get_recent_logs(
 
 @router.get("/logs/stream")
 async def stream_logs(
+    request: Request,
     module: Optional[str] = None,
     level: Optional[str] = None,
+    last_id: Optional[int] = None,
     logger_mgr: LoggerManager = Depends(get_logger_manager_dep)
 ):
-    """Stream logs แบบ real-time"""
+    """Stream logs แบบ real-time (push จาก LoggerManager.log_queue ไม่ต้อง query DB)"""
+    # รองรับ resume ผ่าน header Last-Event-ID ของ EventSource
+    if last_id is None:
+        last_event_id = request.headers.get("last-event-id")
+        if last_event_id and last_event_id.isdigit():
+            last_id = int(last_event_id)
+    
+    broadcaster = logger_mgr.log_broadcaster
+    subscription = broadcaster.subscribe(
+        module=module, level=level, last_id=last_id,
+        loop=asyncio.get_running_loop()
+    )
+    
     async def log_generator():
         try:
-            last_check = time.time()
-            while True:
-                # ดึง logs ใหม่
-                current_time = time.time()
-                logs = logger_mgr.get_recent_logs(limit=50, module=module, level=level)
-                
-                # กรอง logs ที่ใหม่กว่า last_check
-                new_logs = []
-                for log in logs:
-                    log_time = datetime.fromisoformat(log["timestamp"]).timestamp()
-                    if log_time > last_check:
-                        new_logs.append(log)
+            if subscription.resync:
+                # cursor ของ client ไม่ตรงกับ log ที่มี: ให้ client ล้าง log เดิมก่อน
+                yield f"event: resync\ndata: {json.dumps({'last_id': broadcaster.last_id})}\n\n"
+            
+            while not await request.is_disconnected():
+                new_logs = await subscription.wait(timeout=15)
                 
                 if new_logs:
-                    yield f"data: {json.dumps({'logs': new_logs, 'timestamp': datetime.now().isoformat()})}\n\n"
-                
-                last_check = current_time
-                await asyncio.sleep(1)  # อัปเดตทุก 1 วินาที
+                    payload = {'logs': new_logs, 'timestamp': datetime.now().isoformat()}
+                    last_event_id = max(log['id'] for log in new_logs)
+                    yield f"id: {last_event_id}\ndata: {json.dumps(payload)}\n\n"
+                else:
+                    # keep-alive comment
+                    yield ": ping\n\n"
                 
         except Exception as e:
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
     
     return StreamingResponse(
         log_generator(),
-        media_type="text/plain",
+        media_type="text/event-stream",
         headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
     )
 
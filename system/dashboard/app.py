@@ -11,7 +11,7 @@ import json
 import time
 import threading
 from datetime import datetime
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, render_template, jsonify, request, send_from_directory, Response
 from flask_socketio import SocketIO, emit
 import psutil
 import GPUtil
@@ -22,6 +22,11 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Add project root to path (shared core modules)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from core.metrics_sampler import get_metrics_sampler
+from core.capability_prober import CapabilityProber, import_component
+
 # Import logging components
 try:
     from system.core.logging.logger_manager import get_logger_manager
@@ -40,7 +45,6 @@ app.config['SECRET_KEY'] = 'godmode_dashboard_secret_key_2024'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Global variables
-capability_state_cache = {}
 component_cache = {}
 
 # Import components with error handling
@@ -121,337 +125,146 @@ else:
     dashboard_logger.add_log('warning', 'God Mode Knowledge Manager not available')
 
 def safe_import_component(component_name, import_path, class_name=None):
-    """Import component safely and cache result"""
+    """Import component safely and cache successful imports"""
     if component_name in component_cache:
         return component_cache[component_name]
     
-    try:
-        module = __import__(import_path, fromlist=[class_name] if class_name else [])
-        if class_name:
-            component = getattr(module, class_name)
-        else:
-            component = module
+    # cache เฉพาะที่ import สำเร็จ ให้ prober ลองใหม่ได้เมื่อ component พร้อมภายหลัง
+    component = import_component(import_path, class_name)
+    if component is not None:
         component_cache[component_name] = component
-        return component
-    except Exception as e:
-        component_cache[component_name] = None
-        return None
-
-def get_system_capabilities():
-    """Get system capabilities status"""
-    global capability_state_cache
-    capabilities = {
-        'chrome_automation': {
-            'name': 'Chrome Automation',
-            'description': 'Control Chrome with AI and Selenium',
-            'status': 'unknown',
-            'icon': '🌐'
-        },
-        'ai_integration': {
-            'name': 'AI Integration',
-            'description': 'Multimodal AI Processing',
-            'status': 'unknown',
-            'icon': '🧠'
-        },
-        'thai_processor': {
-            'name': 'Thai Language Processor',
-            'description': 'Thai language processing and OCR',
-            'status': 'unknown',
-            'icon': '🇹🇭'
-        },
-        'visual_recognition': {
-            'name': 'Visual Recognition',
-            'description': 'Image recognition and analysis',
-            'status': 'unknown',
-            'icon': '👁️'
-        },
-        'backup_controller': {
-            'name': 'Backup Controller',
-            'description': 'Automated backup control',
-            'status': 'unknown',
-            'icon': '💾'
-        },
-        'supabase_integration': {
-            'name': 'Supabase Database',
-            'description': 'Cloud Database and Real-time Features',
-            'status': 'unknown',
-            'icon': '☁️'
-        },
-        'environment_cards': {
-            'name': 'Environment Cards',
-            'description': 'Display environment information',
-            'status': 'unknown',
-            'icon': '📋'
-        },
-        'knowledge_manager': {
-            'name': 'Knowledge Manager',
-            'description': 'Knowledge base management',
-            'status': 'unknown',
-            'icon': '🧠'
-        },
-        'godmode_knowledge': {
-            'name': 'God Mode Knowledge',
-            'description': 'Permanent knowledge base for God Mode',
-            'status': 'unknown',
-            'icon': '⚡'
-        },
-        'gpu_processing': {
-            'name': 'GPU Processing',
-            'description': 'GPU processing (RTX 4060)',
-            'status': 'unknown',
-            'icon': '🎮'
-        },
-        'smart_allocator': {
-            'name': 'Smart Resource Allocator',
-            'description': 'Intelligent resource allocation',
-            'status': 'unknown',
-            'icon': '⚡'
-        }
+    return component
+
+# Capability metadata (status มาจาก background prober)
+CAPABILITY_INFO = {
+    'chrome_automation': {
+        'name': 'Chrome Automation',
+        'description': 'Control Chrome with AI and Selenium',
+        'icon': '🌐'
+    },
+    'ai_integration': {
+        'name': 'AI Integration',
+        'description': 'Multimodal AI Processing',
+        'icon': '🧠'
+    },
+    'thai_processor': {
+        'name': 'Thai Language Processor',
+        'description': 'Thai language processing and OCR',
+        'icon': '🇹🇭'
+    },
+    'visual_recognition': {
+        'name': 'Visual Recognition',
+        'description': 'Image recognition and analysis',
+        'icon': '👁️'
+    },
+    'backup_controller': {
+        'name': 'Backup Controller',
+        'description': 'Automated backup control',
+        'icon': '💾'
+    },
+    'supabase_integration': {
+        'name': 'Supabase Database',
+        'description': 'Cloud Database and Real-time Features',
+        'icon': '☁️'
+    },
+    'environment_cards': {
+        'name': 'Environment Cards',
+        'description': 'Display environment information',
+        'icon': '📋'
+    },
+    'knowledge_manager': {
+        'name': 'Knowledge Manager',
+        'description': 'Knowledge base management',
+        'icon': '🧠'
+    },
+    'godmode_knowledge': {
+        'name': 'God Mode Knowledge',
+        'description': 'Permanent knowledge base for God Mode',
+        'icon': '⚡'
+    },
+    'gpu_processing': {
+        'name': 'GPU Processing',
+        'description': 'GPU processing (RTX 4060)',
+        'icon': '🎮'
+    },
+    'smart_allocator': {
+        'name': 'Smart Resource Allocator',
+        'description': 'Intelligent resource allocation',
+        'icon': '⚡'
+    }
+}
+
+# ชื่อที่ใช้ใน log เมื่อสถานะเปลี่ยน
+CAPABILITY_LABELS = {
+    'chrome_automation': 'Chrome Controller',
+    'ai_integration': 'AI Integration',
+    'thai_processor': 'Thai Processor',
+    'visual_recognition': 'Visual Recognition',
+    'backup_controller': 'Backup Controller',
+    'supabase_integration': 'Supabase Integration',
+    'environment_cards': 'Environment Cards',
+    'knowledge_manager': 'Knowledge Manager',
+    'godmode_knowledge': 'God Mode Knowledge',
+    'gpu_processing': 'GPU Processing',
+    'smart_allocator': 'Smart Allocator'
+}
+
+def log_capability_change(key, old_status, new_status):
+    """Log only if status changed"""
+    label = CAPABILITY_LABELS.get(key, key)
+    if new_status == 'ready':
+        dashboard_logger.add_log('success', f'{label} ready')
+    elif new_status == 'error':
+        dashboard_logger.add_log('error', f'{label} not available')
+
+def probe_chrome(_component):
+    """Cheap liveness check ของ Chrome Controller"""
+    if chrome_controller and hasattr(chrome_controller, 'is_ready'):
+        return 'ready' if chrome_controller.is_ready() else 'warning'
+    return 'error'
+
+def probe_gpu(_component):
+    """ตรวจสอบ GPU (เรียก nvidia-smi จึงใช้ TTL ยาว)"""
+    return 'ready' if GPUtil.getGPUs() else 'error'
+
+capability_prober = CapabilityProber(default_ttl=30.0, on_change=log_capability_change)
+
+def register_capabilities():
+    """ลงทะเบียน capabilities กับ background prober"""
+    component_imports = {
+        'ai_integration': ('system.core.controllers.ai_integration', 'MultimodalAIIntegration'),
+        'thai_processor': ('system.core.controllers.thai_processor', 'FullThaiProcessor'),
+        'visual_recognition': ('system.core.controllers.visual_recognition', 'VisualRecognition'),
+        'backup_controller': ('system.core.controllers.backup_controller', 'BackupController'),
+        'supabase_integration': ('system.core.controllers.supabase_integration', 'SupabaseIntegration'),
+        'environment_cards': ('system.core.controllers.environment_cards', 'EnvironmentCards'),
+        'smart_allocator': ('smart_resource_allocator', 'SmartResourceAllocator')
     }
     
-    def log_if_changed(key, status, msg_ready, msg_error):
-        """Log only if status changed"""
-        if key not in capability_state_cache or capability_state_cache[key] != status:
-            capability_state_cache[key] = status
-            if status == 'ready':
-                dashboard_logger.add_log('success', msg_ready)
-            elif status == 'error':
-                dashboard_logger.add_log('error', msg_error)
-        return status
+    capability_prober.register('chrome_automation', CAPABILITY_INFO['chrome_automation'],
+                               probe=probe_chrome, ttl=15)
     
-    # Chrome Automation
-    try:
-        if chrome_controller and hasattr(chrome_controller, 'is_ready'):
-            if chrome_controller.is_ready():
-                capabilities['chrome_automation']['status'] = log_if_changed(
-                    'chrome_automation', 'ready', 
-                    'Chrome Controller ready', 
-                    'Chrome Controller error'
-                )
-            else:
-                capabilities['chrome_automation']['status'] = log_if_changed(
-                    'chrome_automation', 'warning', 
-                    'Chrome Controller ready', 
-                    'Chrome Controller preparing'
-                )
-        else:
-            capabilities['chrome_automation']['status'] = log_if_changed(
-                'chrome_automation', 'error', 
-                'Chrome Controller ready', 
-                'Chrome Controller not available'
-            )
-    except:
-        capabilities['chrome_automation']['status'] = log_if_changed(
-            'chrome_automation', 'error', 
-            'Chrome Controller ready', 
-            'Chrome Controller not available'
-        )
-
-    # AI Integration
-    try:
-        ai_integration = safe_import_component('ai_integration', 'system.core.controllers.ai_integration', 'MultimodalAIIntegration')
-        if ai_integration:
-            capabilities['ai_integration']['status'] = log_if_changed(
-                'ai_integration', 'ready', 
-                'AI Integration ready', 
-                'AI Integration error'
-            )
-        else:
-            capabilities['ai_integration']['status'] = log_if_changed(
-                'ai_integration', 'error', 
-                'AI Integration ready', 
-                'AI Integration not available'
-            )
-    except:
-        capabilities['ai_integration']['status'] = log_if_changed(
-            'ai_integration', 'error', 
-            'AI Integration ready', 
-            'AI Integration not available'
+    # Components: import ครั้งเดียว (ลองใหม่ทุก 5 นาทีถ้าไม่สำเร็จ)
+    for key, (import_path, class_name) in component_imports.items():
+        capability_prober.register(
+            key, CAPABILITY_INFO[key], ttl=300, retry_ttl=300,
+            initializer=lambda key=key, import_path=import_path, class_name=class_name:
+                safe_import_component(key, import_path, class_name)
         )
     
-    # Thai Processor
-    try:
-        thai_processor = safe_import_component('thai_processor', 'system.core.controllers.thai_processor', 'FullThaiProcessor')
-        if thai_processor:
-            capabilities['thai_processor']['status'] = log_if_changed(
-                'thai_processor', 'ready', 
-                'Thai Processor ready', 
-                'Thai Processor error'
-            )
-        else:
-            capabilities['thai_processor']['status'] = log_if_changed(
-                'thai_processor', 'error', 
-                'Thai Processor ready', 
-                'Thai Processor not available'
-            )
-    except:
-        capabilities['thai_processor']['status'] = log_if_changed(
-            'thai_processor', 'error', 
-            'Thai Processor ready', 
-            'Thai Processor not available'
-        )
-    
-    # Visual Recognition
-    try:
-        visual_recognition = safe_import_component('visual_recognition', 'system.core.controllers.visual_recognition', 'VisualRecognition')
-        if visual_recognition:
-            capabilities['visual_recognition']['status'] = log_if_changed(
-                'visual_recognition', 'ready', 
-                'Visual Recognition ready', 
-                'Visual Recognition error'
-            )
-        else:
-            capabilities['visual_recognition']['status'] = log_if_changed(
-                'visual_recognition', 'error', 
-                'Visual Recognition ready', 
-                'Visual Recognition not available'
-            )
-    except:
-        capabilities['visual_recognition']['status'] = log_if_changed(
-            'visual_recognition', 'error', 
-            'Visual Recognition ready', 
-            'Visual Recognition not available'
-        )
+    capability_prober.register('knowledge_manager', CAPABILITY_INFO['knowledge_manager'], ttl=300,
+                               probe=lambda _: 'ready' if KNOWLEDGE_MANAGER_AVAILABLE else 'error')
+    capability_prober.register('godmode_knowledge', CAPABILITY_INFO['godmode_knowledge'], ttl=300,
+                               probe=lambda _: 'ready' if GODMODE_KM_AVAILABLE else 'error')
+    capability_prober.register('gpu_processing', CAPABILITY_INFO['gpu_processing'],
+                               probe=probe_gpu, ttl=60)
 
-    # Backup Controller
-    try:
-        backup_controller = safe_import_component('backup_controller', 'system.core.controllers.backup_controller', 'BackupController')
-        if backup_controller:
-            capabilities['backup_controller']['status'] = log_if_changed(
-                'backup_controller', 'ready', 
-                'Backup Controller ready', 
-                'Backup Controller error'
-            )
-        else:
-            capabilities['backup_controller']['status'] = log_if_changed(
-                'backup_controller', 'error', 
-                'Backup Controller ready', 
-                'Backup Controller not available'
-            )
-    except:
-        capabilities['backup_controller']['status'] = log_if_changed(
-            'backup_controller', 'error', 
-            'Backup Controller ready', 
-            'Backup Controller not available'
-        )
-    
-    # Supabase Integration
-    try:
-        supabase_integration = safe_import_component('supabase_integration', 'system.core.controllers.supabase_integration', 'SupabaseIntegration')
-        if supabase_integration:
-            capabilities['supabase_integration']['status'] = log_if_changed(
-                'supabase_integration', 'ready', 
-                'Supabase Integration ready', 
-                'Supabase Integration error'
-            )
-        else:
-            capabilities['supabase_integration']['status'] = log_if_changed(
-                'supabase_integration', 'error', 
-                'Supabase Integration ready', 
-                'Supabase Integration not available'
-            )
-    except:
-        capabilities['supabase_integration']['status'] = log_if_changed(
-            'supabase_integration', 'error', 
-            'Supabase Integration ready', 
-            'Supabase Integration not available'
-        )
-    
-    # Environment Cards
-    try:
-        environment_cards = safe_import_component('environment_cards', 'system.core.controllers.environment_cards', 'EnvironmentCards')
-        if environment_cards:
-            capabilities['environment_cards']['status'] = log_if_changed(
-                'environment_cards', 'ready', 
-                'Environment Cards ready', 
-                'Environment Cards error'
-            )
-        else:
-            capabilities['environment_cards']['status'] = log_if_changed(
-                'environment_cards', 'error', 
-                'Environment Cards ready', 
-                'Environment Cards not available'
-            )
-    except:
-        capabilities['environment_cards']['status'] = log_if_changed(
-            'environment_cards', 'error', 
-            'Environment Cards ready', 
-            'Environment Cards not available'
-        )
-    
-    # Knowledge Manager
-    if KNOWLEDGE_MANAGER_AVAILABLE:
-        capabilities['knowledge_manager']['status'] = log_if_changed(
-            'knowledge_manager', 'ready', 
-            'Knowledge Manager ready', 
-            'Knowledge Manager error'
-        )
-    else:
-        capabilities['knowledge_manager']['status'] = log_if_changed(
-            'knowledge_manager', 'error', 
-            'Knowledge Manager ready', 
-            'Knowledge Manager not available'
-        )
+register_capabilities()
+capability_prober.start()
 
-    # God Mode Knowledge
-    if GODMODE_KM_AVAILABLE:
-        capabilities['godmode_knowledge']['status'] = log_if_changed(
-            'godmode_knowledge', 'ready', 
-            'God Mode Knowledge ready', 
-            'God Mode Knowledge error'
-        )
-    else:
-        capabilities['godmode_knowledge']['status'] = log_if_changed(
-            'godmode_knowledge', 'error', 
-            'God Mode Knowledge ready', 
-            'God Mode Knowledge not available'
-        )
-    
-    # GPU Processing
-    try:
-        gpus = GPUtil.getGPUs()
-        if gpus:
-            capabilities['gpu_processing']['status'] = log_if_changed(
-                'gpu_processing', 'ready', 
-                'GPU Processing ready', 
-                'GPU Processing error'
-            )
-        else:
-            capabilities['gpu_processing']['status'] = log_if_changed(
-                'gpu_processing', 'error', 
-                'GPU Processing ready', 
-                'GPU Processing not available'
-            )
-    except:
-        capabilities['gpu_processing']['status'] = log_if_changed(
-            'gpu_processing', 'error', 
-            'GPU Processing ready', 
-            'GPU Processing not available'
-        )
-    
-    # Smart Allocator
-    try:
-        smart_allocator = safe_import_component('smart_allocator', 'smart_resource_allocator', 'SmartResourceAllocator')
-        if smart_allocator:
-            capabilities['smart_allocator']['status'] = log_if_changed(
-                'smart_allocator', 'ready', 
-                'Smart Allocator ready', 
-                'Smart Allocator error'
-            )
-        else:
-            capabilities['smart_allocator']['status'] = log_if_changed(
-                'smart_allocator', 'error', 
-                'Smart Allocator ready', 
-                'Smart Allocator not available'
-            )
-    except:
-        capabilities['smart_allocator']['status'] = log_if_changed(
-            'smart_allocator', 'error', 
-            'Smart Allocator ready', 
-            'Smart Allocator not available'
-        )
-    
-    return capabilities
+def get_system_capabilities():
+    """Get system capabilities status (cached snapshot จาก background prober)"""
+    return capability_prober.get_capabilities()
 
 def get_godmode_data():
     """Get God Mode Knowledge Base data"""
@@ -490,19 +303,20 @@ def get_godmode_data():
 def get_system_resources():
     """Get system resource usage"""
     try:
+        # CPU / Memory / Disk จาก shared metrics sampler (ไม่ block request)
+        snapshot = get_metrics_sampler().latest(max_age=10)
+        
         # CPU
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_count = psutil.cpu_count()
+        cpu_percent = snapshot.cpu_percent
+        cpu_count = snapshot.cpu_count
         
         # Memory
-        memory = psutil.virtual_memory()
-        memory_percent = memory.percent
-        memory_available_gb = memory.available / (1024**3)
+        memory_percent = snapshot.memory_percent
+        memory_available_gb = snapshot.memory_available / (1024**3)
         
         # Disk
-        disk = psutil.disk_usage('/')
-        disk_percent = disk.percent
-        disk_free_gb = disk.free / (1024**3)
+        disk_percent = snapshot.disk_percent
+        disk_free_gb = snapshot.disk_free / (1024**3)
         
         # GPU
         gpu_info = None
@@ -645,81 +459,102 @@ def test_api():
     """Test API endpoint"""
     return jsonify({'status': 'Dashboard API is working'})
 
-@app.route('/api/status')
-def api_status():
-    """API endpoint for system status"""
-    try:
-        capabilities = get_system_capabilities()
-        ready_count = sum(1 for cap in capabilities.values() if cap['status'] == 'ready')
-        total_count = len(capabilities)
-        status_percent = (ready_count / total_count) * 100 if total_count > 0 else 0
-        
-        # Mock data for testing
-        mock_system_resources = {
-            'cpu': {'percent': 45, 'count': 8},
-            'memory': {'percent': 62, 'available_gb': 12.5},
-            'disk': {'percent': 78, 'free_gb': 156.2},
-            'gpu': {'available': True, 'name': 'NVIDIA RTX 4060', 'used_memory_mb': 2048, 'total_memory_gb': 8},
-            'network': {'status': 'Connected'}
-        }
-        
-        mock_godmode_data = {
-            'statistics': {
-                'total_sessions': 15,
-                'total_commands': 127,
-                'total_patterns': 23,
-                'success_rate': 87.5
+# Cached /api/status response: (etag, JSON body)
+status_response_cache = {'etag': None, 'body': None}
+
+def build_status_payload(capabilities, updated_at):
+    """สร้าง payload ของ /api/status จาก capabilities snapshot"""
+    ready_count = sum(1 for cap in capabilities.values() if cap['status'] == 'ready')
+    total_count = len(capabilities)
+    status_percent = (ready_count / total_count) * 100 if total_count > 0 else 0
+    
+    # Mock data for testing
+    mock_system_resources = {
+        'cpu': {'percent': 45, 'count': 8},
+        'memory': {'percent': 62, 'available_gb': 12.5},
+        'disk': {'percent': 78, 'free_gb': 156.2},
+        'gpu': {'available': True, 'name': 'NVIDIA RTX 4060', 'used_memory_mb': 2048, 'total_memory_gb': 8},
+        'network': {'status': 'Connected'}
+    }
+    
+    mock_godmode_data = {
+        'statistics': {
+            'total_sessions': 15,
+            'total_commands': 127,
+            'total_patterns': 23,
+            'success_rate': 87.5
+        },
+        'sessions': [
+            {
+                'session_id': 'session_001',
+                'status': 'completed',
+                'commands_count': 8,
+                'start_time': '2024-01-15T10:30:00Z'
             },
-            'sessions': [
-                {
-                    'session_id': 'session_001',
-                    'status': 'completed',
-                    'commands_count': 8,
-                    'start_time': '2024-01-15T10:30:00Z'
-                },
-                {
-                    'session_id': 'session_002',
-                    'status': 'active',
-                    'commands_count': 3,
-                    'start_time': '2024-01-15T14:20:00Z'
-                }
-            ],
-            'commands': [
-                {
-                    'command_text': 'Analyze system performance and generate report',
-                    'command_type': 'analysis',
-                    'success': True,
-                    'execution_time': '2024-01-15T10:35:00Z'
-                },
-                {
-                    'command_text': 'Backup critical data files',
-                    'command_type': 'backup',
-                    'success': True,
-                    'execution_time': '2024-01-15T10:40:00Z'
-                }
-            ]
-        }
-        
-        mock_recommendations = [
             {
-                'type': 'success',
-                'message': 'System operating normally, all components ready'
+                'session_id': 'session_002',
+                'status': 'active',
+                'commands_count': 3,
+                'start_time': '2024-01-15T14:20:00Z'
+            }
+        ],
+        'commands': [
+            {
+                'command_text': 'Analyze system performance and generate report',
+                'command_type': 'analysis',
+                'success': True,
+                'execution_time': '2024-01-15T10:35:00Z'
             },
             {
-                'type': 'info',
-                'message': 'Recommend weekly data backup'
+                'command_text': 'Backup critical data files',
+                'command_type': 'backup',
+                'success': True,
+                'execution_time': '2024-01-15T10:40:00Z'
             }
         ]
+    }
     
-        return jsonify({
-            'capabilities': capabilities,
-            'status_percent': status_percent,
-            'status_message': get_status_message(status_percent),
-            'system_resources': mock_system_resources,
-            'godmode_data': mock_godmode_data,
-            'recommendations': mock_recommendations,
-            'last_update': datetime.now().isoformat()
-        })
+    mock_recommendations = [
+        {
+            'type': 'success',
+            'message': 'System operating normally, all components ready'
+        },
+        {
+            'type': 'info',
+            'message': 'Recommend weekly data backup'
+        }
+    ]
+    
+    return {
+        'capabilities': capabilities,
+        'status_percent': status_percent,
+        'status_message': get_status_message(status_percent),
+        'system_resources': mock_system_resources,
+        'godmode_data': mock_godmode_data,
+        'recommendations': mock_recommendations,
+        'last_update': updated_at
+    }
+
+@app.route('/api/status')
+def api_status():
+    """API endpoint for system status (รองรับ ETag / If-None-Match)"""
+    try:
+        capabilities, etag, updated_at = capability_prober.snapshot()
+        
+        # สถานะไม่เปลี่ยน: ตอบ 304 โดยไม่ต้องสร้าง body
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        
+        if status_response_cache['etag'] != etag:
+            status_response_cache['body'] = json.dumps(build_status_payload(capabilities, updated_at))
+            status_response_cache['etag'] = etag
+        
+        response = Response(status_response_cache['body'], mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({
             'error': f'Error getting status: {str(e)}'
@@ -1293,29 +1128,41 @@ def handle_connect():
     """Handle client connection"""
     print(f"Client connected: {request.sid}")
     emit('status', {'message': 'Connected to GOD MODE Dashboard'})
+    # ส่งสถานะปัจจุบันทันที (background_updates emit เฉพาะเมื่อสถานะเปลี่ยน)
+    capabilities, _, _ = capability_prober.snapshot()
+    emit('status_update', build_status_update(capabilities))
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     print(f"Client disconnected: {request.sid}")
 
+def build_status_update(capabilities):
+    """Payload ของ event status_update"""
+    ready_count = sum(1 for cap in capabilities.values() if cap['status'] == 'ready')
+    total_count = len(capabilities)
+    status_percent = (ready_count / total_count) * 100 if total_count > 0 else 0
+    return {
+        'capabilities': capabilities,
+        'status_percent': status_percent,
+        'status_message': get_status_message(status_percent),
+        'timestamp': datetime.now().isoformat()
+    }
+
 def background_updates():
-    """Background task for real-time updates"""
+    """Background task for real-time updates (emit เฉพาะเมื่อสถานะเปลี่ยน client ใหม่ได้สถานะตอน connect)"""
+    last_etag = None
     while True:
         try:
             # Get current status
-            capabilities = get_system_capabilities()
-            ready_count = sum(1 for cap in capabilities.values() if cap['status'] == 'ready')
-            total_count = len(capabilities)
-            status_percent = (ready_count / total_count) * 100 if total_count > 0 else 0
+            capabilities, etag, _ = capability_prober.snapshot()
+            if etag == last_etag:
+                time.sleep(5)
+                continue
+            last_etag = etag
             
             # Emit status update
-            socketio.emit('status_update', {
-                'capabilities': capabilities,
-                'status_percent': status_percent,
-                'status_message': get_status_message(status_percent),
-                'timestamp': datetime.now().isoformat()
-            })
+            socketio.emit('status_update', build_status_update(capabilities))
             
             # Wait before next update
             time.sleep(5)
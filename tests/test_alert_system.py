@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Alert System - ทดสอบการรวม alert ซ้ำและการบันทึกจำนวนครั้งลงฐานข้อมูล
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add logging package to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'system', 'core', 'logging'))
+
+import alert_system as alert_module
+from alert_system import AlertSystem, AlertType, AlertSeverity
+
+def _create_alert_system(tmp_path):
+    # flush_interval ยาว: การบันทึกเกิดจาก flush ที่ทดสอบเท่านั้น
+    return AlertSystem(db_path=str(tmp_path / "alerts.db"), flush_interval=3600)
+
+def _raise_alert(alert_system):
+    return alert_system.create_alert(AlertType.PERFORMANCE, AlertSeverity.WARNING, "High CPU",
+                                     "cpu high", module="monitor", rule="high_cpu_usage")
+
+def _stored_count(alert_system, alert_id):
+    conn = sqlite3.connect(alert_system.db_path)
+    try:
+        return conn.execute("SELECT occurrence_count FROM alerts WHERE id = ?", (alert_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def test_repeats_flushed_before_get_active_alerts(tmp_path):
+    """alert ซ้ำถูกรวมในหน่วยความจำ และถูกบันทึกก่อน get_active_alerts คืนค่า"""
+    alert_system = _create_alert_system(tmp_path)
+    alert_id = _raise_alert(alert_system)
+    assert _raise_alert(alert_system) == alert_id
+    assert _raise_alert(alert_system) == alert_id
+
+    active = alert_system.get_active_alerts()
+    assert [alert["occurrence_count"] for alert in active] == [3]
+    assert _stored_count(alert_system, alert_id) == 3
+    assert alert_system.get_stats()["pending_updates"] == 0
+
+def test_failed_flush_keeps_updates_pending(tmp_path, monkeypatch):
+    """flush ที่เขียนไม่สำเร็จไม่ทิ้งการอัปเดต: รอบถัดไปบันทึกค่าล่าสุด"""
+    alert_system = _create_alert_system(tmp_path)
+    alert_id = _raise_alert(alert_system)
+    _raise_alert(alert_system)
+
+    real_connect = alert_module.sqlite_pool.connect
+
+    def failing_connect(db_path):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(alert_module.sqlite_pool, "connect", failing_connect)
+    assert alert_system.flush_alert_updates() == 0
+    assert alert_system.get_stats()["pending_updates"] == 1
+
+    monkeypatch.setattr(alert_module.sqlite_pool, "connect", real_connect)
+    _raise_alert(alert_system)
+    assert alert_system.flush_alert_updates() == 1
+    assert _stored_count(alert_system, alert_id) == 3
+    assert alert_system.get_stats()["pending_updates"] == 0
+
+def test_repeats_coalesce_by_fingerprint(tmp_path):
+    """alert ที่ fingerprint (type, module, rule) ตรงกันถูกรวม fingerprint อื่นสร้าง alert ใหม่"""
+    alert_system = _create_alert_system(tmp_path)
+    alert_id = _raise_alert(alert_system)
+    other_module = alert_system.create_alert(AlertType.PERFORMANCE, AlertSeverity.WARNING, "High CPU",
+                                             "cpu high", module="worker", rule="high_cpu_usage")
+    assert _raise_alert(alert_system) == alert_id
+    assert other_module != alert_id
+
+    stats = alert_system.get_stats()
+    assert stats["created"] == 2 and stats["coalesced"] == 1
+    assert stats["active_fingerprints"] == 2
+
+    # dismiss แล้ว fingerprint เดิมเริ่ม alert ใหม่
+    assert alert_system.dismiss_alert(alert_id)
+    assert _raise_alert(alert_system) not in (alert_id, other_module)
+
+def test_repeat_notifications_rate_limited_unless_escalated(tmp_path):
+    """alert_repeated ถูกจำกัดต่อ repeat_notify_interval แต่แจ้งทันทีเมื่อความรุนแรงเพิ่มขึ้น"""
+    alert_system = AlertSystem(db_path=str(tmp_path / "alerts.db"), flush_interval=3600,
+                               repeat_notify_interval=3600)
+    repeated = []
+    alert_system.add_callback("alert_repeated", lambda alert: repeated.append(alert.severity))
+
+    alert_id = _raise_alert(alert_system)
+    _raise_alert(alert_system)
+    _raise_alert(alert_system)
+    escalated = alert_system.create_alert(AlertType.PERFORMANCE, AlertSeverity.CRITICAL, "High CPU",
+                                          "cpu very high", module="monitor", rule="high_cpu_usage")
+    assert escalated == alert_id
+    assert alert_system.event_dispatcher.flush()
+
+    assert repeated == [AlertSeverity.CRITICAL]
+    assert alert_system.get_stats()["notifications_suppressed"] == 2
+    active = alert_system.get_active_alerts()
+    assert [(alert["severity"], alert["occurrence_count"], alert["message"]) for alert in active] == [
+        ("critical", 4, "cpu very high")]
+
+def test_active_fingerprints_reloaded_after_restart(tmp_path):
+    """เปิดระบบใหม่: alert ที่ยัง active ถูกโหลดกลับและ alert ซ้ำยังรวมเข้ากับแถวเดิม"""
+    alert_system = _create_alert_system(tmp_path)
+    alert_id = _raise_alert(alert_system)
+    _raise_alert(alert_system)
+    assert alert_system.flush_alert_updates() == 1
+
+    restarted = _create_alert_system(tmp_path)
+    assert _raise_alert(restarted) == alert_id
+    assert restarted.flush_alert_updates() == 1
+    assert _stored_count(restarted, alert_id) == 3
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Auto Cleanup - ทดสอบการหาไฟล์ซ้ำแบบเป็นขั้น, hash cache ข้ามการรัน
+และไฟล์สถานะของระบบไม่ถูกนับรวมในการวิเคราะห์
+"""
+
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AUTO_CLEANUP_SYSTEM import AutoCleanupSystem, PARTIAL_HASH_SIZE
+
+def _write(path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+def _project(root):
+    """ไฟล์ซ้ำ 3 ไฟล์ (ใหญ่กว่า partial hash), ไฟล์ที่ต่างกันแค่ตรงกลาง และไฟล์เล็ก"""
+    big = bytes(range(256)) * (3 * PARTIAL_HASH_SIZE // 256)
+    middle = len(big) // 2
+    _write(root / "a.bin", big)
+    _write(root / "copy" / "a.bin", big)
+    _write(root / "copy" / "a2.bin", big)
+    _write(root / "middle.bin", big[:middle] + b"x" + big[middle + 1:])
+    _write(root / "small.txt", b"tiny")
+    return len(big)
+
+def test_find_duplicates_groups_identical_files(tmp_path):
+    """ไฟล์ที่หัว/ท้ายเหมือนกันแต่ตรงกลางต่างกันไม่ถูกนับเป็นไฟล์ซ้ำ"""
+    size = _project(tmp_path)
+    cleanup = AutoCleanupSystem(str(tmp_path))
+
+    duplicates = cleanup._find_duplicates()
+    assert len(duplicates) == 1
+    assert duplicates[0]["files"] == sorted(str(tmp_path / name) for name in ("a.bin", "copy/a.bin", "copy/a2.bin"))
+    assert duplicates[0]["wasted_bytes"] == 2 * size
+
+def test_hash_cache_reused_and_kept_out_of_project_scan(tmp_path, monkeypatch):
+    """hash cache อยู่ใต้ data/cache ใช้ซ้ำได้ และไม่ถูกนับเป็นไฟล์ของโปรเจกต์"""
+    _project(tmp_path)
+    cleanup = AutoCleanupSystem(str(tmp_path))
+    first = cleanup.analyze_files()
+
+    assert cleanup.hash_cache_file == tmp_path / "data" / "cache" / "cleanup_hash_cache.json"
+    assert cleanup.hash_cache_file.exists()
+    assert not (tmp_path / ".cleanup_hash_cache.json").exists()
+
+    calls = []
+    full_hash = cleanup._full_hash
+    monkeypatch.setattr(cleanup, "_full_hash", lambda path, size: calls.append(path) or full_hash(path, size))
+    second = cleanup.analyze_files()
+
+    assert calls == []
+    assert first["total_files"] == second["total_files"] == 5
+    assert second["duplicate_files"] == first["duplicate_files"]
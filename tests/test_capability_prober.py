@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Capability Prober - ทดสอบว่า component ที่ import ไม่ได้ตอนแรก
+ถูกตรวจพบเมื่อ import ได้ในภายหลัง (prober ลอง import ใหม่หลัง retry_ttl)
+"""
+
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.capability_prober import CapabilityProber, import_component
+
+def _install_module(directory, module_name):
+    (directory / f"{module_name}.py").write_text("class LateComponent:\n    pass\n", encoding="utf-8")
+
+def _wait_for_status(prober, key, status, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        capabilities, _, _ = prober.snapshot()
+        if capabilities[key]["status"] == status:
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_import_component_is_not_cached(tmp_path, monkeypatch):
+    """import ที่ล้มเหลวไม่ถูก cache: ลองใหม่หลังติดตั้ง module แล้วได้ component"""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    assert import_component("late_component_a", "LateComponent") is None
+
+    _install_module(tmp_path, "late_component_a")
+    component = import_component("late_component_a", "LateComponent")
+    assert component is not None and component.__name__ == "LateComponent"
+    assert import_component("late_component_a", "Missing") is None
+
+def test_prober_detects_component_installed_later(tmp_path, monkeypatch):
+    """prober เปลี่ยนสถานะจาก error เป็น ready เมื่อ component import ได้ในรอบ retry"""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    changes = []
+    prober = CapabilityProber(on_change=lambda key, old, new: changes.append((old, new)))
+    prober.register("late", {"name": "Late"}, ttl=60, retry_ttl=0.05,
+                    initializer=lambda: import_component("late_component_b", "LateComponent"))
+    prober.start()
+    try:
+        assert _wait_for_status(prober, "late", "error")
+        _install_module(tmp_path, "late_component_b")
+        assert _wait_for_status(prober, "late", "ready")
+    finally:
+        prober.stop()
+
+    assert changes == [("unknown", "error"), ("error", "ready")]
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Chunk Store - ทดสอบ content-defined chunking: round-trip, dedupe
+และ boundary ของ numpy ตรงกับ loop แบบ byte ต่อ byte
+"""
+
+import sys
+import os
+import io
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.chunk_store as chunk_store
+from core.chunk_store import ChunkStore, iter_chunks
+
+class ChunkStoreTester:
+    """ทดสอบ ChunkStore: store/restore, dedupe และ boundary search"""
+
+    def __init__(self):
+        self.test_results = []
+        self.errors = []
+        self.start_time = time.time()
+
+        self.workdir = Path(tempfile.mkdtemp())
+        self.store = ChunkStore(root=str(self.workdir / "store"))
+        self.random = random.Random(17)
+
+    def log_test(self, test_name: str, success: bool, details: str = "", error: str = None):
+        """บันทึกผลการทดสอบ"""
+        result = {
+            "test_name": test_name,
+            "success": success,
+            "details": details,
+            "error": error,
+            "timestamp": datetime.now().isoformat()
+        }
+        self.test_results.append(result)
+
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"{status} {test_name}: {details}")
+        if error:
+            print(f"   Error: {error}")
+
+    def _random_bytes(self, size: int) -> bytes:
+        return self.random.getrandbits(size * 8).to_bytes(size, "little")
+
+    def _write(self, relative_path: str, data: bytes) -> Path:
+        path = self.workdir / "data" / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path
+
+    def _scalar_chunks(self, data: bytes, **kwargs):
+        """chunk ด้วย loop แบบ byte ต่อ byte (เหมือนตอนไม่มี numpy)"""
+        saved = chunk_store.np
+        chunk_store.np = None
+        try:
+            return list(iter_chunks(io.BytesIO(data), **kwargs))
+        finally:
+            chunk_store.np = saved
+
+    def test_boundaries_match_scalar(self) -> bool:
+        """ทดสอบว่า boundary ของ numpy ตรงกับ loop เดิม (chunk เดิมยัง dedupe ได้)"""
+        print("\n✂️ Testing Chunk Boundaries...")
+        cases = [
+            (self._random_bytes(2 * 1024 * 1024), {}),
+            (self._random_bytes(300 * 1024), {"min_size": 64, "avg_bits": 8, "max_size": 1024}),
+            (bytes(self.random.randrange(3) for _ in range(50000)), {"min_size": 3, "avg_bits": 6, "max_size": 4096}),
+            (b"", {}),
+        ]
+        success = True
+        for data, kwargs in cases:
+            chunks = list(iter_chunks(io.BytesIO(data), **kwargs))
+            ok = chunks == self._scalar_chunks(data, **kwargs) and b"".join(chunks) == data
+            success = success and ok
+            self.log_test(f"Boundaries {len(data)} bytes {kwargs}", ok, f"{len(chunks)} chunks")
+        return success
+
+    def test_round_trip(self) -> bool:
+        """ทดสอบ store_files แล้ว restore_files ได้ไฟล์เดิมทุก byte"""
+        print("\n♻️ Testing Round Trip...")
+        self.originals = {
+            "big.bin": self._random_bytes(1536 * 1024),
+            "sub/small.txt": b"hello chunk store",
+            "empty.bin": b"",
+        }
+        sources = {name: self._write(name, data) for name, data in self.originals.items()}
+        self.files = self.store.store_files(sources)
+
+        restore_dir = self.workdir / "restored"
+        self.store.restore_files(self.files, restore_dir)
+        restored = {name: (restore_dir / name).read_bytes() for name in self.originals}
+
+        problems = self.store.verify(self.files, deep=True)
+        success = restored == self.originals and not problems
+        self.log_test("Round Trip", success,
+                      f"{len(restored)} files, {self.store.stats['chunks_written']} chunks, problems: {problems}")
+        return success
+
+    def test_dedupe(self) -> bool:
+        """ทดสอบ dedupe: ไฟล์เดิมไม่เขียน chunk ใหม่, แทรกข้อมูลกลางไฟล์เขียนใหม่แค่ chunk รอบ ๆ"""
+        print("\n🧬 Testing Dedupe...")
+        written_before = self.store.stats["chunks_written"]
+        copy = self._write("copy.bin", self.originals["big.bin"])
+        entry = self.store.store_file(copy)
+        same = entry["chunks"] == self.files["big.bin"]["chunks"]
+        no_new = self.store.stats["chunks_written"] == written_before
+        self.log_test("Identical File", same and no_new,
+                      f"same chunks: {same}, new chunks: {self.store.stats['chunks_written'] - written_before}")
+
+        original = self.originals["big.bin"]
+        middle = len(original) // 2
+        edited = self._write("edited.bin", original[:middle] + b"inserted bytes" + original[middle:])
+        written_before = self.store.stats["chunks_written"]
+        entry = self.store.store_file(edited)
+        new_chunks = self.store.stats["chunks_written"] - written_before
+        shared = len({d for d, _ in entry["chunks"]} & {d for d, _ in self.files["big.bin"]["chunks"]})
+        local = 1 <= new_chunks <= 2 and shared >= len(entry["chunks"]) - 2
+        self.log_test("Insertion Stays Local", local, f"new chunks: {new_chunks}, shared: {shared}/{len(entry['chunks'])}")
+
+        reused_before = self.store.stats["files_reused"]
+        self.store.store_files({"big.bin": self.workdir / "data" / "big.bin"}, previous=self.files)
+        reused = self.store.stats["files_reused"] - reused_before == 1
+        self.log_test("Unchanged File Reused", reused, f"files_reused: {self.store.stats['files_reused']}")
+        return same and no_new and local and reused
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        """รันการทดสอบทั้งหมด"""
+        print("🚀 Starting Chunk Store Tests...")
+        print("=" * 60)
+
+        tests = [
+            ("Chunk Boundaries", self.test_boundaries_match_scalar),
+            ("Round Trip", self.test_round_trip),
+            ("Dedupe", self.test_dedupe)
+        ]
+
+        try:
+            for test_name, test_func in tests:
+                try:
+                    test_func()
+                except Exception as e:
+                    self.log_test(test_name, False, "", str(e))
+                    self.errors.append(f"{test_name} Error: {e}")
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        total_tests = len(self.test_results)
+        passed_tests = sum(1 for result in self.test_results if result["success"])
+
+        report = {
+            "summary": {
+                "total_tests": total_tests,
+                "passed_tests": passed_tests,
+                "failed_tests": total_tests - passed_tests,
+                "duration_seconds": round(time.time() - self.start_time, 2),
+                "timestamp": datetime.now().isoformat()
+            },
+            "test_results": self.test_results,
+            "errors": self.errors
+        }
+
+        print("\n" + "=" * 60)
+        print(f"📊 Passed: {passed_tests}/{total_tests}")
+        return report
+
+def main():
+    """Main function"""
+    tester = ChunkStoreTester()
+    report = tester.run_all_tests()
+    return 0 if report["summary"]["failed_tests"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
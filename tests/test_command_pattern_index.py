@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Command Pattern Index - ทดสอบ inverted index ของ patterns ใน Smart Command Hub
+คะแนนเท่ากับ calculate_pattern_score, การตัดสินเมื่อคะแนนเท่ากัน, การแทนที่/ลบคำสั่ง
+และ suggestion cache แบบ LRU ที่จำกัดขนาด
+"""
+
+import sys
+import os
+import asyncio
+import importlib
+import random
+
+import pytest
+
+# Add controllers package to path (ก่อน project root ที่มี smart_command_hub.py อีกตัว)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'system', 'core', 'controllers'))
+
+@pytest.fixture
+def hub_module(tmp_path, monkeypatch):
+    """smart_command_hub module (import สร้าง global instance ใน cwd จึงย้ายไป tmp_path ก่อน)"""
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("smart_command_hub")
+
+def _command(hub_module, command_id, name, examples, is_active=True):
+    return hub_module.CommandDefinition(
+        id=command_id, name=name, description="", category="test", component="test",
+        command=command_id, parameters={}, examples=examples, tags=[], is_active=is_active
+    )
+
+def test_index_scores_match_calculate_pattern_score(hub_module):
+    """คะแนนจาก index เท่ากับการวน calculate_pattern_score ทุก pattern"""
+    rng = random.Random(7)
+    words = ["open", "chrome", "backup", "restore", "search", "เปิด", "ค้นหา", "ข้อมูล"]
+    patterns = {f"p{n}": " ".join(rng.sample(words, rng.randint(1, 4))) for n in range(40)}
+    index = hub_module.CommandPatternIndex()
+    for pattern_id, pattern in patterns.items():
+        index.add(pattern_id, pattern, f"cmd-{pattern_id}")
+
+    for _ in range(50):
+        text = " ".join(rng.sample(words, rng.randint(1, 5)))
+        expected = {f"cmd-{pattern_id}": hub_module.SmartCommandHub.calculate_pattern_score(None, text, pattern)
+                    for pattern_id, pattern in patterns.items()}
+        best, ranked = index.match(text, top_k=len(patterns))
+        assert dict(ranked) == pytest.approx({cmd: score for cmd, score in expected.items() if score > 0})
+        assert best[2] == pytest.approx(max(expected.values()))
+
+def test_ties_broken_by_confidence_then_usage(hub_module):
+    """คะแนนเท่ากัน: เลือก confidence สูงกว่า แล้วจึง usage_count"""
+    index = hub_module.CommandPatternIndex()
+    index.add("low", "open chrome", "cmd-low", confidence=0.5)
+    index.add("high", "chrome open", "cmd-high", confidence=0.9)
+    assert index.match("open chrome")[0] == ("high", "cmd-high", 1.0)
+
+    index.add("used", "open the chrome", "cmd-used", confidence=0.9)
+    index.add("high", "open chrome browser", "cmd-high", confidence=0.9)
+    index.add("used2", "open browser chrome", "cmd-used2", confidence=0.9)
+    index.record_use("used2")
+    assert index.match("open chrome browser")[0] == ("used2", "cmd-used2", 1.0)
+    assert index.match("nothing matches") == (None, [])
+
+def test_add_command_replaces_and_removes_patterns(hub_module):
+    """add_command แทนที่ patterns เดิม remove_command ลบ postings ทั้งหมด คำสั่งที่ปิดไม่ถูก index"""
+    index = hub_module.CommandPatternIndex()
+    index.add_command(_command(hub_module, "backup", "Backup files", ["save backup", "backup now"]))
+    assert index.get_statistics()["patterns"] == 3
+    assert index.match("save")[1] == [("backup", 0.5)]
+
+    index.add_command(_command(hub_module, "backup", "Backup files", ["archive everything"]))
+    assert index.match("save")[1] == []
+    assert index.match("archive everything")[1] == [("backup", 1.0)]
+
+    index.remove_command("backup")
+    index.add_command(_command(hub_module, "off", "Disabled command", ["never"], is_active=False))
+    assert index.get_statistics() == {"patterns": 0, "tokens": 0, "commands": 0}
+    assert index.postings == {}
+
+def test_hub_suggestion_cache_is_bounded(hub_module, tmp_path):
+    """suggestion_cache เก็บ input ล่าสุดไม่เกิน suggestion_cache_size และ get_suggestions ใช้ผลเดิมซ้ำ"""
+    hub = hub_module.SmartCommandHub(db_path=str(tmp_path / "hub.db"))
+    hub.is_running = False
+    hub.suggestion_cache_size = 2
+    hub.add_command(_command(hub_module, "zip_logs", "zip logs", ["compress old logs"]))
+    hub.add_pattern("pack the logs", "zip_logs", confidence=0.9)
+
+    found = asyncio.run(hub.find_best_command("pack the logs"))
+    assert found is not None and found.id == "zip_logs"
+
+    for text in ("compress logs", "zip", "old logs"):
+        asyncio.run(hub.find_best_command(text))
+    assert list(hub.suggestion_cache) == ["zip", "old logs"]
+
+    asyncio.run(hub.get_suggestions("zip"))
+    asyncio.run(hub.get_suggestions("logs"))
+    assert list(hub.suggestion_cache) == ["zip", "logs"]
+    assert hub.suggestion_cache["logs"][0][0] == "zip_logs"
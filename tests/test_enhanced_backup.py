@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Enhanced Backup Manager - ทดสอบ incremental backup แบบสาย (full + incremental)
+backup, แก้ไข/ลบไฟล์, หมุนเวียน backup เก่า แล้วกู้คืน
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enhanced_backup_manager import EnhancedBackupManager
+
+class EnhancedBackupTester:
+    """ทดสอบ EnhancedBackupManager: full/incremental, rotation และ restore"""
+
+    def __init__(self):
+        self.test_results = []
+        self.errors = []
+        self.start_time = time.time()
+
+        self.workdir = Path(tempfile.mkdtemp())
+        self.manager = EnhancedBackupManager(project_root=self.workdir)
+        self.manager.config["compression"] = True
+        self.manager.config["retention_days"] = 30
+        self.manager.config["max_incremental_chain"] = 2
+        self.states = {}
+
+    def log_test(self, test_name: str, success: bool, details: str = "", error: str = None):
+        """บันทึกผลการทดสอบ"""
+        result = {
+            "test_name": test_name,
+            "success": success,
+            "details": details,
+            "error": error,
+            "timestamp": datetime.now().isoformat()
+        }
+        self.test_results.append(result)
+
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"{status} {test_name}: {details}")
+        if error:
+            print(f"   Error: {error}")
+
+    def _write(self, relative_path: str, content: str):
+        path = self.workdir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def _read_tree(self, root: Path) -> Dict[str, str]:
+        return {
+            path.relative_to(root).as_posix(): path.read_text(encoding="utf-8")
+            for path in root.rglob("*") if path.is_file()
+        }
+
+    def _snapshot(self) -> Dict[str, str]:
+        return self._read_tree(self.workdir / "data")
+
+    def _backup(self, backup_type: str) -> str:
+        before = {self.manager._backup_name(b) for b in self.manager._list_backups()}
+        assert self.manager.create_backup(backup_type)
+        created = {self.manager._backup_name(b) for b in self.manager._list_backups()} - before
+        return created.pop()
+
+    def _restore(self, backup_name: str):
+        restore_path = self.workdir / "restored" / backup_name
+        if not self.manager.restore_backup(backup_name, restore_path):
+            return None
+        return self._read_tree(restore_path / "data")
+
+    def _expire(self, backup_name: str, days: int = 60):
+        backup = self.manager._find_backup(backup_name)
+        old = time.time() - days * 86400
+        os.utime(backup, (old, old))
+
+    def test_backup_chain(self) -> bool:
+        """ทดสอบ full backup แล้ว incremental ต่อกันจนครบ max_incremental_chain"""
+        print("\n💾 Testing Backup Chain...")
+        self._write("data/a.txt", "a1")
+        self._write("data/sub/b.txt", "b1")
+        self.b1 = self._backup("incremental")  # ยังไม่มี baseline -> full
+        self.states[self.b1] = self._snapshot()
+
+        self._write("data/a.txt", "a2-modified")
+        (self.workdir / "data/sub/b.txt").unlink()
+        self._write("data/c.txt", "c1")
+        self.b2 = self._backup("incremental")
+        self.states[self.b2] = self._snapshot()
+
+        self._write("data/c.txt", "c2-modified")
+        self.b3 = self._backup("incremental")
+        self.states[self.b3] = self._snapshot()
+
+        lengths = [len(self.manager._get_backup_chain(b)) for b in (self.b1, self.b2, self.b3)]
+        success = lengths == [1, 2, 3]
+        self.log_test("Parent Chain", success, f"chain lengths: {lengths}")
+        return success
+
+    def test_restore_chain(self) -> bool:
+        """ทดสอบกู้คืนแต่ละ backup (full + incremental + ไฟล์ที่ถูกลบ)"""
+        print("\n♻️ Testing Restore...")
+        success = True
+        for backup_name in (self.b1, self.b2, self.b3):
+            restored = self._restore(backup_name)
+            ok = restored == self.states[backup_name]
+            success = success and ok
+            self.log_test(f"Restore {backup_name[-6:]}", ok, f"{restored}")
+        return success
+
+    def test_rotation_keeps_needed_bases(self) -> bool:
+        """ทดสอบว่า rotation ไม่ลบ backup ที่ incremental ที่ยังเก็บไว้ต้องใช้"""
+        print("\n🗂️ Testing Rotation...")
+        # b1, b2 หมดอายุ แต่ b3 (ยังไม่หมดอายุ) ต้องใช้ทั้งสอง
+        self._expire(self.b1)
+        self._expire(self.b2)
+        self.manager.cleanup_old_backups()
+        kept = all(self.manager._find_backup(b) for b in (self.b1, self.b2, self.b3))
+        restored = self._restore(self.b3) == self.states[self.b3]
+        self.log_test("Needed Bases Kept", kept and restored, f"kept: {kept}, restore b3: {restored}")
+
+        # สายยาวครบ -> full ใหม่; หลังสายเก่าหมดอายุทั้งสายจึงถูกลบ
+        self.b4 = self._backup("incremental")
+        self._write("data/sub/d.txt", "d1")
+        self.b5 = self._backup("incremental")
+        self.states[self.b5] = self._snapshot()
+        self._expire(self.b3)
+        self.manager.cleanup_old_backups()
+
+        removed = not any(self.manager._find_backup(b) for b in (self.b1, self.b2, self.b3))
+        new_chain = len(self.manager._get_backup_chain(self.b4)) == 1
+        restored_after = self._restore(self.b5) == self.states[self.b5]
+        success = removed and new_chain and restored_after
+        self.log_test("Rotate Old Chain", success,
+                      f"old chain removed: {removed}, new full: {new_chain}, restore b5: {restored_after}")
+        return success
+
+    def test_missing_baseline(self) -> bool:
+        """ทดสอบว่า backup ในสายหายไป -> incremental ถัดไปเป็น full backup"""
+        print("\n🧱 Testing Missing Baseline...")
+        backup = self.manager._find_backup(self.b4)
+        backup.unlink() if backup.is_file() else shutil.rmtree(backup)
+
+        self._write("data/e.txt", "e1")
+        b6 = self._backup("incremental")
+        state = self._snapshot()
+        success = len(self.manager._get_backup_chain(b6)) == 1 and self._restore(b6) == state
+        self.log_test("Missing Baseline -> Full", success, f"chain: {len(self.manager._get_backup_chain(b6))}")
+        return success
+
+    def run_all_tests(self) -> Dict[str, Any]:
+        """รันการทดสอบทั้งหมด"""
+        print("🚀 Starting Enhanced Backup Tests...")
+        print("=" * 60)
+
+        tests = [
+            ("Backup Chain", self.test_backup_chain),
+            ("Restore Chain", self.test_restore_chain),
+            ("Rotation", self.test_rotation_keeps_needed_bases),
+            ("Missing Baseline", self.test_missing_baseline)
+        ]
+
+        try:
+            for test_name, test_func in tests:
+                try:
+                    test_func()
+                except Exception as e:
+                    self.log_test(test_name, False, "", str(e))
+                    self.errors.append(f"{test_name} Error: {e}")
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        total_tests = len(self.test_results)
+        passed_tests = sum(1 for result in self.test_results if result["success"])
+
+        report = {
+            "summary": {
+                "total_tests": total_tests,
+                "passed_tests": passed_tests,
+                "failed_tests": total_tests - passed_tests,
+                "duration_seconds": round(time.time() - self.start_time, 2),
+                "timestamp": datetime.now().isoformat()
+            },
+            "test_results": self.test_results,
+            "errors": self.errors
+        }
+
+        print("\n" + "=" * 60)
+        print(f"📊 Passed: {passed_tests}/{total_tests}")
+        return report
+
+def main():
+    """Main function"""
+    tester = EnhancedBackupTester()
+    report = tester.run_all_tests()
+    return 0 if report["summary"]["failed_tests"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Event Dispatcher - ทดสอบการส่ง event แบบ asynchronous
+ผู้ส่งไม่ถูก block, ลำดับต่อ subscriber, นโยบายเมื่อ queue เต็ม, retry และ async callbacks
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add logging package to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'system', 'core', 'logging'))
+
+from event_dispatcher import EventDispatcher, DropPolicy
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = EventDispatcher("TestEvents")
+    yield dispatcher
+    dispatcher.close()
+
+def test_emit_does_not_wait_for_callbacks(dispatcher):
+    """emit คืนค่าทันทีแม้ callback ช้า และ event ถึง subscriber ตามลำดับ"""
+    received = []
+
+    def slow(value):
+        time.sleep(0.01)
+        received.append(value)
+
+    dispatcher.subscribe("tick", slow)
+    started = time.perf_counter()
+    for value in range(20):
+        dispatcher.emit("tick", value)
+    assert time.perf_counter() - started < 0.1
+
+    assert dispatcher.flush()
+    assert received == list(range(20))
+    assert dispatcher.get_stats()["events"]["tick"]["delivered"] == 20
+
+@pytest.mark.parametrize("policy, expected", [
+    (DropPolicy.DROP_OLDEST, [0, 2, 3]),
+    (DropPolicy.DROP_NEWEST, [0, 1, 2])
+])
+def test_full_queue_follows_drop_policy(dispatcher, policy, expected):
+    """queue เต็ม: ทิ้ง event ตามนโยบายโดยไม่ block ผู้ส่ง"""
+    started, release = threading.Event(), threading.Event()
+    received = []
+
+    def blocking(value):
+        started.set()
+        release.wait(5)
+        received.append(value)
+
+    dispatcher.subscribe("tick", blocking, max_queue_size=2, policy=policy)
+    dispatcher.emit("tick", 0)
+    assert started.wait(5)
+    for value in (1, 2, 3):
+        dispatcher.emit("tick", value)
+    release.set()
+
+    assert dispatcher.flush()
+    assert received == expected
+    assert dispatcher.get_stats()["dropped"] == 1
+
+def test_failed_callbacks_are_retried(dispatcher):
+    """callback ที่ error ถูกลองใหม่ตาม max_retries และ error สุดท้ายไม่หยุด subscriber"""
+    attempts = []
+
+    def flaky(value):
+        attempts.append(value)
+        if len(attempts) < 3:
+            raise RuntimeError("temporary failure")
+
+    def broken(value):
+        raise RuntimeError("always fails")
+
+    dispatcher.subscribe("tick", flaky, max_retries=2, retry_delay=0.001)
+    dispatcher.subscribe("tick", broken)
+    dispatcher.emit("tick", "a")
+    assert dispatcher.flush()
+
+    stats = dispatcher.get_stats()
+    assert attempts == ["a", "a", "a"]
+    assert (stats["delivered"], stats["retried"], stats["failed"]) == (1, 2, 1)
+
+def test_async_callbacks_awaited_in_order(dispatcher):
+    """coroutine callback ถูก await ทีละ event ตามลำดับ"""
+    received = []
+
+    async def handler(value, delay):
+        await asyncio.sleep(delay)
+        received.append(value)
+
+    dispatcher.subscribe("tick", handler)
+    for value in range(5):
+        dispatcher.emit("tick", value, 0.02 - value * 0.004)
+
+    assert dispatcher.flush()
+    assert received == list(range(5))
+
+def test_close_delivers_pending_and_stops_accepting(dispatcher):
+    """close ส่ง event ที่ค้างอยู่ให้ครบ แล้วไม่รับ event ใหม่"""
+    received = []
+    dispatcher.subscribe("tick", received.append)
+    for value in range(10):
+        dispatcher.emit("tick", value)
+
+    dispatcher.close()
+    dispatcher.emit("tick", "late")
+    time.sleep(0.05)
+    assert received == list(range(10))
+    assert dispatcher.get_stats()["pending"] == 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Knowledge Search - ทดสอบการค้นหา BM25 ของ KnowledgeManager
+การจัดอันดับตาม field, ตัวกรอง category, index ตามการแก้ไข/ลบ และ index ที่บันทึกไว้
+"""
+
+import sys
+import os
+import importlib
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.knowledge_index import KnowledgeIndex
+
+@pytest.fixture
+def manager_class(tmp_path, monkeypatch):
+    """KnowledgeManager class (import สร้าง global instance ใน cwd จึงย้ายไป tmp_path ก่อน)"""
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("core.knowledge_manager").KnowledgeManager
+
+def _ids(results):
+    return [item["id"] for item in results]
+
+def test_index_ranks_title_above_content():
+    """คำที่อยู่ใน title ได้คะแนนสูงกว่าคำเดียวกันใน content"""
+    index = KnowledgeIndex(index_file="unused.json")
+    index.rebuild([
+        {"id": "content", "title": "Notes", "content": "webhook setup notes", "category": "n8n"},
+        {"id": "title", "title": "Webhook", "content": "setup notes", "category": "n8n"},
+        {"id": "other", "title": "Zapier", "content": "automation", "category": "zapier"}
+    ])
+
+    assert [doc_id for doc_id, _ in index.search("webhook")] == ["title", "content"]
+    assert index.search("webhook", category="zapier") == []
+    assert index.search("the and") == []
+
+def test_search_follows_updates_and_deletes(manager_class, tmp_path):
+    """ผลการค้นหาตาม add/update/delete และตัวกรอง category"""
+    manager = manager_class(str(tmp_path / "kb"))
+    webhook = manager.add_knowledge_from_text("n8n Webhook Tutorial", "รับข้อมูลผ่าน webhook แบบ real-time", "n8n")
+    zapier = manager.add_knowledge_from_text("Zapier Basics", "เชื่อมต่อแอปต่างๆ เข้าด้วยกัน", "zapier")
+    assert webhook["success"] and zapier["success"]
+
+    results = manager.search_knowledge("webhook")
+    assert _ids(results) == [webhook["knowledge_id"]]
+    assert results[0]["relevance_score"] > 0
+    assert _ids(manager.search_knowledge("เชื่อมต่อ"))[0] == zapier["knowledge_id"]
+    assert manager.search_knowledge("webhook", category="zapier") == []
+
+    assert manager.update_knowledge(zapier["knowledge_id"], {"content": "trigger a webhook from Zapier"})["success"]
+    assert sorted(_ids(manager.search_knowledge("webhook"))) == sorted([webhook["knowledge_id"], zapier["knowledge_id"]])
+
+    assert manager.delete_knowledge(webhook["knowledge_id"])["success"]
+    assert _ids(manager.search_knowledge("webhook")) == [zapier["knowledge_id"]]
+
+def test_persisted_index_is_reused(manager_class, tmp_path, monkeypatch):
+    """เปิดใหม่: ใช้ index ที่บันทึกไว้ + log ที่ replay โดยไม่ rebuild ทั้งหมด"""
+    base_path = str(tmp_path / "kb")
+    manager = manager_class(base_path)
+    added = manager.add_knowledge_from_text("Selenium Chrome", "browser automation with selenium", "chrome")
+    manager._save_knowledge_base(manager.knowledge_base)
+    later = manager.add_knowledge_from_text("Playwright", "browser automation with playwright", "chrome")
+    manager.store.close()
+
+    rebuilds = []
+    monkeypatch.setattr(KnowledgeIndex, "rebuild", lambda self, items: rebuilds.append(len(items)))
+    reopened = manager_class(base_path)
+
+    assert rebuilds == []
+    assert _ids(reopened.search_knowledge("selenium")) == [added["knowledge_id"]]
+    assert _ids(reopened.search_knowledge("playwright")) == [later["knowledge_id"]]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Knowledge Store - ทดสอบ append-only log + snapshot ของฐานความรู้
+replay หลังเปิดใหม่, ตัด record ที่เขียนไม่ครบ และ compaction
+"""
+
+import sys
+import os
+import json
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.knowledge_store import KnowledgeStore
+
+def _store(tmp_path, **kwargs):
+    return KnowledgeStore(str(tmp_path / "knowledge-base.json"), str(tmp_path / "knowledge-base.log.jsonl"), **kwargs)
+
+def _item(knowledge_id, title):
+    return {"id": knowledge_id, "title": title}
+
+def _start(tmp_path, **kwargs):
+    """store ที่มี snapshot ว่าง (เหมือน KnowledgeManager ตอนสร้างฐานความรู้ใหม่)"""
+    store = _store(tmp_path, **kwargs)
+    assert store.compact({"metadata": {}, "knowledge": []})
+    return store
+
+def test_mutations_replayed_after_reopen(tmp_path):
+    """add/update/delete อยู่ใน log เท่านั้น จนกว่าจะเปิดใหม่แล้ว replay"""
+    store = _start(tmp_path)
+    assert store.append("add", item=_item("a", "first"))
+    assert store.append("add", item=_item("b", "second"))
+    assert store.append("update", item=_item("a", "first v2"), metadata={"total_items": 2})
+    assert store.append("delete", knowledge_id="b", metadata={"total_items": 1})
+    assert store.read_item("a") == _item("a", "first v2")
+    store.close()
+
+    with open(tmp_path / "knowledge-base.json", encoding="utf-8") as f:
+        assert json.load(f)["knowledge"] == []
+
+    reopened = _store(tmp_path)
+    data, touched = reopened.load()
+    assert data["knowledge"] == [_item("a", "first v2")]
+    assert data["metadata"]["total_items"] == 1
+    assert touched == ["a", "b", "a", "b"]
+    assert reopened.read_item("a") == _item("a", "first v2")
+    assert reopened.read_item("b") is None
+
+def test_torn_tail_is_truncated(tmp_path):
+    """record ท้าย log ที่เขียนไม่ครบ (crash) ถูกตัดทิ้ง รายการก่อนหน้ายังอยู่"""
+    store = _start(tmp_path)
+    assert store.append("add", item=_item("a", "kept"))
+    store.close()
+    log_file = tmp_path / "knowledge-base.log.jsonl"
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "item": {"id": "b"')
+
+    reopened = _store(tmp_path)
+    data, touched = reopened.load()
+    assert data["knowledge"] == [_item("a", "kept")]
+    assert touched == ["a"]
+    assert log_file.read_text(encoding="utf-8").endswith("\n")
+
+    assert reopened.append("add", item=_item("c", "after crash"))
+    reopened.close()
+    data, _ = _store(tmp_path).load()
+    assert [item["id"] for item in data["knowledge"]] == ["a", "c"]
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    """compact เขียน snapshot ใหม่และเริ่ม log ใหม่ log ของรุ่นเก่าไม่ถูก replay ซ้ำ"""
+    store = _start(tmp_path, compact_threshold=2)
+    items = [_item("a", "one"), _item("b", "two")]
+    for item in items:
+        assert store.append("add", item=item)
+    assert store.needs_compaction()
+
+    assert store.compact({"metadata": {}, "knowledge": list(items)})
+    assert not store.needs_compaction()
+    store.close()
+
+    reopened = _store(tmp_path)
+    data, touched = reopened.load()
+    assert data["knowledge"] == items
+    assert data["metadata"]["log_generation"] == reopened.generation == 2
+    assert touched == []
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Log Sink - ทดสอบ AsyncLogSink และการส่ง log ของ LoggerManager ไปยัง stream
+"""
+
+import sqlite3
+import threading
+import time
+import sys
+import os
+
+# Add logging package to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'system', 'core', 'logging'))
+
+from log_sink import AsyncLogSink, BackpressurePolicy
+from logger_manager import LoggerManager
+
+def _create_logs_table(db_path):
+    """สร้างตาราง logs แบบเดียวกับ LoggerManager"""
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            module TEXT NOT NULL,
+            level TEXT NOT NULL,
+            message TEXT NOT NULL,
+            workflow_id TEXT,
+            step TEXT,
+            duration_ms INTEGER,
+            status TEXT,
+            context TEXT,
+            metadata TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+def _entry(message):
+    return {"timestamp": "2025-01-01T00:00:00", "module": "test", "level": "INFO", "message": message}
+
+def _stored_messages(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT id, message FROM logs ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+def test_listener_gets_only_written_entries(tmp_path):
+    """entry ที่ถูก sample ออกไม่ถูกส่งให้ listener และไม่มี id"""
+    db_path = tmp_path / "logs.db"
+    _create_logs_table(db_path)
+    written = []
+    sink = AsyncLogSink(db_path, max_queue_size=2, batch_size=100, flush_interval=30,
+                        policy=BackpressurePolicy.SAMPLE, sample_rate=0.0, listener=written.append)
+    try:
+        # writer ไม่ทำงานจนกว่าจะ flush: ให้ queue เต็มแล้วตัวที่เหลือถูก sample ออก
+        with sink._cond:
+            accepted = [sink.submit(_entry(f"m{i}")) for i in range(5)]
+        assert sink.flush()
+    finally:
+        sink.close()
+
+    assert accepted == [True, True, False, False, False]
+    assert [entry["message"] for entry in written] == ["m0", "m1"]
+    assert [(entry["id"], entry["message"]) for entry in written] == _stored_messages(db_path)
+    assert sink.get_stats()["sampled_out"] == 3
+
+def test_log_does_not_hold_manager_lock_while_blocked(tmp_path):
+    """policy BLOCK: log() ที่รอ queue ว่างต้องไม่ถือ LoggerManager.lock"""
+    manager = LoggerManager(base_path=str(tmp_path / "logs"), sink_policy=BackpressurePolicy.BLOCK,
+                            sink_queue_size=1, sink_batch_size=100, sink_flush_interval=30)
+    try:
+        with manager.log_sink._cond:
+            manager.log("test", "INFO", "first")
+            blocked = threading.Thread(target=manager.log, args=("test", "INFO", "second"))
+            blocked.start()
+            time.sleep(0.2)
+
+            # writer ถูกกันไว้ด้วย _cond -> log ที่สองยังรออยู่
+            assert blocked.is_alive()
+            assert manager.lock.acquire(timeout=1)
+            manager.lock.release()
+
+        blocked.join(5)
+        assert not blocked.is_alive()
+        assert manager.flush_logs()
+        assert [message for _, message in _stored_messages(manager.db_path)] == ["first", "second"]
+    finally:
+        manager.shutdown()
+
+def test_broadcast_only_written_entries_with_their_ids(tmp_path):
+    """log ที่ถูกทิ้ง (drop oldest) ไม่ถูก broadcast และ id ของ record ไม่ซ้ำกัน"""
+    manager = LoggerManager(base_path=str(tmp_path / "logs"), sink_queue_size=2,
+                            sink_batch_size=100, sink_flush_interval=30)
+    try:
+        subscription = manager.log_broadcaster.subscribe()
+        with manager.log_sink._cond:
+            for i in range(5):
+                manager.log("test", "INFO", f"m{i}")
+        assert manager.flush_logs()
+
+        deadline = time.time() + 5
+        records = []
+        while len(records) < 2 and time.time() < deadline:
+            records.extend(subscription.drain())
+            time.sleep(0.05)
+    finally:
+        manager.shutdown()
+
+    assert [(record["id"], record["message"]) for record in records] == _stored_messages(manager.db_path)
+    assert [record["message"] for record in records] == ["m3", "m4"]
+
+def test_two_sinks_share_one_database(tmp_path):
+    """sink สองตัวเขียนฐานข้อมูลเดียวกัน: id มาจาก SQLite จึงไม่ชนกันและไม่มี log หาย"""
+    db_path = tmp_path / "logs.db"
+    _create_logs_table(db_path)
+    written = {"a": [], "b": []}
+    sinks = {name: AsyncLogSink(db_path, batch_size=20, flush_interval=0.01, listener=written[name].append)
+             for name in written}
+    try:
+        def produce(name):
+            for i in range(200):
+                sinks[name].submit(_entry(f"{name}{i}"))
+
+        producers = [threading.Thread(target=produce, args=(name,)) for name in sinks]
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+        assert all(sink.flush() for sink in sinks.values())
+    finally:
+        for sink in sinks.values():
+            sink.close()
+
+    stored = _stored_messages(db_path)
+    assert len(stored) == 400
+    assert sorted((entry["id"], entry["message"]) for entries in written.values() for entry in entries) == stored
+    assert all(sink.get_stats()["errors"] == 0 for sink in sinks.values())
+
+def test_flush_reports_write_errors(tmp_path):
+    """flush คืน False เมื่อ batch เขียนไม่สำเร็จ และกลับเป็น True เมื่อเขียนได้อีกครั้ง"""
+    db_path = tmp_path / "logs.db"
+    sink = AsyncLogSink(db_path, flush_interval=0.01)
+    try:
+        sink.submit(_entry("no table"))
+        assert not sink.flush()
+        assert sink.get_stats()["errors"] == 1
+
+        _create_logs_table(db_path)
+        sink.submit(_entry("stored"))
+        assert sink.flush()
+    finally:
+        sink.close()
+
+    assert [message for _, message in _stored_messages(db_path)] == ["stored"]
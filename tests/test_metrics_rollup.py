@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Metrics Rollup - ทดสอบตาราง rollup 1m/5m/1h ของ system metrics
+ค่า min/max/avg/p95 ต่อ bucket, การโหลด bucket ที่เปิดอยู่หลัง restart,
+การเลือกความละเอียด และการลบข้อมูลเก่า
+"""
+
+import sqlite3
+import sys
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add project root and logging package to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'system', 'core', 'logging'))
+
+from metrics_rollup import MetricsRollup
+from performance_tracker import PerformanceTracker
+from core.metrics_sampler import get_metrics_sampler
+
+FIELDS = ("cpu_percent",)
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE system_metrics (timestamp TEXT NOT NULL, cpu_percent REAL)")
+    yield conn.cursor()
+    conn.close()
+
+def _rollup(cursor):
+    rollup = MetricsRollup(fields=FIELDS)
+    rollup.init_tables(cursor)
+    return rollup
+
+def _add(rollup, cursor, timestamp, cpu_percent):
+    cursor.execute("INSERT INTO system_metrics VALUES (?, ?)", (timestamp.isoformat(), cpu_percent))
+    rollup.add_sample(cursor, timestamp, {"cpu_percent": cpu_percent})
+
+def test_buckets_keep_min_max_avg_p95(cursor):
+    """sample ใหม่อัปเดตแถวของ bucket ปัจจุบันทุกความละเอียด"""
+    rollup = _rollup(cursor)
+    base = datetime(2026, 1, 1, 10, 0)
+    for seconds, value in ((10, 10), (40, 30), (65, 50)):
+        _add(rollup, cursor, base + timedelta(seconds=seconds), value)
+
+    minutes = rollup.query(cursor, "1m", base)
+    assert [(p["timestamp"], p["sample_count"]) for p in minutes] == [
+        ("2026-01-01T10:01:00", 1), ("2026-01-01T10:00:00", 2)]
+    first = minutes[1]
+    assert (first["cpu_percent"], first["cpu_percent_min"], first["cpu_percent_max"], first["cpu_percent_p95"]) == (20, 10, 30, 30)
+
+    five_minutes = rollup.query(cursor, "5m", base)
+    assert len(five_minutes) == 1 and five_minutes[0]["sample_count"] == 3
+    assert five_minutes[0]["cpu_percent"] == 30
+    assert rollup.average(cursor, base, ["cpu_percent"]) == {"cpu_percent": 30}
+
+def test_open_buckets_seeded_after_restart(cursor):
+    """rollup ใหม่โหลด bucket ที่ยังเปิดอยู่จาก raw samples จึงไม่เขียนทับด้วยค่าบางส่วน"""
+    rollup = _rollup(cursor)
+    base = MetricsRollup._bucket_start(datetime.now(), 3600)
+    _add(rollup, cursor, base + timedelta(seconds=10), 10)
+    _add(rollup, cursor, base + timedelta(seconds=20), 20)
+
+    restarted = _rollup(cursor)
+    restarted.seed(cursor)
+    _add(restarted, cursor, base + timedelta(seconds=30), 60)
+
+    minute = restarted.query(cursor, "1m", base)[-1]
+    assert minute["sample_count"] == 3 and minute["cpu_percent"] == 30
+
+def test_choose_resolution():
+    """ใช้ raw เมื่อจำนวนจุดไม่เกิน max_points ไม่เช่นนั้นใช้ rollup ที่ละเอียดที่สุดที่พอดี"""
+    rollup = MetricsRollup(sample_interval=30, raw_retention_hours=48)
+    assert rollup.choose_resolution(4) == "raw"
+    assert rollup.choose_resolution(24) == "5m"
+    assert rollup.choose_resolution(72, max_points=100000) == "1m"
+    assert rollup.choose_resolution(24 * 365) == "1h"
+
+def test_prune_drops_expired_rows(cursor):
+    """raw samples เกิน raw_retention_hours และ rollup เกินระยะเก็บถูกลบ"""
+    rollup = _rollup(cursor)
+    now = datetime(2026, 3, 1, 12, 0)
+    _add(rollup, cursor, now - timedelta(days=10), 10)
+    _add(rollup, cursor, now - timedelta(hours=1), 20)
+
+    deleted = rollup.prune(cursor, now)
+    assert deleted["raw"] == 1 and deleted["1m"] == 1 and deleted["5m"] == 0
+    assert cursor.execute("SELECT COUNT(*) FROM system_metrics").fetchone()[0] == 1
+
+def test_tracker_serves_rollups(tmp_path):
+    """PerformanceTracker.get_system_metrics คืนแถว rollup เมื่อช่วงเวลายาวเกิน max_points"""
+    tracker = PerformanceTracker(db_path=str(tmp_path / "performance.db"),
+                                 flush_interval=3600, monitor_interval=3600)
+    try:
+        sampler = get_metrics_sampler()
+        for _ in range(3):
+            tracker.track_system_metrics(sampler.sample_now())
+
+        raw = tracker.get_system_metrics(hours=1)
+        rolled = tracker.get_system_metrics(hours=24 * 30)
+        assert len(raw) >= 3 and "id" in raw[0]
+        assert rolled and rolled[0]["resolution"] == "1h"
+        assert sum(point["sample_count"] for point in rolled) == len(raw)
+    finally:
+        get_metrics_sampler().unsubscribe(tracker.metrics_subscription)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Metrics Sampler - ทดสอบ sampler กลางที่ทุก monitor ใช้ร่วมกัน
+latest/history, ความถี่ของ subscriber และ collector ที่ช้าไม่หน่วง snapshot
+"""
+
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.metrics_sampler import MetricsSampler
+
+@pytest.fixture
+def sampler():
+    sampler = MetricsSampler(interval=0.05, history_size=4)
+    yield sampler
+    sampler.stop()
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_latest_samples_only_when_stale(sampler):
+    """latest() วัดใหม่เฉพาะเมื่อยังไม่มี snapshot หรือเก่ากว่า max_age"""
+    first = sampler.latest()
+    assert sampler.latest(max_age=60) is first
+    assert sampler.latest(max_age=0) is not first
+    assert sampler.get_stats()["samples"] == 2
+    assert not sampler.get_stats()["running"]
+
+def test_history_is_bounded_and_ordered(sampler):
+    """history เก็บไม่เกิน history_size snapshot เรียงเก่าไปใหม่"""
+    snapshots = [sampler.sample_now() for _ in range(6)]
+    assert sampler.history() == snapshots[-4:]
+    assert sampler.history(seconds=0) == []
+
+def test_subscribers_get_their_own_interval(sampler):
+    """subscriber แต่ละรายได้ snapshot ตาม interval ของตัวเอง error ไม่หยุดการส่ง"""
+    fast, slow = [], []
+
+    def broken(snapshot):
+        raise RuntimeError("subscriber failure")
+
+    sampler.subscribe(broken)
+    sampler.subscribe(fast.append)
+    sampler.subscribe(slow.append, interval=3600)
+
+    assert _wait_for(lambda: len(fast) >= 3)
+    assert len(slow) == 1
+    assert sampler.get_stats()["callback_errors"] >= 3
+
+def test_slow_background_collector_does_not_delay_snapshots(sampler):
+    """collector แบบ background ที่ช้าไม่หน่วง sample_now snapshot ได้ค่าล่าสุดของมัน"""
+    release = threading.Event()
+
+    def slow_probe():
+        release.wait(5)
+        return {"gpu": "ok"}
+
+    sampler.add_collector("fast", lambda: 42)
+    sampler.add_collector("gpu", slow_probe, interval=3600, background=True)
+
+    started = time.perf_counter()
+    snapshot = sampler.sample_now()
+    assert time.perf_counter() - started < 1.0
+    assert snapshot.extra == {"fast": 42, "gpu": None}
+
+    release.set()
+    assert _wait_for(lambda: sampler.sample_now().extra["gpu"] == {"gpu": "ok"})
+
+    sampler.remove_collector("gpu")
+    assert "gpu" not in sampler.sample_now().extra
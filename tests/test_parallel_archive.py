@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Parallel Archive - ทดสอบ ZIP writer ที่บีบอัดไฟล์แบบขนาน
+round-trip ผ่าน zipfile / extract_archive, ลำดับไฟล์, ไฟล์ที่บีบอัดแล้ว และไฟล์ใหญ่แบบ stream
+"""
+
+import sys
+import os
+import hashlib
+import random
+import zipfile
+
+import pytest
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.parallel_archive import (ParallelArchiveWriter, create_archive, extract_archive, archive_checksums,
+                                   iter_directory_files, available_codecs, METHOD_STORED, METHOD_DEFLATE,
+                                   METHOD_ZSTD)
+
+def _source_tree(root):
+    """ข้อความที่บีบอัดได้, ข้อมูลสุ่ม (บีบอัดไม่ได้), ไฟล์ .png, ไฟล์ว่าง และไฟล์ในโฟลเดอร์ย่อย"""
+    rng = random.Random(5)
+    files = {
+        "notes.txt": b"backup line\n" * 5000,
+        "random.bin": rng.getrandbits(8 * 200000).to_bytes(200000, "little"),
+        "image.png": b"png-ish " * 2000,
+        "empty.txt": b"",
+        "sub/dir/config.json": b'{"key": "value"}' * 300
+    }
+    for name, data in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return files
+
+def _round_trip(tmp_path, files, archive):
+    restored = tmp_path / "restored"
+    assert extract_archive(archive, restored) == len(files)
+    return {name: (restored / name).read_bytes() for name in files}
+
+@pytest.mark.parametrize("codec", ["deflate", "stored"])
+def test_round_trip_keeps_order_and_content(tmp_path, codec):
+    """ไฟล์ที่กู้คืนตรงกับต้นฉบับ ลำดับใน archive ตาม input และ zipfile อ่านได้"""
+    files = _source_tree(tmp_path / "source")
+    archive = tmp_path / "backup.zip"
+    entries = create_archive(archive, iter_directory_files(tmp_path / "source"), codec=codec, max_workers=4)
+
+    with zipfile.ZipFile(archive) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.namelist() == sorted(files)
+        methods = {info.filename: info.compress_type for info in zipf.infolist()}
+
+    assert _round_trip(tmp_path, files, archive) == files
+    assert archive_checksums(archive) == {name: hashlib.sha256(data).hexdigest() for name, data in files.items()}
+    assert {name: entry["sha256"] for name, entry in entries.items()} == archive_checksums(archive)
+
+    expected = METHOD_DEFLATE if codec == "deflate" else METHOD_STORED
+    assert methods["notes.txt"] == expected
+    # ข้อมูลสุ่ม ไฟล์สื่อ และไฟล์ว่างถูกเก็บแบบ stored เสมอ
+    assert methods["random.bin"] == methods["image.png"] == methods["empty.txt"] == METHOD_STORED
+
+def test_large_files_are_streamed(tmp_path):
+    """ไฟล์ที่ใหญ่กว่า stream_threshold ถูกเขียนโดย writer แบบ stream และยังอ่านกลับได้"""
+    files = _source_tree(tmp_path / "source")
+    archive = tmp_path / "streamed.zip"
+    with ParallelArchiveWriter(archive, codec="deflate", max_workers=2, stream_threshold=1024) as writer:
+        entries = writer.write_files(iter_directory_files(tmp_path / "source"))
+
+    assert entries["notes.txt"]["compressed_size"] < entries["notes.txt"]["size"]
+    with zipfile.ZipFile(archive) as zipf:
+        assert zipf.testzip() is None
+    assert _round_trip(tmp_path, files, archive) == files
+
+def test_codec_selection():
+    """auto ใช้ zstd เมื่อมี zstandard ไม่เช่นนั้นใช้ deflate codec ที่ไม่รู้จัก raise ValueError"""
+    writer_codec = "zstd" if "zstd" in available_codecs() else "deflate"
+    with pytest.raises(ValueError):
+        ParallelArchiveWriter(os.devnull, codec="lzma")
+    writer = ParallelArchiveWriter(os.devnull, codec="auto")
+    writer.close()
+    assert writer.codec == writer_codec
+
+def test_zstd_round_trip(tmp_path):
+    """member แบบ zstd (method 93) อ่านกลับได้ผ่าน extract_archive และ archive_checksums"""
+    pytest.importorskip("zstandard")
+    files = _source_tree(tmp_path / "source")
+    archive = tmp_path / "backup.zip"
+    create_archive(archive, iter_directory_files(tmp_path / "source"), codec="zstd")
+
+    with zipfile.ZipFile(archive) as zipf:
+        assert zipf.getinfo("notes.txt").compress_type == METHOD_ZSTD
+    assert _round_trip(tmp_path, files, archive) == files
+    assert archive_checksums(archive)["notes.txt"] == hashlib.sha256(files["notes.txt"]).hexdigest()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Performance Tracker - ทดสอบเส้นทางบันทึกแบบ low-overhead ของ track_module_operation
+ring buffer ในหน่วยความจำ, histogram ระยะเวลา และการ flush แบบ batch
+"""
+
+import sqlite3
+import sys
+import os
+import time
+
+import pytest
+
+# Add project root and logging package to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'system', 'core', 'logging'))
+
+from performance_tracker import PerformanceTracker, ModuleMetricsRing, OperationHistogram
+from core.metrics_sampler import get_metrics_sampler
+
+@pytest.fixture
+def tracker(tmp_path):
+    # flush_interval ยาว: การเขียนลงฐานข้อมูลเกิดจาก flush ที่ทดสอบเท่านั้น
+    tracker = PerformanceTracker(db_path=str(tmp_path / "performance.db"), ring_capacity=64,
+                                 flush_interval=3600, monitor_interval=3600)
+    yield tracker
+    get_metrics_sampler().unsubscribe(tracker.metrics_subscription)
+
+def _stored_rows(tracker):
+    conn = sqlite3.connect(tracker.db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM module_metrics").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_ring_overwrites_oldest_rows():
+    """ring เต็มแล้วเขียนทับ row เก่าสุด drain คืน rows ตามลำดับเวลา"""
+    ring = ModuleMetricsRing(capacity=4)
+    for index in range(6):
+        ring.append((index,))
+
+    assert len(ring) == 4 and ring.dropped == 2
+    assert ring.drain() == [(2,), (3,), (4,), (5,)]
+    assert len(ring) == 0 and ring.drain() == []
+
+def test_histogram_percentiles_and_merge():
+    """percentile ประมาณจากขอบบนของ bucket และ merge รวม count/min/max"""
+    first, second = OperationHistogram(), OperationHistogram()
+    for duration in range(1, 51):
+        first.record(duration)
+    for duration in range(51, 101):
+        second.record(duration, failed=duration > 95)
+    first.merge(second)
+
+    stats = first.to_dict()
+    assert stats["count"] == 100 and stats["fail_count"] == 5
+    assert (stats["min_duration_ms"], stats["max_duration_ms"]) == (1, 100)
+    assert stats["p50_duration_ms"] == 50
+    assert stats["p95_duration_ms"] == 100
+
+def test_tracking_is_buffered_until_flush(tracker):
+    """track_module_operation ไม่เขียนลงฐานข้อมูล flush เขียนทั้งหมดใน batch เดียว"""
+    for index in range(20):
+        tracker.track_module_operation("crawler", "fetch", index, status="completed" if index % 5 else "failed")
+    assert _stored_rows(tracker) == 0
+
+    assert tracker.flush_module_metrics() == 20
+    assert _stored_rows(tracker) == 20
+    assert tracker.flush_module_metrics() == 0
+
+    stats = tracker.get_operation_stats()["crawler"]["fetch"]
+    assert stats["count"] == 20 and stats["fail_count"] == 4
+    assert stats["max_duration_ms"] == 19
+
+def test_reads_flush_pending_metrics(tracker):
+    """get_module_metrics / get_operation_stats เห็นรายการที่ยังไม่ถูก flush"""
+    tracker.track_module_operation("crawler", "fetch", 12, metadata={"url": "a"})
+    tracker.track_module_operation("parser", "parse", 3)
+
+    metrics = tracker.get_module_metrics("crawler")
+    assert [(m["operation"], m["duration_ms"], m["metadata"]) for m in metrics] == [("fetch", 12, {"url": "a"})]
+    assert set(tracker.get_operation_stats()) == {"crawler", "parser"}
+
+def test_half_full_ring_wakes_flusher(tracker):
+    """ring ถึงครึ่งหนึ่งแล้ว background flusher เขียนก่อนครบ flush_interval"""
+    for index in range(tracker.module_metrics_ring.capacity // 2):
+        tracker.track_module_operation("crawler", "fetch", index)
+
+    deadline = time.time() + 5
+    while _stored_rows(tracker) == 0 and time.time() < deadline:
+        time.sleep(0.05)
+    assert _stored_rows(tracker) == tracker.module_metrics_ring.capacity // 2
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test Rule Engine - ทดสอบ RuleEngine และ AlertSystem.evaluate_rules
+ค่าที่ไม่เปลี่ยนยังคง trigger และข้อมูลที่ผิดรูปแบบไม่ทำให้ rule อื่นหยุดทำงาน
+"""
+
+import sys
+import os
+
+# Add logging package to path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'system', 'core', 'logging'))
+
+from rule_engine import RuleEngine
+from alert_system import AlertSystem
+
+CPU_RULE = {
+    "rule_name": "high_cpu_usage",
+    "rule_type": "performance",
+    "conditions": {"metric": "cpu_percent", "threshold": 80},
+    "actions": {"create_alert": True, "severity": "warning"}
+}
+
+MEMORY_RULE = {
+    "rule_name": "high_memory_usage",
+    "rule_type": "performance",
+    "conditions": {"metric": "memory_percent", "threshold": 85},
+    "actions": {"create_alert": True, "severity": "warning"}
+}
+
+def _names(rules):
+    return [rule.name for rule in rules]
+
+def test_steady_breach_keeps_triggering():
+    """ค่าที่เกิน threshold ต่อเนื่องต้อง trigger ทุก sample โดยไม่รัน predicate ซ้ำ"""
+    engine = RuleEngine()
+    engine.load([CPU_RULE])
+
+    results = [_names(engine.evaluate({"cpu_percent": 95})) for _ in range(3)]
+    assert results == [["high_cpu_usage"]] * 3
+    assert engine.get_stats()["predicates"] == 1
+
+    assert engine.evaluate({"cpu_percent": 20}) == []
+    assert engine.evaluate({"cpu_percent": 20}) == []
+
+def test_bad_sample_skips_only_that_rule():
+    """ค่าที่เปรียบเทียบไม่ได้ข้ามเฉพาะ rule นั้น rule อื่นยังถูกประเมิน"""
+    engine = RuleEngine()
+    engine.load([CPU_RULE, MEMORY_RULE])
+
+    assert _names(engine.evaluate({"cpu_percent": "n/a", "memory_percent": 90})) == ["high_memory_usage"]
+    assert engine.get_stats()["errors"] == 1
+
+    # ค่าผิดรูปแบบซ้ำ: ยัง error (ไม่ใช้ผลลัพธ์เก่า) และค่าที่ถูกต้องถูกประเมินใหม่
+    assert _names(engine.evaluate({"cpu_percent": "n/a", "memory_percent": 90})) == ["high_memory_usage"]
+    assert _names(engine.evaluate({"cpu_percent": 95, "memory_percent": 90})) == ["high_cpu_usage", "high_memory_usage"]
+
+def test_alert_system_steady_breach_and_dismiss(tmp_path):
+    """AlertSystem: ค่าเดิมยัง alert ทุก sample และ alert ใหม่หลัง dismiss"""
+    alert_system = AlertSystem(db_path=str(tmp_path / "alerts.db"))
+    assert alert_system.add_alert_rule(CPU_RULE["rule_name"], CPU_RULE["rule_type"],
+                                       CPU_RULE["conditions"], CPU_RULE["actions"])
+
+    sample = {"module": "monitor", "cpu_percent": 95}
+    alerts = [alert_system.evaluate_rules(dict(sample)) for _ in range(3)]
+    assert len(alerts[0]) == 1
+    assert alerts == [alerts[0]] * 3
+
+    assert alert_system.dismiss_alert(alerts[0][0])
+    again = alert_system.evaluate_rules(dict(sample))
+    assert len(again) == 1 and again != alerts[0]
+
+def test_alert_system_bad_sample_does_not_raise(tmp_path):
+    """AlertSystem.evaluate_rules ไม่ raise เมื่อข้อมูลผิดรูปแบบ"""
+    alert_system = AlertSystem(db_path=str(tmp_path / "alerts.db"))
+    for rule in (CPU_RULE, MEMORY_RULE):
+        assert alert_system.add_alert_rule(rule["rule_name"], rule["rule_type"],
+                                           rule["conditions"], rule["actions"])
+
+    alerts = alert_system.evaluate_rules({"module": "monitor", "cpu_percent": "n/a", "memory_percent": 90})
+    assert len(alerts) == 1
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test SQLite Pool - ทดสอบ connection pool ที่ใช้ร่วมกันทุกระบบ
+การนำ connection กลับมาใช้, rollback ตอนคืน, ไฟล์ถูกแทนที่ และแยกตาม thread
+"""
+
+import sys
+import os
+import sqlite3
+import threading
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sqlite_pool import SQLiteConnectionManager
+
+def _table(manager, db_path):
+    conn = manager.connect(db_path)
+    conn.execute("CREATE TABLE items (name TEXT)")
+    conn.commit()
+    conn.close()
+
+def test_connections_are_reused_and_tuned(tmp_path):
+    """close() คืน connection เข้า pool และ connection ถูกตั้งค่า WAL ครั้งเดียว"""
+    manager = SQLiteConnectionManager()
+    db_path = str(tmp_path / "pool.db")
+
+    conn = manager.connect(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+    conn = manager.connect(db_path)
+    conn.close()
+
+    assert manager.get_stats() == {"created": 1, "reused": 1, "closed": 0}
+    try:
+        conn.execute("SELECT 1")
+        assert False, "closed proxy should not be usable"
+    except sqlite3.ProgrammingError:
+        pass
+
+def test_release_rolls_back_and_resets_row_factory(tmp_path):
+    """งานที่ยังไม่ commit ถูก rollback และ row_factory ถูกคืนค่าเมื่อคืน connection"""
+    manager = SQLiteConnectionManager()
+    db_path = str(tmp_path / "pool.db")
+    _table(manager, db_path)
+
+    conn = manager.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("INSERT INTO items VALUES ('uncommitted')")
+    conn.close()
+
+    conn = manager.connect(db_path)
+    assert conn.row_factory is None
+    assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    conn.close()
+
+    with manager.transaction(db_path) as conn:
+        conn.execute("INSERT INTO items VALUES ('committed')")
+    conn = manager.connect(db_path)
+    assert conn.execute("SELECT name FROM items").fetchall() == [("committed",)]
+    conn.close()
+
+def test_replaced_database_file_drops_stale_connection(tmp_path):
+    """ไฟล์ฐานข้อมูลถูกแทนที่ (เช่น restore) connection เก่าไม่ถูกนำกลับมาใช้ และ WAL เก่าไม่ถูก replay"""
+    manager = SQLiteConnectionManager()
+    db_path = tmp_path / "pool.db"
+    _table(manager, str(db_path))
+
+    restored = tmp_path / "restored.db"
+    other = sqlite3.connect(str(restored))
+    other.execute("CREATE TABLE restored (id INTEGER)")
+    other.commit()
+    other.close()
+    os.replace(restored, db_path)
+
+    conn = manager.connect(str(db_path))
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    conn.close()
+    assert integrity == "ok"
+    assert tables == ["restored"]
+    assert manager.get_stats()["closed"] == 1
+
+def test_memory_databases_are_not_pooled():
+    """:memory: ได้ sqlite3.Connection ใหม่เสมอ (แต่ละ connection เป็นฐานข้อมูลของตัวเอง)"""
+    manager = SQLiteConnectionManager()
+    conn = manager.connect(":memory:")
+    assert isinstance(conn, sqlite3.Connection)
+    conn.close()
+    assert manager.get_stats()["created"] == 0
+
+def test_each_thread_gets_its_own_connection(tmp_path):
+    """connection ที่ว่างอยู่ไม่ถูกแชร์ข้าม thread"""
+    manager = SQLiteConnectionManager()
+    db_path = str(tmp_path / "pool.db")
+    conn = manager.connect(db_path)
+    conn.close()
+
+    errors = []
+
+    def worker():
+        try:
+            conn = manager.connect(db_path)
+            conn.execute("SELECT 1")
+            conn.close()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert errors == []
+    assert manager.get_stats()["created"] == 2